@@ -55,6 +55,9 @@ import random
 import logging
 import sys
 import os
+import time
+import threading
+from collections import deque
 
 app = Flask(__name__)
 
@@ -65,6 +68,12 @@ logger = logging.getLogger(__name__)
 # In-memory variable to override the environment flag dynamically
 bug_enabled_runtime = None
 
+# Request counters and recent latencies, scraped by the canary controller
+metrics_lock = threading.Lock()
+requests_total = 0
+errors_total = 0
+recent_latencies_ms = deque(maxlen=1000)
+
 # Updated function to respect runtime override
 def is_bug_enabled():
     global bug_enabled_runtime
@@ -72,6 +81,33 @@ def is_bug_enabled():
         return bug_enabled_runtime
     return os.getenv('BUG_ENABLED', 'False').lower() == 'true'
 
+def percentile(values, pct):
+    """Return the pct-th percentile of values (nearest-rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, int(round(pct / 100.0 * len(ordered))) - 1)
+    return ordered[index]
+
+@app.before_request
+def start_timer():
+    request.environ['bank.start_time'] = time.monotonic()
+
+@app.after_request
+def record_metrics(response):
+    global requests_total, errors_total
+    # Probes and metric scrapes would drown out real traffic
+    if request.path in ('/', '/metrics', '/api/health'):
+        return response
+    start = request.environ.get('bank.start_time')
+    with metrics_lock:
+        requests_total += 1
+        if response.status_code >= 500:
+            errors_total += 1
+        if start is not None:
+            recent_latencies_ms.append((time.monotonic() - start) * 1000.0)
+    return response
+
 @app.route('/')
 def home():
     logger.info("Home endpoint was called successfully.")
@@ -102,6 +138,18 @@ def withdraw():
 def health():
     return jsonify({"status": "ok"}), 200
 
+@app.route("/metrics")
+def metrics():
+    with metrics_lock:
+        latencies = list(recent_latencies_ms)
+        snapshot = {
+            "requests_total": requests_total,
+            "errors_total": errors_total,
+        }
+    snapshot["latency_p50_ms"] = percentile(latencies, 50)
+    snapshot["latency_p95_ms"] = percentile(latencies, 95)
+    return jsonify(snapshot)
+
 @app.route("/debug/bug-flag")
 def debug_bug_flag():
     return jsonify({"BUG_ENABLED": is_bug_enabled()})
@@ -0,0 +1,359 @@
+"""Adaptive retry mode under an alarm storm: throughput, throttle rate and latency against a throttling stand-in.
+
+Several Lambdas, each a client with a few threads calling CodePipeline
+back to back, share one server-side rate limit.  The simulation drives
+botocore's own ClientRateLimiter, CubicCalculator, RateClocker and
+TokenBucket on a virtual clock against a model of that limit, so its
+results are deterministic for a given seed; ``standard`` mode is the same
+run with client-side rate limiting left out.  ``--live SECONDS`` also runs
+real clients in both retry modes against a local HTTP server enforcing
+the limit.  Before any of that the token bucket is checked against the
+previous implementation, and its per-request cost is timed on 1 and many
+threads.
+
+    python benchmarks/adaptive_retries.py --lambdas 8 --threads 4 --server-rate 40 --live 10
+"""
+import argparse
+import heapq
+import http.server
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import botocore.session  # noqa: E402
+from botocore.config import Config  # noqa: E402
+from botocore.exceptions import CapacityNotAvailableError, ClientError  # noqa: E402
+from botocore.retries import adaptive, bucket, standard, throttling  # noqa: E402
+
+PIPELINE = 'self-healing-bank-pipeline'
+THROTTLED = {'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}}
+SUCCEEDED = {'pipelineExecutionId': 'execution-1234'}
+
+
+class LegacyTokenBucket(bucket.TokenBucket):
+    """The bucket as it was: every acquire() and rate change goes through
+    the condition, and every rate change notifies it"""
+
+    @property
+    def max_rate(self):
+        return self._fill_rate
+
+    @max_rate.setter
+    def max_rate(self, value):
+        with self._new_fill_rate_condition:
+            self._refill()
+            self._fill_rate = max(value, self._min_rate)
+            self._max_capacity = value if value >= 1 else 1
+            self._current_capacity = min(self._current_capacity, self._max_capacity)
+            self._new_fill_rate_condition.notify()
+
+    def acquire(self, amount=1, block=True):
+        with self._new_fill_rate_condition:
+            return self._acquire(amount=amount, block=block)
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def sleep(self, amount):
+        raise AssertionError('nothing may sleep on the virtual clock')
+
+    def current_time(self):
+        return self.now
+
+
+class WouldBlock(Exception):
+    def __init__(self, delay):
+        super().__init__(delay)
+        self.delay = delay
+
+
+class VirtualTimeBucket(bucket.TokenBucket):
+    """Reports how long a blocking acquire() would wait instead of waiting"""
+
+    def acquire(self, amount=1, block=True):
+        try:
+            return super().acquire(amount, block=False)
+        except CapacityNotAvailableError:
+            # At least a millisecond, as a real wait would take; shorter
+            # ones can round to no refill at all
+            raise WouldBlock(max(0.001, (amount - self.available_capacity) / self.max_rate))
+
+
+def check_bucket_equivalence(steps=20000, seed=7):
+    rng = random.Random(seed)
+    clocks = [VirtualClock(), VirtualClock()]
+    buckets = [LegacyTokenBucket(max_rate=1, clock=clocks[0]), bucket.TokenBucket(max_rate=1, clock=clocks[1])]
+    for _ in range(steps):
+        advance = rng.random() * 0.2
+        action = rng.random()
+        rate = rng.random() * 50
+        outcomes = []
+        for clock, token_bucket in zip(clocks, buckets):
+            clock.now += advance
+            if action < 0.2:
+                token_bucket.max_rate = rate
+                outcomes.append(None)
+                continue
+            try:
+                outcomes.append(token_bucket.acquire(block=False))
+            except CapacityNotAvailableError:
+                outcomes.append('unavailable')
+        states = [(b.max_rate, b.max_capacity, b.available_capacity, outcome) for b, outcome in zip(buckets, outcomes)]
+        if states[0] != states[1]:
+            raise AssertionError(f'token buckets diverged: {states[0]} != {states[1]}')
+    # A waiter must still be woken by a higher rate
+    token_bucket = bucket.TokenBucket(max_rate=0.5, clock=bucket.Clock())
+    token_bucket.acquire()
+    waiter = threading.Thread(target=token_bucket.acquire)
+    start = time.perf_counter()
+    waiter.start()
+    time.sleep(0.05)
+    token_bucket.max_rate = 1000
+    waiter.join()
+    if time.perf_counter() - start > 1:
+        raise AssertionError('raising the rate did not wake a waiting acquire()')
+    return steps
+
+
+def time_bucket(threads, iterations, rounds=5):
+    """Microseconds per request, the best of interleaved rounds"""
+    best = {'legacy': float('inf'), 'current': float('inf')}
+    for _ in range(rounds):
+        for label, cls in (('legacy', LegacyTokenBucket), ('current', bucket.TokenBucket)):
+            token_bucket = cls(max_rate=1e12, clock=bucket.Clock())
+
+            def requests(count, token_bucket=token_bucket):
+                # A request acquires a token and its response sets a new rate
+                for _ in range(count):
+                    token_bucket.acquire()
+                    token_bucket.max_rate = 1e12
+
+            workers = [threading.Thread(target=requests, args=(iterations // threads,)) for _ in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            best[label] = min(best[label], time.perf_counter() - start)
+    return {label: seconds / iterations * 1e6 for label, seconds in best.items()}
+
+
+def make_limiter(clock):
+    # As adaptive.register_retry_handler builds it, on the given clock
+    return adaptive.ClientRateLimiter(
+        rate_adjustor=throttling.CubicCalculator(starting_max_rate=0, start_time=clock.current_time()),
+        rate_clocker=adaptive.RateClocker(clock),
+        token_bucket=VirtualTimeBucket(max_rate=1, clock=clock),
+        throttling_detector=standard.ThrottlingErrorDetector(retry_event_adapter=standard.RetryEventAdapter()),
+        clock=clock,
+    )
+
+
+class ServerLimit:
+    """The service's rate limit: a token bucket of ``rate`` per second
+    holding up to one second's worth"""
+
+    def __init__(self, rate, now):
+        self.rate = rate
+        self.tokens = rate
+        self.last = now
+
+    def admit(self, now):
+        self.tokens = min(self.rate, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class Attempt:
+    def __init__(self, attempt_number):
+        self.attempt_number = attempt_number
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def simulate(mode, args):
+    rng = random.Random(args.seed)
+    clock = VirtualClock()
+    server = ServerLimit(args.server_rate, clock.now)
+    backoff = standard.ExponentialBackoff(random=rng.random)
+    limiters = [make_limiter(clock) if mode == 'adaptive' else None for _ in range(args.lambdas)]
+    events = []
+    sequence = 0
+
+    def schedule(at, *event):
+        nonlocal sequence
+        sequence += 1
+        heapq.heappush(events, (at, sequence) + event)
+
+    # event: (time, seq, kind, lambda, call start, attempt)
+    for lam in range(args.lambdas):
+        for _ in range(args.threads):
+            schedule(rng.random() * 0.1, 'send', lam, None, 1)
+    sent = throttled = succeeded = failed = 0
+    latencies = []
+    while events:
+        now, _, kind, lam, started, attempt = heapq.heappop(events)
+        if now > args.duration:
+            break
+        clock.now = now
+        limiter = limiters[lam]
+        if kind == 'send':
+            started = now if started is None else started
+            if limiter is not None:
+                try:
+                    limiter.on_sending_request(request=None)
+                except WouldBlock as e:
+                    schedule(now + e.delay, 'send', lam, started, attempt)
+                    continue
+            sent += 1
+            admitted = server.admit(now)
+            throttled += not admitted
+            latency = args.latency * (0.5 + rng.random())
+            schedule(now + latency, 'ok' if admitted else 'throttled', lam, started, attempt)
+            continue
+        parsed = SUCCEEDED if kind == 'ok' else THROTTLED
+        if limiter is not None:
+            limiter.on_receiving_response(
+                attempts=attempt, response=(None, parsed), caught_exception=None,
+                operation=None, request_dict={'context': {}},
+            )
+        if kind == 'throttled' and attempt < args.max_attempts:
+            schedule(now + backoff.delay_amount(Attempt(attempt)), 'send', lam, started, attempt + 1)
+            continue
+        succeeded += kind == 'ok'
+        failed += kind != 'ok'
+        latencies.append(now - started)
+        schedule(now, 'send', lam, None, 1)
+    return report(mode, args.duration, sent, throttled, succeeded, failed, latencies)
+
+
+def report(mode, seconds, sent, throttled, succeeded, failed, latencies):
+    return (f'{mode:9} {succeeded / seconds:7.1f} calls/s  {failed / seconds:6.1f} failed/s  '
+            f'throttled {throttled / max(sent, 1):6.1%} of {sent / seconds:6.1f} requests/s  '
+            f'latency p50 {percentile(latencies, 0.5) * 1e3:7.1f}ms p99 {percentile(latencies, 0.99) * 1e3:7.1f}ms')
+
+
+class ThrottlingHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server = self.server
+        with server.lock:
+            admitted = server.limit.admit(time.monotonic())
+            server.requests += 1
+            server.throttled += not admitted
+        time.sleep(server.latency * (0.5 + random.random()))
+        if admitted:
+            status, body = 200, {'pipelineExecutionId': 'execution-1234'}
+        else:
+            status, body = 400, {'__type': 'ThrottlingException', 'message': 'Rate exceeded'}
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/x-amz-json-1.1')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('x-amzn-RequestId', 'req-1234')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_live(mode, args):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ThrottlingHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.limit = ServerLimit(args.server_rate, time.monotonic())
+    server.latency = args.latency
+    server.requests = server.throttled = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f'http://127.0.0.1:{server.server_address[1]}'
+    config = Config(retries={'mode': mode, 'max_attempts': args.max_attempts},
+                    max_pool_connections=args.threads)
+    clients = [
+        botocore.session.Session().create_client(
+            'codepipeline', region_name='us-east-1', endpoint_url=endpoint, config=config,
+            aws_access_key_id='AKIDEXAMPLE', aws_secret_access_key='SECRET',
+        )
+        for _ in range(args.lambdas)
+    ]
+    lock = threading.Lock()
+    outcomes = {'succeeded': 0, 'failed': 0}
+    latencies = []
+    deadline = time.monotonic() + args.live
+
+    def call(client):
+        while time.monotonic() < deadline:
+            start = time.monotonic()
+            try:
+                client.start_pipeline_execution(name=PIPELINE)
+                outcome = 'succeeded'
+            except ClientError:
+                outcome = 'failed'
+            with lock:
+                outcomes[outcome] += 1
+                latencies.append(time.monotonic() - start)
+
+    workers = [threading.Thread(target=call, args=(client,)) for client in clients for _ in range(args.threads)]
+    start = time.monotonic()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - start
+    server.shutdown()
+    server.server_close()
+    return report(mode, elapsed, server.requests, server.throttled,
+                  outcomes['succeeded'], outcomes['failed'], latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lambdas', type=int, default=8, help='clients, one per Lambda')
+    parser.add_argument('--threads', type=int, default=4, help='concurrent callers per client')
+    parser.add_argument('--server-rate', type=float, default=40, help='requests/s the service admits')
+    parser.add_argument('--latency', type=float, default=0.05, help='mean service time in seconds')
+    parser.add_argument('--max-attempts', type=int, default=3)
+    parser.add_argument('--duration', type=float, default=300, help='simulated seconds')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--live', type=float, default=0, help='seconds per retry mode against a local server')
+    parser.add_argument('--iterations', type=int, default=200000)
+    parser.add_argument('--bucket-threads', type=int, default=64)
+    args = parser.parse_args()
+
+    print(f'token bucket matches the previous implementation over {check_bucket_equivalence()} steps')
+    for threads in (1, args.bucket_threads):
+        results = time_bucket(threads, args.iterations)
+        print(f"token bucket, {threads:2} threads  legacy {results['legacy']:5.2f}us  "
+              f"current {results['current']:5.2f}us per request")
+
+    print(f'{args.lambdas} Lambdas x {args.threads} threads, service limit {args.server_rate:g}/s, '
+          f'max {args.max_attempts} attempts')
+    print(f'simulated {args.duration:g}s, seed {args.seed}')
+    for mode in ('standard', 'adaptive'):
+        print('  ' + simulate(mode, args))
+    if args.live:
+        print(f'live, {args.live:g}s per mode against a local server')
+        for mode in ('standard', 'adaptive'):
+            print('  ' + run_live(mode, args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,436 @@
+"""Calls against a local stand-in for CodePipeline, SNS, Bedrock and EKS: blocking clients vs. asyncio clients.
+
+The stand-in is an HTTPS server with a self-signed certificate made with
+``openssl`` that answers the operations the Lambdas call, in each
+service's protocol, after ``--rtt`` seconds, or ``--bedrock`` seconds
+for Bedrock's InvokeModel.  It runs in a child process, so that its work
+does not slow the client down, and counts the connections it accepts
+and the operations it answers.
+
+* handler: the rollback Lambda's handler, down to re-running the
+  pipeline, with the pipeline history fetched after the Bedrock analysis
+  as before, then while Bedrock thinks.
+* fan-out: ``--fanout`` SNS messages published one after another by a
+  blocking client, then all at once by an asyncio client.
+* per call: ``--calls`` sequential ListPipelines calls with no added
+  latency, for the cost of each client's own work.
+
+Before timing, both clients must get the same parsed responses for each
+operation, including chunked ones, raise the same modeled error, retry
+server errors, reconnect when the server has closed a pooled
+connection, map timeouts, refused connections and untrusted
+certificates to the same exceptions, and the handler must pre-warm its
+asyncio clients' connections when loaded and run end to end against the
+stand-in.
+
+    python benchmarks/async_clients.py --rtt 0.03 --bedrock 0.8
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import ssl
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import botocore.session  # noqa: E402
+from botocore.asyncclient import AsyncClient  # noqa: E402
+from botocore.config import Config  # noqa: E402
+from botocore.exceptions import EndpointConnectionError, ReadTimeoutError, SSLError  # noqa: E402
+from connection_prewarm import make_certificate  # noqa: E402
+
+PIPELINE = 'simple-bank-api'
+TOPIC_ARN = 'arn:aws:sns:us-east-1:123456789012:self-healing'
+ADVICE = {'analysis': 'A deployment introduced HTTP 500 errors.', 'recommendation': 'ROLLBACK'}
+
+
+def execution_summaries(count):
+    start = time.time() - 60
+    return [
+        {'pipelineExecutionId': f'exec-{n:04d}', 'status': 'Succeeded', 'startTime': start - n * 600,
+         'trigger': {'triggerType': 'Webhook', 'triggerDetail': 'push'}}
+        for n in range(count)
+    ]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        self.request.do_handshake()
+        with self.server.lock:
+            self.server.connections += 1
+        super().setup()
+
+    def do_GET(self):
+        # EKS DescribeCluster
+        name = self.path.rsplit('/', 1)[-1]
+        self.answer('DescribeCluster', 200, 'application/json', json.dumps({'cluster': {
+            'name': name, 'status': 'ACTIVE', 'endpoint': 'https://eks.example.com',
+            'certificateAuthority': {'data': 'LS0tLS1CRUdJTi0tLS0t'},
+        }}).encode())
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        target = self.headers.get('X-Amz-Target')
+        if target:
+            self.codepipeline(target.rsplit('.', 1)[-1], json.loads(body))
+        elif self.path.startswith('/model/'):
+            prompt = json.loads(body)['prompt']
+            self.answer('InvokeModel', 200, 'application/json', json.dumps(
+                {'completion': json.dumps(ADVICE), 'stop_reason': 'stop_sequence', 'prompt_length': len(prompt)}
+            ).encode())
+        else:
+            action = parse_qs(body.decode())['Action'][0]
+            message_id = uuid.uuid5(uuid.NAMESPACE_URL, body.decode())
+            self.answer(action, 200, 'text/xml', (
+                '<PublishResponse xmlns="http://sns.amazonaws.com/doc/2010-03-31/">'
+                f'<PublishResult><MessageId>{message_id}</MessageId></PublishResult>'
+                '<ResponseMetadata><RequestId>req-1</RequestId></ResponseMetadata></PublishResponse>'
+            ).encode())
+
+    def codepipeline(self, operation, params):
+        if operation == 'ListPipelines':
+            result = {'pipelines': [{'name': PIPELINE, 'version': 3}]}
+        elif operation == 'ListPipelineExecutions':
+            start = int(params.get('nextToken', 0))
+            end = start + params.get('maxResults', 100)
+            result = {'pipelineExecutionSummaries': self.server.summaries[start:end]}
+            if end < len(self.server.summaries):
+                result['nextToken'] = str(end)
+        elif operation == 'GetPipelineExecution':
+            if params['pipelineExecutionId'] != 'exec-0000':
+                return self.answer(operation, 400, 'application/x-amz-json-1.1', json.dumps({
+                    '__type': 'PipelineExecutionNotFoundException', 'message': 'No such execution',
+                }).encode())
+            result = {'pipelineExecution': {'pipelineName': PIPELINE, 'pipelineExecutionId': 'exec-0000',
+                                            'status': 'Succeeded', 'artifactRevisions': []}}
+        elif operation == 'StartPipelineExecution':
+            result = {'pipelineExecutionId': 'exec-new'}
+        else:
+            return self.answer(operation, 400, 'application/x-amz-json-1.1', json.dumps({
+                '__type': 'InvalidActionException', 'message': operation,
+            }).encode())
+        self.answer(operation, 200, 'application/x-amz-json-1.1', json.dumps(result).encode())
+
+    def answer(self, operation, status, content_type, body):
+        server = self.server
+        with server.lock:
+            server.operations[operation] = server.operations.get(operation, 0) + 1
+            failing = server.fail_next > 0
+            server.fail_next -= failing
+        time.sleep(server.bedrock if operation == 'InvokeModel' else server.rtt)
+        if server.stall:
+            time.sleep(server.stall)
+        if failing:
+            status, body = 503, json.dumps({'__type': 'ServiceUnavailableException', 'message': 'busy'}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('x-amzn-RequestId', 'req-1')
+        if server.chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if server.chunked:
+            for offset in range(0, len(body), 7):
+                chunk = body[offset:offset + 7]
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+        else:
+            self.wfile.write(body)
+        if server.close_after:
+            # Without saying so, as an idle timeout on the server would
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class StandIn(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, cert, key, rtt, bedrock):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(cert, key)
+        self.lock = threading.Lock()
+        self.summaries = execution_summaries(25)
+        self.settings = {'rtt': rtt, 'bedrock': bedrock}
+        self.reset()
+
+    def get_request(self):
+        sock, address = super().get_request()
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self.context.wrap_socket(sock, server_side=True, do_handshake_on_connect=False), address
+
+    def handle_error(self, request, client_address):
+        pass
+
+    def reset(self, **settings):
+        """Returns the connections and operations since the last reset."""
+        with self.lock:
+            counts = getattr(self, 'connections', 0), getattr(self, 'operations', {})
+            self.connections = 0
+            self.operations = {}
+            self.fail_next = 0
+            self.stall = 0
+            self.chunked = False
+            self.close_after = False
+            for name, value in dict(self.settings, **settings).items():
+                setattr(self, name, value)
+        return counts
+
+
+class StandInProcess:
+    """A ``StandIn`` in a child process, so it does not compete with the
+    client for the interpreter, as the real services would not."""
+
+    def __init__(self, *args):
+        self._pipe, child = multiprocessing.Pipe()
+        multiprocessing.Process(target=self._serve, args=(child, args), daemon=True).start()
+        self.server_port = self._pipe.recv()
+
+    @staticmethod
+    def _serve(pipe, args):
+        server = StandIn(*args)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        pipe.send(server.server_port)
+        while True:
+            settings = pipe.recv()
+            if settings is None:
+                return
+            pipe.send(server.reset(**settings))
+
+    def reset(self, **settings):
+        self._pipe.send(settings)
+        return self._pipe.recv()
+
+    def stop(self):
+        self._pipe.send(None)
+
+
+def make_client(service, port, cert, **config):
+    return botocore.session.Session().create_client(
+        service, region_name='us-east-1', endpoint_url=f'https://localhost:{port}', verify=cert,
+        aws_access_key_id='AKIDEXAMPLE', aws_secret_access_key='SECRET', config=Config(**config),
+    )
+
+
+CALLS = (
+    ('codepipeline', 'list_pipelines', {}),
+    ('codepipeline', 'list_pipeline_executions', {'pipelineName': PIPELINE, 'maxResults': 10}),
+    ('codepipeline', 'get_pipeline_execution', {'pipelineName': PIPELINE, 'pipelineExecutionId': 'exec-0000'}),
+    ('codepipeline', 'start_pipeline_execution', {'name': PIPELINE}),
+    ('sns', 'publish', {'TopicArn': TOPIC_ARN, 'Subject': 'Rollback', 'Message': 'Rolled back'}),
+    ('bedrock-runtime', 'invoke_model', {'modelId': 'anthropic.claude-v2', 'body': json.dumps({'prompt': 'Hi'}),
+                                         'accept': 'application/json', 'contentType': 'application/json'}),
+    ('eks', 'describe_cluster', {'name': 'bank'}),
+)
+
+
+def comparable(response):
+    response = dict(response)
+    metadata = response.pop('ResponseMetadata')
+    if 'body' in response:
+        response['body'] = response['body'].read()
+    return response, metadata['HTTPStatusCode'], metadata['RetryAttempts']
+
+
+def outcome(call):
+    try:
+        return call()
+    except Exception as e:
+        return type(e).__name__, str(e)
+
+
+def close_clients(loop, *clients):
+    async def close():
+        await asyncio.gather(*(client.close() for client in clients))
+
+    loop.run_until_complete(close())
+
+
+def check(server, cert, loop):
+    clients = {service: make_client(service, server.server_port, cert) for service in {c[0] for c in CALLS}}
+    async_clients = {service: AsyncClient(client) for service, client in clients.items()}
+    for chunked in (False, True):
+        server.reset(rtt=0, bedrock=0, chunked=chunked)
+        for service, operation, params in CALLS:
+            expected = comparable(getattr(clients[service], operation)(**params))
+            result = comparable(loop.run_until_complete(getattr(async_clients[service], operation)(**params)))
+            if result != expected:
+                raise AssertionError(f'{operation} (chunked {chunked}): got {result}, expected {expected}')
+
+    pipeline, async_pipeline = clients['codepipeline'], async_clients['codepipeline']
+    missing = {'pipelineName': PIPELINE, 'pipelineExecutionId': 'exec-9999'}
+    expected = outcome(lambda: pipeline.get_pipeline_execution(**missing))
+    result = outcome(lambda: loop.run_until_complete(async_pipeline.get_pipeline_execution(**missing)))
+    if result != expected or result[0] != 'PipelineExecutionNotFoundException':
+        raise AssertionError(f'modeled error: got {result}, expected {expected}')
+
+    server.reset(rtt=0, bedrock=0, fail_next=2)
+    retried = comparable(loop.run_until_complete(async_pipeline.list_pipelines()))
+    if retried[2] != 2:
+        raise AssertionError(f'server errors: got {retried}, expected 2 retries')
+
+    # The stand-in closes each connection after answering without saying
+    # so. Whether a call sees that before sending, or sends and has to
+    # reconnect, depends on timing, but each call must succeed on one new
+    # connection. A new client has no connection left from the calls above.
+    closing = AsyncClient(make_client('codepipeline', server.server_port, cert))
+    server.reset(rtt=0, bedrock=0, close_after=True)
+    for _ in range(3):
+        loop.run_until_complete(closing.list_pipelines())
+    connections, _ = server.reset(rtt=0, bedrock=0)
+    if connections != 3:
+        raise AssertionError(f'stale connections: {connections} new connections for 3 calls, expected 3')
+
+    impatient = AsyncClient(make_client('codepipeline', server.server_port, cert, read_timeout=0.2,
+                                        retries={'total_max_attempts': 1}))
+    server.reset(rtt=0, bedrock=0, stall=1)
+    failures = [outcome(lambda: loop.run_until_complete(impatient.list_pipelines()))]
+    with socket.socket() as unused:
+        unused.bind(('127.0.0.1', 0))
+        closed_port = unused.getsockname()[1]
+    refused = AsyncClient(make_client('codepipeline', closed_port, cert, retries={'total_max_attempts': 1}))
+    failures.append(outcome(lambda: loop.run_until_complete(refused.list_pipelines())))
+    untrusted = AsyncClient(make_client('codepipeline', server.server_port, None,
+                                        retries={'total_max_attempts': 1}))
+    failures.append(outcome(lambda: loop.run_until_complete(untrusted.list_pipelines())))
+    expected = [ReadTimeoutError.__name__, EndpointConnectionError.__name__, SSLError.__name__]
+    if [failure[0] for failure in failures] != expected:
+        raise AssertionError(f'failures: got {failures}, expected {expected}')
+    close_clients(loop, closing, impatient, refused, untrusted, *async_clients.values())
+    server.reset()
+    time.sleep(1)
+
+
+def load_handler(server, cert):
+    os.environ.update({
+        'AWS_ENDPOINT_URL': f'https://localhost:{server.server_port}', 'AWS_CA_BUNDLE': cert,
+        'AWS_ACCESS_KEY_ID': 'AKIDEXAMPLE', 'AWS_SECRET_ACCESS_KEY': 'SECRET', 'AWS_DEFAULT_REGION': 'us-east-1',
+        'AWS_REGION': 'us-east-1', 'PIPELINE_NAME': PIPELINE, 'SNS_TOPIC_ARN': TOPIC_ARN,
+        'AWS_LAMBDA_FUNCTION_NAME': 'self-healing-rollback',
+    })
+    import lambda_function
+    return lambda_function
+
+
+def run_handler(lambda_function, overlap):
+    async def no_prefetch(history):
+        pass
+
+    lambda_function.execution_histories.clear()
+    lambda_function.notifier._last_sent.clear()
+    lambda_function.prefetch_history = prefetch_history if overlap else no_prefetch
+    event = {'detail': {'alarmData': {'alarmName': 'bank-api-5xx', 'state': {
+        'value': 'ALARM', 'reason': 'Threshold Crossed: 12 HTTP 500s in 1 minute'}}}}
+    start = time.perf_counter()
+    response = lambda_function.lambda_handler(event, None)
+    return time.perf_counter() - start, response
+
+
+def fan_out(server, cert, loop, count):
+    sns = make_client('sns', server.server_port, cert, max_pool_connections=count)
+    async_sns = AsyncClient(sns)
+    messages = [{'TopicArn': TOPIC_ARN, 'Subject': f'Rollback {n}', 'Message': 'Rolled back'} for n in range(count)]
+    # Open the connections first, so that both measure calls alone
+    for message in messages[:2]:
+        sns.publish(**message)
+
+    async def publish_all():
+        return await asyncio.gather(*(async_sns.publish(**message) for message in messages))
+
+    loop.run_until_complete(publish_all())
+    start = time.perf_counter()
+    for message in messages:
+        sns.publish(**message)
+    blocking = time.perf_counter() - start
+    start = time.perf_counter()
+    loop.run_until_complete(publish_all())
+    concurrent = time.perf_counter() - start
+    close_clients(loop, async_sns)
+    return blocking, concurrent
+
+
+def per_call(server, cert, loop, count):
+    server.reset(rtt=0, bedrock=0)
+    pipeline = make_client('codepipeline', server.server_port, cert)
+    async_pipeline = AsyncClient(pipeline)
+
+    async def calls():
+        for _ in range(count):
+            await async_pipeline.list_pipelines()
+
+    results = []
+    for run in (lambda: [pipeline.list_pipelines() for _ in range(count)],
+                lambda: loop.run_until_complete(calls())):
+        run()
+        start = time.perf_counter()
+        run()
+        results.append((time.perf_counter() - start) / count)
+    close_clients(loop, async_pipeline)
+    server.reset()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rtt', type=float, default=0.03, help='seconds per call')
+    parser.add_argument('--bedrock', type=float, default=0.8, help='seconds per Bedrock InvokeModel call')
+    parser.add_argument('--fanout', type=int, default=20)
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory, names='DNS:localhost')
+        server = StandInProcess(cert, key, args.rtt, args.bedrock)
+        loop = asyncio.new_event_loop()
+        check(server, cert, loop)
+        lambda_function = load_handler(server, cert)
+        connections, _ = server.reset()
+        if connections != 2:
+            raise AssertionError(f'pre-warm: {connections} connections opened at init, expected 2')
+        global prefetch_history
+        prefetch_history = lambda_function.prefetch_history
+        for overlap in (False, True):
+            elapsed, response = run_handler(lambda_function, overlap)
+            _, operations = server.reset()
+            expected = {'InvokeModel': 1, 'ListPipelineExecutions': 1, 'StartPipelineExecution': 1, 'Publish': 1}
+            if response['statusCode'] != 200 or 'exec-new' not in response['body'] or operations != expected:
+                raise AssertionError(f'handler: got {response} after {operations}')
+        print(f'verified {len(CALLS)} operations, errors, retries, reconnects, pre-warming and the handler; '
+              f'rtt {args.rtt * 1e3:g}ms, Bedrock {args.bedrock * 1e3:g}ms')
+
+        for overlap in (False, True):
+            times = sorted(run_handler(lambda_function, overlap)[0] for _ in range(args.repeat))
+            label = 'overlapped' if overlap else 'sequential'
+            print(f'  handler   {label:10} {times[len(times) // 2] * 1e3:7.1f}ms')
+        blocking, concurrent = fan_out(server, cert, loop, args.fanout)
+        print(f'  fan-out   blocking   {blocking * 1e3:7.1f}ms  asyncio {concurrent * 1e3:7.1f}ms  '
+              f'for {args.fanout} messages')
+        blocking, concurrent = per_call(server, cert, loop, args.calls)
+        print(f'  per call  blocking   {blocking * 1e6:7.0f}us  asyncio {concurrent * 1e6:7.0f}us')
+        close_clients(lambda_function.event_loop, lambda_function.async_bedrock_runtime,
+                      lambda_function.async_code_pipeline)
+        lambda_function.event_loop.close()
+        loop.close()
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Client creation with a fresh Session per client: private vs. process-wide loader data.
+
+``boto3.client()`` without a shared session is what the Lambdas do, and
+every such client used to re-read and re-parse its service model, the
+endpoint data and the partitions.  Before timing, every model the clients
+use is loaded through a private loader and through the shared one and
+must compare equal, a forked child must be able to create clients from
+the data its parent loaded, and no merged SDK extras may have leaked into
+the other models sharing an interned leaf.  Memory is what the created
+clients keep alive, measured with tracemalloc.
+
+    python benchmarks/client_creation.py --clients 4 --services codepipeline sns cloudwatch eks
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import botocore.loaders  # noqa: E402
+import botocore.session  # noqa: E402
+from botocore.loaders import JSONFileLoader, Loader  # noqa: E402
+
+# The services the Lambdas create clients for
+SERVICES = ['codepipeline', 'sns', 'cloudwatch', 'eks', 'bedrock-runtime']
+# Models whose extras merge into shapes
+EXTRAS_SERVICES = ['s3', 'rds']
+INTERNED_MODEL_PREFIXES = JSONFileLoader.INTERNED_MODEL_PREFIXES
+
+
+def reset_shared_data(interning=True):
+    botocore.loaders._SHARED_LOADER_DATA.clear()
+    botocore.loaders._INTERNED_MODEL_LEAVES.clear()
+    JSONFileLoader.INTERNED_MODEL_PREFIXES = INTERNED_MODEL_PREFIXES if interning else ()
+
+
+def new_session(private):
+    session = botocore.session.Session()
+    if private:
+        session.register_component('data_loader', Loader(cache={}))
+    return session
+
+
+def create_client(service, private):
+    return new_session(private).create_client(
+        service, region_name='us-east-1',
+        aws_access_key_id='AKIDEXAMPLE', aws_secret_access_key='SECRET',
+    )
+
+
+def loaded_models(loader, service):
+    yield loader.load_service_model(service, 'service-2')
+    yield loader.load_service_model(service, 'endpoint-rule-set-1')
+    for name in ('endpoints', 'partitions', 'sdk-default-configuration', '_retry'):
+        yield loader.load_data(name)
+
+
+def check_identical(services):
+    reset_shared_data()
+    checked = 0
+    for service in services + EXTRAS_SERVICES:
+        private = list(loaded_models(Loader(cache={}), service))
+        shared = list(loaded_models(Loader(), service))
+        if private != shared:
+            raise AssertionError(f'{service}: shared loader data differs from a private load')
+        checked += 1
+    # Every model again, now that all of them share interned leaves
+    for service in services + EXTRAS_SERVICES:
+        private = list(loaded_models(Loader(cache={}), service))
+        if private != list(loaded_models(Loader(), service)):
+            raise AssertionError(f'{service}: merging extras changed another model')
+    if Loader().load_service_model(services[0], 'service-2') is not \
+            Loader().load_service_model(services[0], 'service-2'):
+        raise AssertionError('loaders in one process did not share their data')
+    return checked
+
+
+def check_fork(service):
+    if not hasattr(os, 'fork'):
+        return False
+    create_client(service, private=False)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            create_client(service, private=False).meta.service_model.operation_names
+        except BaseException:
+            os._exit(1)
+        os._exit(0)
+    _, status = os.waitpid(pid, 0)
+    if status != 0:
+        raise AssertionError('a forked child could not create a client from the shared data')
+    return True
+
+
+def create_all(services, clients, private):
+    return [create_client(service, private) for _ in range(clients) for service in services]
+
+
+def measure(services, clients, private, interning):
+    reset_shared_data(interning)
+    gc.collect()
+    start = time.perf_counter()
+    created = create_all(services, clients, private)
+    seconds = time.perf_counter() - start
+    del created
+    reset_shared_data(interning)
+    gc.collect()
+    tracemalloc.start()
+    created = create_all(services, clients, private)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del created
+    return seconds, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=4, help='clients per service (N)')
+    parser.add_argument('--services', nargs='+', default=SERVICES, help='services (M)')
+    args = parser.parse_args()
+
+    print(f'verified identical data for {check_identical(args.services)} services')
+    if check_fork(args.services[0]):
+        print('a forked child created a client from the shared data')
+
+    # Imports, lazily built module state and the compiled endpoint rules
+    # are paid for by whichever mode runs first, so pay for them here
+    create_all(args.services, 1, private=True)
+    total = args.clients * len(args.services)
+    print(f'{args.clients} clients x {len(args.services)} services, a new Session each')
+    for label, private, interning in (
+        ('private', True, False), ('shared', False, False), ('shared+interned', False, True)
+    ):
+        seconds, retained = measure(args.services, args.clients, private, interning)
+        print(f'{label:16} {seconds * 1e3:8.1f}ms total  {seconds * 1e3 / total:6.2f}ms per client  '
+              f'{retained / 1048576:7.1f}MB retained')
+    reset_shared_data()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""First-call latency, pool churn and stale connections against a local TLS server: connection pool options.
+
+The server uses a self-signed certificate made with ``openssl`` and adds
+``--rtt`` seconds to every request and two round trips to every TCP and
+TLS handshake, like an endpoint in another region.  It also counts
+handshakes, and can stop answering connections idle for longer than a
+NAT gateway would keep them, without closing them.
+
+* first calls: two clients for two hosts are created along with
+  ``--init`` seconds of other start-up work, then each makes its first
+  call.  ``prewarm_connections`` opens their connections in the
+  background during that work.
+* pool churn: ``--threads`` threads share one client whose pool is
+  smaller than the number of threads; ``max_pool_connections_per_host``
+  sizes that host's pool to fit them.
+* stale connection: a call made after the server has silently dropped
+  the idle connection waits out the read timeout, unless
+  ``max_idle_time`` reconnects first.
+
+Before timing, every mode must get the same parsed response, and
+pre-warming must open exactly the connections asked for.
+
+    python benchmarks/connection_prewarm.py --rtt 0.03
+"""
+import argparse
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import botocore.session  # noqa: E402
+from botocore.config import Config  # noqa: E402
+
+BODY = b'{"pipelines": [{"name": "rollback", "version": 3}]}'
+
+
+def make_certificate(directory, names='DNS:localhost,IP:127.0.0.1'):
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-keyout', key, '-out', cert, '-subj', '/CN=localhost',
+         '-addext', f'subjectAltName={names}'],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        time.sleep(2 * self.server.rtt)
+        self.request.do_handshake()
+        with self.server.lock:
+            self.server.handshakes += 1
+            self.server.resumed += self.request.session_reused
+        self.last_response = time.monotonic()
+        super().setup()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        drop_after = self.server.drop_idle_after
+        if drop_after is not None and time.monotonic() - self.last_response > drop_after:
+            # A NAT gateway forgot this connection: nothing comes back
+            self.close_connection = True
+            time.sleep(self.server.blackhole)
+            return
+        time.sleep(self.server.rtt)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-amz-json-1.1')
+        self.send_header('Content-Length', str(len(BODY)))
+        if self.server.close_connections:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(BODY)
+        self.last_response = time.monotonic()
+
+    def log_message(self, *args):
+        pass
+
+
+class TLSServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, cert, key, rtt):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(cert, key)
+        self.rtt = rtt
+        self.drop_idle_after = None
+        self.blackhole = 0
+        self.close_connections = False
+        self.handshakes = 0
+        self.resumed = 0
+        self.lock = threading.Lock()
+
+    def get_request(self):
+        sock, address = super().get_request()
+        return self.context.wrap_socket(sock, server_side=True, do_handshake_on_connect=False), address
+
+    def handle_error(self, request, client_address):
+        pass
+
+    def reset(self):
+        with self.lock:
+            handshakes, self.handshakes = self.handshakes, 0
+            self.resumed = 0
+        return handshakes
+
+
+def make_client(host, port, cert, session=None, **config):
+    if session is None:
+        session = botocore.session.Session()
+    return session.create_client(
+        'codepipeline', region_name='us-east-1', endpoint_url=f'https://{host}:{port}', verify=cert,
+        aws_access_key_id='AKIDEXAMPLE', aws_secret_access_key='SECRET', config=Config(**config),
+    )
+
+
+def call(client):
+    response = client.list_pipelines()
+    response.pop('ResponseMetadata')
+    return response
+
+
+def wait_for_handshakes(server, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while server.handshakes < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return server.handshakes
+
+
+def wait_for_pooled(client, count, timeout=5):
+    # The pre-warming threads pool each connection once they have read
+    # its session tickets
+    pool = client._endpoint.http_session._get_connection_pool(client.meta.endpoint_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        pooled = sum(1 for conn in list(pool.pool.queue) if conn is not None and not conn.is_closed)
+        if pooled >= count:
+            break
+        time.sleep(0.001)
+    return pooled
+
+
+def check(server, cert):
+    expected = None
+    for config in ({}, {'prewarm_connections': 3}, {'max_pool_connections_per_host': {'localhost': 2}},
+                   {'max_idle_time': 0.1}):
+        server.reset()
+        client = make_client('localhost', server.server_port, cert, **config)
+        prewarm = 'prewarm_connections' in config
+        if prewarm:
+            opened = wait_for_handshakes(server, 3)
+            if opened != 3 or wait_for_pooled(client, 3) != 3:
+                raise AssertionError(f'pre-warming opened {opened} connections, expected 3')
+        responses = [call(client) for _ in range(3)]
+        if expected is None:
+            expected = responses[0]
+        if any(response != expected for response in responses):
+            raise AssertionError(f'{config}: got {responses}, expected {expected}')
+        if prewarm and server.handshakes != 3:
+            raise AssertionError('calls did not use the pre-warmed connections')
+        client.close()
+    return expected
+
+
+def first_calls(server, cert, args, prewarm):
+    server.reset()
+    config = {'prewarm_connections': 1} if prewarm else {}
+    start = time.perf_counter()
+    clients = [make_client(host, server.server_port, cert, **config) for host in ('localhost', '127.0.0.1')]
+    created = time.perf_counter()
+    time.sleep(args.init)
+    began = time.perf_counter()
+    for client in clients:
+        call(client)
+    end = time.perf_counter()
+    for client in clients:
+        client.close()
+    return created - start, end - began
+
+
+def pool_churn(server, cert, args, per_host):
+    config = {'max_pool_connections': 4}
+    if per_host:
+        config['max_pool_connections_per_host'] = {'localhost': args.threads}
+    client = make_client('localhost', server.server_port, cert, **config)
+    with ThreadPoolExecutor(args.threads) as executor:
+        list(executor.map(lambda _: call(client), range(args.threads)))
+        server.reset()
+        start = time.perf_counter()
+        list(executor.map(lambda _: call(client), range(args.threads * args.rounds)))
+        elapsed = time.perf_counter() - start
+    client.close()
+    return args.threads * args.rounds / elapsed, server.reset()
+
+
+def stale_connection(server, cert, args, max_idle_time):
+    server.drop_idle_after = args.idle / 2
+    server.blackhole = args.read_timeout + 1
+    config = {'read_timeout': args.read_timeout, 'retries': {'mode': 'standard', 'max_attempts': 2}}
+    if max_idle_time:
+        config['max_idle_time'] = args.idle / 4
+    client = make_client('localhost', server.server_port, cert, **config)
+    call(client)
+    time.sleep(args.idle)
+    start = time.perf_counter()
+    call(client)
+    elapsed = time.perf_counter() - start
+    client.close()
+    server.drop_idle_after = None
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rtt', type=float, default=0.03, help='seconds per network round trip')
+    parser.add_argument('--init', type=float, default=0.2, help='seconds of other start-up work')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--idle', type=float, default=2, help='seconds between calls on the stale connection')
+    parser.add_argument('--read-timeout', type=float, default=2)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory)
+        server = TLSServer(cert, key, args.rtt)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f'verified responses {check(server, cert)}, rtt {args.rtt * 1e3:g}ms')
+
+        for prewarm in (False, True):
+            runs = sorted(first_calls(server, cert, args, prewarm) for _ in range(args.repeat))
+            create, first = runs[len(runs) // 2]
+            print(f'first calls    {"prewarmed" if prewarm else "cold":10} create 2 clients {create * 1e3:6.1f}ms  '
+                  f'first call on each {first * 1e3:6.1f}ms')
+        for per_host in (False, True):
+            rate, handshakes = pool_churn(server, cert, args, per_host)
+            label = f'per-host {args.threads}' if per_host else 'pool of 4'
+            print(f'pool churn     {label:10} {rate:8.0f} calls/s  {handshakes:4} new connections '
+                  f'for {args.threads * args.rounds} calls')
+        for max_idle_time in (False, True):
+            elapsed = stale_connection(server, cert, args, max_idle_time)
+            label = f'idle {args.idle / 4:g}s' if max_idle_time else 'reuse'
+            print(f'stale conn     {label:10} call after {args.idle:g}s idle took {elapsed * 1e3:7.1f}ms')
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
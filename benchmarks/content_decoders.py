@@ -0,0 +1,227 @@
+"""Decoding throughput and peak memory of compressed response bodies: zlib backends and bounded output.
+
+Local fixture payloads of ``--size`` bytes are compressed with gzip,
+deflate and, when a zstd module is installed, zstd, and read from
+``HTTPResponse`` in ``--piece`` byte pieces with every zlib-compatible
+backend that can be imported (isal, zlib-ng, zlib).  The fixtures are
+JSON records, which compress about tenfold, mostly empty padding, which
+compresses about a thousandfold, and random bytes, which do not compress.
+
+``unbounded`` wraps each decoder so it decompresses whole reads at once,
+as the decoders did before they took ``max_length``; ``bounded`` decodes
+at most what the read asked for.  Peak memory is measured with
+``tracemalloc`` in a separate, untimed pass; throughput is the median
+of ``--repeat`` runs.
+
+Before timing, every backend must decode every fixture to the same
+bytes through ``read()``, ``read(amt)``, ``read1(amt)`` and chunked
+``stream(amt)``, including gzip bodies of several members, and a
+corrupted body must raise ``DecodeError``.
+
+    python benchmarks/content_decoders.py --size 64M
+"""
+import argparse
+import gzip
+import http.client
+import importlib
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import urllib3.response  # noqa: E402
+from urllib3.exceptions import DecodeError  # noqa: E402
+from urllib3.response import HTTPResponse  # noqa: E402
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+UNITS = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+
+def parse_size(text):
+    unit = UNITS.get(text[-1].upper(), 1)
+    return int(text.rstrip('KMGkmg')) * unit
+
+
+def fixtures(size):
+    rng = random.Random(0)
+    records = b''.join(
+        b'{"pipeline": "rollback-%d", "stage": "deploy", "status": "%s", "duration": %d}\n'
+        % (rng.randrange(500), rng.choice((b'Succeeded', b'Failed', b'InProgress')), rng.randrange(10 ** 6))
+        for _ in range(20000)
+    )
+    padding = (b'\0' * 4000 + b'{"end": true}\n') * 8
+    noise = rng.randbytes(1 << 20)
+    for name, block in (('json', records), ('padding', padding), ('random', noise)):
+        yield name, (block * (size // len(block) + 1))[:size]
+
+
+def backends():
+    # Not through _import_zlib_backend, which falls back to zlib for a
+    # backend that is not installed
+    for name in urllib3.response._ZLIB_BACKENDS:
+        try:
+            yield name.split('.')[0], importlib.import_module(name)
+        except ImportError:
+            continue
+
+
+def encode(payload):
+    members = len(payload) // 2
+    encoded = {
+        'gzip': gzip.compress(payload[:members], 6) + gzip.compress(payload[members:], 6),
+        'deflate': zlib.compress(payload, 6),
+    }
+    if urllib3.response.HAS_ZSTD and zstandard is not None:
+        encoded['zstd'] = zstandard.ZstdCompressor(level=3).compress(payload)
+    return encoded
+
+
+class Unbounded:
+    """A decoder as it was before max_length: each read is decoded whole."""
+
+    def __init__(self, decoder):
+        self._decoder = decoder
+        self.has_pending_output = False
+
+    def decompress(self, data, max_length=-1):
+        return self._decoder.decompress(data)
+
+    def flush(self):
+        return self._decoder.flush()
+
+
+def set_mode(backend, bounded):
+    urllib3.response._zlib = backend
+    decoders = urllib3.response._DECODERS
+    for encoding, factory in list(decoders.items()):
+        factory = getattr(factory, 'bounded', factory)
+        if bounded:
+            decoders[encoding] = factory
+        else:
+            decoders[encoding] = lambda factory=factory: Unbounded(factory())
+            decoders[encoding].bounded = factory
+
+
+def response(body, encoding):
+    return HTTPResponse(io.BytesIO(body), headers={'content-encoding': encoding}, status=200, preload_content=False)
+
+
+class FakeSocket:
+    def __init__(self, raw):
+        self._raw = raw
+
+    def makefile(self, mode):
+        return io.BytesIO(self._raw)
+
+
+def chunked_response(body, encoding):
+    raw = io.BytesIO()
+    raw.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\nContent-Encoding: %s\r\n\r\n' % encoding.encode())
+    for offset in range(0, len(body), 5000):
+        chunk = body[offset:offset + 5000]
+        raw.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+    raw.write(b'0\r\n\r\n')
+    original = http.client.HTTPResponse(FakeSocket(raw.getvalue()), method='GET')
+    original.begin()
+    return HTTPResponse(original, headers=dict(original.getheaders()), status=200, preload_content=False,
+                        original_response=original)
+
+
+def read_pieces(resp, piece):
+    total = 0
+    while True:
+        data = resp.read(piece)
+        if not data:
+            return total
+        total += len(data)
+
+
+def read1_all(resp, piece):
+    parts = []
+    while True:
+        data = resp.read1(piece)
+        if not data:
+            return b''.join(parts)
+        if len(data) > piece:
+            raise AssertionError(f'read1({piece}) returned {len(data)} bytes')
+        parts.append(data)
+
+
+def check(size):
+    for name, payload in fixtures(size):
+        for encoding, body in encode(payload).items():
+            for backend_name, backend in backends():
+                set_mode(backend, True)
+                label = f'{name} {encoding} {backend_name}'
+                results = {'read()': response(body, encoding).read()}
+                for piece in (7, 1000, 65536):
+                    results[f'read({piece})'] = b''.join(response(body, encoding).stream(piece))
+                    results[f'chunked stream({piece})'] = b''.join(
+                        chunked_response(body, encoding).stream(piece, decode_content=True))
+                results['read1(1000)'] = read1_all(response(body, encoding), 1000)
+                for reader, decoded in results.items():
+                    if decoded != payload:
+                        raise AssertionError(f'{label}: {reader} decoded {len(decoded)} of {len(payload)} bytes')
+    set_mode(urllib3.response._import_zlib_backend(), True)
+    corrupted = bytearray(gzip.compress(payload))
+    corrupted[len(corrupted) // 2] ^= 0xFF
+    try:
+        response(bytes(corrupted), 'gzip').read()
+    except DecodeError:
+        pass
+    else:
+        raise AssertionError('a corrupted body decoded without an error')
+
+
+def measure(body, encoding, piece, size, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        total = read_pieces(response(body, encoding), piece)
+        times.append(time.perf_counter() - start)
+        if total != size:
+            raise AssertionError(f'{encoding}: decoded {total} bytes, expected {size}')
+    elapsed = sorted(times)[len(times) // 2]
+    tracemalloc.start()
+    read_pieces(response(body, encoding), piece)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / elapsed / (1 << 20), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=parse_size, default='64M', help='decoded bytes per fixture')
+    parser.add_argument('--piece', type=parse_size, default='256K', help='bytes asked for per read')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    check(parse_size('64K'))
+    print(f'verified every reader, backend and fixture; {args.size >> 20}MB fixtures, '
+          f'{args.piece >> 10}KB pieces')
+    for name, payload in fixtures(args.size):
+        for encoding, body in encode(payload).items():
+            for backend_name, backend in backends():
+                if encoding == 'zstd' and backend_name != 'zlib':
+                    continue
+                line = f'  {name:8} {encoding:8} {"zstandard" if encoding == "zstd" else backend_name:10}'
+                for bounded in (False, True):
+                    set_mode(backend, bounded)
+                    rate, peak = measure(body, encoding, args.piece, args.size, args.repeat)
+                    line += f'  {"bounded" if bounded else "unbounded"} {rate:6.0f}MB/s peak {peak / (1 << 20):6.1f}MB'
+                print(line)
+    set_mode(urllib3.response._import_zlib_backend(), True)
+
+
+if __name__ == '__main__':
+    main()
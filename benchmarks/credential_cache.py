@@ -0,0 +1,139 @@
+"""STS calls made by many processes sharing assumed-role credentials: per-process, JSON file and shared file caches.
+
+Each worker process stands in for a warm Lambda container or a
+CodeBuild step: it fetches credentials with a cached credential fetcher
+every ``--interval`` seconds for ``--seconds`` seconds.  The fake STS
+call takes ``--latency`` seconds and hands out numbered credentials that
+live ``--lifetime`` seconds; the fetchers treat them as expired halfway
+through.  All workers start together, which is when a cold fleet calls
+STS at once.  Every call is appended to a file so the count covers all
+processes.  A read that fails on a partly written cache entry, and
+credentials that mix two generations or have expired, are counted as
+errors.
+
+    python benchmarks/credential_cache.py --processes 16 --seconds 6
+"""
+import argparse
+import datetime
+import math
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+from botocore.credentials import CachedCredentialFetcher  # noqa: E402
+from botocore.utils import JSONFileCache, SharedFileCache  # noqa: E402
+from dateutil.tz import tzutc  # noqa: E402
+
+
+class FakeAssumeRoleFetcher(CachedCredentialFetcher):
+    def __init__(self, cache, calls_path, latency, lifetime):
+        self._calls_path = calls_path
+        self._latency = latency
+        self._lifetime = lifetime
+        super().__init__(cache, expiry_window_seconds=lifetime / 2)
+
+    def _create_cache_key(self):
+        return 'fake-role'
+
+    def _get_credentials(self):
+        fd = os.open(self._calls_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            os.write(fd, b'.')
+            generation = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        time.sleep(self._latency)
+        expiration = datetime.datetime.now(tzutc()) + datetime.timedelta(seconds=self._lifetime)
+        return {
+            'Credentials': {
+                'AccessKeyId': f'AKID{generation}',
+                'SecretAccessKey': f'secret{generation}',
+                'SessionToken': f'token{generation}',
+                'Expiration': expiration.isoformat(),
+            }
+        }
+
+
+def make_cache(kind, working_dir):
+    if kind == 'per-process':
+        return {}
+    if kind == 'json-file':
+        return JSONFileCache(working_dir)
+    return SharedFileCache(working_dir)
+
+
+def worker(kind, working_dir, calls_path, args, start, results):
+    fetcher = FakeAssumeRoleFetcher(make_cache(kind, working_dir), calls_path, args.latency, args.lifetime)
+    start.wait()
+    deadline = time.monotonic() + args.seconds
+    fetches = errors = 0
+    slowest = 0.0
+    while time.monotonic() < deadline:
+        began = time.perf_counter()
+        try:
+            credentials = fetcher.fetch_credentials()
+        except KeyError:
+            # JSONFileCache found the entry but read it half written
+            errors += 1
+            continue
+        slowest = max(slowest, time.perf_counter() - began)
+        fetches += 1
+        generation = credentials['access_key'][4:]
+        expiry = datetime.datetime.fromisoformat(credentials['expiry_time'])
+        if (credentials['secret_key'] != f'secret{generation}'
+                or credentials['token'] != f'token{generation}'
+                or expiry <= datetime.datetime.now(tzutc())):
+            errors += 1
+        time.sleep(args.interval)
+    results.put((fetches, errors, slowest))
+
+
+def run(kind, args):
+    context = multiprocessing.get_context('fork')
+    with tempfile.TemporaryDirectory() as root:
+        working_dir = os.path.join(root, 'cache')
+        calls_path = os.path.join(root, 'sts-calls')
+        start = context.Barrier(args.processes)
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(kind, working_dir, calls_path, args, start, results))
+            for _ in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        calls = os.path.getsize(calls_path)
+    fetches = sum(fetches for fetches, _, _ in outcomes)
+    errors = sum(errors for _, errors, _ in outcomes)
+    slowest = max(slowest for _, _, slowest in outcomes)
+    return calls, fetches, errors, slowest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=6)
+    parser.add_argument('--lifetime', type=float, default=4, help='seconds each set of credentials lives')
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per STS call')
+    parser.add_argument('--interval', type=float, default=0.001, help='seconds between fetches')
+    args = parser.parse_args()
+
+    # Credentials are fresh for lifetime / 2 seconds after each refresh
+    refreshes = math.ceil(args.seconds / (args.lifetime / 2))
+    print(f'{args.processes} processes for {args.seconds:g}s, credentials live {args.lifetime:g}s, '
+          f'STS calls take {args.latency * 1e3:g}ms; one shared cache needs {refreshes} calls')
+    for kind in ('per-process', 'json-file', 'shared-file'):
+        calls, fetches, errors, slowest = run(kind, args)
+        print(f'  {kind:12} {calls:4} STS calls  {fetches:8} fetches  {errors:5} errors  '
+              f'slowest fetch {slowest * 1e3:6.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Credential lookups from many threads across refreshes: background vs. foreground refresh.
+
+Each thread looks up credentials, as signing a request does, every
+``--interval`` seconds.  A fake credential source hands out numbered
+credentials that live a few seconds and takes ``--latency`` seconds per
+fetch, like an STS or container credentials round trip.  The second
+scenario makes every other fetch time out after ``--timeout`` seconds,
+which is what pushes a foreground refresh into the mandatory window
+where every caller blocks.  The refresh windows and the background lead
+are scaled down to match.  Every snapshot a thread gets must be a single
+generation of credentials that has not expired yet.
+
+    python benchmarks/credential_refresh.py --threads 64 --seconds 10
+"""
+import argparse
+import datetime
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+from botocore.credentials import RefreshableCredentials  # noqa: E402
+from dateutil.tz import tzutc  # noqa: E402
+
+BLOCKED = 0.01
+
+
+class ForegroundCredentials(RefreshableCredentials):
+    BACKGROUND_REFRESH = False
+
+
+class BackgroundCredentials(RefreshableCredentials):
+    BACKGROUND_REFRESH = True
+
+
+class FakeCredentialSource:
+    def __init__(self, lifetime, latency, timeout, flaky):
+        self.lifetime = lifetime
+        self.latency = latency
+        self.timeout = timeout
+        self.flaky = flaky
+        self.fetches = 0
+        self.expiry = {}
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.fetches += 1
+            attempt = self.fetches
+        if self.flaky and not attempt % 2:
+            time.sleep(self.timeout)
+            raise RuntimeError('credential source timed out')
+        time.sleep(self.latency)
+        expiry = datetime.datetime.now(tzutc()) + datetime.timedelta(seconds=self.lifetime)
+        with self.lock:
+            self.expiry[attempt] = expiry
+        return {
+            'access_key': f'AKID{attempt}', 'secret_key': f'secret{attempt}', 'token': f'token{attempt}',
+            'expiry_time': expiry.isoformat(),
+        }
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run(cls, args):
+    source = FakeCredentialSource(args.lifetime, args.latency, args.timeout, args.flaky)
+    window = args.lifetime / 2
+    credentials = cls.create_from_metadata(
+        source(), refresh_using=source, method='fake',
+        advisory_timeout=window, mandatory_timeout=window / 2,
+    )
+    credentials._background_refresh_lead = window / 2
+    credentials._background_retry_interval = args.latency
+    latencies = [[] for _ in range(args.threads)]
+    problems = []
+    deadline = time.monotonic() + args.seconds
+
+    def caller(recorded):
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                frozen = credentials.get_frozen_credentials()
+            except RuntimeError:
+                problems.append('a caller got the source error')
+                continue
+            recorded.append(time.perf_counter() - start)
+            time.sleep(args.interval)
+            generation = frozen.access_key[4:]
+            if frozen.secret_key != f'secret{generation}' or frozen.token != f'token{generation}':
+                problems.append(f'inconsistent snapshot {frozen}')
+            elif source.expiry[int(generation)] <= datetime.datetime.now(tzutc()):
+                problems.append(f'expired credentials {frozen.access_key}')
+
+    threads = [threading.Thread(target=caller, args=(recorded,)) for recorded in latencies]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Stop any pending background refresh from fetching again
+    credentials._background_entry = None
+    if problems:
+        raise AssertionError(f'{cls.__name__}: {problems[0]} (and {len(problems) - 1} more)')
+    everything = sorted(latency for recorded in latencies for latency in recorded)
+    blocked = sum(1 for latency in everything if latency > BLOCKED)
+    return (f'{len(everything) / args.seconds:9.0f} lookups/s  {source.fetches:3} fetches  '
+            f'p50 {percentile(everything, 0.5) * 1e6:5.1f}us  p99.9 {percentile(everything, 0.999) * 1e6:8.1f}us  '
+            f'max {everything[-1] * 1e3:6.1f}ms  {blocked:5} lookups waited > {BLOCKED * 1e3:g}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--lifetime', type=float, default=4, help='seconds each set of credentials lives')
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per fetch')
+    parser.add_argument('--timeout', type=float, default=1.2, help='seconds a failing fetch takes')
+    parser.add_argument('--interval', type=float, default=0.002,
+                        help='seconds between lookups, the rest of an API call')
+    args = parser.parse_args()
+
+    print(f'{args.threads} threads for {args.seconds:g}s, credentials live {args.lifetime:g}s, '
+          f'fetches take {args.latency * 1e3:g}ms')
+    for flaky in (False, True):
+        args.flaky = flaky
+        print('every other fetch times out' if flaky else 'healthy source')
+        for label, cls in (('foreground', ForegroundCredentials), ('background', BackgroundCredentials)):
+            print(f'  {label:10} {run(cls, args)}')
+
+
+if __name__ == '__main__':
+    main()
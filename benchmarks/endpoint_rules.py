@@ -0,0 +1,70 @@
+"""Endpoint resolution misses: compiled rule sets vs. the rule interpreter.
+
+The timings bypass the resolve_endpoint LRU, so each evaluation is a
+miss, and compile on the first miss instead of after
+RuleSet.COMPILE_THRESHOLD of them so that cost shows up too.  That both
+ways resolve every bundled rule set identically is checked by
+tests/test_endpoint_rules.py.
+
+    python benchmarks/endpoint_rules.py --iterations 5000
+"""
+import argparse
+import os
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import botocore.endpoint_provider as endpoint_provider  # noqa: E402
+import botocore.loaders  # noqa: E402
+from botocore.endpoint_provider import RuleSet  # noqa: E402
+
+# service, params for the timed misses, from the Lambdas' clients
+TIMED = [
+    ('codepipeline', {'Region': 'us-east-1', 'UseFIPS': False, 'UseDualStack': False}),
+    ('sns', {'Region': 'us-east-1', 'UseFIPS': False, 'UseDualStack': False}),
+    ('bedrock-runtime', {'Region': 'us-east-1', 'UseFIPS': False, 'UseDualStack': False}),
+    ('s3', {
+        'Region': 'us-east-1', 'UseFIPS': False, 'UseDualStack': False, 'ForcePathStyle': False,
+        'Accelerate': False, 'UseGlobalEndpoint': False, 'DisableMultiRegionAccessPoints': False,
+        'UseArnRegion': True, 'Bucket': 'self-healing-pipeline-artifacts', 'Key': 'deploy/app.zip',
+    }),
+]
+
+
+def make_ruleset(ruleset_data, partitions, compiled):
+    ruleset = RuleSet(**ruleset_data, partitions=partitions)
+    ruleset.COMPILE_RULES = compiled
+    # Compile on the first miss rather than after the usual warm-up
+    ruleset.COMPILE_THRESHOLD = 0
+    return ruleset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=5000)
+    args = parser.parse_args()
+
+    loader = botocore.loaders.create_loader()
+    partitions = loader.load_data('partitions')
+
+    for service, params in TIMED:
+        ruleset_data = loader.load_service_model(service, 'endpoint-rule-set-1')
+        endpoint_provider._COMPILED_RULESETS.clear()
+        compiled = make_ruleset(ruleset_data, partitions, True)
+        start = time.perf_counter()
+        compiled.evaluate(dict(params))
+        first = (time.perf_counter() - start) * 1e3
+        results = {}
+        for label, ruleset in (('interpreted', make_ruleset(ruleset_data, partitions, False)),
+                               ('compiled', compiled)):
+            seconds = min(timeit.repeat(lambda: ruleset.evaluate(dict(params)), number=args.iterations, repeat=5))
+            results[label] = seconds / args.iterations * 1e6
+        print(f"{service:16} interpreted {results['interpreted']:7.2f}us  compiled {results['compiled']:6.2f}us  "
+              f"({results['interpreted'] / results['compiled']:.1f}x)  first call incl. compile {first:5.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Event dispatch overhead per API call: compiled dispatch tables vs. the old emitter.
+
+An SNS client answers every call from a ``before-send`` handler, so no
+network is involved.  The script counts the events one Publish emits and
+how many of them have listeners, then replays that sequence through both
+emitters with no-op handlers to isolate the dispatch cost, and finally
+times whole calls.  Registering a handler after the tables are compiled
+must change what the next call dispatches.
+
+    python benchmarks/event_dispatch.py --iterations 20000
+"""
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import botocore.session  # noqa: E402
+from botocore.awsrequest import AWSResponse  # noqa: E402
+from botocore.hooks import EventAliaser, HierarchicalEmitter  # noqa: E402
+
+TOPIC_ARN = 'arn:aws:sns:us-east-1:123456789012:alarm-notifications'
+PUBLISH_BODY = (
+    b'<PublishResponse xmlns="http://sns.amazonaws.com/doc/2010-03-31/">'
+    b'<PublishResult><MessageId>msg-1234</MessageId></PublishResult>'
+    b'<ResponseMetadata><RequestId>req-1234</RequestId></ResponseMetadata>'
+    b'</PublishResponse>'
+)
+logger = logging.getLogger('botocore.hooks')
+
+
+class LegacyEmitter(HierarchicalEmitter):
+    """The emitter as it was: mutable lists, a logging call per handler and
+    no way to ask whether an event has listeners"""
+
+    def _emit(self, event_name, kwargs, stop_on_response=False):
+        handlers_to_call = self._lookup_cache.get(event_name)
+        if handlers_to_call is None:
+            handlers_to_call = self._handlers.prefix_search(event_name)
+            self._lookup_cache[event_name] = handlers_to_call
+        elif not handlers_to_call:
+            return []
+        kwargs['event_name'] = event_name
+        responses = []
+        for handler in handlers_to_call:
+            logger.debug('Event %s: calling handler %s', event_name, handler)
+            response = handler(**kwargs)
+            responses.append((handler, response))
+            if stop_on_response and response is not None:
+                return responses
+        return responses
+
+    def has_handlers(self, event_name):
+        return True
+
+
+class CannedBody:
+    def stream(self, amt=1024):
+        yield PUBLISH_BODY
+
+
+def canned_response(request, **kwargs):
+    headers = {'x-amzn-requestid': 'req-1234', 'content-length': str(len(PUBLISH_BODY))}
+    return AWSResponse(request.url, 200, headers, CannedBody())
+
+
+def make_client(session):
+    client = session.create_client(
+        'sns', region_name='us-east-1',
+        aws_access_key_id='AKIDEXAMPLE', aws_secret_access_key='SECRET',
+    )
+    client.meta.events.register('before-send.sns', canned_response)
+    return client
+
+
+def publish(client):
+    return client.publish(TopicArn=TOPIC_ARN, Message='ALARM: Bank-API-High-5XX-Errors')
+
+
+def record_events(client):
+    """(event name, handler count, kwarg names) for each event one call emits"""
+    emitter = client.meta.events._emitter
+    recorded = []
+    original = emitter._emit
+
+    def recording(event_name, kwargs, stop_on_response=False):
+        recorded.append((event_name, len(emitter._handlers.prefix_search(event_name)), tuple(kwargs)))
+        return original(event_name, kwargs, stop_on_response)
+
+    emitter._emit = recording
+    try:
+        publish(client)
+    finally:
+        del emitter._emit
+    return recorded
+
+
+def replay_emitter(emitter_cls, recorded):
+    def noop(**kwargs):
+        return None
+
+    emitter = emitter_cls()
+    for event_name, handler_count, _ in recorded:
+        for _ in range(handler_count):
+            emitter.register(event_name, noop)
+    events = EventAliaser(emitter)
+
+    def replay():
+        for event_name, _, kwarg_names in recorded:
+            events.emit(event_name, **dict.fromkeys(kwarg_names))
+
+    return replay
+
+
+def use_emitter(client, emitter_cls):
+    client.meta.events._emitter.__class__ = emitter_cls
+    client.meta.events._emitter._lookup_cache = {}
+
+
+def best_of(funcs, number, rounds):
+    """Microseconds per run, interleaving the candidates so drift hits all of them"""
+    best = dict.fromkeys(funcs, float('inf'))
+    for _ in range(rounds):
+        for label, func in funcs.items():
+            best[label] = min(best[label], timeit.timeit(func, number=number))
+    return {label: seconds / number * 1e6 for label, seconds in best.items()}
+
+
+def check_invalidation(session):
+    client = make_client(session)
+    publish(client)
+    seen = []
+    client.meta.events.register('after-call.sns.Publish', lambda **kwargs: seen.append(kwargs['event_name']))
+    publish(client)
+    if seen != ['after-call.sns.Publish']:
+        raise AssertionError('handler registered after the first call was not dispatched')
+    client.meta.events.unregister('before-send.sns', canned_response)
+    if client.meta.events.has_handlers('before-send.sns.Publish'):
+        raise AssertionError('unregistered handler still in the dispatch table')
+
+
+EMITTERS = (('legacy', LegacyEmitter), ('compiled', HierarchicalEmitter))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=7)
+    args = parser.parse_args()
+
+    session = botocore.session.get_session()
+    check_invalidation(session)
+    client = make_client(session)
+    publish(client)
+    recorded = record_events(client)
+    listened = sum(1 for _, count, _ in recorded if count)
+    handlers = sum(count for _, count, _ in recorded)
+    print(f'sns.Publish emits {len(recorded)} events, {listened} with listeners, {handlers} handler calls')
+
+    replays = {label: replay_emitter(cls, recorded) for label, cls in EMITTERS}
+    results = best_of(replays, args.iterations, args.rounds)
+    print(f"dispatch only   legacy {results['legacy']:7.2f}us  compiled {results['compiled']:7.2f}us")
+
+    calls = max(1, args.iterations // 10)
+    clients = {}
+    for label, emitter_cls in EMITTERS:
+        clients[label] = make_client(session)
+        use_emitter(clients[label], emitter_cls)
+        publish(clients[label])
+    results = best_of(
+        {label: lambda c=c: publish(c) for label, c in clients.items()}, calls, args.rounds
+    )
+    print(f"whole call      legacy {results['legacy']:7.2f}us  compiled {results['compiled']:7.2f}us  "
+          f"({results['legacy'] - results['compiled']:.2f}us saved per call)")
+
+
+if __name__ == '__main__':
+    main()
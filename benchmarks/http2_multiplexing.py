@@ -0,0 +1,358 @@
+"""Concurrent calls against a local HTTP/2 server: one HTTP/1.1 connection per call in flight vs. one multiplexed HTTP/2 connection.
+
+The server is the TLS server from ``connection_prewarm.py``, which adds
+``--rtt`` seconds to every request and two round trips to every
+handshake, taught to speak HTTP/2 when the client offers it with ALPN.
+Each HTTP/2 request is answered on its own thread, so concurrent
+streams are answered concurrently, as by a real endpoint, and the
+server runs in a child process so that its work does not slow the
+client down.
+
+* burst: ``--threads`` threads make the first call of a new client at
+  once.  Over HTTP/1.1 each opens a connection and handshakes; over
+  HTTP/2 they share the first.
+* steady: the threads share a warm client for ``--rounds`` calls each,
+  with a pool of ``--threads`` connections for HTTP/1.1.  The server
+  handles each HTTP/2 connection on one thread with the pure-Python
+  ``h2``, so it answers HTTP/2 more slowly than HTTP/1.1, and limits
+  this measurement rather than the client does.
+
+Before timing, HTTP/2 must get the same parsed responses as HTTP/1.1,
+fall back to HTTP/1.1 against a server that only offers that, move
+request and response bodies larger than the flow control windows
+intact, keep working after a body is abandoned part-read and after the
+server drops its connections, and multiplex concurrent calls over one
+connection.
+
+    python benchmarks/http2_multiplexing.py --rtt 0.03 --threads 32
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import socket
+import ssl
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import h2.config
+import h2.connection
+import h2.events
+import h2.exceptions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+from connection_prewarm import BODY, Handler, TLSServer, call, make_certificate, make_client  # noqa: E402
+from urllib3.util.wait import wait_for_read  # noqa: E402
+
+
+def pattern(size):
+    block = hashlib.sha256(str(size).encode()).digest() * 2048
+    return (block * (size // len(block) + 1))[:size]
+
+
+class H2ServerConnection:
+    """The server side of one HTTP/2 connection."""
+
+    def __init__(self, server, sock):
+        self.server = server
+        self.sock = sock
+        self.conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False, header_encoding=None))
+        self.changed = threading.Condition()
+        self.io_lock = threading.Lock()
+        self.requests = {}
+
+    def flush(self):
+        data = self.conn.data_to_send()
+        if data:
+            with self.io_lock:
+                self.sock.sendall(data)
+
+    def recv(self):
+        while True:
+            with self.io_lock:
+                self.sock.setblocking(False)
+                try:
+                    return self.sock.recv(65536)
+                except (ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                    pass
+                finally:
+                    self.sock.setblocking(True)
+            wait_for_read(self.sock)
+
+    def serve(self):
+        with self.changed:
+            self.conn.initiate_connection()
+            self.flush()
+        try:
+            while True:
+                data = self.recv()
+                if not data:
+                    return
+                with self.changed:
+                    for event in self.conn.receive_data(data):
+                        self.handle(event)
+                    self.flush()
+                    self.changed.notify_all()
+        except (OSError, ValueError, h2.exceptions.H2Error):
+            pass
+        finally:
+            with self.changed:
+                self.requests.clear()
+                self.changed.notify_all()
+
+    def handle(self, event):
+        if isinstance(event, h2.events.RequestReceived):
+            self.requests[event.stream_id] = (dict(event.headers), [])
+        elif isinstance(event, h2.events.DataReceived):
+            self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            self.requests[event.stream_id][1].append(event.data)
+        elif isinstance(event, h2.events.StreamEnded):
+            headers, body = self.requests.pop(event.stream_id)
+            self.server.responders.submit(self.respond, event.stream_id, headers, b''.join(body))
+
+    def respond(self, stream_id, headers, body):
+        path = headers[b':path'].decode()
+        if path.startswith('/bytes/'):
+            body = pattern(int(path.split('/')[2]))
+        elif path != '/echo':
+            time.sleep(self.server.rtt)
+            body = BODY
+        try:
+            with self.changed:
+                self.conn.send_headers(stream_id, [
+                    (b':status', b'200'), (b'content-type', b'application/x-amz-json-1.1'),
+                    (b'content-length', str(len(body)).encode())])
+                self.flush()
+            view = memoryview(body)
+            while view:
+                with self.changed:
+                    window = min(self.conn.local_flow_control_window(stream_id), self.conn.max_outbound_frame_size)
+                    if not window:
+                        self.changed.wait()
+                        continue
+                    self.conn.send_data(stream_id, view[:window].tobytes())
+                    self.flush()
+                view = view[window:]
+            with self.changed:
+                self.conn.end_stream(stream_id)
+                self.flush()
+        except (OSError, h2.exceptions.H2Error):
+            # The client cancelled the stream, or the connection went away
+            pass
+
+
+class H2Handler(Handler):
+    def setup(self):
+        # Responses written in pieces would otherwise wait on delayed ACKs
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().setup()
+
+    def handle(self):
+        if self.request.selected_alpn_protocol() != 'h2':
+            return super().handle()
+        connection = H2ServerConnection(self.server, self.request)
+        with self.server.lock:
+            self.server.h2_connections.append(connection)
+        connection.serve()
+
+
+class H2Server(TLSServer):
+    def __init__(self, cert, key, rtt, protocols=('h2', 'http/1.1')):
+        super().__init__(cert, key, rtt)
+        self.RequestHandlerClass = H2Handler
+        self.context.set_alpn_protocols(list(protocols))
+        self.h2_connections = []
+        # Starting a thread per stream would make the reader wait for each
+        # to start
+        self.responders = ThreadPoolExecutor(256)
+
+    def h2_connection_count(self):
+        with self.lock:
+            return len(self.h2_connections)
+
+    def drop_connections(self):
+        with self.lock:
+            connections, self.h2_connections = self.h2_connections, []
+        for connection in connections:
+            try:
+                connection.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class ServerProcess:
+    """An ``H2Server`` in a child process, so it does not compete with the
+    client for the interpreter, as a remote endpoint would not."""
+
+    def __init__(self, *args, **kwargs):
+        self._pipe, child = multiprocessing.Pipe()
+        multiprocessing.Process(target=self._serve, args=(child, args, kwargs), daemon=True).start()
+        self.server_port = self._pipe.recv()
+
+    @staticmethod
+    def _serve(pipe, args, kwargs):
+        server = H2Server(*args, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        pipe.send(server.server_port)
+        while True:
+            command = pipe.recv()
+            if command == 'stop':
+                return
+            pipe.send(getattr(server, command)())
+
+    def _command(self, command):
+        self._pipe.send(command)
+        return self._pipe.recv()
+
+    def reset(self):
+        """Returns the handshakes since the last reset."""
+        return self._command('reset')
+
+    def h2_connection_count(self):
+        return self._command('h2_connection_count')
+
+    def drop_connections(self):
+        return self._command('drop_connections')
+
+    def stop(self):
+        self._pipe.send('stop')
+
+
+def manager(client):
+    return client._endpoint.http_session._http2
+
+
+def url(server, path):
+    return f'https://localhost:{server.server_port}{path}'
+
+
+def check(server, http11_server, cert):
+    expected = call(make_client('localhost', server.server_port, cert))
+    client = make_client('localhost', server.server_port, cert, use_http2=True)
+    server.reset()
+    responses = [call(client) for _ in range(3)]
+    if any(response != expected for response in responses):
+        raise AssertionError(f'HTTP/2 got {responses}, expected {expected}')
+    handshakes = server.reset()
+    if handshakes != 1 or server.h2_connection_count() != 1:
+        raise AssertionError(f'{handshakes} handshakes for 3 HTTP/2 calls')
+
+    fallback = make_client('localhost', http11_server.server_port, cert, use_http2=True)
+    http11_server.reset()
+    if [call(fallback) for _ in range(3)] != [expected] * 3:
+        raise AssertionError('the HTTP/1.1 fallback got different responses')
+    # One handshake to learn the server does not speak HTTP/2, one for the pool
+    handshakes = http11_server.reset()
+    if handshakes != 2:
+        raise AssertionError(f'{handshakes} handshakes for the HTTP/1.1 fallback')
+
+    http2 = manager(client)
+    size = 5 << 20
+    response = http2.urlopen('GET', url(server, f'/bytes/{size}'), f'/bytes/{size}')
+    if b''.join(response.stream(100000)) != pattern(size):
+        raise AssertionError('a large streamed body differs')
+    response = http2.urlopen('GET', url(server, f'/bytes/{size}'), f'/bytes/{size}')
+    buffer, received = bytearray(70000), bytearray()
+    while count := response.readinto(buffer):
+        received += buffer[:count]
+    if received != pattern(size):
+        raise AssertionError('a large body read with readinto differs')
+    body = pattern(3 << 20)
+    response = http2.urlopen('POST', url(server, '/echo'), '/echo', body=body,
+                             headers={'Content-Length': str(len(body)), 'Expect': '100-continue'})
+    if response.read() != body:
+        raise AssertionError('a large request body was not echoed intact')
+
+    # Abandon bodies larger than the connection window part-read
+    for _ in range(3):
+        response = http2.urlopen('GET', url(server, f'/bytes/{32 << 20}'), f'/bytes/{32 << 20}')
+        response.read(1000)
+        response.close()
+    if call(client) != expected:
+        raise AssertionError('a call after abandoned bodies failed')
+
+    server.drop_connections()
+    time.sleep(0.1)
+    if call(client) != expected:
+        raise AssertionError('a call after the server dropped the connection failed')
+
+    server.reset()
+    with ThreadPoolExecutor(16) as executor:
+        responses = list(executor.map(lambda _: call(client), range(64)))
+    handshakes = server.reset()
+    if any(response != expected for response in responses) or handshakes:
+        raise AssertionError(f'64 concurrent calls opened {handshakes} connections')
+    client.close()
+    return expected
+
+
+def burst(server, cert, args, use_http2):
+    config = {'max_pool_connections': args.threads}
+    if use_http2:
+        config['use_http2'] = True
+    client = make_client('localhost', server.server_port, cert, **config)
+    server.reset()
+    barrier = threading.Barrier(args.threads)
+
+    def first_call(_):
+        barrier.wait()
+        start = time.perf_counter()
+        call(client)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(args.threads) as executor:
+        times = sorted(executor.map(first_call, range(args.threads)))
+    client.close()
+    return times[len(times) // 2], times[-1], server.reset()
+
+
+def steady(server, cert, args, use_http2):
+    config = {'max_pool_connections': args.threads}
+    if use_http2:
+        config['use_http2'] = True
+    client = make_client('localhost', server.server_port, cert, **config)
+    with ThreadPoolExecutor(args.threads) as executor:
+        list(executor.map(lambda _: call(client), range(args.threads)))
+        server.reset()
+        start = time.perf_counter()
+        list(executor.map(lambda _: call(client), range(args.threads * args.rounds)))
+        elapsed = time.perf_counter() - start
+    client.close()
+    return args.threads * args.rounds / elapsed, server.reset()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rtt', type=float, default=0.03, help='seconds per network round trip')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory)
+        server = ServerProcess(cert, key, args.rtt)
+        http11_server = ServerProcess(cert, key, args.rtt, protocols=('http/1.1',))
+        print(f'verified responses {check(server, http11_server, cert)}, bodies, fallback and multiplexing; '
+              f'rtt {args.rtt * 1e3:g}ms')
+        for use_http2 in (False, True):
+            label = 'HTTP/2' if use_http2 else 'HTTP/1.1'
+            median, slowest, handshakes = burst(server, cert, args, use_http2)
+            print(f'burst   {label:8} {args.threads} first calls  p50 {median * 1e3:6.1f}ms  '
+                  f'max {slowest * 1e3:6.1f}ms  {handshakes:3} connections')
+        for use_http2 in (False, True):
+            label = 'HTTP/2' if use_http2 else 'HTTP/1.1'
+            rate, handshakes = steady(server, cert, args, use_http2)
+            print(f'steady  {label:8} {rate:8.0f} calls/s  {handshakes:3} new connections '
+                  f'for {args.threads * args.rounds} calls')
+        for each in (server, http11_server):
+            each.stop()
+
+
+if __name__ == '__main__':
+    main()
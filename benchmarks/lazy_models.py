@@ -0,0 +1,154 @@
+"""Memory and time to create a client and make its first call: JSON models vs. indexed models.
+
+Indexed models are written to a temporary data path from the bundled
+service-2 JSON.  Before timing, each indexed model, with its SDK extras
+merged, must materialize to exactly the JSON model with the same order
+of operations and shapes, and must report the same error shapes and
+endpoint discovery operations.  The timings start from an empty loader
+cache and cover creating a client and resolving every shape one
+operation's request and response touch, which is what the first call of
+a client does.  Memory is what the client and the loaded model keep
+alive, measured with tracemalloc.
+
+    python benchmarks/lazy_models.py --services ec2 s3 codepipeline
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import botocore.model  # noqa: E402
+import botocore.session  # noqa: E402
+from botocore.loaders import JSONFileLoader, Loader, write_indexed_model  # noqa: E402
+from client_creation import reset_shared_data  # noqa: E402
+
+# service, the operation of its first call
+FIRST_CALLS = {
+    'ec2': 'DescribeInstances',
+    's3': 'GetObject',
+    'codepipeline': 'StartPipelineExecution',
+    'eks': 'DescribeCluster',
+    'rds': 'DescribeDBInstances',
+}
+# Also checked: services with endpoint discovery operations
+CHECKED = sorted(FIRST_CALLS) + ['dynamodb', 'timestream-write']
+
+
+def write_indexed_models(services, data_path):
+    loader = Loader()
+    for service in services:
+        api_version = loader.determine_latest_version(service, 'service-2')
+        source = os.path.join(loader.BUILTIN_DATA_PATH, service, api_version, 'service-2')
+        target = os.path.join(data_path, service, api_version)
+        os.makedirs(target, exist_ok=True)
+        write_indexed_model(JSONFileLoader().load_file(source), os.path.join(target, 'service-2'))
+
+
+def materialize(model):
+    return {
+        key: [(name, value[name]) for name in value] if key in ('operations', 'shapes') else value
+        for key, value in model.items()
+    }
+
+
+def check_identical(services, data_path):
+    for service in services:
+        json_model = Loader(cache={}).load_service_model(service, 'service-2')
+        indexed_model = Loader(extra_search_paths=[data_path], cache={}).load_service_model(service, 'service-2')
+        if type(indexed_model['shapes']).__name__ != 'IndexedModelSection':
+            raise AssertionError(f'{service}: the indexed model was not used')
+        if materialize(json_model) != materialize(indexed_model):
+            raise AssertionError(f'{service}: the indexed model differs from the JSON model')
+        derived = []
+        for model in (json_model, indexed_model):
+            service_model = botocore.model.ServiceModel(model)
+            discovery = service_model.endpoint_discovery_operation
+            derived.append((
+                [shape.name for shape in service_model.error_shapes],
+                discovery and discovery.name,
+                service_model.endpoint_discovery_required,
+            ))
+        if derived[0] != derived[1]:
+            raise AssertionError(f'{service}: error shapes or endpoint discovery differ')
+    return len(services)
+
+
+def walk(shape, seen):
+    if shape is None or shape.name in seen:
+        return
+    seen.add(shape.name)
+    for member in getattr(shape, 'members', {}).values():
+        walk(member, seen)
+    for name in ('member', 'key', 'value'):
+        if hasattr(shape, name):
+            walk(getattr(shape, name), seen)
+
+
+def first_call(service, data_path):
+    session = botocore.session.Session()
+    session.register_component('data_loader', Loader(extra_search_paths=data_path))
+    client = session.create_client(
+        service, region_name='us-east-1',
+        aws_access_key_id='AKIDEXAMPLE', aws_secret_access_key='SECRET',
+    )
+    created = time.perf_counter()
+    operation = client.meta.service_model.operation_model(FIRST_CALLS[service])
+    seen = set()
+    walk(operation.input_shape, seen)
+    walk(operation.output_shape, seen)
+    return client, created
+
+
+def measure(service, data_path, repeat):
+    create = call = float('inf')
+    for _ in range(repeat):
+        reset_shared_data()
+        gc.collect()
+        start = time.perf_counter()
+        client, created = first_call(service, data_path)
+        end = time.perf_counter()
+        create = min(create, created - start)
+        call = min(call, end - created)
+        del client
+    reset_shared_data()
+    gc.collect()
+    tracemalloc.start()
+    client, _ = first_call(service, data_path)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del client
+    return create, call, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--services', nargs='+', default=['ec2', 's3', 'codepipeline'], choices=sorted(FIRST_CALLS))
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_path:
+        write_indexed_models(CHECKED, data_path)
+        print(f'verified {check_identical(CHECKED, data_path)} indexed models, extras included')
+        # Paid by whichever runs first otherwise
+        first_call(args.services[0], [])
+        for service in args.services:
+            results = {}
+            for label, path in (('json', []), ('indexed', [data_path])):
+                results[label] = measure(service, path, args.repeat)
+            line = f'{service}.{FIRST_CALLS[service]}'.ljust(36)
+            for label, (create, call, retained) in results.items():
+                line += (f'  {label} create {create * 1e3:6.1f}ms first call {call * 1e3:5.1f}ms '
+                         f'{retained / 1048576:5.1f}MB')
+            print(line)
+    reset_shared_data()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Per-call parameter validation cost: compiled plans, trusted caller mode, reflective walk.
+
+That compiled plans report exactly the errors the reflective walk does is
+checked by tests/test_param_validation.py.
+
+    python benchmarks/param_validation.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import botocore.session  # noqa: E402
+from botocore.validate import ParamValidator  # noqa: E402
+from serializer_plans import CASES  # noqa: E402
+
+# Trusted caller mode only skips checks for calls made of scalars, like this
+# one from the rollback Lambda's history lookup
+SCALAR_CASE = ('codepipeline', 'ListPipelineExecutions', {
+    'pipelineName': 'self-healing-bank-pipeline',
+    'maxResults': 10,
+})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    session = botocore.session.get_session()
+    for service, operation, params in [*CASES.values(), SCALAR_CASE]:
+        shape = session.get_service_model(service).operation_model(operation).input_shape
+        results = {}
+        for label, compile_plans, trusted in (
+            ('reflective', False, False), ('compiled', True, False), ('trusted', True, True)
+        ):
+            validator = ParamValidator(trusted_caller=trusted)
+            validator.COMPILE_PLANS = compile_plans
+            if validator.validate(params, shape).has_errors():
+                raise AssertionError(f'{service}.{operation}: benchmark params are invalid')
+            seconds = min(timeit.repeat(
+                lambda: validator.validate(params, shape),
+                number=args.iterations, repeat=5
+            ))
+            results[label] = seconds / args.iterations * 1e6
+        name = f'{service}.{operation}'
+        print(f"{name:40} reflective {results['reflective']:6.2f}us  "
+              f"compiled {results['compiled']:6.2f}us ({results['reflective'] / results['compiled']:.1f}x)  "
+              f"trusted {results['trusted']:6.2f}us ({results['reflective'] / results['trusted']:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
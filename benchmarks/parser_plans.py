@@ -0,0 +1,138 @@
+"""Per-response parsing cost: compiled plans vs. reflective walk.
+
+The timed fixtures are shaped like responses recorded from the Lambdas'
+hot path.  That both ways parse to identical output is checked by
+tests/test_parser_plans.py.
+
+    python benchmarks/parser_plans.py --iterations 2000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import botocore.session  # noqa: E402
+from botocore.parsers import PROTOCOL_PARSERS  # noqa: E402
+
+TIMESTAMP = '2024-05-01T12:30:15Z'
+EPOCH = 1714566615.0
+
+
+def parsers(protocol):
+    compiled = PROTOCOL_PARSERS[protocol]()
+    reflective = PROTOCOL_PARSERS[protocol]()
+    reflective.COMPILE_PLANS = False
+    return compiled, reflective
+
+
+def execution_summary(i):
+    return {
+        'pipelineExecutionId': f'{i:08x}-1111-2222-3333-444455556666',
+        'status': 'Succeeded' if i % 4 else 'Failed',
+        'startTime': EPOCH - i * 3600,
+        'lastUpdateTime': EPOCH - i * 3600 + 420.5,
+        'sourceRevisions': [{
+            'actionName': 'Source',
+            'revisionId': f'{i:040x}',
+            'revisionSummary': '{"ProviderType":"GitHub","CommitMessage":"Fix transfer limits"}',
+            'revisionUrl': f'https://github.com/example/simple-bank-api/commit/{i:040x}',
+        }],
+        'trigger': {'triggerType': 'Webhook', 'triggerDetail': 'arn:aws:codestar-connections:us-east-1:123456789012:connection/abc'},
+        'executionMode': 'SUPERSEDED',
+        'executionType': 'STANDARD',
+    }
+
+
+def alarm_member(i):
+    return (
+        '<member>'
+        f'<AlarmName>Bank-API-Alarm-{i}</AlarmName>'
+        f'<AlarmArn>arn:aws:cloudwatch:us-east-1:123456789012:alarm:Bank-API-Alarm-{i}</AlarmArn>'
+        '<ActionsEnabled>true</ActionsEnabled>'
+        '<AlarmActions><member>arn:aws:sns:us-east-1:123456789012:alarm-notifications</member></AlarmActions>'
+        f'<StateValue>{"ALARM" if i == 0 else "OK"}</StateValue>'
+        '<StateReason>Threshold Crossed: 1 datapoint [7.0] was greater than the threshold (5.0).</StateReason>'
+        f'<StateUpdatedTimestamp>{TIMESTAMP}</StateUpdatedTimestamp>'
+        '<MetricName>HTTPCode_Target_5XX_Count</MetricName><Namespace>AWS/ApplicationELB</Namespace>'
+        '<Statistic>Sum</Statistic>'
+        '<Dimensions><member><Name>LoadBalancer</Name><Value>app/bank-api/0123456789abcdef</Value></member></Dimensions>'
+        '<Period>60</Period><EvaluationPeriods>1</EvaluationPeriods><Threshold>5.0</Threshold>'
+        '<ComparisonOperator>GreaterThanThreshold</ComparisonOperator>'
+        '</member>'
+    )
+
+
+def model_summary(i):
+    return {
+        'modelArn': f'arn:aws:bedrock:us-east-1::foundation-model/vendor.model-{i}-v1:0',
+        'modelId': f'vendor.model-{i}-v1:0',
+        'modelName': f'Model {i}',
+        'providerName': 'Vendor',
+        'inputModalities': ['TEXT'],
+        'outputModalities': ['TEXT'],
+        'responseStreamingSupported': True,
+        'customizationsSupported': [],
+        'inferenceTypesSupported': ['ON_DEMAND'],
+        'modelLifecycle': {'status': 'ACTIVE'},
+    }
+
+
+def fixtures():
+    """(protocol, service, operation, response) shaped like recorded responses"""
+    headers = {'x-amzn-requestid': 'req-1234', 'content-type': 'application/x-amz-json-1.1'}
+    alarms = ''.join(alarm_member(i) for i in range(10))
+    return [
+        ('json', 'codepipeline', 'ListPipelineExecutions', {
+            'status_code': 200, 'headers': headers,
+            'body': json.dumps({
+                'pipelineExecutionSummaries': [execution_summary(i) for i in range(10)],
+                'nextToken': 'token-abc',
+            }).encode('utf-8'),
+        }),
+        ('query', 'cloudwatch', 'DescribeAlarms', {
+            'status_code': 200, 'headers': {'x-amzn-requestid': 'req-1234'},
+            'body': ('<DescribeAlarmsResponse xmlns="http://monitoring.amazonaws.com/doc/2010-08-01/">'
+                     f'<DescribeAlarmsResult><MetricAlarms>{alarms}</MetricAlarms></DescribeAlarmsResult>'
+                     '<ResponseMetadata><RequestId>req-1234</RequestId></ResponseMetadata>'
+                     '</DescribeAlarmsResponse>').encode('utf-8'),
+        }),
+        ('query', 'sns', 'Publish', {
+            'status_code': 200, 'headers': {'x-amzn-requestid': 'req-1234'},
+            'body': (b'<PublishResponse xmlns="http://sns.amazonaws.com/doc/2010-03-31/">'
+                     b'<PublishResult><MessageId>94f20ce6-13c5-43a0-9a9e-ca52d816e90b</MessageId></PublishResult>'
+                     b'<ResponseMetadata><RequestId>req-1234</RequestId></ResponseMetadata></PublishResponse>'),
+        }),
+        ('rest-json', 'bedrock', 'ListFoundationModels', {
+            'status_code': 200, 'headers': {'x-amzn-requestid': 'req-1234'},
+            'body': json.dumps({'modelSummaries': [model_summary(i) for i in range(40)]}).encode('utf-8'),
+        }),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    session = botocore.session.get_session()
+    for protocol, service, operation, response in fixtures():
+        shape = session.get_service_model(service).operation_model(operation).output_shape
+        compiled, reflective = parsers(protocol)
+        results = {}
+        for label, instance in (('reflective', reflective), ('compiled', compiled)):
+            seconds = min(timeit.repeat(
+                lambda: instance.parse(dict(response), shape),
+                number=args.iterations, repeat=5
+            ))
+            results[label] = seconds / args.iterations * 1e6
+        name = f'{service}.{operation}'
+        print(f"{protocol:10} {name:40} reflective {results['reflective']:7.1f}us  "
+              f"compiled {results['compiled']:7.1f}us  ({results['reflective'] / results['compiled']:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+"""Body read throughput and peak memory for 1MB-1GB responses: zero-copy readinto and BytesQueueBuffer.
+
+A local HTTP server streams bodies of each ``--sizes`` size, plain or
+gzip-encoded, and urllib3 reads them in ``--piece`` byte pieces, as
+``StreamingBody`` does for an S3 download.
+
+* plain bodies are read with ``read(amt)``, with ``readinto`` as it was
+  (``read`` and then copy into the caller's buffer), and with the
+  ``readinto`` that reads from the connection straight into the buffer.
+* gzip bodies of repetitive JSON, which decompress to large chunks, are
+  read with ``read(amt)`` through the previous buffer, which sliced and
+  copied what was left of a chunk on every read, and through the current
+  one.  The previous buffer is only run up to ``--previous-limit`` bytes,
+  since its cost grows with the square of the chunk size.
+
+Peak memory is measured with ``tracemalloc`` in a separate, untimed
+pass.  Before timing, every reader must return the same bytes as the
+body, the two buffers must agree on random puts and gets, and a body cut
+short of its Content-Length must still raise ``IncompleteRead``.
+
+    python benchmarks/response_buffer.py --sizes 1M,16M,256M,1G
+"""
+import argparse
+import collections
+import gzip
+import hashlib
+import io
+import os
+import random
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import urllib3  # noqa: E402
+import urllib3.response  # noqa: E402
+from urllib3.exceptions import ProtocolError  # noqa: E402
+
+BLOCK = bytes(random.Random(0).getrandbits(8) for _ in range(1 << 20))
+RECORD = b'{"pipeline": "rollback", "stage": "deploy", "status": "Succeeded", "revision": "3f2a9c"}\n'
+UNITS = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+
+class PreviousBytesQueueBuffer:
+    """The buffer as it was: get() slices the first chunk and puts the rest back."""
+
+    def __init__(self):
+        self.buffer = collections.deque()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def put(self, data):
+        self.buffer.append(data)
+        self._size += len(data)
+
+    def get(self, n):
+        if n == 0:
+            return b''
+        elif not self.buffer:
+            raise RuntimeError('buffer is empty')
+        fetched = 0
+        ret = io.BytesIO()
+        while fetched < n:
+            remaining = n - fetched
+            chunk = self.buffer.popleft()
+            if remaining < len(chunk):
+                ret.write(chunk[:remaining])
+                self.buffer.appendleft(chunk[remaining:])
+                self._size -= remaining
+                break
+            ret.write(chunk)
+            self._size -= len(chunk)
+            fetched += len(chunk)
+            if not self.buffer:
+                break
+        return ret.getvalue()
+
+    def get_all(self):
+        result = b''.join(self.buffer)
+        self.buffer.clear()
+        self._size = 0
+        return result
+
+
+def parse_size(text):
+    unit = UNITS.get(text[-1].upper(), 1)
+    return int(text.rstrip('KMGkmg')) * unit
+
+
+def plain_body(size):
+    for offset in range(0, size, len(BLOCK)):
+        yield BLOCK[:size - offset]
+
+
+def json_body(size):
+    records = RECORD * (len(BLOCK) // len(RECORD) + 1)
+    for offset in range(0, size, len(BLOCK)):
+        yield records[:min(len(BLOCK), size - offset)]
+
+
+def digest(chunks):
+    hasher = hashlib.sha256()
+    for chunk in chunks:
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Small bodies written after the headers would otherwise wait on
+        # a delayed ACK
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        kind, size = self.path.strip('/').split('/')
+        size = int(size)
+        self.send_response(200)
+        if kind == 'gzip':
+            body = self.server.gzipped(size)
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_header('Content-Length', str(size))
+        if kind == 'truncated':
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+            size //= 2
+        self.end_headers()
+        for chunk in plain_body(size):
+            self.wfile.write(chunk)
+
+    def log_message(self, *args):
+        pass
+
+
+class BodyServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self._gzipped = {}
+        self._lock = threading.Lock()
+
+    def gzipped(self, size):
+        with self._lock:
+            if size not in self._gzipped:
+                out = io.BytesIO()
+                with gzip.GzipFile(fileobj=out, mode='wb', compresslevel=1) as f:
+                    for chunk in json_body(size):
+                        f.write(chunk)
+                self._gzipped[size] = out.getvalue()
+            return self._gzipped[size]
+
+
+def read_pieces(response, piece):
+    while True:
+        data = response.read(piece)
+        if not data:
+            return
+        yield data
+
+
+def readinto_pieces(readinto, response, piece):
+    buffer = bytearray(piece)
+    while True:
+        count = readinto(buffer)
+        if not count:
+            return
+        yield memoryview(buffer)[:count]
+
+
+def previous_readinto(response):
+    return lambda buffer: urllib3.response.BaseHTTPResponse.readinto(response, buffer)
+
+
+READERS = {
+    'read': lambda response, piece: read_pieces(response, piece),
+    'readinto (copy)': lambda response, piece: readinto_pieces(previous_readinto(response), response, piece),
+    'readinto': lambda response, piece: readinto_pieces(response.readinto, response, piece),
+}
+BUFFERS = {'previous buffer': PreviousBytesQueueBuffer, 'buffer': urllib3.response.BytesQueueBuffer}
+
+
+def drain(pool, path, reader, piece, buffer_class=urllib3.response.BytesQueueBuffer):
+    # Returns the number of bytes read, without keeping them
+    response = pool.request('GET', path, preload_content=False)
+    response._decoded_buffer = buffer_class()
+    total = 0
+    for data in READERS[reader](response, piece):
+        total += len(data)
+    response.release_conn()
+    return total
+
+
+def check_buffers():
+    rng = random.Random(1)
+    for _ in range(200):
+        previous, current = PreviousBytesQueueBuffer(), urllib3.response.BytesQueueBuffer()
+        for _ in range(rng.randrange(1, 30)):
+            action = rng.random()
+            if action < 0.4:
+                data = bytes(rng.getrandbits(8) for _ in range(rng.randrange(0, 300)))
+                previous.put(data)
+                current.put(data)
+            elif len(previous) and action < 0.8:
+                n = rng.randrange(1, 400)
+                if previous.get(n) != current.get(n):
+                    raise AssertionError('get() differs from the previous buffer')
+            elif len(previous) and action < 0.9:
+                n = rng.randrange(1, 400)
+                expected = previous.get(n)
+                into = bytearray(n)
+                count = current.get_into(memoryview(into))
+                if bytes(into[:count]) != expected:
+                    raise AssertionError('get_into() differs from the previous get()')
+            elif action >= 0.9:
+                if previous.get_all() != current.get_all():
+                    raise AssertionError('get_all() differs from the previous buffer')
+            if len(previous) != len(current):
+                raise AssertionError('the buffers hold different amounts')
+
+
+def check(pool, piece):
+    size = 3 * piece + piece // 3
+    expected = digest(plain_body(size))
+    for reader in READERS:
+        response = pool.request('GET', f'/plain/{size}', preload_content=False)
+        if digest(READERS[reader](response, piece)) != expected:
+            raise AssertionError(f'{reader} returned a different body')
+        response.release_conn()
+    expected = digest(json_body(size))
+    for label, buffer_class in BUFFERS.items():
+        response = pool.request('GET', f'/gzip/{size}', preload_content=False)
+        response._decoded_buffer = buffer_class()
+        if digest(read_pieces(response, piece)) != expected:
+            raise AssertionError(f'{label} returned a different gzip body')
+        response.release_conn()
+    response = pool.request('GET', f'/truncated/{size}', preload_content=False)
+    try:
+        list(readinto_pieces(response.readinto, response, piece))
+    except ProtocolError:
+        pass
+    else:
+        raise AssertionError('readinto did not notice a truncated body')
+    check_buffers()
+
+
+def measure(pool, path, reader, piece, buffer_class, size):
+    start = time.perf_counter()
+    total = drain(pool, path, reader, piece, buffer_class)
+    elapsed = time.perf_counter() - start
+    if total != size:
+        raise AssertionError(f'{path} {reader}: read {total} bytes, expected {size}')
+    tracemalloc.start()
+    drain(pool, path, reader, piece, buffer_class)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / elapsed / (1 << 20), peak
+
+
+def show_size(size):
+    for unit in 'GMK':
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f'{size // UNITS[unit]}{unit}B'
+    return f'{size}B'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1M,16M,256M,1G')
+    parser.add_argument('--piece', type=parse_size, default='256K', help='bytes asked for per read')
+    parser.add_argument('--previous-limit', type=parse_size, default='16M',
+                        help='largest gzip body to read through the previous buffer')
+    args = parser.parse_args()
+
+    server = BodyServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    pool = urllib3.HTTPConnectionPool('127.0.0.1', server.server_port, maxsize=1)
+    check(pool, args.piece)
+    print(f'verified bodies, buffers and truncation; {show_size(args.piece)} pieces')
+    for size in map(parse_size, args.sizes.split(',')):
+        for reader in READERS:
+            rate, peak = measure(pool, f'/plain/{size}', reader, args.piece, urllib3.response.BytesQueueBuffer, size)
+            print(f'  {show_size(size):6} plain {reader:16} {rate:8.0f} MB/s  peak {peak / (1 << 20):7.2f}MB')
+        gzipped = len(server.gzipped(size))
+        for label, buffer_class in BUFFERS.items():
+            if buffer_class is PreviousBytesQueueBuffer and size > args.previous_limit:
+                print(f'  {show_size(size):6} gzip  {label:16}  skipped, over --previous-limit')
+                continue
+            rate, peak = measure(pool, f'/gzip/{size}', 'read', args.piece, buffer_class, size)
+            print(f'  {show_size(size):6} gzip  {label:16} {rate:8.0f} MB/s  peak {peak / (1 << 20):7.2f}MB  '
+                  f'({gzipped // 1024}KB on the wire)')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
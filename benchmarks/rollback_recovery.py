@@ -0,0 +1,168 @@
+"""Time-to-recovery: direct ledger rollback vs. re-running CodePipeline.
+
+Both paths run against local fakes on a virtual clock. Each fake advances
+the clock by a modelled latency for the call it stands in for, so the
+report shows how long recovery takes end to end while the engine code
+itself runs for real. Override the stage timings to match your pipeline.
+
+    python benchmarks/rollback_recovery.py --build-seconds 300
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+from ledger import HEALTHY, DeploymentLedger, S3LedgerStore  # noqa: E402
+from rollback import RollbackEngine  # noqa: E402
+
+REPOSITORY = '123456789012.dkr.ecr.us-east-1.amazonaws.com/simple-bank-api'
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def __call__(self):
+        return self.now
+
+
+class FakeS3:
+    class Error(Exception):
+        def __init__(self, code):
+            super().__init__(code)
+            self.response = {'Error': {'Code': code}}
+
+    def __init__(self, clock, latency):
+        self.clock = clock
+        self.latency = latency
+        self.objects = {}
+
+    def _etag(self, Bucket, Key):
+        data = self.objects.get((Bucket, Key))
+        return None if data is None else f'"{hashlib.md5(data).hexdigest()}"'
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        self.clock.advance(self.latency)
+        etag = self._etag(Bucket, Key)
+        if etag is None:
+            raise self.Error('NoSuchKey')
+        if IfNoneMatch == etag:
+            raise self.Error('304')
+        return {'Body': io.BytesIO(self.objects[(Bucket, Key)]), 'ETag': etag}
+
+    def put_object(self, Bucket, Key, Body, IfMatch=None, IfNoneMatch=None):
+        self.clock.advance(self.latency)
+        etag = self._etag(Bucket, Key)
+        if (IfMatch and IfMatch != etag) or (IfNoneMatch == '*' and etag is not None):
+            raise self.Error('PreconditionFailed')
+        self.objects[(Bucket, Key)] = Body.read()
+        return {'ETag': self._etag(Bucket, Key)}
+
+
+class FakeKube:
+    def __init__(self, clock, patch_latency, rollout_seconds):
+        self.clock = clock
+        self.patch_latency = patch_latency
+        self.rollout_seconds = rollout_seconds
+        self.image = None
+
+    def patch_image(self, image):
+        self.clock.advance(self.patch_latency)
+        self.image = image
+
+    def wait_ready(self):
+        self.clock.advance(self.rollout_seconds)
+
+
+class FakeCodePipeline:
+    def __init__(self, clock, api_latency, stages):
+        self.clock = clock
+        self.api_latency = api_latency
+        self.stages = stages
+
+    def list_pipeline_executions(self, pipelineName, maxResults):
+        self.clock.advance(self.api_latency)
+        return {'pipelineExecutionSummaries': [{'pipelineExecutionId': 'exec-2', 'status': 'Succeeded'}]}
+
+    def start_pipeline_execution(self, name):
+        self.clock.advance(self.api_latency)
+        return {'pipelineExecutionId': 'exec-3'}
+
+    def run_to_completion(self):
+        for _, seconds in self.stages:
+            self.clock.advance(seconds)
+
+
+def seeded_ledger(s3, history, local_path):
+    ledger = DeploymentLedger(S3LedgerStore(s3, 'bench-bucket', local_path=local_path))
+    for i in range(history):
+        ledger.record(REPOSITORY, f'sha256:{i:064x}', commit_id=f'{i:08x}', execution_id=f'exec-{i}',
+                      status=HEALTHY)
+    ledger.record(REPOSITORY, 'sha256:' + 'f' * 64, commit_id='badc0de0', execution_id='exec-bad')
+
+
+def time_direct(args):
+    clock = VirtualClock()
+    s3 = FakeS3(clock, args.s3_latency)
+    kube = FakeKube(clock, args.patch_latency, args.rollout_seconds)
+    with tempfile.TemporaryDirectory() as tmp:
+        seeded_ledger(s3, args.history, os.path.join(tmp, 'seed.sqlite3'))
+
+        # The rollback Lambda opens the ledger fresh, as it would on an alarm
+        clock.now = 0.0
+        wall = time.perf_counter()
+        ledger = DeploymentLedger(S3LedgerStore(s3, 'bench-bucket', local_path=os.path.join(tmp, 'ledger.sqlite3')))
+        result = RollbackEngine(ledger, kube, clock=clock).rollback('benchmark')
+        wall = time.perf_counter() - wall
+    kube.wait_ready()
+    return {'recovery_seconds': clock.now, 'engine_cpu_ms': wall * 1000.0, 'to': result['to']}
+
+
+def time_pipeline(args):
+    clock = VirtualClock()
+    stages = [('Source', args.source_seconds), ('Build', args.build_seconds), ('Deploy', args.deploy_seconds)]
+    pipeline = FakeCodePipeline(clock, args.api_latency, stages)
+
+    # Mirrors lambda-rollback's fallback: inspect latest execution, then re-run everything
+    pipeline.list_pipeline_executions(pipelineName='bench', maxResults=1)
+    pipeline.start_pipeline_execution(name='bench')
+    pipeline.run_to_completion()
+    return {'recovery_seconds': clock.now, 'stages': dict(stages)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--history', type=int, default=40, help='ledger entries before the bad deploy')
+    parser.add_argument('--s3-latency', type=float, default=0.03)
+    parser.add_argument('--patch-latency', type=float, default=0.15)
+    parser.add_argument('--api-latency', type=float, default=0.2)
+    parser.add_argument('--rollout-seconds', type=float, default=20.0,
+                        help='time for replacement pods to pass readiness')
+    parser.add_argument('--source-seconds', type=float, default=15.0)
+    parser.add_argument('--build-seconds', type=float, default=240.0)
+    parser.add_argument('--deploy-seconds', type=float, default=90.0,
+                        help='deployment Lambda incl. kubectl apply and rollout')
+    args = parser.parse_args()
+
+    direct = time_direct(args)
+    pipeline = time_pipeline(args)
+    report = {
+        'direct_rollback': direct,
+        'pipeline_rerun': pipeline,
+        'speedup': round(pipeline['recovery_seconds'] / direct['recovery_seconds'], 1),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Per-call request serialization cost: compiled plans vs. reflective walk.
+
+That both ways produce byte-identical requests is checked by
+tests/test_serializer_plans.py.
+
+    python benchmarks/serializer_plans.py --iterations 20000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import botocore.session  # noqa: E402
+from botocore.serialize import SERIALIZERS  # noqa: E402
+
+# (service, operation, params) per protocol, taken from the Lambdas' hot path.
+# rest-json bodies go through the JSON plans; the blob case covers payloads
+# that bypass them.
+CASES = {
+    'json': ('codepipeline', 'StartPipelineExecution', {
+        'name': 'self-healing-bank-pipeline',
+        'variables': [{'name': 'IMAGE_TAG', 'value': 'abcd1234'}],
+        'sourceRevisions': [{'actionName': 'Source', 'revisionType': 'COMMIT_ID', 'revisionValue': 'abcd1234'}],
+        'clientRequestToken': 'token-1234567890',
+    }),
+    'query': ('sns', 'Publish', {
+        'TopicArn': 'arn:aws:sns:us-east-1:123456789012:alarm-notifications',
+        'Subject': 'Self-Healing Pipeline Notification',
+        'Message': 'ALARM: Bank-API-High-5XX-Errors. Rollback started.',
+        'MessageAttributes': {
+            'severity': {'DataType': 'String', 'StringValue': 'high'},
+            'execution': {'DataType': 'String', 'StringValue': 'exec-1234'},
+        },
+    }),
+    'rest-json': ('lambda', 'UpdateFunctionConfiguration', {
+        'FunctionName': 'self-healing-rollback',
+        'Timeout': 300,
+        'MemorySize': 512,
+        'Environment': {'Variables': {
+            'PIPELINE_NAME': 'self-healing-bank-pipeline',
+            'SNS_TOPIC_ARN': 'arn:aws:sns:us-east-1:123456789012:alarm-notifications',
+            'EKS_CLUSTER_NAME': 'bank-cluster',
+        }},
+        'TracingConfig': {'Mode': 'Active'},
+        'Layers': ['arn:aws:lambda:us-east-1:123456789012:layer:kubectl:3'],
+    }),
+    'rest-json-blob': ('bedrock-runtime', 'InvokeModel', {
+        'modelId': 'anthropic.claude-v2',
+        'body': json.dumps({'prompt': 'Human: roll back?\n\nAssistant:', 'max_tokens_to_sample': 500}),
+        'accept': 'application/json',
+        'contentType': 'application/json',
+    }),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    session = botocore.session.get_session()
+    for case, (service, operation, params) in CASES.items():
+        model = session.get_service_model(service)
+        operation_model = model.operation_model(operation)
+        serializer_cls = SERIALIZERS[model.metadata['protocol']]
+        results = {}
+        for label, compile_plans in (('reflective', False), ('compiled', True)):
+            serializer = serializer_cls()
+            serializer.COMPILE_PLANS = compile_plans
+            serializer.serialize_to_request(params, operation_model)
+            seconds = min(timeit.repeat(
+                lambda: serializer.serialize_to_request(params, operation_model),
+                number=args.iterations, repeat=5
+            ))
+            results[label] = seconds / args.iterations * 1e6
+        name = f'{service}.{operation}'
+        print(f"{case:14} {name:40} reflective {results['reflective']:6.2f}us  "
+              f"compiled {results['compiled']:6.2f}us  ({results['reflective'] / results['compiled']:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Time to create a Session and resolve its credentials: parsed config caching.
+
+A temporary config file holds ``--profiles`` profiles, as a config that
+lists every account of an organization does, and a credentials file
+holds a few more.  Cached configs must equal a fresh parse, must not
+change when a caller changes its copy, and must be parsed again once the
+file is modified.  Two places the credentials come from are measured:
+static keys for the profile in the config file, and a local container
+credentials endpoint, where every file-based provider ahead of it in the
+chain finds nothing.  Each mode must resolve the same credentials with
+the same method before it is timed.  ``parse`` parses the files for
+every session and ``cached`` reuses parsed files until they change.
+
+    python benchmarks/session_credentials.py --profiles 200 --sessions 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import botocore.configloader  # noqa: E402
+import botocore.session  # noqa: E402
+
+MODES = ('parse', 'cached')
+
+
+class ContainerCredentialsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({
+            'AccessKeyId': 'AKIDCONTAINER', 'SecretAccessKey': 'secret-container',
+            'Token': 'token-container', 'Expiration': '2099-01-01T00:00:00Z',
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def write_files(directory, profiles):
+    config_file = os.path.join(directory, 'config')
+    credentials_file = os.path.join(directory, 'credentials')
+    with open(config_file, 'w') as f:
+        f.write('[default]\nregion = us-east-1\n\n')
+        for number in range(profiles):
+            f.write(
+                f'[profile account{number}]\nregion = eu-west-1\noutput = json\n'
+                f'role_session_name = deploy{number}\nretry_mode = standard\nmax_attempts = 5\n'
+                f's3 =\n    addressing_style = path\n    signature_version = s3v4\n\n'
+            )
+        f.write('[profile static]\naws_access_key_id = AKIDCONFIG\naws_secret_access_key = secret-config\n')
+    with open(credentials_file, 'w') as f:
+        for number in range(10):
+            f.write(f'[ci{number}]\naws_access_key_id = AKIDCI{number}\naws_secret_access_key = secret{number}\n\n')
+    return config_file, credentials_file
+
+
+def check_cache(config_file):
+    loaders = (botocore.configloader.load_config, botocore.configloader.raw_config_parse)
+    for load in loaders:
+        botocore.configloader._PARSED_CONFIG_CACHE.clear()
+        parsed = load(config_file)
+        cached = load(config_file)
+        if cached != parsed or cached is parsed:
+            raise AssertionError(f'{load.__name__}: the cached copy differs from the parse')
+        cached.clear()
+        if load(config_file) != parsed:
+            raise AssertionError(f'{load.__name__}: changing a returned config changed the cache')
+    with open(config_file) as f:
+        contents = f.read()
+    try:
+        with open(config_file, 'a') as f:
+            f.write('[profile added]\nregion = us-west-2\n')
+        if 'added' not in botocore.configloader.load_config(config_file)['profiles']:
+            raise AssertionError('a modified config file was not parsed again')
+    finally:
+        with open(config_file, 'w') as f:
+            f.write(contents)
+    return len(loaders)
+
+
+def resolve(profile):
+    session = botocore.session.Session(profile=profile)
+    credentials = session.get_credentials()
+    return credentials.method, credentials.get_frozen_credentials()
+
+
+def set_mode(mode):
+    botocore.configloader._PARSED_CONFIG_CACHE.clear()
+
+
+def measure(mode, profile, sessions):
+    set_mode(mode)
+    expected = resolve(profile)
+    times = []
+    for _ in range(sessions):
+        if mode == 'parse':
+            botocore.configloader._PARSED_CONFIG_CACHE.clear()
+        start = time.perf_counter()
+        result = resolve(profile)
+        times.append(time.perf_counter() - start)
+        if result != expected:
+            raise AssertionError(f'{mode}: resolved {result}, expected {expected}')
+    times.sort()
+    return expected, times[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', type=int, default=200)
+    parser.add_argument('--sessions', type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ContainerCredentialsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    with tempfile.TemporaryDirectory() as directory:
+        config_file, credentials_file = write_files(directory, args.profiles)
+        for name in list(os.environ):
+            if name.startswith('AWS_') and name != 'AWS_CA_BUNDLE':
+                del os.environ[name]
+        os.environ['AWS_CONFIG_FILE'] = config_file
+        os.environ['AWS_SHARED_CREDENTIALS_FILE'] = credentials_file
+        os.environ['AWS_EC2_METADATA_DISABLED'] = 'true'
+        print(f'verified cached configs from {check_cache(config_file)} loaders')
+        print(f'{args.profiles} profiles, median of {args.sessions} sessions')
+        scenarios = (
+            ('config file keys', 'static', {}),
+            ('container endpoint', None, {
+                'AWS_CONTAINER_CREDENTIALS_FULL_URI': f'http://127.0.0.1:{server.server_port}/creds',
+            }),
+        )
+        for label, profile, environ in scenarios:
+            os.environ.update(environ)
+            results = {mode: measure(mode, profile, args.sessions) for mode in MODES}
+            if len({expected for expected, _ in results.values()}) != 1:
+                raise AssertionError(f'{label}: the modes resolved different credentials')
+            method = results['parse'][0][0]
+            line = f'{label} ({method})'.ljust(46)
+            for mode, (_, median) in results.items():
+                line += f'  {mode} {median * 1e3:6.2f}ms'
+            print(line)
+            for name in environ:
+                del os.environ[name]
+    set_mode('parse')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Handshakes and connect cost against a local TLS server: per-connection CA loading vs. shared, resuming SSL contexts.
+
+The server from ``connection_prewarm.py`` closes the connection after
+every response, so each call reconnects, as calls do after a server or
+load balancer closes idle or long-lived connections.  Clients verify it
+with botocore's ``cacert.pem`` plus the server's self-signed
+certificate, issued for ``localhost`` only, which is what
+``AWS_CA_BUNDLE`` pointing at a private CA appended to the usual bundle
+looks like.  The server counts full and resumed handshakes.
+
+Before timing, every mode must get the same responses, a client that
+does not trust the certificate must still be refused, and one that does
+not verify must still connect.
+
+    python benchmarks/tls_contexts.py --calls 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import botocore.httpsession  # noqa: E402
+import botocore.session  # noqa: E402
+from botocore.exceptions import SSLError  # noqa: E402
+from connection_prewarm import TLSServer, call, make_certificate, make_client  # noqa: E402
+
+MODES = (('per-connection', (False, False)), ('shared', (True, False)), ('shared+resumed', (True, True)))
+
+
+def set_mode(mode):
+    botocore.httpsession._SHARED_SSL_CONTEXTS.clear()
+    session_cls = botocore.httpsession.URLLib3Session
+    session_cls.SHARE_SSL_CONTEXTS, session_cls.RESUME_TLS_SESSIONS = mode
+
+
+def make_bundle(directory, cert):
+    bundle = os.path.join(directory, 'bundle.pem')
+    with open(bundle, 'w') as f:
+        for path in (botocore.httpsession.DEFAULT_CA_BUNDLE, cert):
+            with open(path) as source:
+                f.write(source.read())
+    return bundle
+
+
+def check(server, bundle):
+    expected = None
+    for label, mode in MODES:
+        set_mode(mode)
+        client = make_client('localhost', server.server_port, bundle)
+        responses = [call(client) for _ in range(3)]
+        if expected is None:
+            expected = responses[0]
+        if any(response != expected for response in responses):
+            raise AssertionError(f'{label}: got {responses}, expected {expected}')
+        untrusting = make_client('localhost', server.server_port, True, retries={'max_attempts': 1})
+        try:
+            call(untrusting)
+        except SSLError:
+            pass
+        else:
+            raise AssertionError(f'{label}: a client that does not trust the server connected')
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            call(make_client('localhost', server.server_port, False))
+        # An address the certificate does not cover
+        try:
+            call(make_client('127.0.0.1', server.server_port, bundle, retries={'max_attempts': 1}))
+        except SSLError:
+            pass
+        else:
+            raise AssertionError(f'{label}: a certificate for another host was accepted')
+    return expected
+
+
+def measure(server, bundle, args, mode):
+    set_mode(mode)
+    session = botocore.session.Session()
+    start = time.perf_counter()
+    clients = [make_client('localhost', server.server_port, bundle, session=session) for _ in range(args.clients)]
+    created = time.perf_counter() - start
+    for client in clients:
+        call(client)
+    server.reset()
+    times = []
+    for number in range(args.calls):
+        start = time.perf_counter()
+        call(clients[number % len(clients)])
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return created, times[len(times) // 2], server.handshakes, server.resumed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=5)
+    parser.add_argument('--rtt', type=float, default=0, help='seconds per network round trip')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory, names='DNS:localhost')
+        bundle = make_bundle(directory, cert)
+        server = TLSServer(cert, key, args.rtt)
+        server.close_connections = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f'verified responses {check(server, bundle)} and certificate checks')
+        print(f'{args.calls} calls, each on a new connection, across {args.clients} clients, '
+              f'bundle of {os.path.getsize(bundle) // 1024}KB')
+        for label, mode in MODES:
+            created, median, handshakes, resumed = measure(server, bundle, args, mode)
+            print(f'  {label:15} create clients {created * 1e3:6.1f}ms  call p50 {median * 1e3:6.2f}ms  '
+                  f'{handshakes} handshakes, {resumed} resumed')
+        server.shutdown()
+    set_mode((True, True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Cost of urllib3's parse_url per request: normalized-URL fast path and the parsed authority cache.
+
+Each request botocore sends through urllib3 parses its URL twice: the
+full URL to find the connection pool, and the request target in
+``urlopen``.  The URLs are the ones the rollback Lambdas build: a few
+service hosts and already percent-encoded paths and queries.
+``previous`` is parse_url as it was, which normalized every component
+and every host on every call; ``uncached`` is the current parser with
+its authority cache cleared before every call, and ``current`` is the
+parser as it runs.
+
+tests/test_url_parsing.py checks that the current parser agrees with
+``previous`` on these URLs and on a fuzz corpus.
+
+    python benchmarks/url_parsing.py --repeat 20
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+from urllib3.exceptions import LocationParseError  # noqa: E402
+from urllib3.util import url as url_module  # noqa: E402
+from urllib3.util.url import Url, parse_url  # noqa: E402
+
+URLS = (
+    'https://codepipeline.us-east-1.amazonaws.com/',
+    'https://bedrock-runtime.us-east-1.amazonaws.com/model/anthropic.claude-3-haiku-20240307-v1%3A0/invoke',
+    'https://lambda.us-east-1.amazonaws.com/2015-03-31/functions/rollback-prod/invocations',
+    'https://rollback-artifacts.s3.us-east-1.amazonaws.com/pipelines/deploy/2024-06-01/build%20output.zip'
+    '?versionId=3HL4kqtJlcpXroDTDmJ.rmSpXd3dIbrHY&x-id=GetObject',
+    'https://sts.us-east-1.amazonaws.com/',
+)
+
+def previous_parse_url(url):
+    """parse_url as it was before the fast path and the authority cache."""
+    if not url:
+        return Url()
+
+    source_url = url
+    if not url_module._SCHEME_RE.search(url):
+        url = '//' + url
+
+    try:
+        scheme, authority, path, query, fragment = url_module._URI_RE.match(url).groups()
+        normalize_uri = scheme is None or scheme.lower() in url_module._NORMALIZABLE_SCHEMES
+
+        if scheme:
+            scheme = scheme.lower()
+
+        if authority:
+            auth, _, host_port = authority.rpartition('@')
+            auth = auth or None
+            host, port = url_module._HOST_PORT_RE.match(host_port).groups()
+            if auth and normalize_uri:
+                auth = url_module._encode_invalid_chars(auth, url_module._USERINFO_CHARS)
+            if port == '':
+                port = None
+        else:
+            auth, host, port = None, None, None
+
+        if port is not None:
+            port_int = int(port)
+            if not (0 <= port_int <= 65535):
+                raise LocationParseError(url)
+        else:
+            port_int = None
+
+        host = url_module._normalize_host(host, scheme)
+
+        if normalize_uri and path:
+            path = url_module._remove_path_dot_segments(path)
+            path = url_module._encode_invalid_chars(path, url_module._PATH_CHARS)
+        if normalize_uri and query:
+            query = url_module._encode_invalid_chars(query, url_module._QUERY_CHARS)
+        if normalize_uri and fragment:
+            fragment = url_module._encode_invalid_chars(fragment, url_module._FRAGMENT_CHARS)
+
+    except (ValueError, AttributeError) as e:
+        raise LocationParseError(source_url) from e
+
+    if not path:
+        if query is not None or fragment is not None:
+            path = ''
+        else:
+            path = None
+
+    return Url(scheme=scheme, auth=auth, host=host, port=port_int, path=path, query=query, fragment=fragment)
+
+
+def uncached_parse_url(url):
+    url_module._parse_authority.cache_clear()
+    return parse_url(url)
+
+
+def request_targets():
+    for url in URLS:
+        parsed = parse_url(url)
+        yield url, parsed.request_uri
+
+
+def measure(parse, repeat):
+    requests = list(request_targets())
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(200):
+            for url, target in requests:
+                parse(url)
+                parse(target)
+        best = min(best, time.perf_counter() - start)
+    return best / (200 * len(requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f'{len(URLS)} service URLs, full URL and request target parsed per request')
+    results = {}
+    for label, parse in (('previous', previous_parse_url), ('uncached', uncached_parse_url), ('current', parse_url)):
+        results[label] = measure(parse, args.repeat)
+        print(f'  {label:9} {results[label] * 1e6:6.2f}us per request  '
+              f'{results["previous"] / results[label]:5.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+"""Peak memory and time for large Query responses: buffered vs. incremental parsing.
+
+The buffered path joins the whole body into bytes and builds a full
+ElementTree, as botocore did for every response. The incremental path
+feeds the parser from the stream and releases each list item once it is
+parsed. Bodies are generated chunk by chunk, so neither path is charged
+for the benchmark's own fixture. Both paths must produce identical output,
+and a client calling a local stand-in for CloudWatch must take the
+incremental path, give handlers the body as bytes, and retry a connection
+dropped mid-body.
+
+    python benchmarks/xml_incremental_parse.py --sizes 2 8 32
+"""
+import argparse
+import gc
+import io
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+
+import botocore.session  # noqa: E402
+import urllib3  # noqa: E402
+from botocore.config import Config  # noqa: E402
+from botocore.exceptions import ConnectionClosedError  # noqa: E402
+from botocore.parsers import QueryParser  # noqa: E402
+
+TIMESTAMP = '2024-05-01T12:30:15Z'
+CHUNK_SIZE = 65536
+
+
+def alarm_member(i):
+    return (
+        '<member>'
+        f'<AlarmName>Bank-API-Alarm-{i}</AlarmName>'
+        f'<AlarmArn>arn:aws:cloudwatch:us-east-1:123456789012:alarm:Bank-API-Alarm-{i}</AlarmArn>'
+        '<ActionsEnabled>true</ActionsEnabled>'
+        '<AlarmActions><member>arn:aws:sns:us-east-1:123456789012:alarm-notifications</member></AlarmActions>'
+        f'<StateValue>{"ALARM" if i % 50 == 0 else "OK"}</StateValue>'
+        '<StateReason>Threshold Crossed: 1 datapoint [7.0] was greater than the threshold (5.0).</StateReason>'
+        f'<StateUpdatedTimestamp>{TIMESTAMP}</StateUpdatedTimestamp>'
+        '<MetricName>HTTPCode_Target_5XX_Count</MetricName><Namespace>AWS/ApplicationELB</Namespace>'
+        '<Statistic>Sum</Statistic>'
+        '<Dimensions><member><Name>LoadBalancer</Name><Value>app/bank-api/0123456789abcdef</Value></member></Dimensions>'
+        '<Period>60</Period><EvaluationPeriods>1</EvaluationPeriods><Threshold>5.0</Threshold>'
+        '<ComparisonOperator>GreaterThanThreshold</ComparisonOperator>'
+        '</member>'
+    )
+
+
+def subscription_member(i):
+    return (
+        '<member>'
+        f'<SubscriptionArn>arn:aws:sns:us-east-1:123456789012:alarm-notifications:{i:08x}-aaaa-bbbb-cccc-dddddddddddd</SubscriptionArn>'
+        '<Owner>123456789012</Owner><Protocol>email</Protocol>'
+        f'<Endpoint>oncall+{i}@example.com</Endpoint>'
+        '<TopicArn>arn:aws:sns:us-east-1:123456789012:alarm-notifications</TopicArn>'
+        '</member>'
+    )
+
+
+# service, operation, namespace, list element, member generator
+CASES = [
+    ('cloudwatch', 'DescribeAlarms', 'http://monitoring.amazonaws.com/doc/2010-08-01/', 'MetricAlarms', alarm_member),
+    ('sns', 'ListSubscriptions', 'http://sns.amazonaws.com/doc/2010-03-31/', 'Subscriptions', subscription_member),
+]
+
+
+class GeneratedBody:
+    """A response body produced a chunk at a time, like urllib3's HTTPResponse.stream"""
+
+    def __init__(self, operation, namespace, list_name, member, count):
+        self.operation = operation
+        self.namespace = namespace
+        self.list_name = list_name
+        self.member = member
+        self.count = count
+
+    def _pieces(self):
+        yield (f'<{self.operation}Response xmlns="{self.namespace}"><{self.operation}Result>'
+               f'<{self.list_name}>')
+        for i in range(self.count):
+            yield self.member(i)
+        yield (f'</{self.list_name}></{self.operation}Result>'
+               f'<ResponseMetadata><RequestId>req-1234</RequestId></ResponseMetadata>'
+               f'</{self.operation}Response>')
+
+    def stream(self, amt=CHUNK_SIZE):
+        buffered = []
+        size = 0
+        for piece in self._pieces():
+            buffered.append(piece.encode('utf-8'))
+            size += len(buffered[-1])
+            if size >= amt:
+                yield b''.join(buffered)
+                buffered, size = [], 0
+        if buffered:
+            yield b''.join(buffered)
+
+    def read(self, amt=None):
+        raise NotImplementedError('use stream()')
+
+    def size(self):
+        return sum(len(chunk) for chunk in self.stream())
+
+
+def parse_buffered(parser, body, shape):
+    # What AWSResponse.content + QueryParser did before
+    data = b''.join(body.stream())
+    return parser.parse({'status_code': 200, 'headers': {}, 'body': data, 'context': {}}, shape)
+
+
+def parse_incremental(parser, body, shape):
+    return parser.parse({'status_code': 200, 'headers': {}, 'body': body, 'context': {}}, shape)
+
+
+def measure(func, *args, repeat=3):
+    seconds = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(*args)
+        seconds = min(seconds, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    result = func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def count_for_size(member, megabytes):
+    return max(1, int(megabytes * 1024 * 1024 / len(member(12345).encode('utf-8'))))
+
+
+def check_urllib3_stream(session):
+    """The parser must read a real urllib3 response the same way it reads bytes"""
+    service, operation, namespace, list_name, member = CASES[0]
+    shape = session.get_service_model(service).operation_model(operation).output_shape
+    body = GeneratedBody(operation, namespace, list_name, member, 200)
+    data = b''.join(body.stream())
+    raw = urllib3.HTTPResponse(body=io.BytesIO(data), preload_content=False)
+    parser = QueryParser()
+    streamed = parser.parse({'status_code': 200, 'headers': {}, 'body': raw, 'context': {}}, shape)
+    buffered = parser.parse({'status_code': 200, 'headers': {}, 'body': data, 'context': {}}, shape)
+    if streamed != buffered:
+        raise AssertionError('urllib3 stream parse differs from buffered parse')
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests += 1
+        data = self.server.body
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.server.truncate:
+            # Drop the connection halfway through the body
+            self.wfile.write(data[:len(data) // 2])
+            self.close_connection = True
+        else:
+            self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class CloudWatchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, body):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.body = body
+        self.requests = 0
+        self.truncate = False
+
+
+def check_client(session):
+    """A client must parse large bodies off the connection, and only when no handler needs the bytes"""
+    service, operation, namespace, list_name, member = CASES[0]
+    shape = session.get_service_model(service).operation_model(operation).output_shape
+    data = b''.join(GeneratedBody(operation, namespace, list_name, member, count_for_size(member, 2)).stream())
+    expected = QueryParser().parse({'status_code': 200, 'headers': {}, 'body': data, 'context': {}}, shape)
+    server = CloudWatchServer(data)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    session.set_credentials('testing', 'testing')
+    client = session.create_client(
+        service, region_name='us-east-1', endpoint_url=f'http://127.0.0.1:{server.server_port}',
+        config=Config(retries={'mode': 'standard', 'total_max_attempts': 2}),
+    )
+    query_parser = client._endpoint._response_parser_factory.create_parser('query')
+    streamed = []
+    parse_stream = query_parser._parse_xml_stream_to_dom
+
+    def counting_parse_stream(stream, *args, **kwargs):
+        streamed.append(stream)
+        return parse_stream(stream, *args, **kwargs)
+
+    query_parser._parse_xml_stream_to_dom = counting_parse_stream
+    try:
+        response = client.describe_alarms()
+        response['ResponseMetadata'].pop('HTTPHeaders')
+        expected['ResponseMetadata'].pop('HTTPHeaders', None)
+        response['ResponseMetadata'].pop('RetryAttempts')
+        if response != expected:
+            raise AssertionError('client response differs from buffered parse')
+        if len(streamed) != 1:
+            raise AssertionError('client did not parse the response incrementally')
+
+        bodies = []
+
+        def record_body(response_dict, **kwargs):
+            bodies.append(response_dict['body'])
+
+        events = ['before-parse.cloudwatch.DescribeAlarms', 'response-received.cloudwatch.DescribeAlarms']
+        for event in events:
+            client.meta.events.register(event, record_body)
+        client.describe_alarms()
+        for event in events:
+            client.meta.events.unregister(event, record_body)
+        if bodies != [data, data]:
+            raise AssertionError('handlers did not get the body as bytes')
+        if len(streamed) != 1:
+            raise AssertionError('response was parsed incrementally although handlers needed its bytes')
+    finally:
+        query_parser._parse_xml_stream_to_dom = parse_stream
+
+    server.truncate = True
+    server.requests = 0
+    try:
+        client.describe_alarms()
+    except ConnectionClosedError:
+        pass
+    else:
+        raise AssertionError('a truncated body did not raise ConnectionClosedError')
+    if server.requests != 2:
+        raise AssertionError(f'a truncated body was sent {server.requests} times, expected a retry')
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=float, nargs='+', default=[2, 8, 32], help='body sizes in MB')
+    args = parser.parse_args()
+
+    session = botocore.session.get_session()
+    check_urllib3_stream(session)
+    check_client(session)
+    query_parser = QueryParser()
+
+    for service, operation, namespace, list_name, member in CASES:
+        shape = session.get_service_model(service).operation_model(operation).output_shape
+        for megabytes in args.sizes:
+            body = GeneratedBody(operation, namespace, list_name, member, count_for_size(member, megabytes))
+            buffered, buffered_s, buffered_peak = measure(parse_buffered, query_parser, body, shape)
+            incremental, incremental_s, incremental_peak = measure(parse_incremental, query_parser, body, shape)
+            if buffered != incremental:
+                raise AssertionError(f'{service}.{operation}: incremental parse differs')
+            name = f'{service}.{operation}'
+            print(f'{name:28} {body.size() / 1048576:6.1f}MB  '
+                  f'buffered {buffered_s:6.2f}s {buffered_peak / 1048576:7.1f}MB peak  '
+                  f'incremental {incremental_s:6.2f}s {incremental_peak / 1048576:7.1f}MB peak')
+
+
+if __name__ == '__main__':
+    main()
@@ -64,9 +64,68 @@ module "eks" {
     }
   }
 
+  # Let the deployment and rollback Lambdas talk to the Kubernetes API.
+  # The deployment Lambda applies the app's Deployment, HPA and Service
+  # manifests and runs the canaries, so it keeps cluster-admin; the rollback
+  # Lambda only gets the RBAC bound to its group below.
+  manage_aws_auth_configmap = true
+  aws_auth_roles = [
+    {
+      rolearn  = aws_iam_role.lambda_deployment_role.arn
+      username = "lambda-deployment"
+      groups   = ["system:masters"]
+    },
+    {
+      rolearn  = aws_iam_role.lambda_role.arn
+      username = "lambda-rollback"
+      groups   = [local.rollback_k8s_group]
+    },
+  ]
+
   tags = var.tags
 }
 
+locals {
+  rollback_k8s_group = "lambda-rollback"
+}
+
+# The rollback Lambda only patches the app Deployment's image
+# (rollback.py EksClient.patch_image)
+resource "kubernetes_role" "lambda_rollback" {
+  metadata {
+    name      = "lambda-rollback"
+    namespace = "default"
+  }
+
+  rule {
+    api_groups     = ["apps"]
+    resources      = ["deployments"]
+    resource_names = ["simple-bank-api"]
+    verbs          = ["patch"]
+  }
+
+  depends_on = [module.eks]
+}
+
+resource "kubernetes_role_binding" "lambda_rollback" {
+  metadata {
+    name      = "lambda-rollback"
+    namespace = "default"
+  }
+
+  role_ref {
+    api_group = "rbac.authorization.k8s.io"
+    kind      = "Role"
+    name      = kubernetes_role.lambda_rollback.metadata[0].name
+  }
+
+  subject {
+    api_group = "rbac.authorization.k8s.io"
+    kind      = "Group"
+    name      = local.rollback_k8s_group
+  }
+}
+
 
 # module "eks" {
 #   source  = "terraform-aws-modules/eks/aws"
@@ -302,6 +361,8 @@ resource "aws_lambda_function" "rollback" {
       BEDROCK_MODEL_ID = var.bedrock_model_id
       BEDROCK_REGION   = var.aws_region
       SNS_TOPIC_ARN    = aws_sns_topic.alarm_notifications.arn
+      LEDGER_BUCKET    = aws_s3_bucket.codepipeline_artifacts.bucket
+      EKS_CLUSTER_NAME = module.eks.cluster_name
     }
   }
 
@@ -321,7 +382,7 @@ resource "aws_lambda_function" "deployment" {
   role          = aws_iam_role.lambda_deployment_role.arn
   handler       = "lambda_function.lambda_handler"
   runtime       = "python3.9"
-  timeout       = 300  # 5 minutes for deployment operations
+  timeout       = 900  # 15 minutes to cover canary bake windows
 
   environment {
     variables = {
@@ -329,6 +390,12 @@ resource "aws_lambda_function" "deployment" {
       ECR_REPOSITORY_URL = aws_ecr_repository.app.repository_url
       SNS_TOPIC_ARN     = aws_sns_topic.alarm_notifications.arn
       AWS_DEFAULT_REGION = var.aws_region
+      LEDGER_BUCKET     = aws_s3_bucket.codepipeline_artifacts.bucket
+      GITHUB_REPOSITORY = trimsuffix(replace(var.github_repo_url, "https://github.com/", ""), ".git") # "owner/repo", to look up commit authors
+      CANARY_ENABLED    = var.canary_enabled
+      CANARY_STEPS      = var.canary_steps
+      CANARY_BAKE_SECONDS = var.canary_bake_seconds
+      CANARY_PROMOTE_INCONCLUSIVE = var.canary_promote_inconclusive
     }
   }
 
@@ -106,6 +106,31 @@ variable "lambda_function_name" {
   default     = "self-healing-rollback-function"
 }
 
+# Canary Configuration
+variable "canary_enabled" {
+  description = "Roll new images out as a metric-gated canary instead of replacing all replicas"
+  type        = string
+  default     = "true"
+}
+
+variable "canary_steps" {
+  description = "Comma-separated traffic percentages the canary is promoted through"
+  type        = string
+  default     = "10,25,50"
+}
+
+variable "canary_bake_seconds" {
+  description = "Seconds each canary step is observed before promotion"
+  type        = string
+  default     = "120"
+}
+
+variable "canary_promote_inconclusive" {
+  description = "Promote a canary whose last step never saw enough traffic to judge, instead of aborting it"
+  type        = string
+  default     = "False"
+}
+
 # Bedrock Configuration
 variable "bedrock_model_id" {
   description = "The model ID for Amazon Bedrock (e.g., anthropic.claude-v2)"
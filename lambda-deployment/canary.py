@@ -0,0 +1,408 @@
+import json
+import math
+import os
+import random
+import logging
+import subprocess
+import time
+
+import yaml
+
+logger = logging.getLogger()
+
+APP_NAME = 'simple-bank-api'
+CANARY_NAME = f'{APP_NAME}-canary'
+CONTAINER_NAME = 'bank-app'
+NAMESPACE = 'default'
+# The manifest update_deployment applies; canaries and promotions are rendered from it
+MANIFEST_PATH = 'app/kubernetes/deployment.yaml'
+METRICS_PORT = 5000
+# Left over after a canary for removing it and reporting the outcome
+CLEANUP_SECONDS = 30
+
+# Gate verdicts
+PASS = 'PASS'
+FAIL = 'FAIL'
+INCONCLUSIVE = 'INCONCLUSIVE'
+
+
+class CanaryAborted(Exception):
+    """Raised when a canary is rolled back without being promoted"""
+
+
+class CanaryOutOfTime(CanaryAborted):
+    """Raised before a canary step or promotion that might not finish in the time left"""
+
+
+class CanaryConfig:
+    """Rollout steps, bake window and gate thresholds for a canary"""
+
+    def __init__(self, steps=(10, 25, 50), bake_seconds=120, poll_seconds=15,
+                 max_error_rate=0.01, max_latency_p95_ms=500.0, min_requests=20,
+                 canary_timeout_seconds=120, promote_timeout_seconds=300,
+                 extra_bake_seconds=None, promote_inconclusive=False):
+        self.steps = tuple(steps)
+        self.bake_seconds = bake_seconds
+        self.poll_seconds = poll_seconds
+        self.max_error_rate = max_error_rate
+        self.max_latency_p95_ms = max_latency_p95_ms
+        self.min_requests = min_requests
+        # Longest wait for the canary, or the promoted stable Deployment, to roll out
+        self.canary_timeout_seconds = canary_timeout_seconds
+        self.promote_timeout_seconds = promote_timeout_seconds
+        # How much longer the last step may bake while it has too little traffic to judge
+        self.extra_bake_seconds = bake_seconds if extra_bake_seconds is None else extra_bake_seconds
+        # Whether a canary still inconclusive after that is promoted rather than aborted
+        self.promote_inconclusive = promote_inconclusive
+
+    @classmethod
+    def from_env(cls):
+        """Build the config from CANARY_* environment variables"""
+        steps = os.getenv('CANARY_STEPS', '10,25,50')
+        return cls(
+            steps=[int(step) for step in steps.split(',') if step.strip()],
+            bake_seconds=int(os.getenv('CANARY_BAKE_SECONDS', '120')),
+            poll_seconds=int(os.getenv('CANARY_POLL_SECONDS', '15')),
+            max_error_rate=float(os.getenv('CANARY_MAX_ERROR_RATE', '0.01')),
+            max_latency_p95_ms=float(os.getenv('CANARY_MAX_LATENCY_P95_MS', '500')),
+            min_requests=int(os.getenv('CANARY_MIN_REQUESTS', '20')),
+            canary_timeout_seconds=int(os.getenv('CANARY_TIMEOUT_SECONDS', '120')),
+            promote_timeout_seconds=int(os.getenv('CANARY_PROMOTE_TIMEOUT_SECONDS', '300')),
+            extra_bake_seconds=int(os.getenv('CANARY_EXTRA_BAKE_SECONDS', os.getenv('CANARY_BAKE_SECONDS', '120'))),
+            promote_inconclusive=os.getenv('CANARY_PROMOTE_INCONCLUSIVE', 'False').lower() == 'true',
+        )
+
+
+def is_canary_enabled():
+    # On unless turned off, as in infra/variables.tf
+    return os.getenv('CANARY_ENABLED', 'True').lower() == 'true'
+
+
+def canary_replicas(stable_replicas, percent):
+    """Number of canary pods so that they take roughly `percent` of traffic.
+
+    The Service balances across every pod labelled app=simple-bank-api, so
+    the canary's share is canary / (stable + canary). Stable replicas are
+    left alone because the HPA owns them.
+    """
+    if percent >= 100:
+        return stable_replicas
+    return max(1, int(math.ceil(stable_replicas * percent / (100.0 - percent))))
+
+
+def render_deployment(manifest, image, name=APP_NAME, namespace=NAMESPACE, replicas=None, track=None):
+    """The Deployment in `manifest` (deployment.yaml's text) running `image`, as JSON for kubectl.
+
+    Everything else in it, env included, is kept as written, so a canary runs
+    the build exactly as it will be shipped. `track` is added as a label to
+    the Deployment, its selector and its pods; `replicas` replaces the count.
+    """
+    deployment = next(
+        doc for doc in yaml.safe_load_all(manifest) if doc and doc.get('kind') == 'Deployment'
+    )
+    metadata = deployment['metadata']
+    metadata['name'] = name
+    metadata['namespace'] = namespace
+    spec = deployment['spec']
+    for container in spec['template']['spec']['containers']:
+        if container['name'] == CONTAINER_NAME:
+            container['image'] = image
+    if track:
+        for labels in (metadata.setdefault('labels', {}), spec['selector']['matchLabels'],
+                       spec['template']['metadata']['labels']):
+            labels['track'] = track
+    if replicas is not None:
+        spec['replicas'] = replicas
+    return json.dumps(deployment)
+
+
+def metrics_delta(before, after):
+    """Counters observed between two /metrics snapshots"""
+    return {
+        'requests': after['requests_total'] - before['requests_total'],
+        'errors': after['errors_total'] - before['errors_total'],
+        'latency_p95_ms': after['latency_p95_ms'],
+    }
+
+
+def evaluate_gate(window, config):
+    """Judge one bake window of canary metrics.
+
+    Returns a (verdict, reason) tuple where verdict is PASS, FAIL or
+    INCONCLUSIVE (not enough traffic yet to decide).
+    """
+    requests = window['requests']
+    errors = window['errors']
+
+    if requests <= 0:
+        return INCONCLUSIVE, 'no canary traffic observed yet'
+    # A p95 over a handful of requests is mostly the slowest cold start
+    if requests < config.min_requests:
+        return INCONCLUSIVE, f'only {requests}/{config.min_requests} requests observed'
+
+    error_rate = errors / float(requests)
+    if error_rate > config.max_error_rate:
+        return FAIL, (f"error rate {error_rate:.2%} over {requests} requests "
+                      f"exceeds {config.max_error_rate:.2%}")
+    if window['latency_p95_ms'] > config.max_latency_p95_ms:
+        return FAIL, (f"p95 latency {window['latency_p95_ms']:.0f}ms "
+                      f"exceeds {config.max_latency_p95_ms:.0f}ms")
+
+    return PASS, f'error rate {error_rate:.2%}, p95 {window["latency_p95_ms"]:.0f}ms'
+
+
+class KubectlCluster:
+    """Canary operations against the EKS cluster, driven through kubectl"""
+
+    def __init__(self, namespace=NAMESPACE, manifest_path=MANIFEST_PATH):
+        self.namespace = namespace
+        self.manifest_path = manifest_path
+
+    def _render(self, image, **kwargs):
+        with open(self.manifest_path) as f:
+            return render_deployment(f.read(), image, namespace=self.namespace, **kwargs)
+
+    def _kubectl(self, *args, stdin=None):
+        result = subprocess.run(
+            ['kubectl', '-n', self.namespace] + list(args),
+            input=stdin, capture_output=True, text=True, check=True
+        )
+        return result.stdout
+
+    def has_stable(self):
+        """Whether the stable Deployment exists yet"""
+        return bool(self._kubectl(
+            'get', f'deployment/{APP_NAME}', '--ignore-not-found', '-o', 'name'
+        ).strip())
+
+    def stable_replicas(self):
+        return int(self._kubectl(
+            'get', f'deployment/{APP_NAME}', '-o', 'jsonpath={.spec.replicas}'
+        ) or 0)
+
+    def stable_image(self):
+        return self._kubectl(
+            'get', f'deployment/{APP_NAME}',
+            '-o', 'jsonpath={.spec.template.spec.containers[0].image}'
+        )
+
+    def scale_canary(self, image, replicas, timeout=120):
+        """Create or update the canary Deployment with `replicas` pods"""
+        manifest = self._render(image, name=CANARY_NAME, replicas=replicas, track='canary')
+        self._kubectl('apply', '-f', '-', stdin=manifest)
+        self._kubectl('rollout', 'status', f'deployment/{CANARY_NAME}', f'--timeout={timeout}s')
+
+    def canary_metrics(self):
+        """Sum /metrics across canary pods via the API server proxy"""
+        pods = self._kubectl(
+            'get', 'pods', '-l', f'app={APP_NAME},track=canary',
+            '-o', 'jsonpath={.items[*].metadata.name}'
+        ).split()
+        totals = {'requests_total': 0, 'errors_total': 0, 'latency_p95_ms': 0.0}
+        for pod in pods:
+            raw = self._kubectl(
+                'get', '--raw',
+                f'/api/v1/namespaces/{self.namespace}/pods/{pod}:{METRICS_PORT}/proxy/metrics'
+            )
+            sample = json.loads(raw)
+            totals['requests_total'] += sample['requests_total']
+            totals['errors_total'] += sample['errors_total']
+            # Worst pod wins; averaging would hide a single slow replica
+            totals['latency_p95_ms'] = max(totals['latency_p95_ms'], sample['latency_p95_ms'])
+        return totals
+
+    def promote(self, image, timeout=300):
+        """Roll the stable Deployment onto the canary image, with the manifest the canary ran"""
+        # At its current size, which the HPA owns
+        manifest = self._render(image, replicas=self.stable_replicas())
+        self._kubectl('apply', '-f', '-', stdin=manifest)
+        self._kubectl('rollout', 'status', f'deployment/{APP_NAME}', f'--timeout={timeout}s')
+
+    def remove_canary(self):
+        self._kubectl('delete', 'deployment', CANARY_NAME, '--ignore-not-found=true')
+
+
+class SimulatedCluster:
+    """In-memory stand-in for KubectlCluster used to exercise gates locally.
+
+    Each canary pod serves `rps` requests per simulated second with the
+    given error rate and p95 latency.
+    """
+
+    def __init__(self, stable_replicas=2, error_rate=0.0, latency_p95_ms=40.0, rps=5, seed=None):
+        self.replicas = stable_replicas
+        self.image = 'stable'
+        self.error_rate = error_rate
+        self.latency_p95_ms = latency_p95_ms
+        self.rps = rps
+        self.canary_pods = 0
+        self.canary_image = None
+        self.clock = 0.0
+        self._requests = 0
+        self._errors = 0
+        self._random = random.Random(seed)
+
+    def sleep(self, seconds):
+        served = int(self.canary_pods * self.rps * seconds)
+        failed = sum(1 for _ in range(served) if self._random.random() < self.error_rate)
+        self._requests += served
+        self._errors += failed
+        self.clock += seconds
+
+    def monotonic(self):
+        return self.clock
+
+    def has_stable(self):
+        return True
+
+    def stable_replicas(self):
+        return self.replicas
+
+    def stable_image(self):
+        return self.image
+
+    def scale_canary(self, image, replicas, timeout=120):
+        self.canary_image = image
+        self.canary_pods = replicas
+
+    def canary_metrics(self):
+        return {
+            'requests_total': self._requests,
+            'errors_total': self._errors,
+            'latency_p95_ms': self.latency_p95_ms if self._requests else 0.0,
+        }
+
+    def promote(self, image, timeout=300):
+        self.image = image
+
+    def remove_canary(self):
+        self.canary_pods = 0
+        self.canary_image = None
+
+
+class CanaryController:
+    """Shift traffic to a new image in steps, promoting only if each step's gate passes.
+
+    `time_left` returns the seconds the caller has left (in a Lambda,
+    get_remaining_time_in_millis() / 1000). A step or the promotion is only
+    started if it can run to its rollout timeout and still leave
+    CLEANUP_SECONDS; otherwise the canary is removed and CanaryOutOfTime
+    raised, leaving the stable Deployment as it was.
+    """
+
+    def __init__(self, cluster, config, sleep=time.sleep, clock=time.monotonic, time_left=None):
+        self.cluster = cluster
+        self.config = config
+        self.sleep = sleep
+        self.clock = clock
+        self.time_left = time_left
+
+    def _reserve(self, seconds, what):
+        if self.time_left is None:
+            return
+        left = self.time_left()
+        if left < seconds + CLEANUP_SECONDS:
+            raise CanaryOutOfTime(f"Canary stopped before {what}: {left:.0f}s left, "
+                                  f"{seconds + CLEANUP_SECONDS:.0f}s needed")
+
+    def _can_extend(self):
+        # An extended bake must still leave time to promote and clean up
+        if self.time_left is None:
+            return True
+        needed = self.config.poll_seconds + self.config.promote_timeout_seconds + CLEANUP_SECONDS
+        return self.time_left() >= needed
+
+    def bake(self, percent, extra_seconds=0):
+        """Watch canary metrics for one bake window and return the final verdict.
+
+        While the verdict is INCONCLUSIVE, the window is extended by up to
+        `extra_seconds`, as long as there is time for it.
+        """
+        start = self.clock()
+        baseline = self.cluster.canary_metrics()
+        verdict, reason = INCONCLUSIVE, 'bake window not started'
+
+        while True:
+            elapsed = self.clock() - start
+            if elapsed >= self.config.bake_seconds:
+                if verdict != INCONCLUSIVE or elapsed >= self.config.bake_seconds + extra_seconds:
+                    break
+                if not self._can_extend():
+                    break
+                logger.info(f"Canary at {percent}% still inconclusive, extending the bake")
+            self.sleep(self.config.poll_seconds)
+            window = metrics_delta(baseline, self.cluster.canary_metrics())
+            verdict, reason = evaluate_gate(window, self.config)
+            logger.info(f"Canary at {percent}%: {verdict} ({reason})")
+            if verdict == FAIL:
+                break
+
+        return verdict, reason
+
+    def run(self, image):
+        """Roll `image` out through every step.
+
+        Raises CanaryAborted on a failed gate or when the last step is
+        still inconclusive (unless config.promote_inconclusive), and
+        CanaryOutOfTime, a CanaryAborted, when the next step or the
+        promotion might not finish in time.
+        """
+        stable_replicas = self.cluster.stable_replicas()
+        previous_image = self.cluster.stable_image()
+        logger.info(f"Starting canary of {image} over {stable_replicas} stable replicas "
+                    f"(currently {previous_image}), steps {list(self.config.steps)}")
+
+        try:
+            for index, percent in enumerate(self.config.steps):
+                last = index == len(self.config.steps) - 1
+                replicas = canary_replicas(stable_replicas, percent)
+                effective = 100.0 * replicas / (stable_replicas + replicas)
+                # The step and the promotion after it must both fit, so the stable
+                # Deployment is never left mid-rollout when the time runs out
+                self._reserve(self.config.canary_timeout_seconds + self.config.bake_seconds
+                              + self.config.promote_timeout_seconds, f'the {percent}% step')
+                logger.info(f"Canary step {percent}%: {replicas} pod(s), ~{effective:.0f}% of traffic")
+                self.cluster.scale_canary(image, replicas, timeout=self.config.canary_timeout_seconds)
+
+                verdict, reason = self.bake(percent, self.config.extra_bake_seconds if last else 0)
+                if verdict == FAIL:
+                    raise CanaryAborted(f"Canary aborted at {percent}%: {reason}")
+                if verdict == INCONCLUSIVE:
+                    if last and not self.config.promote_inconclusive:
+                        # Never judged: promoting it would ship a build nobody checked
+                        raise CanaryAborted(f"Canary aborted at {percent}%, still inconclusive: {reason}")
+                    # Later steps get more traffic; the ELB alarm remains the backstop
+                    logger.warning(f"Canary step {percent}% inconclusive ({reason}), continuing")
+
+            self._reserve(self.config.promote_timeout_seconds, 'promotion')
+            self.cluster.promote(image, timeout=self.config.promote_timeout_seconds)
+            logger.info(f"Canary passed all steps, promoted {image}")
+        finally:
+            self.cluster.remove_canary()
+
+        return {'image': image, 'previous_image': previous_image, 'steps': list(self.config.steps)}
+
+
+def simulate(error_rate, latency_p95_ms=40.0, config=None, seed=0, rps=5):
+    """Run a canary against SimulatedCluster and report the outcome"""
+    cluster = SimulatedCluster(error_rate=error_rate, latency_p95_ms=latency_p95_ms, rps=rps, seed=seed)
+    controller = CanaryController(cluster, config or CanaryConfig(), sleep=cluster.sleep, clock=cluster.monotonic)
+    try:
+        controller.run('candidate')
+        return {'promoted': True, 'image': cluster.image, 'elapsed_seconds': cluster.clock}
+    except CanaryAborted as e:
+        return {'promoted': False, 'image': cluster.image, 'elapsed_seconds': cluster.clock, 'reason': str(e)}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Simulate canary gate evaluation locally')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of canary requests that fail (1.0 models BUG_ENABLED=True)')
+    parser.add_argument('--latency-p95-ms', type=float, default=40.0)
+    parser.add_argument('--rps', type=float, default=5,
+                        help='Requests per second each canary pod serves (0 models an idle service)')
+    args = parser.parse_args()
+    print(json.dumps(simulate(args.error_rate, args.latency_p95_ms, rps=args.rps), indent=2))
@@ -4,7 +4,11 @@ import os
 import logging
 import subprocess
 import base64
+import urllib.request
 from botocore.exceptions import ClientError
+from canary import CanaryAborted, CanaryConfig, CanaryController, KubectlCluster, is_canary_enabled
+from ledger import DeploymentLedger, S3LedgerStore, ABORTED, HEALTHY, PENDING, UNHEALTHY
+from notifications import Notifier, flush_on_exit
 
 # Setup logging
 logger = logging.getLogger()
@@ -13,8 +17,12 @@ logger.setLevel(logging.INFO)
 # Initialize AWS clients
 codepipeline = boto3.client('codepipeline')
 sns = boto3.client('sns')
+notifier = Notifier(sns)
 eks = boto3.client('eks')
+ecr = boto3.client('ecr')
+s3 = boto3.client('s3')
 
+@flush_on_exit(notifier)
 def lambda_handler(event, context):
     logger.info("Received event: " + json.dumps(event, indent=2))
 
@@ -40,6 +48,11 @@ def lambda_handler(event, context):
     ecr_repository_url = os.getenv('ECR_REPOSITORY_URL')
     sns_topic_arn = os.getenv('SNS_TOPIC_ARN')
     aws_region = os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
+    ledger_bucket = os.getenv('LEDGER_BUCKET')
+    ledger = open_ledger(ledger_bucket) if ledger_bucket else None
+    image_digest = None
+    # Set once a PENDING record for this deployment is in the ledger
+    pending = False
 
     if not all([eks_cluster_name, ecr_repository_url, sns_topic_arn]):
         logger.error("Missing required environment variables")
@@ -69,22 +82,65 @@ def lambda_handler(event, context):
 
         logger.info(f"Using image tag: {image_tag}")
 
+        # Pin the exact digest so a rollback restores these bytes rather than a moved tag
+        image_digest = resolve_image_digest(ecr_repository_url, image_tag)
+        author = None
+        if ledger and image_digest:
+            author = resolve_commit_author(os.getenv('GITHUB_REPOSITORY'), source_revision)
+
+        def record(status):
+            if ledger and image_digest:
+                return record_deployment(ledger, ecr_repository_url, image_digest, image_tag,
+                                         source_revision, author, execution_id, status)
+            return None
+
         # Send deployment started notification
         send_notification(sns_topic_arn, "🚀 DEPLOYMENT STARTED",
-                         f"Starting deployment of {pipeline_name} execution {execution_id} to EKS cluster {eks_cluster_name}")
+                         f"Starting deployment of {pipeline_name} execution {execution_id} to EKS cluster {eks_cluster_name}",
+                         execution_id)
 
         # Configure kubectl for EKS
         configure_kubectl(eks_cluster_name, aws_region)
 
-        # Update Kubernetes deployment with new image
-        update_deployment(ecr_repository_url, image_tag)
+        cluster = KubectlCluster()
+        use_canary = is_canary_enabled()
+        if use_canary and not cluster.has_stable():
+            # Nothing to canary against: the first deployment applies the manifests directly
+            logger.info("No stable deployment yet, deploying directly instead of as a canary")
+            use_canary = False
+
+        if use_canary:
+            # Shift a slice of traffic to the new image and promote only if its metrics hold up.
+            # The image is only recorded once the canary is decided: until it is promoted the
+            # stable Deployment keeps serving the previous image, which must stay the ledger's
+            # current one for the rollback Lambda.
+            try:
+                CanaryController(
+                    cluster, CanaryConfig.from_env(),
+                    time_left=lambda: context.get_remaining_time_in_millis() / 1000.0
+                ).run(f'{ecr_repository_url}:{image_tag}')
+            except CanaryAborted:
+                record(ABORTED)
+                raise
+            record(HEALTHY)
+        else:
+            # Only a recorded deployment can have its verdict written
+            pending = record(PENDING) is not None
+
+            # Update Kubernetes deployment with new image
+            update_deployment(ecr_repository_url, image_tag)
+
+            # Wait for deployment rollout
+            wait_for_rollout()
 
-        # Wait for deployment rollout
-        wait_for_rollout()
+            if pending:
+                # The rollback Lambda may already have found it UNHEALTHY; that verdict stands
+                mark_deployment(ledger, image_digest, HEALTHY, expected_status=PENDING)
 
         # Send success notification
         send_notification(sns_topic_arn, "✅ DEPLOYMENT SUCCESSFUL",
-                         f"Successfully deployed {pipeline_name} execution {execution_id} to EKS cluster {eks_cluster_name}")
+                         f"Successfully deployed {pipeline_name} execution {execution_id} to EKS cluster {eks_cluster_name}",
+                         execution_id)
 
         return {
             'statusCode': 200,
@@ -95,8 +151,11 @@ def lambda_handler(event, context):
         error_message = f"Deployment failed for {pipeline_name} execution {execution_id}: {str(e)}"
         logger.error(error_message)
 
+        if pending:
+            mark_deployment(ledger, image_digest, UNHEALTHY, expected_status=PENDING)
+
         # Send failure notification
-        send_notification(sns_topic_arn, "❌ DEPLOYMENT FAILED", error_message)
+        send_notification(sns_topic_arn, "❌ DEPLOYMENT FAILED", error_message, execution_id)
 
         return {
             'statusCode': 500,
@@ -212,14 +271,66 @@ def wait_for_rollout():
         logger.error(f"Rollout failed: {e.stderr}")
         raise
 
-def send_notification(topic_arn, subject, message):
-    """Send notification via SNS"""
+def resolve_image_digest(ecr_repository_url, image_tag):
+    """Look up the manifest digest ECR holds for an image tag"""
     try:
-        sns.publish(
-            TopicArn=topic_arn,
-            Subject=subject,
-            Message=message
+        repository_name = ecr_repository_url.split('/', 1)[1]
+        response = ecr.describe_images(
+            repositoryName=repository_name,
+            imageIds=[{'imageTag': image_tag}]
         )
-        logger.info(f"Notification sent: {subject}")
+        return response['imageDetails'][0]['imageDigest']
+    except Exception as e:
+        logger.error(f"Failed to resolve digest for {ecr_repository_url}:{image_tag}: {e}")
+        return None
+
+def resolve_commit_author(repository, commit_id):
+    """GitHub login (or email) of the author of a commit, or None if it can't be looked up
+
+    `repository` is "owner/repo". Private repositories need a token in GITHUB_TOKEN.
+    """
+    if not repository or not commit_id:
+        return None
+    request = urllib.request.Request(
+        f'https://api.github.com/repos/{repository}/commits/{commit_id}',
+        headers={'Accept': 'application/vnd.github+json'}
+    )
+    token = os.getenv('GITHUB_TOKEN')
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            commit = json.load(response)
+    except Exception as e:
+        logger.warning(f"Failed to look up the author of {repository}@{commit_id}: {e}")
+        return None
+    git_author = commit.get('commit', {}).get('author') or {}
+    return (commit.get('author') or {}).get('login') or git_author.get('email') or git_author.get('name')
+
+def open_ledger(bucket):
+    """Open the deployment ledger kept in S3, or None if it can't be read"""
+    try:
+        return DeploymentLedger(S3LedgerStore(s3, bucket))
+    except Exception as e:
+        logger.error(f"Failed to open deployment ledger: {e}")
+        return None
+
+def record_deployment(ledger, image, digest, tag, commit_id, author, execution_id, status=PENDING):
+    """Add a deployment to the deployment ledger; returns the record, or None if it failed"""
+    try:
+        return ledger.record(image, digest, tag=tag, commit_id=commit_id, author=author,
+                             execution_id=execution_id, status=status)
     except Exception as e:
-        logger.error(f"Failed to send notification: {e}")
\ No newline at end of file
+        logger.error(f"Failed to record deployment in ledger: {e}")
+        return None
+
+def mark_deployment(ledger, digest, status, expected_status=None):
+    """Record the health outcome of a deployment in the deployment ledger"""
+    try:
+        ledger.mark(digest, status, expected_status)
+    except Exception as e:
+        logger.error(f"Failed to update ledger: {e}")
+
+def send_notification(topic_arn, subject, message, execution_id=None):
+    """Queue a notification; it is published in the background and flushed on handler exit"""
+    notifier.notify(topic_arn, subject, message, key=execution_id)
@@ -0,0 +1 @@
+../shared/notifications.py
\ No newline at end of file
@@ -24,6 +24,7 @@ import socket
 import botocore.exceptions
 import botocore.parsers
 import botocore.serialize
+import botocore.validate
 from botocore.config import Config
 from botocore.endpoint import EndpointCreator
 from botocore.regions import EndpointResolverBuiltins as EPRBuiltins
@@ -168,7 +169,14 @@ class ClientArgsCreator:
             socket_options=socket_options,
             client_cert=new_config.client_cert,
             proxies_config=new_config.proxies_config,
+            max_pool_connections_per_host=(
+                new_config.max_pool_connections_per_host
+            ),
+            max_idle_time=new_config.max_idle_time,
+            use_http2=new_config.use_http2,
         )
+        if new_config.prewarm_connections:
+            endpoint.prewarm(new_config.prewarm_connections, wait=False)
 
         serializer = botocore.serialize.create_serializer(
             protocol, parameter_validation
@@ -228,9 +236,17 @@ class ClientArgsCreator:
         parameter_validation = True
         if client_config and not client_config.parameter_validation:
             parameter_validation = False
+        elif (
+            client_config
+            and client_config.parameter_validation
+            == botocore.validate.TRUSTED_CALLER
+        ):
+            parameter_validation = botocore.validate.TRUSTED_CALLER
         elif scoped_config:
             raw_value = scoped_config.get('parameter_validation')
-            if raw_value is not None:
+            if raw_value == botocore.validate.TRUSTED_CALLER:
+                parameter_validation = raw_value
+            elif raw_value is not None:
                 parameter_validation = ensure_boolean(raw_value)
 
         s3_config = self.compute_s3_config(client_config)
@@ -304,6 +320,12 @@ class ClientArgsCreator:
                 ),
                 account_id_endpoint_mode=client_config.account_id_endpoint_mode,
                 auth_scheme_preference=client_config.auth_scheme_preference,
+                max_pool_connections_per_host=(
+                    client_config.max_pool_connections_per_host
+                ),
+                max_idle_time=client_config.max_idle_time,
+                prewarm_connections=client_config.prewarm_connections,
+                use_http2=client_config.use_http2,
             )
         self._compute_retry_config(config_kwargs)
         self._compute_connect_timeout(config_kwargs)
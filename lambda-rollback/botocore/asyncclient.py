@@ -0,0 +1,249 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""Clients whose operations are awaited on an asyncio event loop.
+
+``AsyncClient`` wraps a client made the usual way, and shares its
+service model, serializer, endpoint resolution, signer, event hooks,
+retry handlers and parser; only the requests are sent differently, over
+``botocore.asynchttp``::
+
+    sns = AsyncClient(session.create_client('sns'))
+    response = await sns.publish(TopicArn=topic_arn, Message=message)
+
+Everything but sending still runs on the event loop, including work
+handlers registered on the client do, such as refreshing credentials.
+"""
+import asyncio
+import logging
+
+from botocore.asynchttp import AsyncHTTPSession
+from botocore.compress import maybe_compress_request
+from botocore.context import start_as_current_context
+from botocore.endpoint import Endpoint
+from botocore.exceptions import HTTPClientError
+from botocore.httpchecksum import apply_request_checksum
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncEndpoint(Endpoint):
+    """An ``Endpoint`` whose requests are coroutines.
+
+    Requests are created, signed, retried and parsed as ``Endpoint`` does
+    it, with the same events; retry delays are awaited instead of slept.
+    """
+
+    async def prewarm(self, connections=1):
+        """Open ``connections`` pooled connections to this endpoint's host.
+
+        Does nothing for HTTP sessions that cannot pre-warm connections.
+        """
+        prewarm = getattr(self.http_session, 'prewarm', None)
+        if prewarm is not None:
+            await prewarm([self.host], connections=connections)
+
+    async def close(self):
+        aclose = getattr(self.http_session, 'aclose', None)
+        if aclose is None:
+            self.http_session.close()
+        else:
+            await aclose()
+
+    async def make_request(self, operation_model, request_dict):
+        logger.debug(
+            "Making request for %s with params: %s",
+            operation_model,
+            request_dict,
+        )
+        return await self._send_request(request_dict, operation_model)
+
+    async def _send_request(self, request_dict, operation_model):
+        attempts = 1
+        context = request_dict['context']
+        self._update_retries_context(context, attempts)
+        request = self.create_request(request_dict, operation_model)
+        success_response, exception = await self._get_response(
+            request, operation_model, context
+        )
+        while True:
+            delay = self._retry_delay(
+                attempts,
+                operation_model,
+                request_dict,
+                success_response,
+                exception,
+            )
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+            attempts += 1
+            self._update_retries_context(context, attempts, success_response)
+            request.reset_stream()
+            request = self.create_request(request_dict, operation_model)
+            success_response, exception = await self._get_response(
+                request, operation_model, context
+            )
+        return self._request_result(attempts, success_response, exception)
+
+    async def _get_response(self, request, operation_model, context):
+        success_response, exception = await self._do_get_response(
+            request, operation_model, context
+        )
+        self._emit_response_received(
+            operation_model, context, success_response, exception
+        )
+        return success_response, exception
+
+    async def _do_get_response(self, request, operation_model, context):
+        try:
+            http_response = self._emit_before_send(request, operation_model)
+            if http_response is None:
+                http_response = await self._send(request)
+        except HTTPClientError as e:
+            return (None, e)
+        except Exception as e:
+            logger.debug(
+                "Exception received when sending HTTP request.", exc_info=True
+            )
+            return (None, e)
+        return self._parse_response(http_response, operation_model, context)
+
+    async def _send(self, request):
+        return await self.http_session.send(request)
+
+
+class AsyncClient:
+    """Awaitable operations of a botocore client.
+
+    Each operation of ``client`` is a coroutine function of the same name
+    and arguments here, which returns the same response or raises the
+    same exceptions.  Streaming response bodies are read whole before the
+    response is returned; operations with event stream responses are not
+    supported.
+
+    :param client: The client to send operations for.  It keeps working
+        as before, with its own connections.
+    :param http_session: The ``AsyncHTTPSession`` to send requests with.
+        By default one with the client's certificate, timeout and pool
+        settings.  Proxies are not supported.
+    """
+
+    def __init__(self, client, http_session=None):
+        endpoint = client._endpoint
+        if http_session is None:
+            http_session = endpoint.http_session
+            proxy_config = getattr(http_session, '_proxy_config', None)
+            if proxy_config and proxy_config.proxy_url_for(endpoint.host):
+                raise ValueError(
+                    'Asyncio clients do not support proxies, but one is '
+                    f'configured for {endpoint.host}'
+                )
+            http_session = AsyncHTTPSession.from_http_session(http_session)
+        self._client = client
+        self._endpoint = AsyncEndpoint(
+            endpoint.host,
+            endpoint_prefix=endpoint._endpoint_prefix,
+            event_emitter=endpoint._event_emitter,
+            response_parser_factory=endpoint._response_parser_factory,
+            http_session=http_session,
+        )
+        self.meta = client.meta
+
+    def __getattr__(self, item):
+        operation_name = self.meta.method_to_api_mapping.get(item)
+        if operation_name is None:
+            raise AttributeError(
+                f"'{self.__class__.__name__}' object has no attribute "
+                f"'{item}'"
+            )
+
+        async def _api_call(*args, **kwargs):
+            if args:
+                raise TypeError(f"{item}() only accepts keyword arguments.")
+            return await self._make_api_call(operation_name, kwargs)
+
+        _api_call.__name__ = item
+        # Created once per operation, then found without __getattr__.
+        setattr(self, item, _api_call)
+        return _api_call
+
+    @property
+    def exceptions(self):
+        return self._client.exceptions
+
+    async def prewarm(self, connections=1):
+        """Opens ``connections`` connections to the client's endpoint.
+
+        They are opened on the running event loop, which must be the one
+        later calls are made on for them to be used.  Failures are logged
+        and leave calls to connect as they would have.
+        """
+        await self._endpoint.prewarm(connections)
+
+    async def close(self):
+        """Closes the idle connections of this client."""
+        await self._endpoint.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _make_api_call(self, operation_name, api_params):
+        client = self._client
+        operation_model = client._service_model.operation_model(
+            operation_name
+        )
+        if operation_model.has_event_stream_output:
+            raise NotImplementedError(
+                f'{operation_name} returns an event stream, which asyncio '
+                'clients do not support'
+            )
+        with start_as_current_context():
+            (
+                operation_model,
+                request_dict,
+                request_context,
+                event_response,
+            ) = client._prepare_api_call(operation_name, api_params)
+            if event_response is not None:
+                http, parsed_response = event_response
+            else:
+                maybe_compress_request(
+                    self.meta.config, request_dict, operation_model
+                )
+                apply_request_checksum(request_dict)
+                http, parsed_response = await self._make_request(
+                    operation_model, request_dict, request_context
+                )
+            return client._finish_api_call(
+                operation_model, request_context, http, parsed_response
+            )
+
+    async def _make_request(
+        self, operation_model, request_dict, request_context
+    ):
+        try:
+            return await self._endpoint.make_request(
+                operation_model, request_dict
+            )
+        except Exception as e:
+            service_id = self._client._service_model.service_id.hyphenize()
+            self.meta.events.emit(
+                f'after-call-error.{service_id}.{operation_model.name}',
+                exception=e,
+                context=request_context,
+            )
+            raise
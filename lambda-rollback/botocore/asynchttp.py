@@ -0,0 +1,463 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""The interfaces in this module are not intended for public use.
+
+This module sends requests over HTTP/1.1 on asyncio streams, for the
+clients of ``botocore.asyncclient``.  It does what ``URLLib3Session``
+does for blocking clients, for the requests botocore makes: keep-alive
+connections pooled per host, the same timeouts, certificate checks and
+exceptions.  It does not support proxies.
+"""
+import asyncio
+import io
+import logging
+import ssl
+from collections import deque
+from http.client import _is_illegal_header_value, _is_legal_header_name
+
+from urllib3._collections import HTTPHeaderDict
+from urllib3.util.timeout import Timeout
+from urllib3.util.url import parse_url
+
+import botocore.awsrequest
+from botocore.exceptions import (
+    BotoCoreError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    HTTPClientError,
+    ReadTimeoutError,
+    SSLError,
+)
+from botocore.httpsession import DEFAULT_TIMEOUT, MAX_POOL_CONNECTIONS
+
+logger = logging.getLogger(__name__)
+
+ALPN_PROTOCOLS = ['http/1.1']
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# The longest status line and header block a response may have.
+MAX_HEADER_SIZE = 1 << 16
+READ_SIZE = 1 << 16
+# How long closing a connection may wait for the server's TLS close_notify.
+CLOSE_TIMEOUT = 1
+# Bodies are sent without waiting for a 100 Continue; the header is not
+# signed, so dropping it leaves the signature valid.
+_SKIPPED_HEADERS = frozenset([b'expect', b'connection'])
+
+
+class _ResponseError(Exception):
+    """The connection failed before the response was complete.
+
+    ``stale`` is set when the server had closed a pooled connection
+    before it got the request, so that it can be sent again.
+    """
+
+    def __init__(self, error, stale=False):
+        super().__init__(error)
+        self.error = error
+        self.stale = stale
+
+
+def _head_bytes(method, target, host, headers, body):
+    lines = [f'{method} {target} HTTP/1.1'.encode('ascii')]
+    seen = set()
+    for name, value in headers.items():
+        if isinstance(name, str):
+            name = name.encode('latin-1')
+        lower = name.lower()
+        if lower in _SKIPPED_HEADERS:
+            continue
+        if isinstance(value, str):
+            value = value.encode('latin-1')
+        elif not isinstance(value, bytes):
+            value = str(value).encode('latin-1')
+        if not _is_legal_header_name(name):
+            raise ValueError(f"Invalid header name {name!r}")
+        if _is_illegal_header_value(value):
+            raise ValueError(f"Invalid header value {value!r}")
+        seen.add(lower)
+        lines.append(name + b': ' + value)
+    if b'host' not in seen:
+        lines.append(b'Host: ' + host.encode('ascii'))
+    if b'accept-encoding' not in seen:
+        # As http.client sends it: botocore reads bodies as they are sent.
+        lines.append(b'Accept-Encoding: identity')
+    if b'content-length' not in seen and b'transfer-encoding' not in seen:
+        if body or method in ('POST', 'PUT', 'PATCH'):
+            lines.append(b'Content-Length: %d' % len(body))
+    lines.append(b'\r\n')
+    return b'\r\n'.join(lines)
+
+
+def _read_body(body):
+    if body is None:
+        return b''
+    if isinstance(body, str):
+        return body.encode('utf-8')
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return bytes(body)
+    if hasattr(body, 'read'):
+        data = body.read()
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return data
+    return b''.join(
+        chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+        for chunk in body
+    )
+
+
+def _address(url):
+    # The parsed URL, its port and the key of its connections in the pool.
+    parsed = parse_url(url)
+    port = parsed.port or DEFAULT_PORTS[parsed.scheme]
+    return parsed, port, (parsed.scheme, parsed.host, port)
+
+
+def _parse_head(head):
+    lines = head.decode('latin-1').split('\r\n')
+    version, _, rest = lines[0].partition(' ')
+    status, _, _ = rest.partition(' ')
+    if not version.startswith('HTTP/') or not status.isdigit():
+        raise ValueError(f"Invalid status line {lines[0]!r}")
+    headers = HTTPHeaderDict()
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(':')
+        if not sep:
+            raise ValueError(f"Invalid header line {line!r}")
+        headers.add(name.strip(), value.strip())
+    return version, int(status), headers
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @property
+    def usable(self):
+        return not self.reader.at_eof() and not self.writer.is_closing()
+
+    def close(self):
+        try:
+            self.writer.close()
+        except RuntimeError:
+            # Its event loop is closed already.
+            pass
+
+    async def wait_closed(self):
+        try:
+            await asyncio.wait_for(self.writer.wait_closed(), CLOSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.writer.transport.abort()
+        except (OSError, ssl.SSLError):
+            # Closed, if not cleanly.
+            pass
+
+
+class AsyncHTTPSession:
+    """Sends ``AWSPreparedRequest`` objects on an asyncio event loop.
+
+    Connections are kept for reuse per scheme, host and port, up to
+    ``max_pool_connections`` of them; more are opened as concurrent
+    requests need them, and closed when done, as ``URLLib3Session`` does
+    with its non-blocking pools.  Connections belong to the event loop
+    that opened them: when requests come from another loop, the idle
+    connections of the previous one are dropped, so callers that want
+    warm connections across calls keep one loop.
+
+    Response bodies are read whole before ``send`` returns, including
+    those of streaming operations, which are then read from memory.
+    """
+
+    def __init__(
+        self,
+        ssl_context,
+        timeout=None,
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        socket_options=None,
+    ):
+        if timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        if not isinstance(timeout, Timeout):
+            timeout = Timeout(connect=timeout, read=timeout)
+        self._ssl_context = ssl_context
+        self._connect_timeout = timeout.connect_timeout
+        self._read_timeout = timeout.read_timeout
+        self._max_pool_connections = max_pool_connections
+        self._socket_options = socket_options or []
+        self._idle = {}
+        self._loop = None
+
+    @classmethod
+    def from_http_session(cls, http_session):
+        """Create a session with the settings of a ``URLLib3Session``.
+
+        Connections check certificates against the same CA bundle, present
+        the same client certificate and use the same timeouts, pool size
+        and socket options.
+        """
+        ssl_context = http_session._get_verifying_ssl_context(ALPN_PROTOCOLS)
+        if ssl_context is None:
+            raise ValueError(
+                'Could not load the CA bundle or client certificate for '
+                'asyncio connections'
+            )
+        return cls(
+            ssl_context,
+            timeout=http_session._timeout,
+            max_pool_connections=http_session._max_pool_connections,
+            socket_options=http_session._socket_options,
+        )
+
+    def _check_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self.close()
+            self._loop = loop
+
+    async def prewarm(self, urls, connections=1):
+        """Open pooled connections to ``urls`` ahead of the first request.
+
+        As ``URLLib3Session.prewarm`` does, all connections are opened at
+        once, at most the pool size per host, counting the idle ones
+        already open.  Failures are logged and leave the request to
+        connect as it would have.  The connections belong to the running
+        event loop.
+
+        :param urls: The endpoint URLs, e.g. ``client.meta.endpoint_url``.
+        :param connections: How many connections to open to each URL.
+        """
+        self._check_loop()
+        opening = []
+        for url in urls:
+            parsed, port, key = _address(url)
+            idle = len(self._idle.get(key, ()))
+            count = min(connections, self._max_pool_connections) - idle
+            opening.extend(
+                self._prewarm_connection(key, parsed.host, port, url)
+                for _ in range(count)
+            )
+        await asyncio.gather(*opening)
+
+    async def _prewarm_connection(self, key, host, port, url):
+        try:
+            conn = await self._open(key[0], host, port, url)
+        except BotoCoreError:
+            logger.debug(
+                "Could not pre-warm a connection to %s", host, exc_info=True
+            )
+            return
+        self._release(key, conn)
+
+    def _pooled_connection(self, key):
+        connections = self._idle.get(key)
+        while connections:
+            conn = connections.pop()
+            if conn.usable:
+                return conn
+            conn.close()
+        return None
+
+    def _release(self, key, conn):
+        connections = self._idle.setdefault(key, deque())
+        if len(connections) < self._max_pool_connections:
+            connections.append(conn)
+        else:
+            conn.close()
+
+    async def _open(self, scheme, host, port, url):
+        ssl_context = None
+        server_hostname = None
+        if scheme == 'https':
+            ssl_context = self._ssl_context
+            server_hostname = host.strip('[]')
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    host.strip('[]'),
+                    port,
+                    ssl=ssl_context,
+                    server_hostname=server_hostname,
+                    limit=MAX_HEADER_SIZE,
+                ),
+                self._connect_timeout,
+            )
+        except asyncio.TimeoutError as e:
+            raise ConnectTimeoutError(endpoint_url=url, error=e)
+        except ssl.SSLError as e:
+            raise SSLError(endpoint_url=url, error=e)
+        except OSError as e:
+            raise EndpointConnectionError(endpoint_url=url, error=e)
+        sock = writer.get_extra_info('socket')
+        for option in self._socket_options:
+            sock.setsockopt(*option)
+        return _Connection(reader, writer)
+
+    async def _read(self, awaitable):
+        return await asyncio.wait_for(awaitable, self._read_timeout)
+
+    async def _read_chunked(self, reader):
+        chunks = []
+        while True:
+            line = await self._read(reader.readuntil(b'\r\n'))
+            size = int(line.split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                break
+            chunks.append(await self._read(reader.readexactly(size)))
+            await self._read(reader.readexactly(2))
+        # Trailers, if any, end with an empty line.
+        while await self._read(reader.readuntil(b'\r\n')) != b'\r\n':
+            pass
+        return b''.join(chunks)
+
+    async def _read_until_eof(self, reader):
+        chunks = []
+        while True:
+            chunk = await self._read(reader.read(READ_SIZE))
+            if not chunk:
+                return b''.join(chunks)
+            chunks.append(chunk)
+
+    async def _exchange(self, conn, method, head, body, reused):
+        # Returns the response and whether the connection can be reused.
+        reader, writer = conn.reader, conn.writer
+        try:
+            writer.write(head)
+            if body:
+                writer.write(body)
+            await self._read(writer.drain())
+            while True:
+                response_head = await self._read(
+                    reader.readuntil(b'\r\n\r\n')
+                )
+                version, status, headers = _parse_head(response_head)
+                # Interim responses, like 100 Continue, come before the
+                # final one.
+                if not 100 <= status < 200:
+                    break
+        except asyncio.IncompleteReadError as e:
+            raise _ResponseError(e, stale=reused and not e.partial)
+        except ConnectionError as e:
+            raise _ResponseError(e, stale=reused)
+
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.1':
+            keep_alive = connection != 'close'
+        else:
+            keep_alive = connection == 'keep-alive'
+        transfer_encoding = headers.get('transfer-encoding', '').lower()
+        length = headers.get('content-length')
+        try:
+            if method == 'HEAD' or status in (204, 304):
+                data = b''
+            elif 'chunked' in transfer_encoding:
+                data = await self._read_chunked(reader)
+            elif length is not None:
+                data = await self._read(reader.readexactly(int(length)))
+            else:
+                data = await self._read_until_eof(reader)
+                keep_alive = False
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            raise _ResponseError(e)
+        return status, headers, data, keep_alive
+
+    async def send(self, request):
+        url = request.url
+        try:
+            self._check_loop()
+            parsed, port, key = _address(url)
+            scheme = parsed.scheme
+            host = parsed.host
+            if parsed.port and parsed.port != DEFAULT_PORTS[scheme]:
+                host = f'{host}:{port}'
+            body = _read_body(request.body)
+            head = _head_bytes(
+                request.method,
+                parsed.request_uri,
+                host,
+                request.headers,
+                body,
+            )
+
+            while True:
+                conn = self._pooled_connection(key)
+                reused = conn is not None
+                if conn is None:
+                    conn = await self._open(scheme, parsed.host, port, url)
+                done = False
+                try:
+                    status, headers, data, keep_alive = await self._exchange(
+                        conn, request.method, head, body, reused
+                    )
+                    done = True
+                except _ResponseError as e:
+                    if e.stale:
+                        logger.debug(
+                            'Pooled connection to %s was closed, '
+                            'reconnecting',
+                            parsed.host,
+                        )
+                        continue
+                    raise ConnectionClosedError(
+                        error=e.error, request=request, endpoint_url=url
+                    )
+                finally:
+                    if done and keep_alive:
+                        self._release(key, conn)
+                    else:
+                        conn.close()
+                break
+
+            http_response = botocore.awsrequest.AWSResponse(
+                url, status, headers, io.BytesIO(data)
+            )
+            http_response._content = data
+            return http_response
+        except asyncio.TimeoutError as e:
+            raise ReadTimeoutError(endpoint_url=url, error=e)
+        except ssl.SSLError as e:
+            raise SSLError(endpoint_url=url, error=e)
+        except BotoCoreError:
+            raise
+        except Exception as e:
+            message = 'Exception received when sending asyncio HTTP request'
+            logger.debug(message, exc_info=True)
+            raise HTTPClientError(error=e)
+
+    def close(self):
+        """Closes the idle connections without waiting for them to close."""
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+    async def aclose(self):
+        """Closes the idle connections and waits until they are closed.
+
+        Connections of another event loop are only closed, as ``close``
+        does.
+        """
+        if self._loop is not asyncio.get_running_loop():
+            self.close()
+            return
+        idle, self._idle = self._idle, {}
+        closing = [
+            conn for connections in idle.values() for conn in connections
+        ]
+        for conn in closing:
+            conn.close()
+        await asyncio.gather(*(conn.wait_closed() for conn in closing))
@@ -18,6 +18,7 @@ import functools
 import hmac
 import json
 import logging
+import threading
 import time
 from collections.abc import Mapping
 from email.utils import formatdate
@@ -69,6 +70,9 @@ SIGNED_HEADERS_BLACKLIST = [
 ]
 UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
 STREAMING_UNSIGNED_PAYLOAD_TRAILER = 'STREAMING-UNSIGNED-PAYLOAD-TRAILER'
+# Signing keys only change with the credentials, the date, the region and
+# the service, so a small cache covers every client in a process.
+SIGNING_KEY_CACHE_SIZE = 64
 
 
 def _host_from_url(url):
@@ -103,6 +107,53 @@ def _get_body_as_dict(request):
     return data
 
 
+def _hmac_sha256(key, msg):
+    return hmac.new(key, msg.encode('utf-8'), sha256).digest()
+
+
+def _derive_signing_key(secret_key, date, region_name, service_name):
+    # Cached on a digest of the secret key, so the cache does not keep
+    # secret keys in memory for the life of the process.
+    secret_digest = sha256(secret_key.encode('utf-8')).digest()
+    cache_key = (secret_digest, date, region_name, service_name)
+    k_signing = _signing_keys.get(cache_key)
+    if k_signing is None:
+        k_date = _hmac_sha256(f"AWS4{secret_key}".encode(), date)
+        k_region = _hmac_sha256(k_date, region_name)
+        k_service = _hmac_sha256(k_region, service_name)
+        k_signing = _hmac_sha256(k_service, 'aws4_request')
+        with _signing_keys_lock:
+            if len(_signing_keys) >= SIGNING_KEY_CACHE_SIZE:
+                # Keys change daily, so the oldest entry is the one to drop.
+                _signing_keys.pop(next(iter(_signing_keys)), None)
+            _signing_keys[cache_key] = k_signing
+    return k_signing
+
+
+_signing_keys = {}
+_signing_keys_lock = threading.Lock()
+
+
+# The Host header is usually added by the HTTP client after signing, so it
+# is derived from the URL, which for most protocols is fixed per client.
+_cached_host_from_url = functools.lru_cache(maxsize=128)(_host_from_url)
+
+
+# Headers that carry credentials.  They are never put in the process-wide
+# fragment cache, where they would outlive the credentials in plain text.
+_UNCACHED_HEADERS = frozenset(
+    ('authorization', 'x-amz-security-token', 'x-amz-s3session-token')
+)
+
+
+@functools.lru_cache(maxsize=512)
+def _canonical_header_fragment(name, value):
+    # Host, Content-Type, X-Amz-Target and friends are the same on every
+    # request of a client; only the date and the length change, and those
+    # simply fall out of the LRU.
+    return f"{name}:{' '.join(value.split())}"
+
+
 class BaseSigner:
     REQUIRES_REGION = False
     REQUIRES_TOKEN = False
@@ -217,6 +268,14 @@ class SigV4Auth(BaseSigner):
 
     REQUIRES_REGION = True
 
+    # Derive signing keys through the process-wide cache and build the
+    # canonical and signed header strings straight from the request headers
+    # instead of through an intermediate HTTPHeaders copy.  Subclasses that
+    # override how keys or headers are produced get the original code path
+    # for the part they override, so signatures are identical either way.
+    # Set this to False to always take the original code path.
+    USE_SIGNING_CACHES = True
+
     def __init__(self, credentials, service_name, region_name):
         self.credentials = credentials
         # We initialize these value here so the unit tests can have
@@ -319,6 +378,63 @@ class SigV4Auth(BaseSigner):
         headers = sorted(n.lower().strip() for n in set(headers_to_sign))
         return ';'.join(headers)
 
+    def _canonical_header_parts(self, request):
+        """Return ``(canonical_headers, signed_headers)`` for ``request``.
+
+        This is what ``canonical_headers`` and ``signed_headers`` produce
+        from ``headers_to_sign``, computed in one pass over the raw header
+        values.  ``None`` is returned whenever the result could differ from
+        the original code path, and callers must then fall back to it.
+        """
+        if not self.USE_SIGNING_CACHES or not _uses_builtin(
+            type(self),
+            ('headers_to_sign', 'canonical_headers', 'signed_headers',
+             '_header_value'),
+        ):
+            return None
+        raw_items = getattr(request.headers, 'raw_items', None)
+        if raw_items is None:
+            return None
+        # add_auth needs the parts twice, once for the canonical request and
+        # once for the Authorization header, with no header changes between.
+        raw_headers = list(raw_items())
+        memo = getattr(self, '_header_parts_memo', None)
+        if memo is not None and memo[:2] == (request.url, raw_headers):
+            return memo[2]
+        parts = self._compute_header_parts(request, raw_headers)
+        self._header_parts_memo = (request.url, raw_headers, parts)
+        return parts
+
+    def _compute_header_parts(self, request, raw_headers):
+        header_values = {}
+        for name, value in raw_headers:
+            # Non-str, non-ASCII or padded values go through the email
+            # policy and ensure_unicode in the original path.
+            if type(value) is not str or not value.isascii():
+                return None
+            lname = name.lower()
+            if lname in SIGNED_HEADERS_BLACKLIST:
+                continue
+            if lname != lname.strip():
+                return None
+            values = header_values.get(lname)
+            if values is None:
+                header_values[lname] = [value]
+            else:
+                values.append(value)
+        if 'host' not in header_values:
+            header_values['host'] = [_cached_host_from_url(request.url)]
+        names = sorted(header_values)
+        fragments = []
+        for name in names:
+            values = header_values[name]
+            if len(values) == 1 and name not in _UNCACHED_HEADERS:
+                fragments.append(_canonical_header_fragment(name, values[0]))
+            else:
+                value = ','.join(self._header_value(v) for v in values)
+                fragments.append(f'{name}:{value}')
+        return '\n'.join(fragments), ';'.join(names)
+
     def _is_streaming_checksum_payload(self, request):
         checksum_context = request.context.get('checksum', {})
         algorithm = checksum_context.get('request_algorithm')
@@ -365,9 +481,15 @@ class SigV4Auth(BaseSigner):
         path = self._normalize_url_path(urlsplit(request.url).path)
         cr.append(path)
         cr.append(self.canonical_query_string(request))
-        headers_to_sign = self.headers_to_sign(request)
-        cr.append(self.canonical_headers(headers_to_sign) + '\n')
-        cr.append(self.signed_headers(headers_to_sign))
+        header_parts = self._canonical_header_parts(request)
+        if header_parts is None:
+            headers_to_sign = self.headers_to_sign(request)
+            header_parts = (
+                self.canonical_headers(headers_to_sign),
+                self.signed_headers(headers_to_sign),
+            )
+        cr.append(header_parts[0] + '\n')
+        cr.append(header_parts[1])
         if 'X-Amz-Content-SHA256' in request.headers:
             body_checksum = request.headers['X-Amz-Content-SHA256']
         else:
@@ -409,6 +531,14 @@ class SigV4Auth(BaseSigner):
 
     def signature(self, string_to_sign, request):
         key = self.credentials.secret_key
+        if self.USE_SIGNING_CACHES and _uses_builtin(type(self), ('_sign',)):
+            k_signing = _derive_signing_key(
+                key,
+                request.context["timestamp"][0:8],
+                self._region_name,
+                self._service_name,
+            )
+            return self._sign(k_signing, string_to_sign, hex=True)
         k_date = self._sign(
             (f"AWS4{key}").encode(), request.context["timestamp"][0:8]
         )
@@ -437,10 +567,12 @@ class SigV4Auth(BaseSigner):
 
     def _inject_signature_to_request(self, request, signature):
         auth_str = [f'AWS4-HMAC-SHA256 Credential={self.scope(request)}']
-        headers_to_sign = self.headers_to_sign(request)
-        auth_str.append(
-            f"SignedHeaders={self.signed_headers(headers_to_sign)}"
-        )
+        header_parts = self._canonical_header_parts(request)
+        if header_parts is None:
+            signed_headers = self.signed_headers(self.headers_to_sign(request))
+        else:
+            signed_headers = header_parts[1]
+        auth_str.append(f"SignedHeaders={signed_headers}")
         auth_str.append(f'Signature={signature}')
         request.headers['Authorization'] = ', '.join(auth_str)
         return request
@@ -479,6 +611,20 @@ class SigV4Auth(BaseSigner):
             request.headers['X-Amz-Date'] = request.context['timestamp']
 
 
+_BUILTIN_METHODS = {}
+
+
+def _uses_builtin(cls, method_names):
+    key = (cls, method_names)
+    uses_builtin = _BUILTIN_METHODS.get(key)
+    if uses_builtin is None:
+        uses_builtin = _BUILTIN_METHODS[key] = all(
+            getattr(cls, name) is getattr(SigV4Auth, name)
+            for name in method_names
+        )
+    return uses_builtin
+
+
 class S3SigV4Auth(SigV4Auth):
     def _modify_request_before_signing(self, request):
         super()._modify_request_before_signing(request)
@@ -13,6 +13,7 @@
 # language governing permissions and limitations under the License.
 import functools
 import logging
+import time
 from collections.abc import Mapping
 
 import urllib3.util
@@ -77,6 +78,9 @@ class AWSConnection:
         self._send_called = False
 
     def close(self):
+        # Servers that close connections after a response leave no pooled
+        # connection to save the TLS session from.
+        _save_tls_session(self)
         super().close()
         # Reset all of our instance state we were tracking.
         self._response_received = False
@@ -240,11 +244,64 @@ class AWSHTTPSConnection(AWSConnection, VerifiedHTTPSConnection):
     """An HTTPSConnection that supports 100 Continue behavior."""
 
 
-class AWSHTTPConnectionPool(HTTPConnectionPool):
+class AWSConnectionPool:
+    """Mixin for connection pools that stop reusing idle connections.
+
+    Load balancers and NAT gateways drop keep-alive connections that sit
+    idle for too long, often without telling either end, and a request
+    sent on such a connection waits out the whole read timeout.  A
+    connection that has been back in the pool for longer than
+    ``max_idle_time`` seconds is closed when it is taken out, so it
+    reconnects before the request is sent.
+
+    """
+
+    # Set by URLLib3Session; None reuses connections however long they
+    # have been idle, as urllib3 does.
+    max_idle_time = None
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+        max_idle_time = self.max_idle_time
+        if max_idle_time is not None and not conn.is_closed:
+            returned_at = getattr(conn, '_returned_to_pool_at', None)
+            if (
+                returned_at is not None
+                and time.monotonic() - returned_at > max_idle_time
+            ):
+                logger.debug(
+                    "Closing connection to %s idle for more than %ss",
+                    self.host,
+                    max_idle_time,
+                )
+                conn.close()
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn._returned_to_pool_at = time.monotonic()
+            _save_tls_session(conn)
+        super()._put_conn(conn)
+
+
+def _save_tls_session(conn):
+    # Contexts that resume TLS sessions (see ResumingSSLContext) get each
+    # connection's session once its tickets have been read, which they have
+    # by the time a response has been.
+    sock = getattr(conn, 'sock', None)
+    if sock is None or getattr(conn, '_saved_session_of', None) is sock:
+        return
+    context = getattr(sock, 'context', None)
+    save_session = getattr(context, 'save_session', None)
+    if save_session is not None and save_session(sock):
+        conn._saved_session_of = sock
+
+
+class AWSHTTPConnectionPool(AWSConnectionPool, HTTPConnectionPool):
     ConnectionCls = AWSHTTPConnection
 
 
-class AWSHTTPSConnectionPool(HTTPSConnectionPool):
+class AWSHTTPSConnectionPool(AWSConnectionPool, HTTPSConnectionPool):
     ConnectionCls = AWSHTTPSConnection
 
 
@@ -499,14 +556,27 @@ class AWSPreparedRequest:
     :ivar headers: The HTTP headers to send.
     :ivar body: The HTTP body.
     :ivar stream_output: If the response for this request should be streamed.
+    :ivar incremental_threshold: Successful responses with a content-length
+        of at least this many bytes are left unread by the HTTP session,
+        for the parser to read incrementally.  ``None`` when the whole body
+        should be read.
     """
 
-    def __init__(self, method, url, headers, body, stream_output):
+    def __init__(
+        self,
+        method,
+        url,
+        headers,
+        body,
+        stream_output,
+        incremental_threshold=None,
+    ):
         self.method = method
         self.url = url
         self.headers = headers
         self.body = body
         self.stream_output = stream_output
+        self.incremental_threshold = incremental_threshold
 
     def __repr__(self):
         fmt = (
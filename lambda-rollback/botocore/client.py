@@ -29,7 +29,10 @@ from botocore.discovery import (
     EndpointDiscoveryManager,
     block_endpoint_discovery_required_operations,
 )
-from botocore.docs.docstring import ClientMethodDocstring, PaginatorDocstring
+from botocore.docs.docstring import (
+    OperationMethodDocstring,
+    PaginatorDocstring,
+)
 from botocore.exceptions import (
     ClientError,  # noqa: F401
     DataNotFoundError,
@@ -604,12 +607,11 @@ class ClientCreator:
         _api_call.__name__ = str(py_operation_name)
 
         # Add the docstring to the client method
-        operation_model = service_model.operation_model(operation_name)
-        docstring = ClientMethodDocstring(
-            operation_model=operation_model,
+        docstring = OperationMethodDocstring(
+            service_model=service_model,
+            operation_name=operation_name,
             method_name=operation_name,
             event_emitter=self._event_emitter,
-            method_description=operation_model.documentation,
             example_prefix=f'response = client.{py_operation_name}',
             include_signature=False,
         )
@@ -993,6 +995,28 @@ class BaseClient:
 
     @with_current_context()
     def _make_api_call(self, operation_name, api_params):
+        operation_model, request_dict, request_context, event_response = (
+            self._prepare_api_call(operation_name, api_params)
+        )
+        if event_response is not None:
+            http, parsed_response = event_response
+        else:
+            maybe_compress_request(
+                self.meta.config, request_dict, operation_model
+            )
+            apply_request_checksum(request_dict)
+            http, parsed_response = self._make_request(
+                operation_model, request_dict, request_context
+            )
+        return self._finish_api_call(
+            operation_model, request_context, http, parsed_response
+        )
+
+    def _prepare_api_call(self, operation_name, api_params):
+        # Everything up to sending the request, shared with clients that
+        # send it some other way.  Returns the operation model, request
+        # dict and context, and the response a before-call handler gave,
+        # if any.
         operation_model = self._service_model.operation_model(operation_name)
         service_name = self._service_model.service_name
         history_recorder.record(
@@ -1049,18 +1073,13 @@ class BaseClient:
             request_signer=self._request_signer,
             context=request_context,
         )
+        return operation_model, request_dict, request_context, event_response
 
-        if event_response is not None:
-            http, parsed_response = event_response
-        else:
-            maybe_compress_request(
-                self.meta.config, request_dict, operation_model
-            )
-            apply_request_checksum(request_dict)
-            http, parsed_response = self._make_request(
-                operation_model, request_dict, request_context
-            )
-
+    def _finish_api_call(
+        self, operation_model, request_context, http, parsed_response
+    ):
+        operation_name = operation_model.name
+        service_id = self._service_model.service_id.hyphenize()
         self.meta.events.emit(
             f'after-call.{service_id}.{operation_name}',
             http_response=http,
@@ -363,3 +363,10 @@ try:
     HAS_GZIP = True
 except ImportError:
     HAS_GZIP = False
+
+# Detect if advisory file locks are available for use
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
@@ -54,17 +54,56 @@ class Config:
         thrown when attempting to read from a connection. The default is
         60 seconds.
 
-    :type parameter_validation: bool
+    :type parameter_validation: bool or str
     :param parameter_validation: Whether parameter validation should occur
         when serializing requests. The default is True.  You can disable
         parameter validation for performance reasons.  Otherwise, it's
-        recommended to leave parameter validation enabled.
+        recommended to leave parameter validation enabled.  Set to
+        ``'trusted'`` to validate only the first call of each operation
+        with a given set of top level parameter names in full, and only
+        the value types of later ones.  This applies to calls whose
+        parameters are all scalars; nested values are always validated
+        in full.
 
     :type max_pool_connections: int
     :param max_pool_connections: The maximum number of connections to
         keep in a connection pool.  If this value is not set, the default
         value of 10 is used.
 
+    :type max_pool_connections_per_host: dict
+    :param max_pool_connections_per_host: The maximum number of connections
+        to keep in the connection pool of particular hosts, keyed by host
+        name, e.g. ``{'bucket.s3.amazonaws.com': 50}``.  Other hosts use
+        ``max_pool_connections``.
+
+        Defaults to None.
+
+    :type max_idle_time: float
+    :param max_idle_time: Pooled connections that have been idle for longer
+        than this many seconds are reconnected instead of reused.  Set it
+        below the idle timeout of load balancers or NAT gateways between the
+        client and the endpoint, which may drop idle connections silently.
+
+        Defaults to None, which reuses connections however long they have
+        been idle.
+
+    :type prewarm_connections: int
+    :param prewarm_connections: The number of connections to open to the
+        client's endpoint in the background as the client is created, so
+        that the first requests do not wait for a TCP and TLS handshake.
+
+        Defaults to None, which opens connections as requests need them.
+
+    :type use_http2: bool
+    :param use_http2: Whether to send requests over HTTP/2 to endpoints
+        that support it, so that concurrent requests to a host share one
+        connection instead of taking one each.  Endpoints that do not
+        choose HTTP/2 when connecting, plain HTTP endpoints and endpoints
+        reached through a proxy keep using HTTP/1.1, as do all endpoints
+        if the ``h2`` package is not installed.
+
+        Defaults to False.
+
     :type proxies: dict
     :param proxies: A dictionary of proxy servers to use by protocol or
         endpoint, e.g.:
@@ -321,6 +360,10 @@ class Config:
             ('response_checksum_validation', None),
             ('account_id_endpoint_mode', None),
             ('auth_scheme_preference', None),
+            ('max_pool_connections_per_host', None),
+            ('max_idle_time', None),
+            ('prewarm_connections', None),
+            ('use_http2', None),
         ]
     )
 
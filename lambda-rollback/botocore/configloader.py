@@ -15,10 +15,17 @@ import configparser
 import copy
 import os
 import shlex
+import stat
 import sys
 
 import botocore.exceptions
 
+# Parsed INI files keyed by (path, parse_subsections, build function).
+# Each entry keeps the file's stat signature, so a file is only parsed
+# again once it has been modified or replaced; every caller gets its own
+# copy.
+_PARSED_CONFIG_CACHE = {}
+
 
 def multi_file_load_config(*filenames):
     """Load and combine multiple INI configs with profiles.
@@ -102,8 +109,7 @@ def load_config(config_filename):
     top level keys, use ``raw_config_parse`` instead.
 
     """
-    parsed = raw_config_parse(config_filename)
-    return build_profile_map(parsed)
+    return _cached_config(config_filename, True, build_profile_map)
 
 
 def raw_config_parse(config_filename, parse_subsections=True):
@@ -136,39 +142,77 @@ def raw_config_parse(config_filename, parse_subsections=True):
 
     :raises: ConfigNotFound, ConfigParseError
     """
-    config = {}
+    return _cached_config(config_filename, parse_subsections)
+
+
+def _cached_config(config_filename, parse_subsections, build=None):
+    # Parse the file and apply ``build`` to the result, or copy what that
+    # produced last time if the file has not changed since.
     path = config_filename
-    if path is not None:
-        path = os.path.expandvars(path)
-        path = os.path.expanduser(path)
-        if not os.path.isfile(path):
-            raise botocore.exceptions.ConfigNotFound(path=_unicode_path(path))
-        cp = configparser.RawConfigParser()
-        try:
-            cp.read([path])
-        except (configparser.Error, UnicodeDecodeError) as e:
-            raise botocore.exceptions.ConfigParseError(
-                path=_unicode_path(path), error=e
-            ) from None
-        else:
-            for section in cp.sections():
-                config[section] = {}
-                for option in cp.options(section):
-                    config_value = cp.get(section, option)
-                    if parse_subsections and config_value.startswith('\n'):
-                        # Then we need to parse the inner contents as
-                        # hierarchical.  We support a single level
-                        # of nesting for now.
-                        try:
-                            config_value = _parse_nested(config_value)
-                        except ValueError as e:
-                            raise botocore.exceptions.ConfigParseError(
-                                path=_unicode_path(path), error=e
-                            ) from None
-                    config[section][option] = config_value
+    if path is None:
+        config = {}
+        return config if build is None else build(config)
+    path = os.path.expandvars(path)
+    path = os.path.expanduser(path)
+    try:
+        file_stat = os.stat(path)
+    except (OSError, ValueError):
+        file_stat = None
+    if file_stat is None or not stat.S_ISREG(file_stat.st_mode):
+        raise botocore.exceptions.ConfigNotFound(path=_unicode_path(path))
+    cache_key = (path, parse_subsections, build)
+    signature = (
+        file_stat.st_dev,
+        file_stat.st_ino,
+        file_stat.st_size,
+        file_stat.st_mtime_ns,
+    )
+    cached = _PARSED_CONFIG_CACHE.get(cache_key)
+    if cached is not None and cached[0] == signature:
+        return _copy_config(cached[1])
+    config = _parse_config_file(path, parse_subsections)
+    if build is not None:
+        config = build(config)
+    _PARSED_CONFIG_CACHE[cache_key] = (signature, _copy_config(config))
     return config
 
 
+def _parse_config_file(path, parse_subsections):
+    config = {}
+    cp = configparser.RawConfigParser()
+    try:
+        cp.read([path])
+    except (configparser.Error, UnicodeDecodeError) as e:
+        raise botocore.exceptions.ConfigParseError(
+            path=_unicode_path(path), error=e
+        ) from None
+    for section in cp.sections():
+        config[section] = {}
+        for option in cp.options(section):
+            config_value = cp.get(section, option)
+            if parse_subsections and config_value.startswith('\n'):
+                # Then we need to parse the inner contents as
+                # hierarchical.  We support a single level
+                # of nesting for now.
+                try:
+                    config_value = _parse_nested(config_value)
+                except ValueError as e:
+                    raise botocore.exceptions.ConfigParseError(
+                        path=_unicode_path(path), error=e
+                    ) from None
+            config[section][option] = config_value
+    return config
+
+
+def _copy_config(config):
+    # Parsed configs are dicts nesting only dicts and strings, which this
+    # copies several times faster than deepcopy.
+    return {
+        key: _copy_config(value) if type(value) is dict else value
+        for key, value in config.items()
+    }
+
+
 def _unicode_path(path):
     if isinstance(path, str):
         return path
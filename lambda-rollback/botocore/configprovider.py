@@ -125,6 +125,14 @@ BOTOCORE_DEFAUT_SESSION_VARIABLES = {
         utils.ensure_boolean,
     ),
     'parameter_validation': ('parameter_validation', None, True, None),
+    # Cache assumed-role and other fetched credentials in a SharedFileCache
+    # that every process of the current user on this host reads.
+    'shared_credential_cache': (
+        'shared_credential_cache',
+        'AWS_SHARED_CREDENTIAL_CACHE',
+        False,
+        utils.ensure_boolean,
+    ),
     # Client side monitoring configurations.
     # Note: These configurations are considered internal to botocore.
     # Do not use them until publicly documented.
@@ -11,14 +11,18 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
+import contextlib
 import datetime
 import getpass
+import heapq
+import itertools
 import json
 import logging
 import os
 import subprocess
 import threading
 import time
+import weakref
 from collections import namedtuple
 from copy import deepcopy
 from hashlib import sha1
@@ -51,8 +55,10 @@ from botocore.utils import (
     FileWebIdentityTokenLoader,
     InstanceMetadataFetcher,
     JSONFileCache,
+    SharedFileCache,
     SSOTokenLoader,
     create_nested_client,
+    ensure_boolean,
     parse_key_val_file,
     resolve_imds_endpoint_mode,
 )
@@ -66,6 +72,9 @@ ReadOnlyCredentials = namedtuple(
 
 _DEFAULT_MANDATORY_REFRESH_TIMEOUT = 10 * 60  # 10 min
 _DEFAULT_ADVISORY_REFRESH_TIMEOUT = 15 * 60  # 15 min
+_DEFAULT_BACKGROUND_REFRESH_LEAD = 5 * 60  # 5 min
+_DEFAULT_BACKGROUND_RETRY_INTERVAL = 30  # 30 sec
+_BACKGROUND_REFRESH_ENV_VAR = 'AWS_CREDENTIAL_BACKGROUND_REFRESH'
 
 
 def create_credential_resolver(session, cache=None, region_name=None):
@@ -95,7 +104,7 @@ def create_credential_resolver(session, cache=None, region_name=None):
     }
 
     if cache is None:
-        cache = {}
+        cache = _create_default_cache(session)
 
     env_provider = EnvProvider()
     container_provider = ContainerProvider()
@@ -250,6 +259,83 @@ def _local_now():
     return datetime.datetime.now(tzlocal())
 
 
+class _BackgroundRefresher:
+    """Refreshes credentials on a daemon thread when they become due.
+
+    One thread serves every RefreshableCredentials in the process and is
+    started when the first refresh is scheduled.  Credentials are only
+    weakly referenced, and a refresh scheduled before a fork is carried
+    out in the child by a new thread once anything is scheduled there.
+    """
+
+    def __init__(self):
+        self._scheduled = []
+        self._entry_ids = itertools.count()
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._thread = None
+
+    def is_running(self):
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def schedule(self, credentials, delay):
+        """Refresh ``credentials`` in ``delay`` seconds.
+
+        Returns an id for the entry; credentials act only on the entry
+        whose id they hold.
+        """
+        entry_id = next(self._entry_ids)
+        entry = (
+            time.monotonic() + delay,
+            entry_id,
+            weakref.ref(credentials),
+        )
+        with self._condition:
+            heapq.heappush(self._scheduled, entry)
+            if not self.is_running():
+                self._thread = threading.Thread(
+                    target=self._run, name='botocore-credential-refresh'
+                )
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+        return entry_id
+
+    def _next_due(self):
+        with self._condition:
+            while True:
+                if not self._scheduled:
+                    self._condition.wait()
+                    continue
+                due, entry_id, reference = self._scheduled[0]
+                delay = due - time.monotonic()
+                if delay <= 0:
+                    heapq.heappop(self._scheduled)
+                    return entry_id, reference()
+                self._condition.wait(delay)
+
+    def _run(self):
+        while True:
+            entry_id, credentials = self._next_due()
+            if credentials is None:
+                continue
+            try:
+                credentials._refresh_in_background(entry_id)
+            except Exception:
+                logger.warning(
+                    "Background refresh of temporary credentials failed.",
+                    exc_info=True,
+                )
+
+
+_BACKGROUND_REFRESHER = _BackgroundRefresher()
+
+
 def _parse_if_needed(value):
     if isinstance(value, datetime.datetime):
         return value
@@ -264,6 +350,18 @@ def _serialize_if_needed(value, iso=False):
     return value
 
 
+def _create_default_cache(session):
+    # Processes that share a host (warm Lambda containers, parallel build
+    # steps) can opt in to sharing fetched credentials instead of each
+    # calling STS for their own.
+    if session.get_config_variable('shared_credential_cache'):
+        try:
+            return SharedFileCache()
+        except (OSError, ValueError) as e:
+            logger.warning("Not sharing cached credentials: %s", e)
+    return {}
+
+
 def _get_client_creator(session, region_name):
     def client_creator(service_name, **kwargs):
         create_client_kwargs = {'region_name': region_name}
@@ -378,6 +476,21 @@ class RefreshableCredentials(Credentials):
     # The time at which all threads will block waiting for
     # refreshed credentials.
     _mandatory_refresh_timeout = _DEFAULT_MANDATORY_REFRESH_TIMEOUT
+    # How long before the advisory refresh period the background refresher
+    # starts trying, and how long it waits between tries when a refresh
+    # fails or does not produce credentials that last longer.
+    _background_refresh_lead = _DEFAULT_BACKGROUND_REFRESH_LEAD
+    _background_retry_interval = _DEFAULT_BACKGROUND_RETRY_INTERVAL
+
+    # When enabled, credentials are refreshed on a background thread ahead
+    # of the advisory refresh period, so the threads making API calls keep
+    # using the current credentials and never wait for the refresh
+    # themselves.  They still refresh in the foreground, as before, if the
+    # background refresh has not succeeded by the mandatory refresh period.
+    # ``None`` leaves it to the AWS_CREDENTIAL_BACKGROUND_REFRESH
+    # environment variable, which is off unless set to ``true``.
+    BACKGROUND_REFRESH = None
+    _background_entry = None
 
     def __init__(
         self,
@@ -409,6 +522,7 @@ class RefreshableCredentials(Credentials):
             self._advisory_refresh_timeout = advisory_timeout
         if mandatory_timeout is not None:
             self._mandatory_refresh_timeout = mandatory_timeout
+        self._schedule_background_refresh(when_due=0)
 
     def _normalize(self):
         self._access_key = botocore.compat.ensure_unicode(self._access_key)
@@ -542,6 +656,14 @@ class RefreshableCredentials(Credentials):
         if not self.refresh_needed(self._advisory_refresh_timeout):
             return
 
+        if (
+            self._background_entry is not None
+            and _BACKGROUND_REFRESHER.is_running()
+            and not self.refresh_needed(self._mandatory_refresh_timeout)
+        ):
+            # The background refresher is on it.
+            return
+
         # acquire() doesn't accept kwargs, but False is indicating
         # that we should not block if we can't acquire the lock.
         # If we aren't able to acquire the lock, we'll trigger
@@ -591,6 +713,7 @@ class RefreshableCredentials(Credentials):
         self._frozen_credentials = ReadOnlyCredentials(
             self._access_key, self._secret_key, self._token, self._account_id
         )
+        self._schedule_background_refresh()
         if self._is_expired():
             # We successfully refreshed credentials but for whatever
             # reason, our refreshing function returned credentials
@@ -604,6 +727,49 @@ class RefreshableCredentials(Credentials):
             logger.warning(msg)
             raise RuntimeError(msg)
 
+    def _background_refresh_in(self):
+        return self._advisory_refresh_timeout + self._background_refresh_lead
+
+    def _background_refresh_enabled(self):
+        if self.BACKGROUND_REFRESH is not None:
+            return self.BACKGROUND_REFRESH
+        return ensure_boolean(
+            os.environ.get(_BACKGROUND_REFRESH_ENV_VAR, False)
+        )
+
+    def _schedule_background_refresh(self, delay=None, when_due=None):
+        if self._expiry_time is None or not self._background_refresh_enabled():
+            return
+        if delay is None:
+            delay = self._seconds_remaining() - self._background_refresh_in()
+        if delay <= 0:
+            # Already due.  Just after a refresh this means the source
+            # handed out credentials that are about to expire, as cached
+            # sources do until they are inside their own expiry window, so
+            # by default wait a while before asking again.
+            delay = when_due
+            if delay is None:
+                delay = self._background_retry_interval
+        self._background_entry = _BACKGROUND_REFRESHER.schedule(self, delay)
+
+    def _refresh_in_background(self, entry_id):
+        if entry_id != self._background_entry:
+            # Superseded by a later schedule.
+            return
+        self._background_entry = None
+        if self._refresh_lock.acquire(False):
+            try:
+                if self.refresh_needed(self._background_refresh_in()):
+                    self._protected_refresh(is_mandatory=False)
+            finally:
+                self._refresh_lock.release()
+        if self._background_entry is None:
+            # The refresh failed or another thread is refreshing; check
+            # again later.
+            self._schedule_background_refresh(
+                self._background_retry_interval
+            )
+
     @staticmethod
     def _expiry_datetime(time_str):
         return parse(time_str)
@@ -729,8 +895,15 @@ class CachedCredentialFetcher:
         """
         response = self._load_from_cache()
         if response is None:
-            response = self._get_credentials()
-            self._write_to_cache(response)
+            with self._cache_lock():
+                # Another process may have refreshed a shared cache while
+                # we waited for the lock.
+                response = self._load_from_cache()
+                if response is None:
+                    response = self._get_credentials()
+                    self._write_to_cache(response)
+                else:
+                    logger.debug("Credentials for role retrieved from cache.")
         else:
             logger.debug("Credentials for role retrieved from cache.")
 
@@ -760,6 +933,14 @@ class CachedCredentialFetcher:
     def _write_to_cache(self, response):
         self._cache[self._cache_key] = deepcopy(response)
 
+    def _cache_lock(self):
+        # Caches shared between processes, such as SharedFileCache, let us
+        # hold a lock while refreshing so only one of them calls STS.
+        lock = getattr(self._cache, 'lock', None)
+        if lock is None:
+            return contextlib.nullcontext()
+        return lock(self._cache_key)
+
     def _is_expired(self, credentials):
         """Check if credentials are expired."""
         end_time = _parse_if_needed(credentials['Credentials']['Expiration'])
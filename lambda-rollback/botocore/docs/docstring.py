@@ -87,6 +87,26 @@ class ClientMethodDocstring(LazyLoadedDocstring):
         document_model_driven_method(*args, **kwargs)
 
 
+class OperationMethodDocstring(ClientMethodDocstring):
+    """A ClientMethodDocstring that also defers looking up the operation.
+
+    It takes the service model and the operation name in place of the
+    operation model and its description, so that creating a client does
+    not load the model of every operation it has.
+    """
+
+    def _write_docstring(self, *args, **kwargs):
+        operation_model = kwargs.pop('service_model').operation_model(
+            kwargs.pop('operation_name')
+        )
+        super()._write_docstring(
+            *args,
+            operation_model=operation_model,
+            method_description=operation_model.documentation,
+            **kwargs,
+        )
+
+
 class WaiterDocstring(LazyLoadedDocstring):
     def _write_docstring(self, *args, **kwargs):
         document_wait_method(*args, **kwargs)
@@ -19,10 +19,17 @@ import threading
 import time
 import uuid
 
+from urllib3.exceptions import ProtocolError
+from urllib3.exceptions import ReadTimeoutError as URLLib3ReadTimeoutError
+
 from botocore import parsers
 from botocore.awsrequest import create_request_object
 from botocore.compat import get_current_datetime
-from botocore.exceptions import HTTPClientError
+from botocore.exceptions import (
+    ConnectionClosedError,
+    HTTPClientError,
+    ReadTimeoutError,
+)
 from botocore.history import get_global_history_recorder
 from botocore.hooks import first_non_none_response
 from botocore.httpchecksum import handle_checksum_body
@@ -40,7 +47,9 @@ DEFAULT_TIMEOUT = 60
 MAX_POOL_CONNECTIONS = 10
 
 
-def convert_to_response_dict(http_response, operation_model):
+def convert_to_response_dict(
+    http_response, operation_model, incremental_threshold=None
+):
     """Convert an HTTP response object to a request dict.
 
     This converts the HTTP response object to a dictionary.
@@ -48,6 +57,12 @@ def convert_to_response_dict(http_response, operation_model):
     :type http_response: botocore.awsrequest.AWSResponse
     :param http_response: The HTTP response from an AWS service request.
 
+    :type incremental_threshold: int
+    :param incremental_threshold: Successful, non-streaming responses whose
+        content-length is at least this many bytes keep the unread urllib3
+        stream as their body so the parser can consume it incrementally.
+        Once parsed, ``http_response.content`` is empty.
+
     :rtype: dict
     :return: A response dictionary which will contain the following keys:
         * headers (dict)
@@ -69,11 +84,25 @@ def convert_to_response_dict(http_response, operation_model):
     elif operation_model.has_streaming_output:
         length = response_dict['headers'].get('content-length')
         response_dict['body'] = StreamingBody(http_response.raw, length)
+    elif _is_incremental_body(http_response, incremental_threshold):
+        response_dict['body'] = http_response.raw
     else:
         response_dict['body'] = http_response.content
     return response_dict
 
 
+def _is_incremental_body(http_response, threshold):
+    if threshold is None or not hasattr(http_response.raw, 'stream'):
+        return False
+    if getattr(http_response, '_content', None) is not None:
+        # Something already read the body; parsing the bytes is cheaper.
+        return False
+    # Bodies of unknown length, such as chunked ones, are usually small
+    # and are read into memory as before.
+    length = http_response.headers.get('content-length')
+    return length is not None and int(length) >= threshold
+
+
 class Endpoint:
     """
     Represents an endpoint for a particular service in a specific
@@ -110,6 +139,16 @@ class Endpoint:
     def close(self):
         self.http_session.close()
 
+    def prewarm(self, connections=1, wait=True):
+        """Open ``connections`` pooled connections to this endpoint's host.
+
+        Does nothing for HTTP sessions that cannot pre-warm connections.
+        """
+        prewarm = getattr(self.http_session, 'prewarm', None)
+        if prewarm is None:
+            return []
+        return prewarm([self.host], connections=connections, wait=wait)
+
     def make_request(self, operation_model, request_dict):
         logger.debug(
             "Making request for %s with params: %s",
@@ -135,8 +174,35 @@ class Endpoint:
                 operation_name=operation_model.name,
             )
         prepared_request = self.prepare_request(request)
+        if operation_model:
+            prepared_request.incremental_threshold = (
+                self._incremental_threshold(operation_model)
+            )
         return prepared_request
 
+    def _incremental_threshold(self, operation_model):
+        # Bodies are only left on the connection for the parser when no
+        # handler wants them: before-parse and response-received handlers
+        # get the body as bytes, as they always have.
+        if (
+            operation_model.has_streaming_output
+            or operation_model.has_event_stream_output
+        ):
+            return None
+        service_model = operation_model.service_model
+        parser = self._response_parser_factory.create_parser(
+            service_model.resolved_protocol
+        )
+        threshold = getattr(parser, 'INCREMENTAL_PARSE_THRESHOLD', None)
+        if threshold is None:
+            return None
+        service_id = service_model.service_id.hyphenize()
+        for event in ('before-parse', 'response-received'):
+            event_name = f'{event}.{service_id}.{operation_model.name}'
+            if self._event_emitter.has_handlers(event_name):
+                return None
+        return threshold
+
     def _encode_headers(self, headers):
         # In place encoding of headers to utf-8 if they are unicode.
         for key, value in headers.items():
@@ -216,6 +282,9 @@ class Endpoint:
             success_response, exception = self._get_response(
                 request, operation_model, context
             )
+        return self._request_result(attempts, success_response, exception)
+
+    def _request_result(self, attempts, success_response, exception):
         if (
             success_response is not None
             and 'ResponseMetadata' in success_response[1]
@@ -239,6 +308,20 @@ class Endpoint:
         success_response, exception = self._do_get_response(
             request, operation_model, context
         )
+        self._emit_response_received(
+            operation_model, context, success_response, exception
+        )
+        return success_response, exception
+
+    def _emit_response_received(
+        self, operation_model, context, success_response, exception
+    ):
+        service_id = operation_model.service_model.service_id.hyphenize()
+        event_name = f"response-received.{service_id}.{operation_model.name}"
+        if not self._event_emitter.has_handlers(event_name):
+            # Converting the response again is only needed by listeners,
+            # and usually there are none.
+            return
         kwargs_to_emit = {
             'response_dict': None,
             'parsed_response': None,
@@ -251,30 +334,11 @@ class Endpoint:
             kwargs_to_emit['response_dict'] = convert_to_response_dict(
                 http_response, operation_model
             )
-        service_id = operation_model.service_model.service_id.hyphenize()
-        self._event_emitter.emit(
-            f"response-received.{service_id}.{operation_model.name}",
-            **kwargs_to_emit,
-        )
-        return success_response, exception
+        self._event_emitter.emit(event_name, **kwargs_to_emit)
 
     def _do_get_response(self, request, operation_model, context):
         try:
-            logger.debug("Sending http request: %s", request)
-            history_recorder.record(
-                'HTTP_REQUEST',
-                {
-                    'method': request.method,
-                    'headers': request.headers,
-                    'streaming': operation_model.has_streaming_input,
-                    'url': request.url,
-                    'body': request.body,
-                },
-            )
-            service_id = operation_model.service_model.service_id.hyphenize()
-            event_name = f"before-send.{service_id}.{operation_model.name}"
-            responses = self._event_emitter.emit(event_name, request=request)
-            http_response = first_non_none_response(responses)
+            http_response = self._emit_before_send(request, operation_model)
             if http_response is None:
                 http_response = self._send(request)
         except HTTPClientError as e:
@@ -284,9 +348,43 @@ class Endpoint:
                 "Exception received when sending HTTP request.", exc_info=True
             )
             return (None, e)
+        try:
+            return self._parse_response(
+                http_response, operation_model, context
+            )
+        except HTTPClientError as e:
+            # The connection failed while the parser was reading the body.
+            return (None, e)
+
+    def _emit_before_send(self, request, operation_model):
+        # Returns the response a before-send handler gave, if any.
+        logger.debug("Sending http request: %s", request)
+        history_recorder.record(
+            'HTTP_REQUEST',
+            {
+                'method': request.method,
+                'headers': request.headers,
+                'streaming': operation_model.has_streaming_input,
+                'url': request.url,
+                'body': request.body,
+            },
+        )
+        service_id = operation_model.service_model.service_id.hyphenize()
+        event_name = f"before-send.{service_id}.{operation_model.name}"
+        responses = self._event_emitter.emit(event_name, request=request)
+        return first_non_none_response(responses)
+
+    def _parse_response(self, http_response, operation_model, context):
+        service_id = operation_model.service_model.service_id.hyphenize()
+        protocol = operation_model.service_model.resolved_protocol
+        parser = self._response_parser_factory.create_parser(protocol)
         # This returns the http_response and the parsed_data.
         response_dict = convert_to_response_dict(
-            http_response, operation_model
+            http_response,
+            operation_model,
+            incremental_threshold=getattr(
+                parser, 'INCREMENTAL_PARSE_THRESHOLD', None
+            ),
         )
         handle_checksum_body(
             http_response,
@@ -301,7 +399,6 @@ class Endpoint:
         )
         history_recorder.record('HTTP_RESPONSE', http_response_record_dict)
 
-        protocol = operation_model.service_model.resolved_protocol
         customized_response_dict = {}
         self._event_emitter.emit(
             f"before-parse.{service_id}.{operation_model.name}",
@@ -309,10 +406,18 @@ class Endpoint:
             response_dict=response_dict,
             customized_response_dict=customized_response_dict,
         )
-        parser = self._response_parser_factory.create_parser(protocol)
-        parsed_response = parser.parse(
-            response_dict, operation_model.output_shape
-        )
+        try:
+            parsed_response = parser.parse(
+                response_dict, operation_model.output_shape
+            )
+        except URLLib3ReadTimeoutError as e:
+            # Incrementally parsed bodies are read here rather than by the
+            # HTTP session, so its errors are mapped the same way.
+            raise ReadTimeoutError(endpoint_url=http_response.url, error=e)
+        except ProtocolError as e:
+            raise ConnectionClosedError(
+                error=e, endpoint_url=http_response.url
+            )
         parsed_response.update(customized_response_dict)
         # Do a second parsing pass to pick up on any modeled error fields
         # NOTE: Ideally, we would push this down into the parser classes but
@@ -355,6 +460,23 @@ class Endpoint:
         response=None,
         caught_exception=None,
     ):
+        delay = self._retry_delay(
+            attempts, operation_model, request_dict, response, caught_exception
+        )
+        if delay is None:
+            return False
+        time.sleep(delay)
+        return True
+
+    def _retry_delay(
+        self,
+        attempts,
+        operation_model,
+        request_dict,
+        response=None,
+        caught_exception=None,
+    ):
+        # Seconds to wait before retrying, or None not to retry.
         service_id = operation_model.service_model.service_id.hyphenize()
         event_name = f"needs-retry.{service_id}.{operation_model.name}"
         responses = self._event_emitter.emit(
@@ -367,17 +489,14 @@ class Endpoint:
             request_dict=request_dict,
         )
         handler_response = first_non_none_response(responses)
-        if handler_response is None:
-            return False
-        else:
+        if handler_response is not None:
             # Request needs to be retried, and we need to sleep
             # for the specified number of times.
             logger.debug(
                 "Response received to retry, sleeping for %s seconds",
                 handler_response,
             )
-            time.sleep(handler_response)
-            return True
+        return handler_response
 
     def _send(self, request):
         return self.http_session.send(request)
@@ -401,6 +520,9 @@ class EndpointCreator:
         socket_options=None,
         client_cert=None,
         proxies_config=None,
+        max_pool_connections_per_host=None,
+        max_idle_time=None,
+        use_http2=None,
     ):
         if not is_valid_endpoint_url(
             endpoint_url
@@ -412,6 +534,17 @@ class EndpointCreator:
         endpoint_prefix = service_model.endpoint_prefix
 
         logger.debug('Setting %s timeout as %s', endpoint_prefix, timeout)
+        # Only passed when set, so custom session classes without these
+        # options keep working.
+        pool_options = {}
+        if max_pool_connections_per_host is not None:
+            pool_options['max_pool_connections_per_host'] = (
+                max_pool_connections_per_host
+            )
+        if max_idle_time is not None:
+            pool_options['max_idle_time'] = max_idle_time
+        if use_http2:
+            pool_options['use_http2'] = use_http2
         http_session = http_session_cls(
             timeout=timeout,
             proxies=proxies,
@@ -420,6 +553,7 @@ class EndpointCreator:
             socket_options=socket_options,
             client_cert=client_cert,
             proxies_config=proxies_config,
+            **pool_options,
         )
 
         return Endpoint(
@@ -22,6 +22,7 @@ or you can look at the test files in /tests/unit/data/endpoints/valid-rules/
 
 import logging
 import re
+import threading
 from enum import Enum
 from string import Formatter
 from typing import NamedTuple
@@ -648,9 +649,27 @@ class ParameterDefinition:
         return value
 
 
+# id(rules data) -> [rules data, compiled evaluate function, misses].
+# The loader returns the same rules list for every client of a service, so
+# each rule set is compiled once; the entry keeps the list alive so its id
+# cannot be reused while it is cached.
+_COMPILED_RULESETS = {}
+_COMPILED_RULESETS_LOCK = threading.Lock()
+
+
 class RuleSet:
     """Collection of rules to derive a routable service endpoint."""
 
+    # Evaluate through Python functions generated from the rule tree by
+    # RuleSetCompiler instead of interpreting the rule objects, once the
+    # rule set has been evaluated more than COMPILE_THRESHOLD times in the
+    # process.  Compiling the branches a call reaches costs about as much
+    # as a few dozen interpreted evaluations, which clients that keep
+    # hitting the resolve_endpoint cache never recover.  Set COMPILE_RULES
+    # to False to always use the interpreter.
+    COMPILE_RULES = True
+    COMPILE_THRESHOLD = 32
+
     def __init__(
         self, version, parameters, rules, partitions, documentation=None
     ):
@@ -659,6 +678,25 @@ class RuleSet:
         self.rules = [RuleCreator.create(**rule) for rule in rules]
         self.rule_lib = RuleSetStandardLibrary(partitions)
         self.documentation = documentation
+        self._rules_data = rules
+        self._compiled = None
+
+    def _get_compiled(self):
+        compiled = self._compiled
+        if compiled is None:
+            with _COMPILED_RULESETS_LOCK:
+                entry = _COMPILED_RULESETS.get(id(self._rules_data))
+                if entry is None or entry[0] is not self._rules_data:
+                    if len(_COMPILED_RULESETS) >= CACHE_SIZE:
+                        del _COMPILED_RULESETS[next(iter(_COMPILED_RULESETS))]
+                    entry = [self._rules_data, None, 0]
+                    _COMPILED_RULESETS[id(self._rules_data)] = entry
+                entry[2] += 1
+                if entry[1] is None and entry[2] > self.COMPILE_THRESHOLD:
+                    compiler = RuleSetCompiler(self.rule_lib)
+                    entry[1] = compiler.compile(self.rules)
+                compiled = self._compiled = entry[1]
+        return compiled
 
     def _ingest_parameter_spec(self, parameters):
         return {
@@ -691,6 +729,10 @@ class RuleSet:
         :type input_parameters: dict
         """
         self.process_input_parameters(input_parameters)
+        if self.COMPILE_RULES:
+            compiled = self._get_compiled()
+            if compiled is not None:
+                return compiled(input_parameters, self.rule_lib)
         for rule in self.rules:
             evaluation = rule.evaluate(input_parameters.copy(), self.rule_lib)
             if evaluation is not None:
@@ -698,6 +740,243 @@ class RuleSet:
         return None
 
 
+class _NotCompilable(Exception):
+    pass
+
+
+class RuleSetCompiler:
+    """Translate a rule tree into straight-line Python.
+
+    Every rule becomes a function that checks its conditions in order and
+    returns ``None`` at the first one that fails.  Tree rules call their
+    children in turn.  Variables assigned by conditions are resolved
+    statically: a rule function receives the assignments of its ancestors
+    as arguments, and a reference to anything else reads the input
+    parameters exactly like the interpreter's ``scope_vars.get``.  The
+    result is a single ``evaluate(params, lib)`` function that returns what
+    ``RuleSet.evaluate`` would after the input parameters are processed.
+
+    Rule functions are generated and compiled the first time they are
+    called, so only the branches a client actually reaches are paid for.
+    A rule the compiler cannot translate is evaluated by the interpreter
+    with an equivalent scope.
+    """
+
+    def __init__(self, rule_lib):
+        self._rule_lib = rule_lib
+        self._consts = []
+        self._identifiers = {}
+        self._temp_count = 0
+        self._rule_count = 0
+        self._lock = threading.Lock()
+        self._namespace = {
+            'EndpointResolutionError': EndpointResolutionError,
+            'RuleSetEndpoint': RuleSetEndpoint,
+            '_consts': self._consts,
+        }
+
+    def compile(self, rules):
+        """Return the compiled ``evaluate`` function for ``rules``.
+
+        :type rules: list of BaseRule
+        """
+        body = []
+        for rule in rules:
+            name = self._declare_rule(rule, {})
+            body.append(f"    result = {name}(params, lib)")
+            body.append("    if result is not None:")
+            body.append("        return result")
+        body.append("    return None")
+        return self._define(
+            "evaluate", "def evaluate(params, lib):\n" + "\n".join(body)
+        )
+
+    def _define(self, name, source):
+        code = compile(source, f'<endpoint-rule-set {name}>', 'exec')
+        exec(code, self._namespace)
+        return self._namespace[name]
+
+    def _declare_rule(self, rule, scope):
+        name = f"rule_{self._rule_count}"
+        self._rule_count += 1
+        scope = dict(scope)
+
+        def compile_on_first_call(*args):
+            with self._lock:
+                function = self._namespace[name]
+                if function is compile_on_first_call:
+                    function = self._compile_rule(name, rule, scope)
+            return function(*args)
+
+        self._namespace[name] = compile_on_first_call
+        return name
+
+    def _compile_rule(self, name, rule, scope):
+        try:
+            source = self._rule_source(name, rule, scope)
+        except _NotCompilable as e:
+            logger.debug("Interpreting endpoint rule, cannot compile: %s", e)
+            names = tuple(scope)
+
+            def interpret(params, lib, *values):
+                scope_vars = params.copy()
+                scope_vars.update(zip(names, values))
+                return rule.evaluate(scope_vars, lib)
+
+            self._namespace[name] = interpret
+            return interpret
+        return self._define(name, source)
+
+    def _rule_source(self, name, rule, scope):
+        arguments = ", ".join(["params", "lib", *scope.values()])
+        scope = dict(scope)
+        body = []
+        for condition in rule.conditions:
+            if not self._rule_lib.is_func(condition):
+                raise _NotCompilable("condition is not a function")
+            result = self._call(condition, scope, body)
+            body.append(f"    if {result} is False or {result} is None:")
+            body.append("        return None")
+        if isinstance(rule, TreeRule):
+            for child in rule.rules:
+                child_name = self._declare_rule(child, scope)
+                child_args = ", ".join(["params", "lib", *scope.values()])
+                body.append(f"    result = {child_name}({child_args})")
+                body.append("    if result:")
+                body.append("        return result")
+            body.append("    return None")
+        elif isinstance(rule, EndpointRule):
+            url = self._value(rule.endpoint["url"], scope, body)
+            properties = self._properties(
+                rule.endpoint.get("properties", {}), scope
+            )
+            headers = []
+            for header, values in rule.endpoint.get("headers", {}).items():
+                items = [self._value(v, scope, body) for v in values]
+                headers.append(f"{header!r}: [{', '.join(items)}]")
+            headers = ", ".join(headers)
+            body.append(
+                f"    return RuleSetEndpoint(url={url}, "
+                f"properties={properties}, headers={{{headers}}})"
+            )
+        elif isinstance(rule, ErrorRule):
+            error = self._value(rule.error, scope, body)
+            body.append(f"    raise EndpointResolutionError(msg={error})")
+        else:
+            raise _NotCompilable(f"unknown rule {type(rule).__name__}")
+        return f"def {name}({arguments}):\n" + "\n".join(body)
+
+    def _temp(self):
+        self._temp_count += 1
+        return f"t{self._temp_count}"
+
+    def _identifier(self, name):
+        identifier = self._identifiers.get(name)
+        if identifier is None:
+            safe = re.sub(r"\W", "_", name)
+            identifier = f"v{len(self._identifiers)}_{safe}"
+            self._identifiers[name] = identifier
+        return identifier
+
+    def _call(self, func_signature, scope, body, nested=False):
+        rule_lib = self._rule_lib
+        func_name = rule_lib.convert_func_name(func_signature["fn"])
+        if not callable(getattr(rule_lib, func_name, None)):
+            raise _NotCompilable(f"unknown function {func_signature['fn']}")
+        if nested and "assign" in func_signature:
+            raise _NotCompilable("assignment inside a function argument")
+        args = [
+            self._value(arg, scope, body, nested=True)
+            for arg in func_signature["argv"]
+        ]
+        builtin = getattr(type(rule_lib), func_name, None) is getattr(
+            RuleSetStandardLibrary, func_name, None
+        )
+        if builtin and func_name == "is_set":
+            expression = f"{args[0]} is not None"
+        elif builtin and func_name == "_not":
+            expression = f"not {args[0]}"
+        elif (
+            builtin
+            and func_name == "get_attr"
+            and isinstance(func_signature["argv"][1], str)
+            and "[" not in func_signature["argv"][1]
+        ):
+            parts = func_signature["argv"][1].split(".")
+            expression = args[0] + "".join(f"[{part!r}]" for part in parts)
+        else:
+            expression = f"lib.{func_name}({', '.join(args)})"
+        result = self._temp()
+        body.append(f"    {result} = {expression}")
+        if "assign" in func_signature:
+            assign = func_signature["assign"]
+            msg = (
+                f"Assignment {assign} already exists in "
+                "scoped variables and cannot be overwritten"
+            )
+            error = f"raise EndpointResolutionError(msg={msg!r})"
+            if assign in scope:
+                body.append(f"    {error}")
+            else:
+                body.append(f"    if {assign!r} in params:")
+                body.append(f"        {error}")
+            identifier = self._identifier(assign)
+            body.append(f"    {identifier} = {result}")
+            scope[assign] = identifier
+        return result
+
+    def _value(self, value, scope, body, nested=False):
+        rule_lib = self._rule_lib
+        if rule_lib.is_func(value):
+            return self._call(value, scope, body, nested=nested)
+        elif rule_lib.is_ref(value):
+            name = value["ref"]
+            if name in scope:
+                return scope[name]
+            return f"params.get({name!r})"
+        elif rule_lib.is_template(value):
+            return self._template(value, scope)
+        return self._literal(value)
+
+    def _template(self, value, scope):
+        try:
+            parsed = list(STRING_FORMATTER.parse(value))
+        except ValueError as e:
+            raise _NotCompilable(f"malformed template {value!r}") from e
+        pieces = []
+        for literal, reference, _, _ in parsed:
+            if literal:
+                pieces.append(repr(literal))
+            if reference is not None:
+                first, *rest = reference.split("#")
+                lookup = scope.get(first) or f"params[{first!r}]"
+                lookup += "".join(f"[{part!r}]" for part in rest)
+                pieces.append(f"format({lookup})")
+        if not pieces:
+            return "''"
+        return f"({' + '.join(pieces)})"
+
+    def _properties(self, properties, scope):
+        if isinstance(properties, list):
+            items = ", ".join(self._properties(p, scope) for p in properties)
+            return f"[{items}]"
+        elif isinstance(properties, dict):
+            items = ", ".join(
+                f"{key!r}: {self._properties(value, scope)}"
+                for key, value in properties.items()
+            )
+            return f"{{{items}}}"
+        elif self._rule_lib.is_template(properties):
+            return self._template(properties, scope)
+        return self._literal(properties)
+
+    def _literal(self, value):
+        if value is None or type(value) in (str, bool, int, float):
+            return repr(value)
+        self._consts.append(value)
+        return f"_consts[{len(self._consts) - 1}]"
+
+
 class EndpointProvider:
     """Derives endpoints from a RuleSet for given input parameters."""
 
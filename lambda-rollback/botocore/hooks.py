@@ -81,6 +81,16 @@ class BaseEventHooks:
         """
         return []
 
+    def has_handlers(self, event_name):
+        """Whether emitting ``event_name`` could call any handler.
+
+        Callers use this to skip building expensive event kwargs when
+        nothing is listening.  The default is conservative and always
+        returns True.
+
+        """
+        return True
+
     def register(
         self, event_name, handler, unique_id=None, unique_id_uses_count=False
     ):
@@ -195,7 +205,9 @@ class HierarchicalEmitter(BaseEventHooks):
     def __init__(self):
         # We keep a reference to the handlers for quick
         # read only access (we never modify self._handlers).
-        # A cache of event name to handler list.
+        # The dispatch table: event name to the tuple of handlers to
+        # call, compiled from the trie on the first emit of each name.
+        # Any registration change throws the whole table away.
         self._lookup_cache = {}
         self._handlers = _PrefixTrie()
         # This is used to ensure that unique_id's are only
@@ -220,28 +232,41 @@ class HierarchicalEmitter(BaseEventHooks):
         :return: List of (handler, response) tuples from all processed
                  handlers.
         """
-        responses = []
         # Invoke the event handlers from most specific
         # to least specific, each time stripping off a dot.
         handlers_to_call = self._lookup_cache.get(event_name)
         if handlers_to_call is None:
-            handlers_to_call = self._handlers.prefix_search(event_name)
-            self._lookup_cache[event_name] = handlers_to_call
-        elif not handlers_to_call:
+            handlers_to_call = self._compile_handlers(event_name)
+        if not handlers_to_call:
             # Short circuit and return an empty response is we have
             # no handlers to call.  This is the common case where
             # for the majority of signals, nothing is listening.
             return []
         kwargs['event_name'] = event_name
         responses = []
+        debug = logger.isEnabledFor(logging.DEBUG)
         for handler in handlers_to_call:
-            logger.debug('Event %s: calling handler %s', event_name, handler)
+            if debug:
+                logger.debug(
+                    'Event %s: calling handler %s', event_name, handler
+                )
             response = handler(**kwargs)
             responses.append((handler, response))
             if stop_on_response and response is not None:
                 return responses
         return responses
 
+    def _compile_handlers(self, event_name):
+        handlers_to_call = tuple(self._handlers.prefix_search(event_name))
+        self._lookup_cache[event_name] = handlers_to_call
+        return handlers_to_call
+
+    def has_handlers(self, event_name):
+        handlers_to_call = self._lookup_cache.get(event_name)
+        if handlers_to_call is None:
+            handlers_to_call = self._compile_handlers(event_name)
+        return bool(handlers_to_call)
+
     def emit(self, event_name, **kwargs):
         """
         Emit an event by name with arguments passed as keyword args.
@@ -395,6 +420,10 @@ class HierarchicalEmitter(BaseEventHooks):
         new_state = self.__dict__.copy()
         new_state['_handlers'] = copy.copy(self._handlers)
         new_state['_unique_id_handlers'] = copy.copy(self._unique_id_handlers)
+        # The compiled tuples are immutable and still valid for the copied
+        # trie, but the table itself must not be shared: each copy fills
+        # and invalidates its own.
+        new_state['_lookup_cache'] = dict(self._lookup_cache)
         new_instance.__dict__ = new_state
         return new_instance
 
@@ -415,6 +444,10 @@ class EventAliaser(BaseEventHooks):
         aliased_event_name = self._alias_event_name(event_name)
         return self._emitter.emit_until_response(aliased_event_name, **kwargs)
 
+    def has_handlers(self, event_name):
+        aliased_event_name = self._alias_event_name(event_name)
+        return self._emitter.has_handlers(aliased_event_name)
+
     def register(
         self, event_name, handler, unique_id=None, unique_id_uses_count=False
     ):
@@ -452,8 +485,9 @@ class EventAliaser(BaseEventHooks):
         )
 
     def _alias_event_name(self, event_name):
-        if event_name in self._alias_name_cache:
-            return self._alias_name_cache[event_name]
+        aliased_event_name = self._alias_name_cache.get(event_name)
+        if aliased_event_name is not None:
+            return aliased_event_name
 
         for old_part, new_part in self._event_aliases.items():
             # We can't simply do a string replace for everything, otherwise we
@@ -0,0 +1,700 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""The interfaces in this module are not intended for public use.
+
+This module sends requests over HTTP/2 connections that multiplex the
+concurrent requests to a host, each on its own stream, for
+``URLLib3Session`` when a client is created with ``use_http2``.  It needs
+the ``h2`` package, so it is only imported when HTTP/2 is asked for.
+"""
+import io
+import logging
+import socket
+import ssl
+import threading
+from collections import deque
+
+import h2.config
+import h2.connection
+import h2.errors
+import h2.events
+import h2.exceptions
+import h2.settings
+from urllib3 import HTTPResponse
+from urllib3._collections import HTTPHeaderDict
+from urllib3.exceptions import (
+    ConnectTimeoutError,
+    NewConnectionError,
+    ProtocolError,
+    ReadTimeoutError,
+    SSLError,
+)
+from urllib3.http2.connection import (
+    _is_illegal_header_value,
+    _is_legal_header_name,
+)
+from urllib3.util.connection import create_connection
+from urllib3.util.timeout import Timeout
+from urllib3.util.url import parse_url
+from urllib3.util.wait import wait_for_read
+
+logger = logging.getLogger(__name__)
+
+ALPN_PROTOCOLS = ['h2', 'http/1.1']
+# Flow control windows for response bodies: how much of a stream, and of
+# all the streams of a connection, the server may send before it is read.
+STREAM_WINDOW_SIZE = 1 << 20
+CONNECTION_WINDOW_SIZE = 16 << 20
+READ_SIZE = 1 << 16
+# HTTP/1.1 headers that HTTP/2 does not allow.  HTTP/2 frames bodies
+# itself, and bodies are sent without waiting for a 100 Continue.
+_CONNECTION_HEADERS = frozenset(
+    [
+        b'connection',
+        b'expect',
+        b'keep-alive',
+        b'proxy-connection',
+        b'te',
+        b'transfer-encoding',
+        b'upgrade',
+    ]
+)
+
+
+def _request_headers(method, authority, target, headers):
+    request_headers = [
+        (b':method', method.encode('ascii')),
+        (b':scheme', b'https'),
+        (b':authority', authority.encode('ascii')),
+        (b':path', target.encode('ascii')),
+    ]
+    for name, value in headers.items():
+        if isinstance(name, str):
+            name = name.encode('latin-1')
+        name = name.lower()
+        if isinstance(value, str):
+            value = value.encode('latin-1')
+        if name == b'host':
+            request_headers[2] = (b':authority', value)
+            continue
+        if name in _CONNECTION_HEADERS:
+            continue
+        if not _is_legal_header_name(name):
+            raise ValueError(f"Illegal header name {name!r}")
+        if _is_illegal_header_value(value):
+            raise ValueError(f"Illegal header value {value!r}")
+        request_headers.append((name, value))
+    return request_headers
+
+
+def _body_chunks(body):
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        yield body
+    elif hasattr(body, 'read'):
+        while True:
+            chunk = body.read(READ_SIZE)
+            if not chunk:
+                return
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            yield chunk
+    else:
+        yield from body
+
+
+class _Stream:
+    def __init__(self, stream_id, lock):
+        self.stream_id = stream_id
+        # The request and its body wait on this for the reader thread.
+        self.changed = threading.Condition(lock)
+        self.status = None
+        self.headers = None
+        self.chunks = deque()
+        self.ended = False
+        # Why the stream failed, raised to whoever waits on it next.
+        self.error = None
+
+
+class HTTP2Connection:
+    """An HTTP/2 connection to one host, shared by concurrent requests.
+
+    Each request opens a stream and sends its frames from its own thread.
+    A reader thread receives the server's frames and hands them to the
+    streams they belong to, where the requests and their response bodies
+    wait for them.  Response bodies are acknowledged to the server as they
+    are read, so a body nobody reads only holds up its own stream.
+
+    The TLS socket is only used by one thread at a time: the reader takes
+    it for non-blocking reads of whatever has arrived and waits for more
+    without it.
+    """
+
+    def __init__(self, host, port, ssl_context, timeout, socket_options=None):
+        self.host = host
+        self.port = port
+        self._ssl_context = ssl_context
+        self._timeout = timeout
+        self._socket_options = socket_options
+        self._sock = None
+        config = h2.config.H2Configuration(
+            client_side=True, header_encoding=None
+        )
+        self._h2 = h2.connection.H2Connection(config=config)
+        self._h2.local_settings = h2.settings.Settings(
+            client=True,
+            initial_values={
+                h2.settings.SettingCodes.ENABLE_PUSH: 0,
+                h2.settings.SettingCodes.INITIAL_WINDOW_SIZE: (
+                    STREAM_WINDOW_SIZE
+                ),
+            },
+        )
+        # Guards the h2 state and the streams.  Requests wait on it for
+        # flow control windows and stream slots, and on their stream for
+        # its response.
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._io_lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+        self._connect_error = None
+        self._streams = {}
+        self._closed = False
+        self._accepting = True
+        # None until connected, then whether the server chose HTTP/2.
+        self.negotiated = None
+
+    @property
+    def usable(self):
+        return (
+            self._connect_error is None
+            and self.negotiated is not False
+            and not self._closed
+            and self._accepting
+        )
+
+    @property
+    def has_capacity(self):
+        # Read without the lock, which the reader thread holds often.
+        return (
+            self.usable
+            and len(self._streams)
+            < self._h2.remote_settings.max_concurrent_streams
+        )
+
+    def connect(self):
+        """Connect, unless connected already.
+
+        Concurrent callers wait for the first to connect and share its
+        outcome.
+
+        :returns: Whether the server chose HTTP/2.
+        """
+        if self.negotiated is not None:
+            return self.negotiated
+        with self._connect_lock:
+            if self._connect_error is not None:
+                raise self._connect_error
+            if self.negotiated is None:
+                try:
+                    self.negotiated = self._connect()
+                except Exception as e:
+                    self._connect_error = e
+                    raise
+        return self.negotiated
+
+    def _connect(self):
+        address = (self.host.strip('[]'), self.port)
+        try:
+            sock = create_connection(
+                address,
+                self._timeout.connect_timeout,
+                socket_options=self._socket_options,
+            )
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self,
+                f"Connection to {self.host} timed out. "
+                f"(connect timeout={self._timeout.connect_timeout})",
+            ) from e
+        except socket.gaierror:
+            raise
+        except OSError as e:
+            raise NewConnectionError(
+                self, f"Failed to establish a new connection: {e}"
+            ) from e
+        try:
+            sock = self._ssl_context.wrap_socket(
+                sock, server_hostname=self.host.strip('[]')
+            )
+        except ssl.SSLError as e:
+            sock.close()
+            raise SSLError(e) from e
+        except OSError as e:
+            sock.close()
+            raise NewConnectionError(
+                self, f"Failed to establish a new connection: {e}"
+            ) from e
+        if sock.selected_alpn_protocol() != 'h2':
+            sock.close()
+            return False
+        sock.settimeout(self._timeout.read_timeout)
+        self._sock = sock
+        with self._lock:
+            self._h2.initiate_connection()
+            self._h2.increment_flow_control_window(
+                CONNECTION_WINDOW_SIZE - self._h2.inbound_flow_control_window
+            )
+            self._flush()
+        threading.Thread(
+            target=self._read_frames, name='botocore-http2', daemon=True
+        ).start()
+        return True
+
+    def request(self, method, url, authority, target, headers, body=None):
+        """Send a request on a new stream and wait for its response.
+
+        :returns: A ``urllib3.HTTPResponse`` whose body has not been read.
+        """
+        request_headers = _request_headers(method, authority, target, headers)
+        end_stream = not body
+        with self._lock:
+            while (
+                self._h2.open_outbound_streams
+                >= self._h2.remote_settings.max_concurrent_streams
+                and self.usable
+            ):
+                self._changed.wait()
+            if not self.usable:
+                raise ProtocolError(
+                    'Connection aborted.',
+                    ConnectionResetError('The HTTP/2 connection was closed'),
+                )
+            try:
+                stream_id = self._h2.get_next_available_stream_id()
+            except h2.exceptions.NoAvailableStreamIDError as e:
+                self._accepting = False
+                raise ProtocolError('Connection aborted.', e)
+            stream = _Stream(stream_id, self._lock)
+            self._streams[stream_id] = stream
+            try:
+                self._h2.send_headers(
+                    stream_id, request_headers, end_stream=end_stream
+                )
+                self._flush()
+            except OSError as e:
+                raise ProtocolError('Connection aborted.', e)
+        if not end_stream:
+            self._send_body(stream, url, body)
+        with self._lock:
+            while stream.status is None:
+                if stream.error is not None:
+                    self._streams.pop(stream_id, None)
+                    raise ProtocolError(
+                        'Connection aborted.', ConnectionResetError(stream.error)
+                    )
+                if not stream.changed.wait(self._timeout.read_timeout):
+                    self._cancel(stream)
+                    raise ReadTimeoutError(
+                        None,
+                        url,
+                        f"Read timed out. "
+                        f"(read timeout={self._timeout.read_timeout})",
+                    )
+        return HTTPResponse(
+            body=_ResponseBody(self, stream),
+            headers=stream.headers,
+            status=stream.status,
+            version=20,
+            version_string='HTTP/2',
+            preload_content=False,
+            decode_content=False,
+            request_method=method,
+            request_url=url,
+        )
+
+    def _send_body(self, stream, url, body):
+        stream_id = stream.stream_id
+        for chunk in _body_chunks(body):
+            view = memoryview(chunk).cast('B')
+            while view:
+                with self._lock:
+                    while True:
+                        if stream.ended or stream.error is not None:
+                            # The server has answered, or given up on the
+                            # request, without waiting for the rest of it.
+                            return
+                        window = min(
+                            self._h2.local_flow_control_window(stream_id),
+                            self._h2.max_outbound_frame_size,
+                        )
+                        if window:
+                            break
+                        if not self._changed.wait(self._timeout.read_timeout):
+                            self._cancel(stream)
+                            raise ReadTimeoutError(
+                                None, url, 'Timed out sending the request body'
+                            )
+                    try:
+                        self._h2.send_data(stream_id, view[:window].tobytes())
+                        self._flush()
+                    except OSError as e:
+                        raise ProtocolError('Connection aborted.', e)
+                view = view[window:]
+        with self._lock:
+            if not stream.ended and stream.error is None:
+                try:
+                    self._h2.end_stream(stream_id)
+                    self._flush()
+                except OSError as e:
+                    raise ProtocolError('Connection aborted.', e)
+
+    def read(self, stream, size):
+        """Read at most ``size`` bytes of ``stream``'s response body."""
+        with self._lock:
+            while not stream.chunks:
+                if stream.error is not None:
+                    raise ConnectionResetError(stream.error)
+                if stream.ended:
+                    return b''
+                if not stream.changed.wait(self._timeout.read_timeout):
+                    raise socket.timeout('The read operation timed out')
+            chunk = stream.chunks[0]
+            if len(chunk) > size:
+                stream.chunks[0] = chunk[size:]
+                chunk = chunk[:size]
+            else:
+                stream.chunks.popleft()
+            self._h2.acknowledge_received_data(len(chunk), stream.stream_id)
+            self._flush()
+            return chunk
+
+    def release(self, stream):
+        """Stop receiving ``stream``, whether or not it was read to the end."""
+        with self._lock:
+            if self._streams.pop(stream.stream_id, None) is None:
+                return
+            if not stream.ended and stream.error is None:
+                self._cancel(stream)
+            unread = sum(len(chunk) for chunk in stream.chunks)
+            stream.chunks.clear()
+            if unread and not self._closed:
+                self._h2.acknowledge_received_data(unread, stream.stream_id)
+                try:
+                    self._flush()
+                except OSError:
+                    pass
+
+    def _cancel(self, stream):
+        # Called with the lock held.
+        self._streams.pop(stream.stream_id, None)
+        stream.error = 'The request was cancelled'
+        if self._closed:
+            return
+        try:
+            self._h2.reset_stream(
+                stream.stream_id, h2.errors.ErrorCodes.CANCEL
+            )
+            self._flush()
+        except (h2.exceptions.StreamClosedError, OSError):
+            pass
+
+    def _flush(self):
+        # Called with the lock held, so frames go out in the order h2
+        # produced them.
+        data = self._h2.data_to_send()
+        if data:
+            with self._io_lock:
+                self._sock.sendall(data)
+
+    def _recv(self, sock):
+        while True:
+            with self._io_lock:
+                timeout = sock.gettimeout()
+                sock.setblocking(False)
+                try:
+                    return sock.recv(READ_SIZE)
+                except (ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                    pass
+                finally:
+                    sock.settimeout(timeout)
+            wait_for_read(sock)
+
+    def _read_frames(self):
+        sock = self._sock
+        saved_session = not hasattr(self._ssl_context, 'save_session')
+        reason = 'The server closed the HTTP/2 connection'
+        try:
+            while True:
+                data = self._recv(sock)
+                if not data:
+                    break
+                if not saved_session:
+                    # Session tickets arrive just after the handshake.
+                    saved_session = self._ssl_context.save_session(sock)
+                with self._lock:
+                    changed = set()
+                    for event in self._h2.receive_data(data):
+                        changed.add(self._handle(event))
+                    self._flush()
+                    for stream in changed:
+                        if stream is None:
+                            self._changed.notify_all()
+                        else:
+                            stream.changed.notify()
+        except (OSError, ValueError, h2.exceptions.H2Error) as e:
+            # ValueError is a select() on a socket that close() has closed.
+            if not self._closed:
+                logger.debug('HTTP/2 connection to %s failed', self.host)
+                reason = f'The HTTP/2 connection failed: {e}'
+        finally:
+            with self._lock:
+                self._closed = True
+                for stream in self._streams.values():
+                    if not stream.ended and stream.error is None:
+                        stream.error = reason
+                self._notify_all()
+            sock.close()
+
+    def _handle(self, event):
+        # Returns the stream whose waiters the event concerns, or None if
+        # it concerns the requests waiting on the connection.
+        stream = self._streams.get(getattr(event, 'stream_id', None))
+        if isinstance(event, h2.events.DataReceived):
+            if stream is None:
+                # A stream that has been released: give the window back.
+                self._h2.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id
+                )
+                return None
+            padding = event.flow_controlled_length - len(event.data)
+            if padding:
+                self._h2.acknowledge_received_data(padding, event.stream_id)
+            if event.data:
+                stream.chunks.append(event.data)
+        elif stream is None:
+            if isinstance(event, h2.events.ConnectionTerminated):
+                self._terminated(event)
+                self._notify_all()
+            return None
+        elif isinstance(event, h2.events.ResponseReceived):
+            headers = HTTPHeaderDict()
+            for name, value in event.headers:
+                if name == b':status':
+                    status = int(value)
+                elif not name.startswith(b':'):
+                    headers.add(name.decode('latin-1'), value.decode('latin-1'))
+            stream.headers = headers
+            stream.status = status
+        elif isinstance(event, h2.events.StreamEnded):
+            stream.ended = True
+            # A stream slot is free, and the body may be waiting for a
+            # window it no longer needs.
+            self._changed.notify_all()
+        elif isinstance(event, h2.events.StreamReset):
+            # A server that has sent the whole response may reset the
+            # rest of the request.
+            if not stream.ended:
+                stream.error = (
+                    f'The server reset the stream with error code '
+                    f'{event.error_code!r}'
+                )
+            self._changed.notify_all()
+        elif isinstance(event, h2.events.WindowUpdated):
+            return None
+        return stream
+
+    def _notify_all(self):
+        self._changed.notify_all()
+        for stream in self._streams.values():
+            stream.changed.notify_all()
+
+    def _terminated(self, event):
+        # GOAWAY: streams after the last one the server processed can be
+        # retried, the others may still finish.
+        self._accepting = False
+        last_stream_id = event.last_stream_id
+        for stream_id, stream in self._streams.items():
+            if last_stream_id is None or stream_id > last_stream_id:
+                if not stream.ended and stream.error is None:
+                    stream.error = 'The server did not process the request'
+
+    def close(self):
+        with self._lock:
+            if self._closed or self._sock is None:
+                self._closed = True
+                return
+            self._closed = True
+            try:
+                self._h2.close_connection()
+                self._flush()
+            except (OSError, h2.exceptions.H2Error):
+                pass
+            for stream in self._streams.values():
+                if not stream.ended and stream.error is None:
+                    stream.error = 'The HTTP/2 connection was closed'
+            self._notify_all()
+        try:
+            # Wakes the reader thread, which closes the socket.
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class _ResponseBody(io.RawIOBase):
+    """The body of a response, read from its stream as it arrives."""
+
+    def __init__(self, connection, stream):
+        self._connection = connection
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if self.closed:
+            return b''
+        if size is None or size < 0:
+            parts = []
+            while True:
+                chunk = self._connection.read(self._stream, READ_SIZE)
+                if not chunk:
+                    return b''.join(parts)
+                parts.append(chunk)
+        return self._connection.read(self._stream, size)
+
+    def readinto(self, b):
+        chunk = self.read(len(b))
+        b[: len(chunk)] = chunk
+        return len(chunk)
+
+    def close(self):
+        if not self.closed:
+            self._connection.release(self._stream)
+        super().close()
+
+
+class HTTP2ConnectionManager:
+    """Keeps an HTTP/2 connection to each host that speaks HTTP/2.
+
+    Hosts that do not choose HTTP/2 when connecting are remembered, and
+    their requests are left to HTTP/1.1.  A second connection to a host
+    is only opened while the first has as many streams open as the
+    server allows.
+    """
+
+    def __init__(self, ssl_context, timeout, socket_options=None):
+        if not isinstance(timeout, Timeout):
+            timeout = Timeout(connect=timeout, read=timeout)
+        self._ssl_context = ssl_context
+        self._timeout = timeout
+        self._socket_options = socket_options
+        self._connections = {}
+        self._http11_hosts = set()
+        self._lock = threading.Lock()
+
+    def _key(self, url):
+        parsed = parse_url(url)
+        if parsed.scheme != 'https':
+            return None
+        key = (parsed.host, parsed.port or 443)
+        if key in self._http11_hosts:
+            return None
+        return key
+
+    def _find_connection(self, key):
+        for conn in self._connections.get(key, ()):
+            if conn.negotiated is None and conn.usable or conn.has_capacity:
+                return conn
+        return None
+
+    def _get_connection(self, key):
+        # The tuples of connections are replaced, not changed, so they can
+        # be searched without the lock.
+        conn = self._find_connection(key)
+        if conn is not None:
+            return conn
+        with self._lock:
+            conn = self._find_connection(key)
+            if conn is None:
+                conn = HTTP2Connection(
+                    key[0],
+                    key[1],
+                    self._ssl_context,
+                    self._timeout,
+                    socket_options=self._socket_options,
+                )
+                self._connections[key] = tuple(
+                    c for c in self._connections.get(key, ()) if c.usable
+                ) + (conn,)
+        return conn
+
+    def _connect(self, key):
+        conn = self._get_connection(key)
+        try:
+            negotiated = conn.connect()
+        except Exception:
+            with self._lock:
+                self._connections[key] = tuple(
+                    c for c in self._connections.get(key, ()) if c is not conn
+                )
+            raise
+        if not negotiated:
+            logger.debug(
+                'HTTP/2 was not negotiated with %s, using HTTP/1.1', key[0]
+            )
+            with self._lock:
+                self._http11_hosts.add(key)
+                self._connections.pop(key, None)
+            return None
+        return conn
+
+    def connect(self, url):
+        """Open a connection to ``url``'s host unless it has one.
+
+        :returns: Whether requests to ``url`` use HTTP/2.
+        """
+        key = self._key(url)
+        return key is not None and self._connect(key) is not None
+
+    def urlopen(self, method, url, target, body=None, headers=None):
+        """Send a request over HTTP/2.
+
+        :param target: The request target, the path and query of ``url``.
+        :returns: A ``urllib3.HTTPResponse``, or None if ``url`` is not an
+            HTTPS URL of a host that speaks HTTP/2.
+        """
+        key = self._key(url)
+        if key is None:
+            return None
+        conn = self._connect(key)
+        if conn is None:
+            return None
+        host, port = key
+        authority = host if port == 443 else f'{host}:{port}'
+        return conn.request(
+            method, url, authority, target, headers or {}, body=body
+        )
+
+    def clear(self):
+        with self._lock:
+            connections = [
+                conn
+                for host_connections in self._connections.values()
+                for conn in host_connections
+            ]
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
@@ -2,7 +2,10 @@ import logging
 import os
 import os.path
 import socket
+import ssl
 import sys
+import threading
+import time
 import warnings
 from base64 import b64encode
 from concurrent.futures import CancelledError
@@ -29,6 +32,7 @@ from urllib3.util.ssl_ import (
     ssl,
 )
 from urllib3.util.url import parse_url
+from urllib3.util.wait import wait_for_read
 
 try:
     from urllib3.util.ssl_ import OP_NO_TICKET, PROTOCOL_TLS_CLIENT
@@ -101,7 +105,11 @@ def get_cert_path(verify):
 
 
 def create_urllib3_context(
-    ssl_version=None, cert_reqs=None, options=None, ciphers=None
+    ssl_version=None,
+    cert_reqs=None,
+    options=None,
+    ciphers=None,
+    context_class=None,
 ):
     """This function is a vendored version of the same function in urllib3
 
@@ -112,7 +120,9 @@ def create_urllib3_context(
     if not ssl_version or ssl_version == PROTOCOL_TLS:
         ssl_version = PROTOCOL_TLS_CLIENT
 
-    context = SSLContext(ssl_version)
+    if context_class is None:
+        context_class = SSLContext
+    context = context_class(ssl_version)
 
     if ciphers:
         context.set_ciphers(ciphers)
@@ -180,6 +190,72 @@ def create_urllib3_context(
     return context
 
 
+class ResumingSSLContext(SSLContext):
+    """An SSLContext that resumes TLS sessions with hosts it has seen.
+
+    Connections made with it offer the last session saved for their host,
+    so a reconnect skips the certificate exchange and key agreement of a
+    full handshake when the server accepts it.  Sessions are saved with
+    ``save_session`` once a connection has received its session tickets,
+    which the connection pools do when a connection is returned.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.tls_sessions = {}
+
+    def wrap_socket(
+        self, sock, *args, server_hostname=None, session=None, **kwargs
+    ):
+        if session is None and server_hostname is not None:
+            session = self.tls_sessions.get(server_hostname)
+            if (
+                session is not None
+                and time.time() >= session.time + session.timeout
+            ):
+                self.tls_sessions.pop(server_hostname, None)
+                session = None
+        return super().wrap_socket(
+            sock,
+            *args,
+            server_hostname=server_hostname,
+            session=session,
+            **kwargs,
+        )
+
+    def save_session(self, sock):
+        """Save ``sock``'s session to resume its host's next connection.
+
+        Returns whether there was a resumable session to save.
+        """
+        hostname = sock.server_hostname
+        session = sock.session
+        if hostname is None or session is None:
+            return False
+        # TLS 1.3 sessions can only be resumed once a ticket has arrived.
+        if not session.has_ticket and sock.version() == 'TLSv1.3':
+            return False
+        self.tls_sessions[hostname] = session
+        return True
+
+
+# SSL contexts shared by URLLib3Sessions with the same verification and
+# client certificate settings, with the CA bundle already loaded.  Keyed
+# by those settings and the files' stat signatures.
+_SHARED_SSL_CONTEXTS = {}
+_SHARED_SSL_CONTEXTS_LOCK = threading.Lock()
+
+
+def _file_signature(path):
+    if path is None:
+        return None
+    try:
+        file_stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return (path, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns)
+
+
 def ensure_boolean(val):
     """Ensures a boolean value if a string or boolean is provided
 
@@ -209,6 +285,18 @@ def mask_proxy_url(proxy_url):
     return proxy_url
 
 
+def _is_read_incrementally(request, urllib_response):
+    # Whether the endpoint's parser will read this response off the
+    # connection itself; see AWSPreparedRequest.incremental_threshold.
+    threshold = getattr(request, 'incremental_threshold', None)
+    if threshold is None or not hasattr(urllib_response, 'stream'):
+        return False
+    if not 200 <= urllib_response.status < 300:
+        return False
+    length = urllib_response.headers.get('content-length')
+    return length is not None and int(length) >= threshold
+
+
 def _is_ipaddress(host):
     """Wrap urllib3's is_ipaddress to support bracketed IPv6 addresses."""
     return is_ipaddress(host) or bool(IPV6_ADDRZ_RE.match(host))
@@ -285,6 +373,13 @@ class URLLib3Session:
     directly via a flag to urlopen so enabling it if needed should be trivial.
     """
 
+    # Sessions with the same verification and client certificate settings
+    # share one SSL context that loads the CA bundle once, instead of every
+    # new connection parsing it again.
+    SHARE_SSL_CONTEXTS = True
+    # Shared contexts resume TLS sessions when reconnecting to a host.
+    RESUME_TLS_SESSIONS = True
+
     def __init__(
         self,
         verify=True,
@@ -294,6 +389,9 @@ class URLLib3Session:
         socket_options=None,
         client_cert=None,
         proxies_config=None,
+        max_pool_connections_per_host=None,
+        max_idle_time=None,
+        use_http2=False,
     ):
         self._verify = verify
         self._proxy_config = ProxyConfiguration(
@@ -317,12 +415,21 @@ class URLLib3Session:
 
         self._timeout = timeout
         self._max_pool_connections = max_pool_connections
+        self._max_pool_connections_per_host = {
+            host.lower(): maxsize
+            for host, maxsize in (max_pool_connections_per_host or {}).items()
+        }
+        self._max_idle_time = max_idle_time
         self._socket_options = socket_options
         if socket_options is None:
             self._socket_options = []
         self._proxy_managers = {}
+        self._shared_ssl_context = self._get_shared_ssl_context()
         self._manager = PoolManager(**self._get_pool_manager_kwargs())
         self._manager.pool_classes_by_scheme = self._pool_classes_by_scheme
+        self._http2 = None
+        if use_http2:
+            self._http2 = self._get_http2_manager()
 
     def _proxies_kwargs(self, **kwargs):
         proxies_settings = self._proxy_config.settings
@@ -335,10 +442,13 @@ class URLLib3Session:
         return {k: v for k, v in proxies_kwargs.items() if v is not None}
 
     def _get_pool_manager_kwargs(self, **extra_kwargs):
+        ssl_context = self._shared_ssl_context
+        if ssl_context is None:
+            ssl_context = self._get_ssl_context()
         pool_manager_kwargs = {
             'timeout': self._timeout,
             'maxsize': self._max_pool_connections,
-            'ssl_context': self._get_ssl_context(),
+            'ssl_context': ssl_context,
             'socket_options': self._socket_options,
             'cert_file': self._cert_file,
             'key_file': self._key_file,
@@ -349,6 +459,103 @@ class URLLib3Session:
     def _get_ssl_context(self):
         return create_urllib3_context()
 
+    def _get_shared_ssl_context(self):
+        # Subclasses that build their own context keep getting it.
+        if (
+            not self.SHARE_SSL_CONTEXTS
+            or type(self)._get_ssl_context
+            is not URLLib3Session._get_ssl_context
+        ):
+            return None
+        ca_certs = get_cert_path(self._verify) if self._verify else None
+        context_class = SSLContext
+        if self.RESUME_TLS_SESSIONS:
+            context_class = ResumingSSLContext
+        key = self._shared_ssl_context_key(context_class, ca_certs)
+        context = _SHARED_SSL_CONTEXTS.get(key)
+        if context is not None:
+            return context
+        with _SHARED_SSL_CONTEXTS_LOCK:
+            context = _SHARED_SSL_CONTEXTS.get(key)
+            if context is None:
+                context = create_urllib3_context(context_class=context_class)
+                if ca_certs:
+                    try:
+                        context.load_verify_locations(ca_certs)
+                    except (OSError, ssl.SSLError):
+                        # Leave connections to load it and report the
+                        # error as they always have.
+                        return None
+                _SHARED_SSL_CONTEXTS[key] = context
+        return context
+
+    def _shared_ssl_context_key(self, context_class, ca_certs):
+        return (
+            context_class,
+            bool(self._verify),
+            _file_signature(ca_certs),
+            _file_signature(self._cert_file),
+            _file_signature(self._key_file),
+        )
+
+    def _get_http2_manager(self):
+        try:
+            from botocore.http2 import ALPN_PROTOCOLS, HTTP2ConnectionManager
+        except ImportError:
+            logger.debug(
+                "HTTP/2 needs the h2 package, using HTTP/1.1", exc_info=True
+            )
+            return None
+        ssl_context = self._get_verifying_ssl_context(ALPN_PROTOCOLS)
+        if ssl_context is None:
+            return None
+        return HTTP2ConnectionManager(
+            ssl_context, self._timeout, socket_options=self._socket_options
+        )
+
+    def _get_verifying_ssl_context(self, alpn_protocols):
+        # urllib3 sets the ALPN protocols of the contexts it wraps sockets
+        # with, so transports that wrap sockets themselves, like HTTP/2
+        # connections, offer their protocols from a context of their own
+        # that also checks certificates and hostnames itself.  None if the
+        # CA bundle or client certificate cannot be loaded.
+        ca_certs = get_cert_path(self._verify) if self._verify else None
+        key = None
+        if self._shared_ssl_context is not None:
+            context_class = type(self._shared_ssl_context)
+            key = (tuple(alpn_protocols),) + self._shared_ssl_context_key(
+                context_class, ca_certs
+            )
+            context = _SHARED_SSL_CONTEXTS.get(key)
+            if context is not None:
+                return context
+            context = create_urllib3_context(context_class=context_class)
+        else:
+            context = self._get_ssl_context()
+        try:
+            if ca_certs:
+                context.load_verify_locations(ca_certs)
+            if self._cert_file:
+                context.load_cert_chain(self._cert_file, self._key_file)
+        except (OSError, ssl.SSLError):
+            logger.debug(
+                "Could not prepare an SSL context for %s",
+                alpn_protocols,
+                exc_info=True,
+            )
+            return None
+        if self._verify:
+            context.verify_mode = ssl.CERT_REQUIRED
+            context.check_hostname = True
+        else:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        context.set_alpn_protocols(alpn_protocols)
+        if key is not None:
+            with _SHARED_SSL_CONTEXTS_LOCK:
+                context = _SHARED_SSL_CONTEXTS.setdefault(key, context)
+        return context
+
     def _get_proxy_manager(self, proxy_url):
         if proxy_url not in self._proxy_managers:
             proxy_headers = self._proxy_config.proxy_headers_for(proxy_url)
@@ -377,7 +584,11 @@ class URLLib3Session:
     def _setup_ssl_cert(self, conn, url, verify):
         if url.lower().startswith('https') and verify:
             conn.cert_reqs = 'CERT_REQUIRED'
-            conn.ca_certs = get_cert_path(verify)
+            if self._shared_ssl_context is not None:
+                # The shared context has loaded the CA bundle already.
+                conn.ca_certs = None
+            else:
+                conn.ca_certs = get_cert_path(verify)
         else:
             conn.cert_reqs = 'CERT_NONE'
             conn.ca_certs = None
@@ -415,6 +626,130 @@ class URLLib3Session:
             manager = self._manager
         return manager
 
+    def _get_connection_pool(self, url, proxy_url=None):
+        manager = self._get_connection_manager(url, proxy_url)
+        maxsize = None
+        if self._max_pool_connections_per_host:
+            maxsize = self._max_pool_connections_per_host.get(
+                urlparse(url).hostname
+            )
+        if maxsize is None:
+            conn = manager.connection_from_url(url)
+        else:
+            conn = manager.connection_from_url(
+                url, pool_kwargs={'maxsize': maxsize}
+            )
+        self._setup_ssl_cert(conn, url, self._verify)
+        conn.max_idle_time = self._max_idle_time
+        return conn
+
+    def prewarm(self, urls, connections=1, wait=True):
+        """Open pooled connections to ``urls`` ahead of the first request.
+
+        Each connection is opened, and for HTTPS handshaken, on its own
+        thread so every endpoint's connections are ready after about one
+        handshake.  At most the pool size of each host is opened.  Failures
+        are logged and leave the request to connect as it would have.
+        Endpoints reached through a proxy are skipped.  With HTTP/2, each
+        host that speaks it gets its one connection instead.
+
+        :param urls: The endpoint URLs, e.g. ``client.meta.endpoint_url``.
+        :param connections: How many connections to open to each URL.
+        :param wait: Whether to return only once the connections are open.
+        :returns: The threads opening the connections.
+
+        """
+        threads = []
+        for url in urls:
+            if self._proxy_config.proxy_url_for(url):
+                logger.debug("Not pre-warming %s, it is behind a proxy", url)
+                continue
+            if self._http2 is not None and url.lower().startswith('https:'):
+                thread = threading.Thread(
+                    target=self._prewarm_http2,
+                    args=(url,),
+                    name='botocore-prewarm',
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+                continue
+            pool = self._get_connection_pool(url)
+            count = min(connections, pool.pool.maxsize)
+            for conn in [pool._get_conn() for _ in range(count)]:
+                thread = threading.Thread(
+                    target=self._prewarm_connection,
+                    args=(pool, conn),
+                    name='botocore-prewarm',
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+        if wait:
+            for thread in threads:
+                thread.join()
+        return threads
+
+    def _prewarm_http2(self, url):
+        try:
+            if self._http2.connect(url):
+                return
+        except Exception:
+            logger.debug(
+                "Could not pre-warm an HTTP/2 connection to %s",
+                url,
+                exc_info=True,
+            )
+            return
+        # The host does not speak HTTP/2, so its requests will use the pool.
+        pool = self._get_connection_pool(url)
+        self._prewarm_connection(pool, pool._get_conn())
+
+    def _prewarm_connection(self, pool, conn):
+        try:
+            if conn.is_closed:
+                start = time.monotonic()
+                conn.connect()
+                self._read_session_tickets(conn, time.monotonic() - start)
+        except Exception:
+            logger.debug(
+                "Could not pre-warm a connection to %s",
+                pool.host,
+                exc_info=True,
+            )
+            conn.close()
+        pool._put_conn(conn)
+
+    def _read_session_tickets(self, conn, handshake_time):
+        # TLS 1.3 servers send session tickets just after the handshake,
+        # often in more than one packet.  Left unread, they make the idle
+        # connection readable, which urllib3 takes to mean the server
+        # closed it.  Each should follow the last within a round trip,
+        # which the handshake took more than.
+        sock = conn.sock
+        if not isinstance(sock, ssl.SSLSocket):
+            return
+        timeout = sock.gettimeout()
+        try:
+            while wait_for_read(sock, timeout=handshake_time):
+                sock.setblocking(False)
+                try:
+                    if not sock.recv(1):
+                        # The server closed the connection.
+                        conn.close()
+                        return
+                except ssl.SSLWantReadError:
+                    pass
+                else:
+                    # Nothing should arrive before a request, so don't
+                    # reuse a connection that is out of step.
+                    conn.close()
+                    return
+                sock.settimeout(timeout)
+        finally:
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+
     def _get_request_target(self, url, proxy_url):
         has_proxy = proxy_url is not None
 
@@ -442,37 +777,51 @@ class URLLib3Session:
 
     def close(self):
         self._manager.clear()
+        if self._http2 is not None:
+            self._http2.clear()
         for manager in self._proxy_managers.values():
             manager.clear()
 
+    def _urlopen(self, request, proxy_url):
+        conn = self._get_connection_pool(request.url, proxy_url)
+        if ensure_boolean(
+            os.environ.get('BOTO_EXPERIMENTAL__ADD_PROXY_HOST_HEADER', '')
+        ):
+            # This is currently an "experimental" feature which provides
+            # no guarantees of backwards compatibility. It may be subject
+            # to change or removal in any patch version. Anyone opting in
+            # to this feature should strictly pin botocore.
+            host = urlparse(request.url).hostname
+            conn.proxy_headers['host'] = host
+
+        request_target = self._get_request_target(request.url, proxy_url)
+        return conn.urlopen(
+            method=request.method,
+            url=request_target,
+            body=request.body,
+            headers=request.headers,
+            retries=Retry(False),
+            assert_same_host=False,
+            preload_content=False,
+            decode_content=False,
+            chunked=self._chunked(request.headers),
+        )
+
     def send(self, request):
         try:
             proxy_url = self._proxy_config.proxy_url_for(request.url)
-            manager = self._get_connection_manager(request.url, proxy_url)
-            conn = manager.connection_from_url(request.url)
-            self._setup_ssl_cert(conn, request.url, self._verify)
-            if ensure_boolean(
-                os.environ.get('BOTO_EXPERIMENTAL__ADD_PROXY_HOST_HEADER', '')
-            ):
-                # This is currently an "experimental" feature which provides
-                # no guarantees of backwards compatibility. It may be subject
-                # to change or removal in any patch version. Anyone opting in
-                # to this feature should strictly pin botocore.
-                host = urlparse(request.url).hostname
-                conn.proxy_headers['host'] = host
-
-            request_target = self._get_request_target(request.url, proxy_url)
-            urllib_response = conn.urlopen(
-                method=request.method,
-                url=request_target,
-                body=request.body,
-                headers=request.headers,
-                retries=Retry(False),
-                assert_same_host=False,
-                preload_content=False,
-                decode_content=False,
-                chunked=self._chunked(request.headers),
-            )
+            urllib_response = None
+            if self._http2 is not None and not proxy_url:
+                # None when the host does not speak HTTP/2.
+                urllib_response = self._http2.urlopen(
+                    request.method,
+                    request.url,
+                    self._path_url(request.url),
+                    body=request.body,
+                    headers=request.headers,
+                )
+            if urllib_response is None:
+                urllib_response = self._urlopen(request, proxy_url)
 
             http_response = botocore.awsrequest.AWSResponse(
                 request.url,
@@ -481,7 +830,9 @@ class URLLib3Session:
                 urllib_response,
             )
 
-            if not request.stream_output:
+            if not request.stream_output and not _is_read_incrementally(
+                request, urllib_response
+            ):
                 # Cause the raw stream to be exhausted immediately. We do it
                 # this way instead of using preload_content because
                 # preload_content will never buffer chunked responses
@@ -100,15 +100,27 @@ applied to the model after it is loaded. Data in these files might represent
 information that doesn't quite fit in the original models, but is still needed
 for the sdk. For instance, additional operation parameters might be added here
 which don't represent the actual service api.
+
+
+Indexed Models
+==============
+
+A model can also be stored as an indexed file, ``service-2.idx``, which
+the loader prefers over ``service-2.json``.  It holds the top level of the
+model and an index of where each operation and shape is encoded in the
+file.  Loading it decodes only that header; operations and shapes are
+decoded the first time they are looked up.  For a large service of which a
+client only calls a few operations this avoids parsing, and keeping, most
+of the model.  Indexed files are written from a loaded model with
+``write_indexed_model``.
 """
 
 import logging
 import os
 
 from botocore import BOTOCORE_ROOT
-from botocore.compat import HAS_GZIP, OrderedDict, json
+from botocore.compat import HAS_GZIP, MutableMapping, OrderedDict, json
 from botocore.exceptions import DataNotFoundError, UnknownServiceError
-from botocore.utils import deep_merge
 
 _JSON_OPEN_METHODS = {
     '.json': open,
@@ -123,6 +135,17 @@ if HAS_GZIP:
 
 logger = logging.getLogger(__name__)
 
+# Everything loaded by Loaders that use the default file loader, shared by
+# every Session in the process.  Entries are never evicted; a process only
+# ever loads a handful of models and they are as long-lived as the modules
+# that use them.  There is no lock to be left held across a fork: entries
+# are only added with dict.setdefault, and a child simply inherits them.
+_SHARED_LOADER_DATA = {}
+# Leaf objects of service models (member references, http traits, simple
+# shapes) that are equal across operations and services are parsed into a
+# single shared object.
+_INTERNED_MODEL_LEAVES = {}
+
 
 def instance_cache(func):
     """Cache the result of a method on a per instance basis.
@@ -141,12 +164,202 @@ def instance_cache(func):
         if key in self._cache:
             return self._cache[key]
         data = func(self, *args, **kwargs)
-        self._cache[key] = data
-        return data
+        return self._cache.setdefault(key, data)
 
     return _wrapper
 
 
+class _SharedLoaderCache:
+    """The view of the process-wide loader data for one Loader.
+
+    Results depend on where a loader searches and which extras it merges,
+    so those are part of every key.  They are read on each access because
+    callers are allowed to change ``Loader.search_paths`` in place.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def _shared_key(self, key):
+        loader = self._loader
+        return (
+            type(loader),
+            tuple(loader.search_paths),
+            tuple(loader.extras_types),
+            key,
+        )
+
+    def __contains__(self, key):
+        return self._shared_key(key) in _SHARED_LOADER_DATA
+
+    def __getitem__(self, key):
+        return _SHARED_LOADER_DATA[self._shared_key(key)]
+
+    def setdefault(self, key, value):
+        return _SHARED_LOADER_DATA.setdefault(self._shared_key(key), value)
+
+
+def _interning_object_pairs_hook(pairs):
+    key = []
+    for name, value in pairs:
+        if isinstance(value, (dict, list)):
+            return OrderedDict(pairs)
+        # The type keeps true, 1 and 1.0 apart, as they are equal
+        key += (name, type(value), value)
+    key = tuple(key)
+    leaf = _INTERNED_MODEL_LEAVES.get(key)
+    if leaf is None:
+        leaf = _INTERNED_MODEL_LEAVES.setdefault(key, OrderedDict(pairs))
+    return leaf
+
+
+_INDEXED_MODEL_MAGIC = b'botocore-indexed-model 1\n'
+# The top-level keys of a model that are indexed rather than decoded.
+_INDEXED_MODEL_SECTIONS = ('operations', 'shapes')
+# The keys whose holders are listed in the header, so that finding, say,
+# the exception shapes does not decode every shape.
+_INDEXED_MODEL_KEYS = {
+    'operations': ('endpointoperation', 'endpointdiscovery'),
+    'shapes': ('exception',),
+}
+_DELETED = object()
+
+
+def write_indexed_model(model, file_path):
+    """Write a model as an indexed model file.
+
+    :type model: dict
+    :param model: The model as loaded from its JSON file, that is without
+        any extras applied.
+
+    :type file_path: str
+    :param file_path: The full path to write to without the '.idx'
+        extension.
+
+    """
+    body = []
+    offset = 0
+    index = OrderedDict()
+    holders = OrderedDict()
+    for section in _INDEXED_MODEL_SECTIONS:
+        if section not in model:
+            continue
+        index[section] = OrderedDict()
+        holders[section] = {key: [] for key in _INDEXED_MODEL_KEYS[section]}
+        for name, value in model[section].items():
+            encoded = json.dumps(value, separators=(',', ':')).encode('utf-8')
+            index[section][name] = [offset, len(encoded)]
+            body.append(encoded)
+            offset += len(encoded)
+            for key in _INDEXED_MODEL_KEYS[section]:
+                if key in value:
+                    holders[section][key].append(name)
+    header = {
+        'model': OrderedDict(
+            (key, value)
+            for key, value in model.items()
+            if key not in _INDEXED_MODEL_SECTIONS
+        ),
+        'index': index,
+        'holders': holders,
+    }
+    full_path = file_path + '.idx'
+    temp_path = f'{full_path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as fp:
+        fp.write(_INDEXED_MODEL_MAGIC)
+        fp.write(json.dumps(header, separators=(',', ':')).encode('utf-8'))
+        fp.write(b'\n')
+        fp.writelines(body)
+    os.replace(temp_path, full_path)
+
+
+class IndexedModelSection(MutableMapping):
+    """The operations or shapes of an indexed model file.
+
+    Values are decoded from the file when they are first looked up, and
+    then kept.  No file handle is held in between, so a section can be
+    used after a fork.  Setting or deleting a name only changes this
+    section, which is how extras are merged into it.
+    """
+
+    def __init__(self, path, body_offset, index, holders):
+        self._path = path
+        self._body_offset = body_offset
+        self._index = index
+        self._decoded = {}
+        self._changed = {}
+        self._holders = holders
+
+    def _decode(self, name):
+        offset, length = self._index[name]
+        with open(self._path, 'rb') as fp:
+            fp.seek(self._body_offset + offset)
+            payload = fp.read(length).decode('utf-8')
+        value = json.loads(
+            payload, object_pairs_hook=_interning_object_pairs_hook
+        )
+        return self._decoded.setdefault(name, value)
+
+    def __getitem__(self, name):
+        value = self._changed.get(name)
+        if value is None:
+            value = self._decoded.get(name)
+            if value is None:
+                return self._decode(name)
+        elif value is _DELETED:
+            raise KeyError(name)
+        return value
+
+    def __setitem__(self, name, value):
+        self._changed[name] = value
+
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        self._changed[name] = _DELETED
+
+    def __contains__(self, name):
+        value = self._changed.get(name)
+        if value is None:
+            return name in self._index
+        return value is not _DELETED
+
+    def __iter__(self):
+        for name in self._index:
+            if self._changed.get(name) is not _DELETED:
+                yield name
+        for name, value in self._changed.items():
+            if value is not _DELETED and name not in self._index:
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self):
+        section = self.__class__.__new__(self.__class__)
+        section.__dict__.update(self.__dict__)
+        section._changed = self._changed.copy()
+        return section
+
+    def names_with_key(self, key):
+        """The names whose value has ``key``, without decoding the others.
+
+        Returns None if the file does not list the holders of ``key``.
+        """
+        if key not in self._holders:
+            return None
+        names = [
+            name for name in self._holders[key] if name not in self._changed
+        ]
+        for name, value in self._changed.items():
+            if value is not _DELETED and key in value:
+                names.append(name)
+        return names
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self._path!r})'
+
+
 class JSONFileLoader:
     """Loader JSON files.
 
@@ -154,6 +367,11 @@ class JSONFileLoader:
 
     """
 
+    # File name prefixes of models whose leaf objects are interned.  Only
+    # models that botocore treats as read-only qualify: an interned object
+    # may be shared by many places in many models.
+    INTERNED_MODEL_PREFIXES = ('service-2',)
+
     def exists(self, file_path):
         """Checks if the file exists.
 
@@ -164,6 +382,8 @@ class JSONFileLoader:
         :return: True if file path exists, False otherwise.
 
         """
+        if os.path.isfile(file_path + '.idx'):
+            return True
         for ext in _JSON_OPEN_METHODS:
             if os.path.isfile(file_path + ext):
                 return True
@@ -179,7 +399,35 @@ class JSONFileLoader:
             payload = fp.read().decode('utf-8')
 
         logger.debug("Loading JSON file: %s", full_path)
-        return json.loads(payload, object_pairs_hook=OrderedDict)
+        if os.path.basename(full_path).startswith(
+            self.INTERNED_MODEL_PREFIXES
+        ):
+            object_pairs_hook = _interning_object_pairs_hook
+        else:
+            object_pairs_hook = OrderedDict
+        return json.loads(payload, object_pairs_hook=object_pairs_hook)
+
+    def _load_indexed_file(self, full_path):
+        if not os.path.isfile(full_path):
+            return
+
+        with open(full_path, 'rb') as fp:
+            if fp.readline() != _INDEXED_MODEL_MAGIC:
+                logger.debug("Ignoring unknown indexed model: %s", full_path)
+                return
+            header = json.loads(
+                fp.readline().decode('utf-8'),
+                object_pairs_hook=OrderedDict,
+            )
+            body_offset = fp.tell()
+
+        logger.debug("Loading indexed model: %s", full_path)
+        model = header['model']
+        for section, index in header['index'].items():
+            model[section] = IndexedModelSection(
+                full_path, body_offset, index, header['holders'][section]
+            )
+        return model
 
     def load_file(self, file_path):
         """Attempt to load the file path.
@@ -191,6 +439,9 @@ class JSONFileLoader:
         :return: The loaded data if it exists, otherwise None.
 
         """
+        data = self._load_indexed_file(file_path + '.idx')
+        if data is not None:
+            return data
         for ext, open_method in _JSON_OPEN_METHODS.items():
             data = self._load_file(file_path + ext, open_method)
             if data is not None:
@@ -230,6 +481,12 @@ class Loader:
     The main method used here is ``load_service_model``, which is a
     convenience method over ``load_data`` and ``determine_latest_version``.
 
+    Loaders that use the default file loader and no explicit ``cache``
+    share everything they load with every other such loader in the
+    process, so each model is read and parsed once no matter how many
+    sessions create clients.  Loaded data must therefore be treated as
+    read-only; pass ``cache={}`` to get a loader whose data is private.
+
     """
 
     FILE_LOADER_CLASS = JSONFileLoader
@@ -249,7 +506,9 @@ class Loader:
         include_default_search_paths=True,
         include_default_extras=True,
     ):
-        self._cache = {}
+        if cache is None:
+            cache = _SharedLoaderCache(self) if file_loader is None else {}
+        self._cache = cache
         if file_loader is None:
             file_loader = self.FILE_LOADER_CLASS()
         self.file_loader = file_loader
@@ -522,4 +781,19 @@ class ExtrasProcessor:
     def _process(self, model, extra_model):
         """Process a single extras model into a service model."""
         if 'merge' in extra_model:
-            deep_merge(model, extra_model['merge'])
+            self._merge(model, extra_model['merge'])
+
+    def _merge(self, base, extra):
+        # The same as botocore.utils.deep_merge, except that nested dicts
+        # are copied before they are merged into: they may be interned
+        # leaves shared with other shapes and services.
+        for key in extra:
+            if (
+                key in base
+                and isinstance(base[key], (dict, IndexedModelSection))
+                and isinstance(extra[key], dict)
+            ):
+                base[key] = base[key].copy()
+                self._merge(base[key], extra[key])
+                continue
+            base[key] = extra[key]
@@ -362,12 +362,24 @@ class ServiceModel:
     @CachedProperty
     def error_shapes(self):
         error_shapes = []
-        for shape_name in self.shape_names:
+        for shape_name in self._names_with_key('shapes', 'exception'):
             error_shape = self.shape_for(shape_name)
             if error_shape.metadata.get('exception', False):
                 error_shapes.append(error_shape)
         return error_shapes
 
+    def _names_with_key(self, section, key):
+        # Indexed models (see botocore.loaders) can tell which operations or
+        # shapes have a key without decoding all of them.  The callers still
+        # check the values, this only narrows down the names to look at.
+        values = self._service_description.get(section, {})
+        names = getattr(values, 'names_with_key', None)
+        if names is not None:
+            names = names(key)
+        if names is None:
+            names = list(values)
+        return names
+
     @instance_cache
     def operation_model(self, operation_name):
         try:
@@ -456,14 +468,18 @@ class ServiceModel:
 
     @CachedProperty
     def endpoint_discovery_operation(self):
-        for operation in self.operation_names:
+        for operation in self._names_with_key(
+            'operations', 'endpointoperation'
+        ):
             model = self.operation_model(operation)
             if model.is_endpoint_discovery_operation:
                 return model
 
     @CachedProperty
     def endpoint_discovery_required(self):
-        for operation in self.operation_names:
+        for operation in self._names_with_key(
+            'operations', 'endpointdiscovery'
+        ):
             model = self.operation_model(operation)
             if (
                 model.endpoint_discovery is not None
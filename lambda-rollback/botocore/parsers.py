@@ -134,6 +134,7 @@ from botocore.utils import (
     CachedProperty,
     ensure_boolean,
     is_json_value_header,
+    PlanCache,
     lowercase_dict,
     merge_dicts,
     parse_timestamp,
@@ -147,6 +148,10 @@ DEFAULT_TIMESTAMP_PARSER = parse_timestamp
 class ResponseParserFactory:
     def __init__(self):
         self._defaults = {}
+        # Parsers hold no per-response state, so one instance per protocol
+        # is shared.  This also lets compiled parse plans be reused across
+        # responses instead of being rebuilt for every parser.
+        self._parsers = {}
 
     def set_parser_defaults(self, **kwargs):
         """Set default arguments when a parser instance is created.
@@ -159,10 +164,17 @@ class ResponseParserFactory:
 
         """
         self._defaults.update(kwargs)
+        self._parsers = {}
 
     def create_parser(self, protocol_name):
+        try:
+            return self._parsers[protocol_name]
+        except KeyError:
+            pass
         parser_cls = PROTOCOL_PARSERS[protocol_name]
-        return parser_cls(**self._defaults)
+        parser = parser_cls(**self._defaults)
+        self._parsers[protocol_name] = parser
+        return parser
 
 
 def create_parser(protocol):
@@ -190,6 +202,30 @@ def _text_content(func):
     return _get_text_content
 
 
+class _ParsedNode(ETree.Element):
+    # Stands in for an XML element that was already parsed, and whose
+    # subtree was released, while an incremental parse was in progress.
+    # ``parsed`` holds the value the element's shape produced.
+    parsed = None
+
+
+def _iter_body_chunks(body, chunk_size):
+    if hasattr(body, 'stream'):
+        # urllib3 response: same reads AWSResponse.content would do.
+        yield from body.stream(chunk_size)
+        return
+    while True:
+        chunk = body.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _parse_passthrough(value):
+    # Plan for shapes whose value needs no conversion.
+    return value
+
+
 class ResponseParserError(Exception):
     pass
 
@@ -215,6 +251,20 @@ class ResponseParser:
     # to parse the value. Members with locations that aren't in this list
     # will be parsed from the body.
     KNOWN_LOCATIONS = ('header', 'headers', 'statusCode')
+    # When enabled, each shape is compiled on first use into a closure
+    # (a "plan") that parses nodes of that shape without re-walking the
+    # model.  Plans produce exactly the same output as dispatching through
+    # the ``_handle_*`` methods, which remain the fallback for any type a
+    # subclass customizes.
+    COMPILE_PLANS = True
+    # How many compiled plans a parser keeps, least recently used first out.
+    PLAN_CACHE_SIZE = 1024
+    # Successful responses with a content-length of at least this many
+    # bytes are handed to the parser as the undecoded urllib3 stream
+    # rather than as bytes, so the parser can consume them incrementally.
+    # Bodies of unknown length are read into memory first, as are all
+    # bodies when this is ``None``.
+    INCREMENTAL_PARSE_THRESHOLD = None
 
     def __init__(self, timestamp_parser=None, blob_parser=None):
         if timestamp_parser is None:
@@ -341,10 +391,69 @@ class ResponseParser:
         )
 
     def _parse_shape(self, shape, node):
-        handler = getattr(
+        if self.COMPILE_PLANS:
+            return self._get_parse_plan(shape)(node)
+        handler = self._get_type_handler(shape)
+        return handler(shape, node)
+
+    def _get_type_handler(self, shape):
+        return getattr(
             self, f'_handle_{shape.type_name}', self._default_handle
         )
-        return handler(shape, node)
+
+    def _get_parse_plan(self, shape):
+        # Plans are keyed on the Shape object itself.  Shapes are cached on
+        # their operation/service model, so each shape is compiled once per
+        # parser instance while it stays in the bounded cache.
+        try:
+            plans = self._parse_plans
+        except AttributeError:
+            plans = self._parse_plans = PlanCache(self.PLAN_CACHE_SIZE)
+        return plans.get(shape, self._compile_plan)
+
+    def _compile_plan(self, shape):
+        # Default plan: bind the type handler once so later calls skip the
+        # name lookup.  Subclasses compile the types they know about into
+        # specialized closures.
+        if shape.type_name == 'list' and self._has_builtin_handler(
+            'list', ResponseParser
+        ):
+            return self._compile_list(shape)
+        handler = self._get_type_handler(shape)
+
+        def parse_with_handler(node):
+            return handler(shape, node)
+
+        return parse_with_handler
+
+    def _compile_list(self, shape):
+        get_plan = self._lazy_plan(shape.member)
+
+        def parse_list(node):
+            plan = get_plan()
+            return [plan(item) for item in node]
+
+        return parse_list
+
+    def _has_builtin_handler(self, type_name, owner):
+        # True if ``type_name`` is still parsed by ``owner``'s handler,
+        # i.e. no subclass has customized it and a compiled plan is safe.
+        name = f'_handle_{type_name}'
+        return getattr(type(self), name, None) is getattr(owner, name, None)
+
+    def _lazy_plan(self, shape):
+        # Returns a function that compiles ``shape`` on first call.  This
+        # keeps compilation proportional to the parts of a model actually
+        # used and makes recursive shapes safe to compile.
+        plan = None
+
+        def get_plan():
+            nonlocal plan
+            if plan is None:
+                plan = self._get_parse_plan(shape)
+            return plan
+
+        return get_plan
 
     def _handle_list(self, shape, node):
         # Enough implementations share list serialization that it's moved
@@ -449,7 +558,14 @@ class BaseXMLResponseParser(ResponseParser):
         # it's flattened, and if it's not, then we make it a one element list.
         if shape.serialization.get('flattened') and not isinstance(node, list):
             node = [node]
-        return super()._handle_list(shape, node)
+        parsed = []
+        member_shape = shape.member
+        for item in node:
+            if isinstance(item, _ParsedNode):
+                parsed.append(item.parsed)
+            else:
+                parsed.append(self._parse_shape(member_shape, item))
+        return parsed
 
     def _handle_structure(self, shape, node):
         parsed = {}
@@ -548,6 +664,128 @@ class BaseXMLResponseParser(ResponseParser):
             )
         return root
 
+    def _parse_xml_stream_to_dom(
+        self, stream, shape=None, result_wrapper=None, chunk_size=65536
+    ):
+        # Incremental counterpart of _parse_xml_string_to_dom for bodies
+        # given as a stream.  The body is fed to the XML parser a chunk at a
+        # time.  When ``shape`` is known, every list item is parsed as soon
+        # as its closing tag is seen and its subtree is swapped for a
+        # _ParsedNode, so a large result set never exists as a full tree.
+        # ``shape`` describes the root element, or the root's child named
+        # ``result_wrapper`` when one is given.
+        parser = ETree.XMLPullParser(events=('start', 'end'))
+        try:
+            try:
+                root = self._consume_xml_events(
+                    parser,
+                    _iter_body_chunks(stream, chunk_size),
+                    shape,
+                    result_wrapper,
+                )
+                parser.close()
+            except XMLParseError as e:
+                raise ResponseParserError(
+                    f"Unable to parse response ({e}), "
+                    f"invalid XML received. Further retries may succeed."
+                )
+        except Exception:
+            # Don't leave a half read response on a pooled connection.
+            if hasattr(stream, 'close'):
+                stream.close()
+            raise
+        return root
+
+    def _consume_xml_events(self, parser, chunks, shape, result_wrapper):
+        root = None
+        # [element, shape, is list item, index in parent, children seen]
+        # for each open element on the modeled path from the root down to
+        # the list items.
+        stack = []
+        # Number of open elements inside a list item or an unmodeled
+        # element.  Nothing there needs tracking until it closes.
+        inner_depth = 0
+        for chunk in chunks:
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    if inner_depth:
+                        inner_depth += 1
+                        continue
+                    index = 0
+                    if stack:
+                        # Events are read after a whole chunk is fed, so
+                        # later siblings may already be in the tree; count
+                        # children rather than assume the last one.
+                        index = stack[-1][4]
+                        stack[-1][4] += 1
+                    else:
+                        root = elem
+                    elem_shape, is_item = self._stream_context(
+                        stack, elem, shape, result_wrapper
+                    )
+                    stack.append([elem, elem_shape, is_item, index, 0])
+                    if is_item or (elem_shape is None and len(stack) > 1):
+                        inner_depth = 1
+                    continue
+                if inner_depth > 1:
+                    inner_depth -= 1
+                    continue
+                inner_depth = 0
+                _, elem_shape, is_item, index, _ = stack.pop()
+                if is_item:
+                    node = _ParsedNode(elem.tag)
+                    node.parsed = self._parse_shape(elem_shape, elem)
+                    stack[-1][0][index] = node
+        return root
+
+    def _stream_context(self, stack, elem, shape, result_wrapper):
+        # Returns (shape, is list item) for an element that just started.
+        if not stack:
+            return (None if result_wrapper else shape), False
+        parent_shape = stack[-1][1]
+        if parent_shape is None:
+            # Only the root of a wrapped result is tracked without a shape.
+            if self._node_tag(elem) == result_wrapper:
+                return shape, False
+            return None, False
+        if parent_shape.type_name == 'list':
+            # Only non-flattened lists have an element of their own.
+            return parent_shape.member, True
+        if parent_shape.type_name == 'structure':
+            member_shape = self._stream_members(parent_shape).get(
+                self._node_tag(elem)
+            )
+            if member_shape is not None:
+                if member_shape.type_name == 'list' and (
+                    member_shape.serialization.get('flattened')
+                ):
+                    return member_shape.member, True
+                return member_shape, False
+        # Maps and unmodeled elements are kept whole.
+        return None, False
+
+    def _stream_members(self, shape):
+        # xml name -> member shape, for the members of ``shape`` that are
+        # read from the body.
+        try:
+            return self._stream_member_names[shape]
+        except AttributeError:
+            self._stream_member_names = {}
+        except KeyError:
+            pass
+        members = {}
+        for member_name, member_shape in shape.members.items():
+            serialization = member_shape.serialization
+            if serialization.get(
+                'location'
+            ) in self.KNOWN_LOCATIONS or serialization.get('eventheader'):
+                continue
+            xml_name = self._member_key_name(member_shape, member_name)
+            members.setdefault(xml_name, member_shape)
+        self._stream_member_names[shape] = members
+        return members
+
     def _replace_nodes(self, parsed):
         for key, value in parsed.items():
             if list(value):
@@ -588,8 +826,151 @@ class BaseXMLResponseParser(ResponseParser):
     _handle_double = _handle_float
     _handle_long = _handle_integer
 
+    def _compile_plan(self, shape):
+        type_name = shape.type_name
+        if not self._has_builtin_handler(type_name, BaseXMLResponseParser):
+            return super()._compile_plan(shape)
+        if type_name == 'structure':
+            return self._compile_structure(shape)
+        elif type_name == 'list':
+            return self._compile_list(shape)
+        elif type_name == 'map':
+            return self._compile_map(shape)
+        elif type_name in ('string', 'character'):
+
+            def parse_string(node):
+                if hasattr(node, 'text'):
+                    text = node.text
+                    return '' if text is None else text
+                return node
+
+            return parse_string
+        converters = {
+            'boolean': lambda text: text == 'true',
+            'integer': int,
+            'long': int,
+            'float': float,
+            'double': float,
+            'timestamp': self._timestamp_parser,
+            'blob': self._blob_parser,
+        }
+        if type_name in converters:
+            convert = converters[type_name]
+
+            def parse_scalar(node):
+                # Same unwrapping as the _text_content decorator.
+                if hasattr(node, 'text'):
+                    text = node.text
+                    if text is None:
+                        text = ''
+                else:
+                    text = node
+                return convert(text)
+
+            return parse_scalar
+        return super()._compile_plan(shape)
+
+    def _compile_structure(self, shape):
+        # (member name, xml name, plan getter, is xml attribute) for every
+        # member parsed from the body, in model order.
+        members = []
+        for member_name, member_shape in shape.members.items():
+            serialization = member_shape.serialization
+            if serialization.get(
+                'location'
+            ) in self.KNOWN_LOCATIONS or serialization.get('eventheader'):
+                # Members with known locations are handled elsewhere.
+                continue
+            members.append(
+                (
+                    member_name,
+                    self._member_key_name(member_shape, member_name),
+                    self._lazy_plan(member_shape),
+                    bool(serialization.get('xmlAttribute')),
+                )
+            )
+        is_exception = shape.metadata.get('exception', False)
+        is_tagged_union = shape.is_tagged_union
+        build_name_to_xml_node = self._build_name_to_xml_node
+        namespace_re = self._namespace_re
+
+        def parse_structure(node):
+            if is_exception:
+                node = self._get_error_root(node)
+            xml_dict = build_name_to_xml_node(node)
+            if is_tagged_union and self._has_unknown_tagged_union_member(
+                shape, xml_dict
+            ):
+                tag = self._get_first_key(xml_dict)
+                return self._handle_unknown_tagged_union_member(tag)
+            parsed = {}
+            for member_name, xml_name, get_plan, is_attribute in members:
+                member_node = xml_dict.get(xml_name)
+                if member_node is not None:
+                    parsed[member_name] = get_plan()(member_node)
+                elif is_attribute:
+                    location_name = shape.members[member_name].serialization[
+                        'name'
+                    ]
+                    prefix = location_name.split(':')[0] + ':'
+                    for key, value in node.attrib.items():
+                        if namespace_re.sub(prefix, key) == location_name:
+                            parsed[member_name] = value
+            return parsed
+
+        return parse_structure
+
+    def _compile_list(self, shape):
+        get_plan = self._lazy_plan(shape.member)
+        flattened = shape.serialization.get('flattened')
+
+        def parse_list(node):
+            # See _handle_list for why a flattened node may be a scalar.
+            if flattened and not isinstance(node, list):
+                node = [node]
+            plan = get_plan()
+            return [
+                item.parsed if isinstance(item, _ParsedNode) else plan(item)
+                for item in node
+            ]
+
+        return parse_list
+
+    def _compile_map(self, shape):
+        get_key_plan = self._lazy_plan(shape.key)
+        get_value_plan = self._lazy_plan(shape.value)
+        key_location_name = shape.key.serialization.get('name') or 'key'
+        value_location_name = shape.value.serialization.get('name') or 'value'
+        flattened = shape.serialization.get('flattened')
+        node_tag = self._node_tag
+
+        def parse_map(node):
+            parsed = {}
+            key_plan = get_key_plan()
+            value_plan = get_value_plan()
+            if flattened and not isinstance(node, list):
+                node = [node]
+            for keyval_node in node:
+                for single_pair in keyval_node:
+                    tag_name = node_tag(single_pair)
+                    if tag_name == key_location_name:
+                        key_name = key_plan(single_pair)
+                    elif tag_name == value_location_name:
+                        val_name = value_plan(single_pair)
+                    else:
+                        raise ResponseParserError(f"Unknown tag: {tag_name}")
+                parsed[key_name] = val_name
+            return parsed
+
+        return parse_map
+
 
 class QueryParser(BaseXMLResponseParser):
+    # Query services (SNS, CloudWatch, IAM, EC2, ...) return large result
+    # sets as XML and no handler reads their raw body, so big responses
+    # are parsed straight off the connection.
+    INCREMENTAL_PARSE_THRESHOLD = 1024 * 1024
+
     def _do_error_parse(self, response, shape):
         xml_contents = response['body']
         root = self._parse_xml_string_to_dom(xml_contents)
@@ -614,7 +995,15 @@ class QueryParser(BaseXMLResponseParser):
 
     def _parse_body_as_xml(self, response, shape, inject_metadata=True):
         xml_contents = response['body']
-        root = self._parse_xml_string_to_dom(xml_contents)
+        if hasattr(xml_contents, 'read'):
+            result_wrapper = None
+            if shape is not None:
+                result_wrapper = shape.serialization.get('resultWrapper')
+            root = self._parse_xml_stream_to_dom(
+                xml_contents, shape, result_wrapper
+            )
+        else:
+            root = self._parse_xml_string_to_dom(xml_contents)
         parsed = {}
         if shape is not None:
             start = root
@@ -719,6 +1108,72 @@ class BaseJSONParser(ResponseParser):
     def _handle_timestamp(self, shape, value):
         return self._timestamp_parser(value)
 
+    def _compile_plan(self, shape):
+        type_name = shape.type_name
+        if not self._has_builtin_handler(type_name, BaseJSONParser):
+            return super()._compile_plan(shape)
+        if type_name == 'structure':
+            if shape.is_document_type:
+                return _parse_passthrough
+            return self._compile_structure(shape)
+        elif type_name == 'map':
+            return self._compile_map(shape)
+        elif type_name == 'blob':
+            return self._blob_parser
+        elif type_name == 'timestamp':
+            return self._timestamp_parser
+        elif type_name in (
+            'string',
+            'character',
+            'boolean',
+            'integer',
+            'long',
+            'float',
+            'double',
+        ):
+            # json.loads already produced the right Python type.
+            return _parse_passthrough
+        return super()._compile_plan(shape)
+
+    def _compile_structure(self, shape):
+        members = [
+            (
+                member_name,
+                member_shape.serialization.get('name', member_name),
+                self._lazy_plan(member_shape),
+            )
+            for member_name, member_shape in shape.members.items()
+        ]
+        is_tagged_union = shape.is_tagged_union
+
+        def parse_structure(value):
+            if value is None:
+                return None
+            if is_tagged_union and self._has_unknown_tagged_union_member(
+                shape, value
+            ):
+                tag = self._get_first_key(value)
+                return self._handle_unknown_tagged_union_member(tag)
+            final_parsed = {}
+            for member_name, json_name, get_plan in members:
+                raw_value = value.get(json_name)
+                if raw_value is not None:
+                    final_parsed[member_name] = get_plan()(raw_value)
+            return final_parsed
+
+        return parse_structure
+
+    def _compile_map(self, shape):
+        get_key_plan = self._lazy_plan(shape.key)
+        get_value_plan = self._lazy_plan(shape.value)
+
+        def parse_map(value):
+            key_plan = get_key_plan()
+            value_plan = get_value_plan()
+            return {key_plan(k): value_plan(v) for k, v in value.items()}
+
+        return parse_map
+
     def _do_error_parse(self, response, shape):
         body = self._parse_body_as_json(response['body'])
         error = {"Error": {"Message": '', "Code": ''}, "ResponseMetadata": {}}
@@ -1229,6 +1684,24 @@ class BaseRestParser(ResponseParser):
             node = [e.strip() for e in node.split(',')]
         return super()._handle_list(shape, node)
 
+    def _compile_plan(self, shape):
+        type_name = shape.type_name
+        if (
+            type_name == 'list'
+            and shape.serialization.get('location') != 'header'
+            and self._has_builtin_handler('list', BaseRestParser)
+        ):
+            # Outside of headers a list parses exactly as in the body
+            # protocol, so use that protocol's list plan.
+            return self._compile_list(shape)
+        elif (
+            type_name == 'string'
+            and self._has_builtin_handler('string', BaseRestParser)
+            and not is_json_value_header(shape)
+        ):
+            return _parse_passthrough
+        return super()._compile_plan(shape)
+
 
 class BaseRpcV2Parser(ResponseParser):
     def _do_parse(self, response, shape):
@@ -1400,6 +1873,10 @@ class RestXMLParser(BaseRestParser, BaseXMLResponseParser):
     EVENT_STREAM_PARSER_CLS = EventStreamXMLParser
 
     def _initial_body_parse(self, xml_string):
+        if hasattr(xml_string, 'read'):
+            # The shape isn't known here, so list items aren't released
+            # early, but the body is still never held in memory as bytes.
+            return self._parse_xml_stream_to_dom(xml_string)
         if not xml_string:
             return ETree.Element('')
         return self._parse_xml_string_to_dom(xml_string)
@@ -27,8 +27,12 @@ class TokenBucket:
         self._clock = clock
         self._last_timestamp = None
         self._min_rate = min_rate
+        # acquire() and the max_rate setter, which run for every request and
+        # response, hold the lock directly.  The condition shares it and is
+        # only used, and notified, while a caller waits for capacity.
         self._lock = threading.Lock()
         self._new_fill_rate_condition = threading.Condition(self._lock)
+        self._waiters = 0
         self.max_rate = max_rate
 
     @property
@@ -37,7 +41,7 @@ class TokenBucket:
 
     @max_rate.setter
     def max_rate(self, value):
-        with self._new_fill_rate_condition:
+        with self._lock:
             # Before we can change the rate we need to fill any pending
             # tokens we might have based on the current rate.  If we don't
             # do this it means everything since the last recorded timestamp
@@ -54,7 +58,8 @@ class TokenBucket:
             self._current_capacity = min(
                 self._current_capacity, self._max_capacity
             )
-            self._new_fill_rate_condition.notify()
+            if self._waiters:
+                self._new_fill_rate_condition.notify()
 
     @property
     def max_capacity(self):
@@ -74,7 +79,7 @@ class TokenBucket:
         was successfully acquired, False otherwise.
 
         """
-        with self._new_fill_rate_condition:
+        with self._lock:
             return self._acquire(amount=amount, block=block)
 
     def _acquire(self, amount, block):
@@ -87,16 +92,20 @@ class TokenBucket:
                 raise CapacityNotAvailableError()
             # Not enough capacity.
             sleep_amount = self._sleep_amount(amount)
-            while sleep_amount > 0:
-                # Until python3.2, wait() always returned None so we can't
-                # tell if a timeout occurred waiting on the cond var.
-                # Because of this we'll unconditionally call _refill().
-                # The downside to this is that we were waken up via
-                # a notify(), we're calling unnecessarily calling _refill() an
-                # extra time.
-                self._new_fill_rate_condition.wait(sleep_amount)
-                self._refill()
-                sleep_amount = self._sleep_amount(amount)
+            self._waiters += 1
+            try:
+                while sleep_amount > 0:
+                    # Until python3.2, wait() always returned None so we
+                    # can't tell if a timeout occurred waiting on the cond
+                    # var.  Because of this we'll unconditionally call
+                    # _refill().  The downside to this is that we were waken
+                    # up via a notify(), we're calling unnecessarily calling
+                    # _refill() an extra time.
+                    self._new_fill_rate_condition.wait(sleep_amount)
+                    self._refill()
+                    sleep_amount = self._sleep_amount(amount)
+            finally:
+                self._waiters -= 1
             self._current_capacity -= amount
             return True
 
@@ -46,6 +46,7 @@ import json
 import math
 import re
 import struct
+from functools import lru_cache
 from xml.etree import ElementTree
 
 from botocore import validate
@@ -53,6 +54,7 @@ from botocore.compat import formatdate
 from botocore.exceptions import ParamValidationError
 from botocore.useragent import register_feature_id
 from botocore.utils import (
+    PlanCache,
     has_header,
     is_json_value_header,
     parse_to_aware_datetime,
@@ -65,13 +67,16 @@ ISO8601 = '%Y-%m-%dT%H:%M:%SZ'
 # Same as ISO8601, but with microsecond precision.
 ISO8601_MICRO = '%Y-%m-%dT%H:%M:%S.%fZ'
 HOST_PREFIX_RE = re.compile(r"^[A-Za-z0-9\.\-]+$")
+URI_TEMPLATE_PARAM_RE = re.compile(r'{(.*?)}')
 
 
 def create_serializer(protocol_name, include_validation=True):
     # TODO: Unknown protocols.
     serializer = SERIALIZERS[protocol_name]()
     if include_validation:
-        validator = validate.ParamValidator()
+        validator = validate.ParamValidator(
+            trusted_caller=include_validation == validate.TRUSTED_CALLER
+        )
         serializer = validate.ParamValidationDecorator(validator, serializer)
     return serializer
 
@@ -84,6 +89,15 @@ class Serializer:
     # tests.
     MAP_TYPE = dict
     DEFAULT_ENCODING = 'utf-8'
+    # When enabled, each shape is compiled on first use into a closure
+    # (a "plan") that serializes values of that shape without re-walking
+    # the model.  Plans produce exactly the same output as dispatching
+    # through the ``_serialize_type_*`` methods, which remain the fallback
+    # for any type a subclass customizes.
+    COMPILE_PLANS = True
+    # How many compiled plans a serializer keeps, least recently used
+    # first out.
+    PLAN_CACHE_SIZE = 1024
 
     def serialize_to_request(self, parameters, operation_model):
         """Serialize parameters into an HTTP request.
@@ -225,6 +239,54 @@ class Serializer:
         if operation_model.service_model.is_query_compatible:
             serialized['headers']['x-amzn-query-mode'] = 'true'
 
+    def _get_serialize_plan(self, shape):
+        # Plans are keyed on the Shape object itself.  Shapes are cached on
+        # their operation/service model, so each shape is compiled once per
+        # serializer instance while it stays in the bounded cache.
+        try:
+            plans = self._serialize_plans
+        except AttributeError:
+            plans = self._serialize_plans = PlanCache(self.PLAN_CACHE_SIZE)
+        return plans.get(shape, self._compile_plan)
+
+    def _compile_plan(self, shape):
+        # Default plan: bind the type handler once so later calls skip the
+        # name lookup.  Subclasses compile the types they know about into
+        # specialized closures.
+        method = self._get_type_handler(shape)
+
+        def serialize_with_handler(serialized, value, key):
+            method(serialized, value, shape, key)
+
+        return serialize_with_handler
+
+    def _get_type_handler(self, shape):
+        return getattr(
+            self,
+            f'_serialize_type_{shape.type_name}',
+            self._default_serialize,
+        )
+
+    def _has_builtin_handler(self, type_name, owner):
+        # True if ``type_name`` is still serialized by ``owner``'s handler,
+        # i.e. no subclass has customized it and a compiled plan is safe.
+        name = f'_serialize_type_{type_name}'
+        return getattr(type(self), name, None) is getattr(owner, name, None)
+
+    def _lazy_plan(self, shape):
+        # Returns a function that compiles ``shape`` on first call.  This
+        # keeps compilation proportional to the parts of a model actually
+        # used and makes recursive shapes safe to compile.
+        plan = None
+
+        def get_plan():
+            nonlocal plan
+            if plan is None:
+                plan = self._get_serialize_plan(shape)
+            return plan
+
+        return get_plan
+
 
 class QuerySerializer(Serializer):
     TIMESTAMP_FORMAT = 'iso8601'
@@ -261,13 +323,112 @@ class QuerySerializer(Serializer):
         #        input.
         # prefix: The incrementally built up prefix for the serialized
         #         key (i.e Foo.bar.members.1).
-        method = getattr(
-            self,
-            f'_serialize_type_{shape.type_name}',
-            self._default_serialize,
-        )
+        if self.COMPILE_PLANS:
+            self._get_serialize_plan(shape)(serialized, value, prefix)
+            return
+        method = self._get_type_handler(shape)
         method(serialized, value, shape, prefix=prefix)
 
+    def _compile_plan(self, shape):
+        type_name = shape.type_name
+        if not self._has_builtin_handler(type_name, QuerySerializer):
+            return super()._compile_plan(shape)
+        if type_name == 'structure':
+            return self._compile_structure(shape)
+        elif type_name == 'list':
+            return self._compile_list(shape)
+        elif type_name == 'map':
+            return self._compile_map(shape)
+        elif type_name == 'boolean':
+
+            def serialize_boolean(serialized, value, prefix):
+                serialized[prefix] = 'true' if value else 'false'
+
+            return serialize_boolean
+        elif type_name in ('float', 'double'):
+            handle_float = self._handle_float
+
+            def serialize_float(serialized, value, prefix):
+                serialized[prefix] = handle_float(value)
+
+            return serialize_float
+        elif type_name in ('string', 'integer', 'long'):
+
+            def serialize_scalar(serialized, value, prefix):
+                serialized[prefix] = value
+
+            return serialize_scalar
+        return super()._compile_plan(shape)
+
+    def _compile_structure(self, shape):
+        members = shape.members
+        # member name -> (serialized name, plan), filled in as members are
+        # first seen.
+        member_plans = {}
+
+        def serialize_structure(serialized, value, prefix):
+            for key, member_value in value.items():
+                try:
+                    name, get_plan = member_plans[key]
+                except KeyError:
+                    member_shape = members[key]
+                    name = self._get_serialized_name(member_shape, key)
+                    get_plan = self._lazy_plan(member_shape)
+                    member_plans[key] = name, get_plan
+                member_prefix = f'{prefix}.{name}' if prefix else name
+                get_plan()(serialized, member_value, member_prefix)
+
+        return serialize_structure
+
+    def _compile_list(self, shape):
+        get_plan = self._lazy_plan(shape.member)
+        flattened = self._is_shape_flattened(shape)
+        member_name = None
+        if flattened:
+            if shape.member.serialization.get('name'):
+                member_name = self._get_serialized_name(
+                    shape.member, default_name=''
+                )
+        else:
+            list_name = shape.member.serialization.get('name', 'member')
+
+        def serialize_list(serialized, value, prefix):
+            if not value:
+                # The query protocol serializes empty lists.
+                serialized[prefix] = ''
+                return
+            if not flattened:
+                list_prefix = f'{prefix}.{list_name}'
+            elif member_name is not None:
+                # Replace '.Original' with '.{name}'.
+                list_prefix = '.'.join(prefix.split('.')[:-1] + [member_name])
+            else:
+                list_prefix = prefix
+            plan = get_plan()
+            for i, element in enumerate(value, 1):
+                plan(serialized, element, f'{list_prefix}.{i}')
+
+        return serialize_list
+
+    def _compile_map(self, shape):
+        get_key_plan = self._lazy_plan(shape.key)
+        get_value_plan = self._lazy_plan(shape.value)
+        flattened = self._is_shape_flattened(shape)
+        key_suffix = self._get_serialized_name(shape.key, default_name='key')
+        value_suffix = self._get_serialized_name(shape.value, 'value')
+
+        def serialize_map(serialized, value, prefix):
+            full_prefix = prefix if flattened else f'{prefix}.entry'
+            key_plan = get_key_plan()
+            value_plan = get_value_plan()
+            for i, key in enumerate(value, 1):
+                key_plan(serialized, key, f'{full_prefix}.{i}.{key_suffix}')
+                value_plan(
+                    serialized, value[key], f'{full_prefix}.{i}.{value_suffix}'
+                )
+
+        return serialize_map
+
     def _serialize_type_structure(self, serialized, value, shape, prefix=''):
         members = shape.members
         for key, value in value.items():
@@ -366,6 +527,20 @@ class EC2Serializer(QuerySerializer):
             element_shape = shape.member
             self._serialize(serialized, element, element_shape, element_prefix)
 
+    def _compile_plan(self, shape):
+        if shape.type_name == 'list' and self._has_builtin_handler(
+            'list', EC2Serializer
+        ):
+            get_plan = self._lazy_plan(shape.member)
+
+            def serialize_list(serialized, value, prefix):
+                plan = get_plan()
+                for i, element in enumerate(value, 1):
+                    plan(serialized, element, f'{prefix}.{i}')
+
+            return serialize_list
+        return super()._compile_plan(shape)
+
 
 class JSONSerializer(Serializer):
     TIMESTAMP_FORMAT = 'unixtimestamp'
@@ -399,13 +574,106 @@ class JSONSerializer(Serializer):
         return serialized
 
     def _serialize(self, serialized, value, shape, key=None):
-        method = getattr(
-            self,
-            f'_serialize_type_{shape.type_name}',
-            self._default_serialize,
-        )
+        if self.COMPILE_PLANS:
+            self._get_serialize_plan(shape)(serialized, value, key)
+            return
+        method = self._get_type_handler(shape)
         method(serialized, value, shape, key)
 
+    def _compile_plan(self, shape):
+        type_name = shape.type_name
+        if not self._has_builtin_handler(type_name, JSONSerializer):
+            return super()._compile_plan(shape)
+        if type_name == 'structure' and not shape.is_document_type:
+            return self._compile_structure(shape)
+        elif type_name == 'list':
+            return self._compile_list(shape)
+        elif type_name == 'map':
+            return self._compile_map(shape)
+        elif type_name in ('float', 'double'):
+            handle_float = self._handle_float
+
+            def serialize_float(serialized, value, key):
+                if isinstance(value, decimal.Decimal):
+                    value = float(value)
+                serialized[key] = handle_float(value)
+
+            return serialize_float
+        elif self._is_passthrough(shape):
+
+            def serialize_scalar(serialized, value, key):
+                serialized[key] = value
+
+            return serialize_scalar
+        return super()._compile_plan(shape)
+
+    def _is_passthrough(self, shape):
+        # Types whose values are copied into the JSON document unchanged.
+        if shape.type_name == 'structure':
+            return shape.is_document_type
+        return (
+            shape.type_name in ('string', 'integer', 'long', 'boolean')
+            and self._get_type_handler(shape) == self._default_serialize
+        )
+
+    def _compile_structure(self, shape):
+        members = shape.members
+        map_type = self.MAP_TYPE
+        # member name -> (serialized name, plan), filled in as members are
+        # first seen.
+        member_plans = {}
+
+        def serialize_structure(serialized, value, key):
+            if key is not None:
+                new_serialized = map_type()
+                serialized[key] = new_serialized
+                serialized = new_serialized
+            for member_key, member_value in value.items():
+                try:
+                    name, get_plan = member_plans[member_key]
+                except KeyError:
+                    member_shape = members[member_key]
+                    name = member_shape.serialization.get('name', member_key)
+                    get_plan = self._lazy_plan(member_shape)
+                    member_plans[member_key] = name, get_plan
+                get_plan()(serialized, member_value, name)
+
+        return serialize_structure
+
+    def _compile_list(self, shape):
+        if self._is_passthrough(shape.member):
+
+            def serialize_scalar_list(serialized, value, key):
+                serialized[key] = list(value)
+
+            return serialize_scalar_list
+
+        get_plan = self._lazy_plan(shape.member)
+
+        def serialize_list(serialized, value, key):
+            plan = get_plan()
+            list_obj = []
+            serialized[key] = list_obj
+            for list_item in value:
+                wrapper = {}
+                plan(wrapper, list_item, "__current__")
+                list_obj.append(wrapper["__current__"])
+
+        return serialize_list
+
+    def _compile_map(self, shape):
+        get_plan = self._lazy_plan(shape.value)
+        map_type = self.MAP_TYPE
+
+        def serialize_map(serialized, value, key):
+            plan = get_plan()
+            map_obj = map_type()
+            serialized[key] = map_obj
+            for sub_key, sub_value in value.items():
+                plan(map_obj, sub_value, sub_key)
+
+        return serialize_map
+
     def _serialize_type_structure(self, serialized, value, shape, key):
         if shape.is_document_type:
             serialized[key] = value
@@ -708,6 +976,19 @@ class CBORSerializer(Serializer):
             return initial_byte + struct.pack(">H", 0x7E00)
 
 
+@lru_cache(maxsize=1024)
+def _uri_template_params(uri_template):
+    return tuple(URI_TEMPLATE_PARAM_RE.findall(uri_template))
+
+
+def _compile_body_members(shape):
+    return frozenset(
+        name
+        for name, member in shape.members.items()
+        if 'location' not in member.serialization
+    )
+
+
 class BaseRestSerializer(Serializer):
     """Base class for rest protocols.
 
@@ -757,10 +1038,18 @@ class BaseRestSerializer(Serializer):
             'body_kwargs': self.MAP_TYPE(),
             'headers': self.MAP_TYPE(),
         }
+        if self.COMPILE_PLANS:
+            body_members = self._get_body_members(shape)
+        else:
+            body_members = ()
+        body_kwargs = partitioned['body_kwargs']
         for param_name, param_value in parameters.items():
             if param_value is None:
                 # Don't serialize any parameter with a None value.
                 continue
+            if param_name in body_members:
+                body_kwargs[param_name] = param_value
+                continue
             self._partition_parameters(
                 partitioned, param_name, param_value, shape_members
             )
@@ -794,7 +1083,7 @@ class BaseRestSerializer(Serializer):
         # A label ending with '+' is greedy.  There can only
         # be one greedy key.
         encoded_params = {}
-        for template_param in re.findall(r'{(.*?)}', uri_template):
+        for template_param in _uri_template_params(uri_template):
             if template_param.endswith('+'):
                 encoded_params[template_param] = percent_encode(
                     params[template_param[:-1]], safe='/~'
@@ -805,6 +1094,18 @@ class BaseRestSerializer(Serializer):
                 )
         return uri_template.format(**encoded_params)
 
+    def _get_body_members(self, shape):
+        # Names of the input members without a location, which
+        # _partition_parameters would put in the body.  Cached per shape
+        # alongside the compiled serialize plans.
+        try:
+            body_members = self._body_members
+        except AttributeError:
+            body_members = self._body_members = PlanCache(
+                self.PLAN_CACHE_SIZE
+            )
+        return body_members.get(shape, _compile_body_members)
+
     def _serialize_payload(
         self, partitioned, parameters, serialized, shape, shape_members
     ):
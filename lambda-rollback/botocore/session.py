@@ -628,12 +628,18 @@ class Session:
             data_path, type_name='service-2', api_version=api_version
         )
         service_id = EVENT_ALIASES.get(service_name, service_name)
-        self._events.emit(
-            f'service-data-loaded.{service_id}',
-            service_data=service_data,
-            service_name=service_name,
-            session=self,
-        )
+        event_name = f'service-data-loaded.{service_id}'
+        if self._events.has_handlers(event_name):
+            # The loaded data may be shared with every other Session in the
+            # process, so handlers, which are allowed to change it, are
+            # given a copy that only this Session returns.
+            service_data = copy.deepcopy(service_data)
+            self._events.emit(
+                event_name,
+                service_data=service_data,
+                service_name=service_name,
+                session=self,
+            )
         return service_data
 
     def get_available_services(self):
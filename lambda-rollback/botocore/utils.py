@@ -12,6 +12,7 @@
 # language governing permissions and limitations under the License.
 import base64
 import binascii
+import contextlib
 import datetime
 import email.message
 import functools
@@ -22,6 +23,8 @@ import os
 import random
 import re
 import socket
+import tempfile
+import threading
 import time
 import warnings
 import weakref
@@ -41,6 +44,7 @@ import botocore.httpsession
 # IP Regexes retained for backwards compatibility
 from botocore.compat import (
     HAS_CRT,
+    HAS_FCNTL,
     HEX_PAT,  # noqa: F401
     IPV4_PAT,  # noqa: F401
     IPV4_RE,
@@ -94,6 +98,9 @@ from botocore.plugin import (
     set_plugin_context,
 )
 
+if HAS_FCNTL:
+    import fcntl
+
 logger = logging.getLogger(__name__)
 DEFAULT_METADATA_SERVICE_TIMEOUT = 1
 METADATA_BASE_URL = 'http://169.254.169.254/'
@@ -1525,6 +1532,44 @@ def lru_cache_weakref(*cache_args, **cache_kwargs):
     return wrapper
 
 
+class PlanCache:
+    """Least-recently-used map of Shape objects to their compiled plans.
+
+    Shape objects belong to the service model that created them, and a
+    parser shared by every client of a session sees the shapes of each
+    new client's model.  Bounding the cache keeps those models from being
+    kept alive by it; an evicted shape is simply compiled again.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._plans = OrderedDict()
+
+    def __len__(self):
+        return len(self._plans)
+
+    def get(self, shape, compile_plan):
+        plans = self._plans
+        try:
+            plan = plans[shape]
+        except KeyError:
+            plan = compile_plan(shape)
+            plans[shape] = plan
+            while len(plans) > self.maxsize:
+                try:
+                    plans.popitem(last=False)
+                except KeyError:
+                    # Emptied by another thread
+                    break
+            return plan
+        try:
+            plans.move_to_end(shape)
+        except KeyError:
+            # Evicted by another thread since the lookup
+            pass
+        return plan
+
+
 def switch_host_s3_accelerate(request, operation_name, **kwargs):
     """Switches the current s3 endpoint with an S3 Accelerate endpoint"""
 
@@ -3595,6 +3640,72 @@ class JSONFileCache:
         return value
 
 
+class SharedFileCache(JSONFileCache):
+    """JSON file cache that processes on one host can share safely.
+
+    Entries are replaced atomically, so a reader never sees a partly
+    written file, and ``lock`` takes an exclusive lock on an entry across
+    processes.  Cached credential fetchers hold that lock while they
+    check the cache, call STS and write the result, so when credentials
+    expire only one process fetches new ones and the others read them.
+
+    The default directory is private to the current user under the
+    system temp directory, ``/tmp`` on Lambda and CodeBuild.  A directory
+    that other users could read or write is refused.
+    """
+
+    CACHE_DIR = os.path.join(
+        tempfile.gettempdir(),
+        f"botocore-cache-{os.getuid() if hasattr(os, 'getuid') else 'user'}",
+    )
+    # Serializes lock() within a process where file locks are unavailable.
+    _process_lock = threading.Lock()
+
+    def __init__(self, working_dir=CACHE_DIR, dumps_func=None):
+        super().__init__(working_dir, dumps_func)
+        os.makedirs(working_dir, mode=0o700, exist_ok=True)
+        if hasattr(os, 'getuid'):
+            stat = os.stat(working_dir)
+            if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+                raise ValueError(
+                    f"Refusing to cache credentials in {working_dir}: it "
+                    f"must be owned by the current user and not accessible "
+                    f"to others."
+                )
+
+    def __setitem__(self, cache_key, value):
+        full_key = self._convert_cache_key(cache_key)
+        try:
+            file_content = self._dumps(value)
+        except (TypeError, ValueError):
+            raise ValueError(
+                f"Value cannot be cached, must be JSON serializable: {value}"
+            )
+        temp_path = f'{full_key}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with os.fdopen(
+            os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600),
+            'w',
+        ) as f:
+            f.write(file_content)
+        os.replace(temp_path, full_key)
+
+    @contextlib.contextmanager
+    def lock(self, cache_key):
+        """Hold an exclusive lock on ``cache_key`` across processes."""
+        if not HAS_FCNTL:
+            with self._process_lock:
+                yield
+            return
+        lock_path = os.path.join(self._working_dir, cache_key + '.lock')
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the descriptor releases the lock.
+            os.close(fd)
+
+
 def is_s3express_bucket(bucket):
     if bucket is None:
         return False
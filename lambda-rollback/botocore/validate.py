@@ -18,7 +18,15 @@ import json
 from datetime import datetime
 
 from botocore.exceptions import ParamValidationError
-from botocore.utils import is_json_value_header, parse_to_aware_datetime
+from botocore.utils import (
+    PlanCache,
+    is_json_value_header,
+    parse_to_aware_datetime,
+)
+
+# Value for the ``parameter_validation`` config option that validates only
+# the first call of each parameter signature (see ParamValidator).
+TRUSTED_CALLER = 'trusted'
 
 
 def validate_parameters(params, shape):
@@ -70,6 +78,17 @@ def type_check(valid_types):
     return _create_type_check_guard
 
 
+def _min_allowed(shape):
+    # The lower bound range_check enforces for ``shape``, or None.
+    if 'min' in shape.metadata:
+        return shape.metadata['min']
+    elif hasattr(shape, 'serialization'):
+        # Members that can be bound to the host have an implicit min of 1
+        if shape.serialization.get('hostLabel'):
+            return 1
+    return None
+
+
 def range_check(name, value, shape, error_type, errors):
     failed = False
     min_allowed = float('-inf')
@@ -179,7 +198,44 @@ class ValidationErrors:
 
 
 class ParamValidator:
-    """Validates parameters against a shape model."""
+    """Validates parameters against a shape model.
+
+    When ``trusted_caller`` is true, once a call for a given input shape
+    and set of top level parameter names has passed full validation, later
+    calls with the same signature only have the types of their values
+    checked; required members, unknown names, lengths and ranges are not
+    checked again.  This applies only when every given parameter is a plain
+    scalar (string, integer, long, boolean, double or float).  Nested
+    values are not validated by a type check, so calls with any structure,
+    list, map, blob, timestamp or document member are always validated in
+    full.
+    """
+
+    # When enabled, each shape is compiled on first use into a closure
+    # (a "plan") with its required members, type checks and bounds
+    # precomputed.  Plans report exactly the same errors as dispatching
+    # through the ``_validate_*`` methods, which remain the fallback for
+    # any type a subclass customizes.
+    COMPILE_PLANS = True
+    # How many compiled plans a validator keeps, least recently used
+    # first out.
+    PLAN_CACHE_SIZE = 1024
+    # Scalar type name -> (valid types, range check error or None), as
+    # enforced by the matching ``_validate_*`` method.
+    _SCALAR_TYPES = {
+        'string': ((str,), 'invalid length'),
+        'integer': ((int,), 'invalid range'),
+        'long': ((int,), 'invalid range'),
+        'boolean': ((bool,), None),
+        'double': ((float, decimal.Decimal, int), 'invalid range'),
+        'float': ((float, decimal.Decimal, int), 'invalid range'),
+    }
+
+    def __init__(self, trusted_caller=False):
+        self._trusted_caller = trusted_caller
+        # (shape, parameter names) -> valid types of each parameter, or
+        # False if they are not all scalars
+        self._trusted_signatures = {}
 
     def validate(self, params, shape):
         """Validate parameters against a shape model.
@@ -196,9 +252,221 @@ class ParamValidator:
 
         """
         errors = ValidationErrors()
-        self._validate(params, shape, errors, name='')
+        signature = None
+        if self._trusted_caller and isinstance(params, dict):
+            signature = (shape, tuple(params))
+            valid_types = self._trusted_signatures.get(signature)
+            if valid_types is False:
+                signature = None
+            elif valid_types is not None:
+                for value, types in zip(params.values(), valid_types):
+                    if not isinstance(value, types):
+                        break
+                else:
+                    return errors
+        if self.COMPILE_PLANS:
+            self._get_validate_plan(shape)(params, errors, '')
+        else:
+            self._validate(params, shape, errors, name='')
+        if signature is not None and not errors.has_errors():
+            valid_types = self._scalar_types(shape, params)
+            self._trusted_signatures[signature] = (
+                False if valid_types is None else valid_types
+            )
         return errors
 
+    def _scalar_types(self, shape, params):
+        # The valid types of each of ``params``, or None unless all of them
+        # are scalars that a type check alone can vouch for.
+        members = getattr(shape, 'members', {})
+        valid_types = []
+        for name in params:
+            member = members.get(name)
+            if (
+                member is None
+                or member.type_name not in self._SCALAR_TYPES
+                or self._check_special_validation_cases(member)
+            ):
+                return None
+            valid_types.append(self._SCALAR_TYPES[member.type_name][0])
+        return tuple(valid_types)
+
+    def _get_validate_plan(self, shape):
+        # Plans are keyed on the Shape object itself.  Shapes are cached on
+        # their operation/service model, so each shape is compiled once per
+        # validator instance while it stays in the bounded cache.
+        try:
+            plans = self._validate_plans
+        except AttributeError:
+            plans = self._validate_plans = PlanCache(self.PLAN_CACHE_SIZE)
+        return plans.get(shape, self._compile_plan)
+
+    def _lazy_plan(self, shape):
+        # Returns a function that compiles ``shape`` on first call.  This
+        # keeps compilation proportional to the parts of a model actually
+        # used and makes recursive shapes safe to compile.
+        plan = None
+
+        def get_plan():
+            nonlocal plan
+            if plan is None:
+                plan = self._get_validate_plan(shape)
+            return plan
+
+        return get_plan
+
+    def _has_builtin_validator(self, type_name):
+        name = f'_validate_{type_name}'
+        return getattr(type(self), name, None) is getattr(
+            ParamValidator, name, None
+        )
+
+    def _compile_plan(self, shape):
+        type_name = shape.type_name
+        special_validator = self._check_special_validation_cases(shape)
+        if special_validator is None and self._has_builtin_validator(
+            type_name
+        ):
+            if type_name == 'structure':
+                return self._compile_structure(shape)
+            elif type_name == 'list':
+                return self._compile_list(shape)
+            elif type_name == 'map':
+                return self._compile_map(shape)
+            elif type_name in self._SCALAR_TYPES:
+                return self._compile_scalar(shape)
+        # Bind the validator once so later calls skip the name lookup.
+        validator = special_validator or getattr(
+            self, f'_validate_{type_name}'
+        )
+
+        def validate_with_method(params, errors, name):
+            validator(params, shape, errors, name)
+
+        return validate_with_method
+
+    def _compile_scalar(self, shape):
+        valid_types, range_error = self._SCALAR_TYPES[shape.type_name]
+        valid_type_names = [str(t) for t in valid_types]
+        min_allowed = None
+        if range_error is not None:
+            min_allowed = _min_allowed(shape)
+        measure = len if shape.type_name == 'string' else None
+
+        def validate_scalar(param, errors, name):
+            if not isinstance(param, valid_types):
+                errors.report(
+                    name,
+                    'invalid type',
+                    param=param,
+                    valid_types=valid_type_names,
+                )
+            elif min_allowed is not None:
+                value = measure(param) if measure else param
+                if value < min_allowed:
+                    errors.report(
+                        name, range_error, param=value, min_allowed=min_allowed
+                    )
+
+        return validate_scalar
+
+    def _compile_structure(self, shape):
+        members = shape.members
+        required = shape.metadata.get('required', [])
+        is_tagged_union = shape.is_tagged_union
+        # member name -> plan getter, filled in as members are first seen.
+        member_plans = {}
+
+        def validate_structure(params, errors, name):
+            if not isinstance(params, dict):
+                errors.report(
+                    name,
+                    'invalid type',
+                    param=params,
+                    valid_types=[str(dict)],
+                )
+                return
+            if is_tagged_union:
+                if len(params) == 0:
+                    errors.report(name, 'empty input', members=members)
+                elif len(params) > 1:
+                    errors.report(name, 'more than one input', members=members)
+            for required_member in required:
+                if required_member not in params:
+                    errors.report(
+                        name,
+                        'missing required field',
+                        required_name=required_member,
+                        user_params=params,
+                    )
+            known_params = []
+            for param in params:
+                if param in members:
+                    known_params.append(param)
+                else:
+                    errors.report(
+                        name,
+                        'unknown field',
+                        unknown_param=param,
+                        valid_names=list(members),
+                    )
+            for param in known_params:
+                try:
+                    get_plan = member_plans[param]
+                except KeyError:
+                    get_plan = self._lazy_plan(members[param])
+                    member_plans[param] = get_plan
+                get_plan()(params[param], errors, f'{name}.{param}')
+
+        return validate_structure
+
+    def _compile_list(self, shape):
+        get_plan = self._lazy_plan(shape.member)
+        min_allowed = _min_allowed(shape)
+
+        def validate_list(param, errors, name):
+            if not isinstance(param, (list, tuple)):
+                errors.report(
+                    name,
+                    'invalid type',
+                    param=param,
+                    valid_types=[str(list), str(tuple)],
+                )
+                return
+            if min_allowed is not None and len(param) < min_allowed:
+                errors.report(
+                    name,
+                    'invalid length',
+                    param=len(param),
+                    min_allowed=min_allowed,
+                )
+            plan = get_plan()
+            for i, item in enumerate(param):
+                plan(item, errors, f'{name}[{i}]')
+
+        return validate_list
+
+    def _compile_map(self, shape):
+        get_key_plan = self._lazy_plan(shape.key)
+        get_value_plan = self._lazy_plan(shape.value)
+
+        def validate_map(param, errors, name):
+            if not isinstance(param, dict):
+                errors.report(
+                    name,
+                    'invalid type',
+                    param=param,
+                    valid_types=[str(dict)],
+                )
+                return
+            key_plan = get_key_plan()
+            value_plan = get_value_plan()
+            for key, value in param.items():
+                key_plan(key, errors, f"{name} (key: {key})")
+                value_plan(value, errors, f'{name}.{key}')
+
+        return validate_map
+
     def _check_special_validation_cases(self, shape):
         if is_json_value_header(shape):
             return self._validate_jsonvalue_string
@@ -206,6 +474,9 @@ class ParamValidator:
             return self._validate_document
 
     def _validate(self, params, shape, errors, name):
+        if self.COMPILE_PLANS:
+            self._get_validate_plan(shape)(params, errors, name)
+            return
         special_validator = self._check_special_validation_cases(shape)
         if special_validator:
             special_validator(params, shape, errors, name)
@@ -0,0 +1,169 @@
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger()
+
+# Decisions the rollback handler acts on
+ROLLBACK_IN_PROGRESS = 'ROLLBACK_IN_PROGRESS'
+PREVIOUS_SUCCESS = 'PREVIOUS_SUCCESS'
+FLAPPING = 'FLAPPING'
+NEEDS_INVESTIGATION = 'NEEDS_INVESTIGATION'
+NO_HISTORY = 'NO_HISTORY'
+
+TERMINAL_STATUSES = ('Succeeded', 'Failed', 'Stopped', 'Cancelled', 'Superseded')
+ROLLBACK_TRIGGERS = ('ManualRollback', 'AutomatedRollback')
+
+
+def is_rollback(summary, function_name=None):
+    """True if an execution was started as a rollback (by us or by CodePipeline itself)"""
+    trigger = summary.get('trigger', {})
+    if trigger.get('triggerType') in ROLLBACK_TRIGGERS:
+        return True
+    return bool(
+        function_name
+        and trigger.get('triggerType') == 'StartPipelineExecution'
+        and function_name in trigger.get('triggerDetail', '')
+    )
+
+
+class ExecutionHistory:
+    """Newest-first stream of a pipeline's execution summaries.
+
+    Summaries come from the ListPipelineExecutions paginator one page at a
+    time, only as far as the caller iterates. What was read is cached on the
+    instance, so a warm container keeps it across invocations: within
+    `cache_seconds` the cache is served without any API call, and after that
+    only the pages newer than the last cached terminal execution are fetched.
+    The newest page can also be fetched ahead, with `prefetch`, while the
+    caller is busy with something else. At most `max_cached` summaries are
+    kept, newest first.
+    """
+
+    def __init__(self, code_pipeline, pipeline_name, page_size=10, cache_seconds=30,
+                 max_cached=100, clock=time.monotonic):
+        self.code_pipeline = code_pipeline
+        self.pipeline_name = pipeline_name
+        self.page_size = page_size
+        self.cache_seconds = cache_seconds
+        self.max_cached = max_cached
+        self.clock = clock
+        self._cached = []
+        self._cached_at = None
+        self._prefetched = None
+        self._prefetched_at = None
+
+    def _is_fresh(self, fetched_at):
+        return fetched_at is not None and self.clock() - fetched_at < self.cache_seconds
+
+    def _pages(self):
+        paginator = self.code_pipeline.get_paginator('list_pipeline_executions')
+        return paginator.paginate(
+            pipelineName=self.pipeline_name, PaginationConfig={'PageSize': self.page_size}
+        )
+
+    def _pages_after(self, page):
+        """The prefetched page, then the ones after it"""
+        yield page
+        while page.get('nextToken'):
+            page = self.code_pipeline.list_pipeline_executions(
+                pipelineName=self.pipeline_name, maxResults=self.page_size, nextToken=page['nextToken']
+            )
+            yield page
+
+    async def prefetch(self, async_code_pipeline):
+        """Fetch the newest page with an asyncio client, for the next read to start from.
+
+        Does nothing while the cache is fresh; a prefetched page that is
+        not read within `cache_seconds` is dropped.
+        """
+        if self._is_fresh(self._cached_at):
+            return
+        fetched_at = self.clock()
+        page = await async_code_pipeline.list_pipeline_executions(
+            pipelineName=self.pipeline_name, maxResults=self.page_size
+        )
+        self._prefetched, self._prefetched_at = page, fetched_at
+
+    def _fetch(self):
+        """Yield fresh summaries until the cached window is reached, then splice it in"""
+        known = {s['pipelineExecutionId'] for s in self._cached if s['status'] in TERMINAL_STATUSES}
+        fresh = []
+        spliced = False
+        if self._prefetched is not None and self._is_fresh(self._prefetched_at):
+            pages = self._pages_after(self._prefetched)
+        else:
+            pages = self._pages()
+        self._prefetched = None
+        try:
+            for page in pages:
+                for summary in page['pipelineExecutionSummaries']:
+                    if summary['pipelineExecutionId'] in known:
+                        index = next(i for i, s in enumerate(self._cached)
+                                     if s['pipelineExecutionId'] == summary['pipelineExecutionId'])
+                        self._cached = fresh + self._cached[index:]
+                        spliced = True
+                        yield from self._cached[len(fresh):]
+                        return
+                    fresh.append(summary)
+                    yield summary
+        finally:
+            # A caller that stopped early still leaves the newest window cached
+            if not spliced:
+                self._cached = fresh
+            del self._cached[self.max_cached:]
+            self._cached_at = self.clock()
+
+    def __iter__(self):
+        if self._is_fresh(self._cached_at):
+            logger.info(f"Serving {len(self._cached)} cached execution summaries")
+            return iter(list(self._cached))
+        return self._fetch()
+
+    def note_started(self, execution_id, function_name=None):
+        """Record an execution we just started so later invocations see it without a lookup"""
+        self._cached.insert(0, {
+            'pipelineExecutionId': execution_id,
+            'status': 'InProgress',
+            'startTime': datetime.now(timezone.utc),
+            'trigger': {'triggerType': 'StartPipelineExecution', 'triggerDetail': function_name or ''},
+        })
+        del self._cached[self.max_cached:]
+
+    def decide(self, flap_window=timedelta(hours=1), flap_threshold=2, function_name=None, now=None):
+        """Classify recent history into one of the decision constants.
+
+        Returns (decision, summary) where summary is the execution the
+        decision hinges on. Rollbacks count towards flapping if they started
+        within `flap_window` of `now`, the current time by default. Stops
+        reading as soon as the answer is known.
+        """
+        function_name = function_name or os.getenv('AWS_LAMBDA_FUNCTION_NAME')
+        latest = None
+        rollbacks = 0
+        cutoff = (now or datetime.now(timezone.utc)) - flap_window
+
+        summaries = iter(self)
+        try:
+            for summary in summaries:
+                if latest is None:
+                    latest = summary
+                    if summary['status'] == 'InProgress' and is_rollback(summary, function_name):
+                        return ROLLBACK_IN_PROGRESS, summary
+                if summary['startTime'] < cutoff:
+                    break
+
+                if is_rollback(summary, function_name):
+                    rollbacks += 1
+                    if rollbacks >= flap_threshold:
+                        return FLAPPING, latest
+        finally:
+            if hasattr(summaries, 'close'):
+                summaries.close()
+
+        if latest is None:
+            return NO_HISTORY, None
+        if latest['status'] == 'Succeeded':
+            return PREVIOUS_SUCCESS, latest
+        return NEEDS_INVESTIGATION, latest
@@ -1,9 +1,15 @@
 # 
 
+import asyncio
 import json
 import boto3
 import os
 import logging
+from botocore.asyncclient import AsyncClient
+from ledger import DeploymentLedger, S3LedgerStore
+from rollback import EksClient, RollbackEngine, RollbackRefused
+from notifications import Notifier, flush_on_exit
+from history import ExecutionHistory, ROLLBACK_IN_PROGRESS, PREVIOUS_SUCCESS, FLAPPING, NO_HISTORY
 
 # Setup logging
 logger = logging.getLogger()
@@ -13,9 +19,43 @@ logger.setLevel(logging.INFO)
 code_pipeline = boto3.client('codepipeline')
 cloudwatch = boto3.client('cloudwatch')
 sns = boto3.client('sns')
+notifier = Notifier(sns)
+
+# Execution history per pipeline, kept warm across invocations
+execution_histories = {}
 # Check your Bedrock model availability region
 bedrock_runtime = boto3.client('bedrock-runtime', region_name=os.getenv('BEDROCK_REGION', 'us-east-1'))
+s3 = boto3.client('s3')
+
+# Bedrock analysis and the pipeline lookup are awaited together on one loop,
+# kept across invocations so that their connections stay open
+event_loop = asyncio.new_event_loop()
+async_bedrock_runtime = AsyncClient(bedrock_runtime)
+async_code_pipeline = AsyncClient(code_pipeline)
+
+
+# Lambda allows 10s for init; pre-warming is best effort and must not use much of it
+PREWARM_TIMEOUT_SECONDS = 2
+
+
+async def prewarm_clients():
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(async_bedrock_runtime.prewarm(), async_code_pipeline.prewarm()),
+            timeout=PREWARM_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"Pre-warming connections took over {PREWARM_TIMEOUT_SECONDS}s, "
+                       f"the first invocation will connect instead")
+    except Exception as e:
+        logger.warning(f"Failed to pre-warm connections: {e}")
 
+
+# A rollback needs Bedrock and CodePipeline first, so their connections are opened during
+# init; the loop is not running between invocations, so init waits for the handshakes
+event_loop.run_until_complete(prewarm_clients())
+
+@flush_on_exit(notifier)
 def lambda_handler(event, context):
     logger.info("Received event: " + json.dumps(event, indent=2))
 
@@ -40,42 +80,11 @@ def lambda_handler(event, context):
         logger.error("PIPELINE_NAME environment variable not set")
         return {'statusCode': 500, 'body': json.dumps('Pipeline name not configured.')}
 
-    # 3. Use Bedrock to analyze the situation and recommend action
+    # 3. Use Bedrock to analyze the situation and recommend action,
+    #    fetching recent pipeline history for the fallback meanwhile
+    history = get_execution_history(pipeline_name)
     try:
-        prompt = f"""
-        Human: An AWS CloudWatch alarm '{alarm_name}' has triggered with reason: '{reason}'. 
-        This alarm monitors a banking API deployment on Kubernetes. The most likely cause is a recent code deployment that introduced a bug causing HTTP 500 errors.
-        Should we roll back the deployment? Respond ONLY with a valid JSON object in this exact format:
-        {{
-            "analysis": "A one-sentence summary of the likely problem based on the reason.",
-            "recommendation": "ROLLBACK" 
-        }}
-
-        Assistant:
-        """
-        
-        body = json.dumps({
-            "prompt": prompt,
-            "max_tokens_to_sample": 500,
-            "temperature": 0.5,
-            "top_p": 1,
-        })
-        
-        model_id = os.getenv('BEDROCK_MODEL_ID', 'anthropic.claude-v2')
-        
-        bedrock_response = bedrock_runtime.invoke_model(
-            body=body,
-            modelId=model_id,
-            accept='application/json',
-            contentType='application/json'
-        )
-        
-        response_body = json.loads(bedrock_response.get('body').read())
-        completion = response_body.get('completion')
-        logger.info(f"Bedrock analysis: {completion}")
-
-        # Parse the JSON response from Bedrock
-        advice = json.loads(completion)
+        advice = event_loop.run_until_complete(analyze_alarm(alarm_name, reason, history))
         if advice['recommendation'] != 'ROLLBACK':
             logger.info("Bedrock did not recommend a rollback. Stopping.")
             return {'statusCode': 200, 'body': json.dumps('Rollback not recommended by AI.')}
@@ -83,35 +92,77 @@ def lambda_handler(event, context):
     except Exception as e:
         logger.error(f"Error using Bedrock: {e}. Proceeding with rollback based on alarm alone.")
 
-    # 4. Initiate Rollback in CodePipeline
+    # 4. Read just enough recent history to tell what is going on; a rollback already
+    #    running or a pipeline that keeps being rolled back stops both kinds of rollback
     try:
-        # Find the latest execution of the pipeline
-        executions = code_pipeline.list_pipeline_executions(
-            pipelineName=pipeline_name,
-            maxResults=1
-        )
-        
-        if not executions['pipelineExecutionSummaries']:
+        decision, execution = history.decide()
+    except Exception as e:
+        logger.error(f"Error reading pipeline history: {e}")
+        message = f"Failed to initiate rollback for alarm {alarm_name}. Error: {str(e)}"
+        return {'statusCode': 500, 'body': json.dumps(message)}
+
+    if decision == ROLLBACK_IN_PROGRESS:
+        message = (f"Alarm {alarm_name} triggered while rollback execution {execution['pipelineExecutionId']} "
+                   f"is still running. Not starting another.")
+        logger.info(message)
+        return {'statusCode': 200, 'body': json.dumps(message)}
+
+    if decision == FLAPPING:
+        message = (f"🚨 ALARM: {alarm_name}. Pipeline {pipeline_name} has been rolled back repeatedly in the last hour; "
+                   f"automatic rollback paused. Manual investigation needed.")
+        send_notification(message, alarm_name)
+        logger.warning(message)
+        return {'statusCode': 200, 'body': json.dumps(message)}
+
+    # 5. Patch the Deployment straight back to the last healthy image, if the ledger has one
+    ledger_bucket = os.getenv('LEDGER_BUCKET')
+    eks_cluster_name = os.getenv('EKS_CLUSTER_NAME')
+    if ledger_bucket and eks_cluster_name:
+        try:
+            engine = RollbackEngine(
+                DeploymentLedger(S3LedgerStore(s3, ledger_bucket)),
+                EksClient(boto3.session.Session(), eks_cluster_name, os.getenv('AWS_REGION', 'us-east-1'))
+            )
+            result = engine.rollback(reason)
+            if result:
+                message = (f"🚨 ALARM: {alarm_name}. 🤖 AI-initiated rollback: Deployment patched from "
+                           f"{result['from']} to last healthy image {result['to']} in {result['elapsed_seconds']}s.")
+                send_notification(message, alarm_name)
+                logger.info(f"ACTION: {message}")
+                return {'statusCode': 200, 'body': json.dumps(message)}
+        except RollbackRefused as e:
+            # Re-running the pipeline would only roll back further as well
+            message = (f"🚨 ALARM: {alarm_name}. The running image came from a recent rollback ({e}); "
+                       f"automatic rollback paused. Manual investigation needed.")
+            send_notification(message, alarm_name)
+            logger.warning(message)
+            return {'statusCode': 200, 'body': json.dumps(message)}
+        except Exception as e:
+            logger.error(f"Direct rollback failed: {e}. Falling back to pipeline re-run.")
+
+    # 6. Fall back to re-running CodePipeline
+    try:
+        if decision == NO_HISTORY:
             logger.error("No pipeline executions found")
             return {'statusCode': 404, 'body': json.dumps('No pipeline executions found.')}
-            
-        latest_execution = executions['pipelineExecutionSummaries'][0]
-        latest_execution_id = latest_execution['pipelineExecutionId']
-        latest_status = latest_execution['status']
+
+        latest_execution_id = execution['pipelineExecutionId']
+        latest_status = execution['status']
 
         # Only rollback if the latest execution was successful (which caused the problem)
-        if latest_status == 'Succeeded':
+        if decision == PREVIOUS_SUCCESS:
             logger.info(f"Initiating rollback for execution: {latest_execution_id}")
             # This starts a new execution, which by default uses the last good artifact
             rollback_response = code_pipeline.start_pipeline_execution(
                 name=pipeline_name
             )
+            history.note_started(rollback_response['pipelineExecutionId'], os.getenv('AWS_LAMBDA_FUNCTION_NAME'))
             logger.info(f"Rollback execution started: {rollback_response['pipelineExecutionId']}")
             
             message = f"🚨 ALARM: {alarm_name}. 🤖 AI-initiated rollback started. Execution ID: {rollback_response['pipelineExecutionId']}"
 
             # Send notification via SNS
-            send_notification(message)
+            send_notification(message, alarm_name)
             logger.info(f"ACTION: {message}")
             
         else:
@@ -128,18 +179,61 @@ def lambda_handler(event, context):
         'body': json.dumps(message)
     }
 
-def send_notification(message):
-    """Send notification via SNS"""
+async def analyze_alarm(alarm_name, reason, history):
+    """Ask Bedrock whether to roll back while the newest pipeline history page is prefetched"""
+    prefetch = asyncio.ensure_future(prefetch_history(history))
     try:
-        sns_topic_arn = os.getenv('SNS_TOPIC_ARN')
-        if sns_topic_arn:
-            sns.publish(
-                TopicArn=sns_topic_arn,
-                Subject="Self-Healing Pipeline Notification",
-                Message=message
-            )
-            logger.info("Notification sent via SNS")
-        else:
-            logger.warning("SNS_TOPIC_ARN not set, skipping notification")
+        prompt = f"""
+        Human: An AWS CloudWatch alarm '{alarm_name}' has triggered with reason: '{reason}'. 
+        This alarm monitors a banking API deployment on Kubernetes. The most likely cause is a recent code deployment that introduced a bug causing HTTP 500 errors.
+        Should we roll back the deployment? Respond ONLY with a valid JSON object in this exact format:
+        {{
+            "analysis": "A one-sentence summary of the likely problem based on the reason.",
+            "recommendation": "ROLLBACK" 
+        }}
+
+        Assistant:
+        """
+        
+        body = json.dumps({
+            "prompt": prompt,
+            "max_tokens_to_sample": 500,
+            "temperature": 0.5,
+            "top_p": 1,
+        })
+        
+        model_id = os.getenv('BEDROCK_MODEL_ID', 'anthropic.claude-v2')
+        
+        bedrock_response = await async_bedrock_runtime.invoke_model(
+            body=body,
+            modelId=model_id,
+            accept='application/json',
+            contentType='application/json'
+        )
+        
+        response_body = json.loads(bedrock_response.get('body').read())
+        completion = response_body.get('completion')
+        logger.info(f"Bedrock analysis: {completion}")
+
+        # Parse the JSON response from Bedrock
+        return json.loads(completion)
+    finally:
+        await prefetch
+
+async def prefetch_history(history):
+    """Fetch the newest page of pipeline history ahead of a possible fallback"""
+    try:
+        await history.prefetch(async_code_pipeline)
     except Exception as e:
-        logger.error(f"Failed to send SNS notification: {e}")
\ No newline at end of file
+        # The fallback reads it again if it needs it
+        logger.warning(f"Failed to prefetch pipeline history: {e}")
+
+def get_execution_history(pipeline_name):
+    """Return the cached execution history for a pipeline, creating it on first use"""
+    if pipeline_name not in execution_histories:
+        execution_histories[pipeline_name] = ExecutionHistory(code_pipeline, pipeline_name)
+    return execution_histories[pipeline_name]
+
+def send_notification(message, alarm_name=None):
+    """Queue a notification; it is published in the background and flushed on handler exit"""
+    notifier.notify(os.getenv('SNS_TOPIC_ARN'), "Self-Healing Pipeline Notification", message, key=alarm_name)
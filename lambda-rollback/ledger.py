@@ -0,0 +1 @@
+../shared/ledger.py
\ No newline at end of file
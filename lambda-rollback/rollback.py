@@ -0,0 +1,133 @@
+import base64
+import json
+import logging
+import ssl
+import time
+
+import urllib3
+
+from ledger import HEALTHY, UNHEALTHY, image_ref
+
+logger = logging.getLogger()
+
+DEPLOYMENT_NAME = 'simple-bank-api'
+CONTAINER_NAME = 'bank-app'
+NAMESPACE = 'default'
+TOKEN_PREFIX = 'k8s-aws-v1.'
+
+
+class EksClient:
+    """Minimal Kubernetes API client for an EKS cluster.
+
+    Talks to the API server directly with an IAM-derived bearer token, the
+    same one `aws eks get-token` produces, so no kubectl or kubeconfig is
+    needed inside the Lambda.
+    """
+
+    def __init__(self, session, cluster_name, region):
+        self.session = session
+        self.cluster_name = cluster_name
+        self.region = region
+        self._endpoint = None
+        self._http = None
+
+    def _connect(self):
+        cluster = self.session.client('eks', region_name=self.region).describe_cluster(
+            name=self.cluster_name
+        )['cluster']
+        ca_data = base64.b64decode(cluster['certificateAuthority']['data']).decode('ascii')
+        self._endpoint = cluster['endpoint']
+        self._http = urllib3.PoolManager(ssl_context=ssl.create_default_context(cadata=ca_data))
+
+    def _token(self):
+        sts = self.session.client(
+            'sts', region_name=self.region,
+            endpoint_url=f'https://sts.{self.region}.amazonaws.com'
+        )
+
+        def add_cluster_header(request, **kwargs):
+            request.headers['x-k8s-aws-id'] = self.cluster_name
+
+        sts.meta.events.register('before-sign.sts.GetCallerIdentity', add_cluster_header)
+        url = sts.generate_presigned_url(
+            'get_caller_identity', Params={}, ExpiresIn=60, HttpMethod='GET'
+        )
+        return TOKEN_PREFIX + base64.urlsafe_b64encode(url.encode('utf-8')).decode('utf-8').rstrip('=')
+
+    def patch_image(self, image, deployment=DEPLOYMENT_NAME, container=CONTAINER_NAME, namespace=NAMESPACE):
+        """Point `container` of `deployment` at `image` with a strategic merge patch"""
+        if self._http is None:
+            self._connect()
+        body = {'spec': {'template': {'spec': {'containers': [{'name': container, 'image': image}]}}}}
+        response = self._http.request(
+            'PATCH',
+            f'{self._endpoint}/apis/apps/v1/namespaces/{namespace}/deployments/{deployment}',
+            body=json.dumps(body).encode('utf-8'),
+            headers={
+                'Authorization': f'Bearer {self._token()}',
+                'Content-Type': 'application/strategic-merge-patch+json',
+            }
+        )
+        if response.status >= 300:
+            raise RuntimeError(f"Kubernetes PATCH failed ({response.status}): {response.data[:500]!r}")
+        return json.loads(response.data)
+
+
+class RollbackRefused(Exception):
+    """Raised instead of rolling back over an image a recent rollback put in place"""
+
+
+class RollbackEngine:
+    """Roll the Deployment back to the last healthy image recorded in the ledger"""
+
+    def __init__(self, ledger, kube, clock=time.monotonic, flap_window_seconds=3600):
+        self.ledger = ledger
+        self.kube = kube
+        self.clock = clock
+        self.flap_window_seconds = flap_window_seconds
+
+    def rollback(self, reason):
+        """Patch the Deployment to the last healthy digest.
+
+        Returns a summary dict, or None when the ledger has no healthy image
+        to go back to and the caller should fall back to the pipeline.
+        Raises RollbackRefused when the current image was itself put in
+        place by a rollback within `flap_window_seconds`: going further back
+        would mark an image that was healthy a moment ago UNHEALTHY.
+        """
+        start = self.clock()
+        current = self.ledger.current()
+        if current is None:
+            logger.warning("Ledger is empty, no image to roll back to")
+            return None
+
+        if current.get('rolled_back_from'):
+            age = self.ledger.clock() - current['deployed_at']
+            if age < self.flap_window_seconds:
+                raise RollbackRefused(
+                    f"{image_ref(current)} was rolled back to {int(age)}s ago, "
+                    f"replacing {current['rolled_back_from']}"
+                )
+
+        target = self.ledger.last_healthy(exclude_digest=current['digest'])
+        if target is None:
+            logger.warning(f"No healthy image in ledger other than current {image_ref(current)}")
+            return None
+
+        logger.info(f"Rolling back {image_ref(current)} -> {image_ref(target)} ({reason})")
+        self.kube.patch_image(image_ref(target))
+
+        self.ledger.mark(current['digest'], UNHEALTHY)
+        # Not a new build, so no author: it must not count towards anyone's failure rate
+        self.ledger.record(
+            target['image'], target['digest'], tag=target['tag'],
+            commit_id=target['commit_id'], execution_id=target['execution_id'],
+            status=HEALTHY, rolled_back_from=current['digest']
+        )
+
+        return {
+            'from': image_ref(current),
+            'to': image_ref(target),
+            'commit': target['commit_id'],
+            'elapsed_seconds': round(self.clock() - start, 3),
+        }
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import collections
+import importlib
 import io
 import json as _json
 import logging
@@ -52,43 +53,90 @@ log = logging.getLogger(__name__)
 
 
 class ContentDecoder:
-    def decompress(self, data: bytes) -> bytes:
+    def decompress(self, data: bytes, max_length: int = -1) -> bytes:
         raise NotImplementedError()
 
+    @property
+    def has_pending_output(self) -> bool:
+        """
+        Whether an earlier ``decompress(data, max_length)`` stopped at
+        ``max_length`` with more to come, which ``decompress(b"")`` returns.
+        """
+        return False
+
     def flush(self) -> bytes:
         raise NotImplementedError()
 
 
+# zlib-compatible modules the gzip and deflate decoders use, fastest first.
+# The first one that can be imported is used, and zlib always can.
+_ZLIB_BACKENDS = ("isal.isal_zlib", "zlib_ng.zlib_ng", "zlib")
+
+
+def _import_zlib_backend(names: typing.Iterable[str] = _ZLIB_BACKENDS) -> typing.Any:
+    for name in names:
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            continue
+    return zlib
+
+
+_zlib = _import_zlib_backend()
+
+
 class DeflateDecoder(ContentDecoder):
     def __init__(self) -> None:
         self._first_try = True
         self._data = b""
-        self._obj = zlib.decompressobj()
+        self._zlib = _zlib
+        self._obj = self._zlib.decompressobj()
+        self._unconsumed_tail = b""
+        self._output_full = False
+
+    @property
+    def has_pending_output(self) -> bool:
+        return bool(self._unconsumed_tail) or self._output_full
 
-    def decompress(self, data: bytes) -> bytes:
-        if not data:
+    def decompress(self, data: bytes, max_length: int = -1) -> bytes:
+        if self._unconsumed_tail:
+            data, self._unconsumed_tail = self._unconsumed_tail + data, b""
+        if not data and not self._output_full:
             return data
 
         if not self._first_try:
-            return self._obj.decompress(data)
+            return self._decompress(data, max_length)
 
         self._data += data
         try:
-            decompressed = self._obj.decompress(data)
+            decompressed = self._decompress(data, max_length)
             if decompressed:
                 self._first_try = False
                 self._data = None  # type: ignore[assignment]
             return decompressed
-        except zlib.error:
+        except self._zlib.error:
             self._first_try = False
-            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            self._obj = self._zlib.decompressobj(-zlib.MAX_WBITS)
             try:
-                return self.decompress(self._data)
+                return self.decompress(self._data, max_length)
             finally:
                 self._data = None  # type: ignore[assignment]
 
+    def _decompress(self, data: bytes, max_length: int) -> bytes:
+        # zlib reads a max_length of 0 as no limit
+        decompressed = self._obj.decompress(data, max(max_length, 0))
+        # isal leaves data after the end of the stream in unconsumed_tail
+        if not self._obj.eof:
+            self._unconsumed_tail = self._obj.unconsumed_tail
+        # Output that fills max_length may not be all of it even when all
+        # of data was used; isal, for one, buffers input internally.
+        self._output_full = (
+            0 < max_length == len(decompressed) and not self._obj.eof
+        )
+        return decompressed  # type: ignore[no-any-return]
+
     def flush(self) -> bytes:
-        return self._obj.flush()
+        return self._obj.flush()  # type: ignore[no-any-return]
 
 
 class GzipDecoderState:
@@ -99,32 +147,65 @@ class GzipDecoderState:
 
 class GzipDecoder(ContentDecoder):
     def __init__(self) -> None:
-        self._obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._zlib = _zlib
+        self._obj = self._zlib.decompressobj(16 + zlib.MAX_WBITS)
         self._state = GzipDecoderState.FIRST_MEMBER
+        self._unconsumed_tail = b""
+        self._output_full = False
 
-    def decompress(self, data: bytes) -> bytes:
-        ret = bytearray()
-        if self._state == GzipDecoderState.SWALLOW_DATA or not data:
-            return bytes(ret)
+    @property
+    def has_pending_output(self) -> bool:
+        return bool(self._unconsumed_tail) or self._output_full
+
+    def decompress(self, data: bytes, max_length: int = -1) -> bytes:
+        if self._unconsumed_tail:
+            data, self._unconsumed_tail = self._unconsumed_tail + data, b""
+        if self._state == GzipDecoderState.SWALLOW_DATA or (
+            not data and not self._output_full
+        ):
+            return b""
+        self._output_full = False
+        parts = []
+        produced = 0
         while True:
+            if max_length < 0:
+                limit = 0  # No limit
+            elif produced < max_length:
+                limit = max_length - produced
+            else:
+                # Output is full but another member has started
+                self._unconsumed_tail = data
+                break
             try:
-                ret += self._obj.decompress(data)
-            except zlib.error:
+                part = self._obj.decompress(data, limit)
+            except self._zlib.error:
                 previous_state = self._state
                 # Ignore data after the first error
                 self._state = GzipDecoderState.SWALLOW_DATA
                 if previous_state == GzipDecoderState.OTHER_MEMBERS:
                     # Allow trailing garbage acceptable in other gzip clients
-                    return bytes(ret)
+                    break
                 raise
+            parts.append(part)
+            produced += len(part)
+            if not self._obj.eof:
+                # isal leaves data after the end of a member in
+                # unconsumed_tail, so it is only kept before the end.
+                self._unconsumed_tail = self._obj.unconsumed_tail
+                # See DeflateDecoder._decompress()
+                self._output_full = 0 < limit == len(part)
+                break
             data = self._obj.unused_data
             if not data:
-                return bytes(ret)
+                break
             self._state = GzipDecoderState.OTHER_MEMBERS
-            self._obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            self._obj = self._zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if len(parts) == 1:
+            return parts[0]  # type: ignore[no-any-return]
+        return b"".join(parts)
 
     def flush(self) -> bytes:
-        return self._obj.flush()
+        return self._obj.flush()  # type: ignore[no-any-return]
 
 
 if brotli is not None:
@@ -136,9 +217,13 @@ if brotli is not None:
         def __init__(self) -> None:
             self._obj = brotli.Decompressor()
             if hasattr(self._obj, "decompress"):
-                setattr(self, "decompress", self._obj.decompress)
+                self._decompress = self._obj.decompress
             else:
-                setattr(self, "decompress", self._obj.process)
+                self._decompress = self._obj.process
+
+        def decompress(self, data: bytes, max_length: int = -1) -> bytes:
+            # Output is not bounded: neither package can stop early
+            return self._decompress(data)  # type: ignore[no-any-return]
 
         def flush(self) -> bytes:
             if hasattr(self._obj, "flush"):
@@ -156,7 +241,8 @@ try:
         def __init__(self) -> None:
             self._obj = zstd.ZstdDecompressor()
 
-        def decompress(self, data: bytes) -> bytes:
+        def decompress(self, data: bytes, max_length: int = -1) -> bytes:
+            # Output is not bounded, see the zstandard decoder below
             if not data:
                 return b""
             data_parts = [self._obj.decompress(data)]
@@ -194,7 +280,9 @@ except ImportError:
             def __init__(self) -> None:
                 self._obj = zstd.ZstdDecompressor().decompressobj()
 
-            def decompress(self, data: bytes) -> bytes:
+            def decompress(self, data: bytes, max_length: int = -1) -> bytes:
+                # Output is not bounded: zstandard's decompressobj cannot
+                # stop early
                 if not data:
                     return b""
                 data_parts = [self._obj.decompress(data)]
@@ -226,28 +314,37 @@ class MultiDecoder(ContentDecoder):
     def flush(self) -> bytes:
         return self._decoders[0].flush()
 
-    def decompress(self, data: bytes) -> bytes:
-        for d in reversed(self._decoders):
-            data = d.decompress(data)
-        return data
+    @property
+    def has_pending_output(self) -> bool:
+        return self._decoders[0].has_pending_output
 
+    def decompress(self, data: bytes, max_length: int = -1) -> bytes:
+        # Only the last decoding applied is bounded by max_length
+        for d in reversed(self._decoders[1:]):
+            data = d.decompress(data)
+        return self._decoders[0].decompress(data, max_length)
 
-def _get_decoder(mode: str) -> ContentDecoder:
-    if "," in mode:
-        return MultiDecoder(mode)
 
+# Decoders by content coding; codings that are not listed are decoded as
+# deflate.
+_DECODERS: dict[str, typing.Callable[[], ContentDecoder]] = {
     # According to RFC 9110 section 8.4.1.3, recipients should
     # consider x-gzip equivalent to gzip
-    if mode in ("gzip", "x-gzip"):
-        return GzipDecoder()
+    "gzip": GzipDecoder,
+    "x-gzip": GzipDecoder,
+    "deflate": DeflateDecoder,
+}
+if brotli is not None:
+    _DECODERS["br"] = BrotliDecoder
+if HAS_ZSTD:
+    _DECODERS["zstd"] = ZstdDecoder
 
-    if brotli is not None and mode == "br":
-        return BrotliDecoder()
 
-    if HAS_ZSTD and mode == "zstd":
-        return ZstdDecoder()
+def _get_decoder(mode: str) -> ContentDecoder:
+    if "," in mode:
+        return MultiDecoder(mode)
 
-    return DeflateDecoder()
+    return _DECODERS.get(mode, DeflateDecoder)()
 
 
 class BytesQueueBuffer:
@@ -258,18 +355,23 @@ class BytesQueueBuffer:
 
     This buffer should be filled using calls to put()
 
+    Chunks are never sliced or copied while they sit in the buffer: get()
+    remembers how far into the first chunk it has read and copies only the
+    bytes it returns, so reading a large chunk in small pieces copies it
+    once rather than once per piece. A get() that returns exactly one whole
+    chunk returns it without copying.
+
     Our maximum memory usage is determined by the sum of the size of:
 
      * self.buffer, which contains the full data
-     * the largest chunk that we will copy in get()
-
-    The worst case scenario is a single chunk, in which case we'll make a full copy of
-    the data inside get().
+     * the data returned by get()
     """
 
     def __init__(self) -> None:
         self.buffer: typing.Deque[bytes] = collections.deque()
         self._size: int = 0
+        # How much of self.buffer[0] has already been returned
+        self._offset: int = 0
 
     def __len__(self) -> int:
         return self._size
@@ -278,6 +380,26 @@ class BytesQueueBuffer:
         self.buffer.append(data)
         self._size += len(data)
 
+    def _pop(self, n: int) -> typing.Iterator[bytes | memoryview]:
+        # Yields up to n bytes from the front of the buffer, as whole
+        # chunks or as views into them.
+        buffer = self.buffer
+        while buffer and n > 0:
+            chunk = buffer[0]
+            start = self._offset
+            end = min(len(chunk), start + n)
+            if end == len(chunk):
+                buffer.popleft()
+                self._offset = 0
+            else:
+                self._offset = end
+            self._size -= end - start
+            n -= end - start
+            if start == 0 and end == len(chunk):
+                yield chunk
+            else:
+                yield memoryview(chunk)[start:end]
+
     def get(self, n: int) -> bytes:
         if n == 0:
             return b""
@@ -286,52 +408,42 @@ class BytesQueueBuffer:
         elif n < 0:
             raise ValueError("n should be > 0")
 
-        fetched = 0
-        ret = io.BytesIO()
-        while fetched < n:
-            remaining = n - fetched
-            chunk = self.buffer.popleft()
-            chunk_length = len(chunk)
-            if remaining < chunk_length:
-                left_chunk, right_chunk = chunk[:remaining], chunk[remaining:]
-                ret.write(left_chunk)
-                self.buffer.appendleft(right_chunk)
-                self._size -= remaining
-                break
-            else:
-                ret.write(chunk)
-                self._size -= chunk_length
-            fetched += chunk_length
-
-            if not self.buffer:
-                break
+        pieces = list(self._pop(n))
+        if len(pieces) == 1 and isinstance(pieces[0], bytes):
+            return pieces[0]
+        return b"".join(pieces)
 
-        return ret.getvalue()
+    def get_into(self, b: memoryview) -> int:
+        """
+        Moves up to ``len(b)`` bytes from the buffer into ``b`` and returns
+        how many were moved.
+        """
+        fetched = 0
+        for piece in self._pop(len(b)):
+            b[fetched : fetched + len(piece)] = piece
+            fetched += len(piece)
+        return fetched
 
     def get_all(self) -> bytes:
         buffer = self.buffer
         if not buffer:
             assert self._size == 0
             return b""
-        if len(buffer) == 1:
+        if len(buffer) == 1 and not self._offset:
             result = buffer.pop()
+            self._size = 0
         else:
-            ret = io.BytesIO()
-            ret.writelines(buffer.popleft() for _ in range(len(buffer)))
-            result = ret.getvalue()
-        self._size = 0
+            result = b"".join(list(self._pop(self._size)))
         return result
 
 
 class BaseHTTPResponse(io.IOBase):
-    CONTENT_DECODERS = ["gzip", "x-gzip", "deflate"]
-    if brotli is not None:
-        CONTENT_DECODERS += ["br"]
-    if HAS_ZSTD:
-        CONTENT_DECODERS += ["zstd"]
+    CONTENT_DECODERS = list(_DECODERS)
     REDIRECT_STATUSES = [301, 302, 303, 307, 308]
 
     DECODER_ERROR_CLASSES: tuple[type[Exception], ...] = (IOError, zlib.error)
+    if _zlib is not zlib:
+        DECODER_ERROR_CLASSES += (_zlib.error,)
     if brotli is not None:
         DECODER_ERROR_CLASSES += (brotli.error,)
 
@@ -492,10 +604,18 @@ class BaseHTTPResponse(io.IOBase):
                     self._decoder = _get_decoder(content_encoding)
 
     def _decode(
-        self, data: bytes, decode_content: bool | None, flush_decoder: bool
+        self,
+        data: bytes,
+        decode_content: bool | None,
+        flush_decoder: bool,
+        max_length: int = -1,
     ) -> bytes:
         """
         Decode the data passed in and potentially flush the decoder.
+
+        Unless ``max_length`` is -1, at most ``max_length`` bytes are
+        decoded, and the decoder holds on to the rest of ``data`` until
+        :meth:`_decode` is called again.
         """
         if not decode_content:
             if self._has_decoded_content:
@@ -507,7 +627,7 @@ class BaseHTTPResponse(io.IOBase):
 
         try:
             if self._decoder:
-                data = self._decoder.decompress(data)
+                data = self._decoder.decompress(data, max_length)
                 self._has_decoded_content = True
         except self.DECODER_ERROR_CLASSES as e:
             content_encoding = self.headers.get("content-encoding", "").lower()
@@ -521,6 +641,12 @@ class BaseHTTPResponse(io.IOBase):
 
         return data
 
+    def _has_pending_output(self) -> bool:
+        """
+        Whether the decoder holds data it can decode without reading more.
+        """
+        return self._decoder is not None and self._decoder.has_pending_output
+
     def _flush_decoder(self) -> bytes:
         """
         Flushes the decoder. Should only be called if the decoder is actually
@@ -977,11 +1103,14 @@ class HTTPResponse(BaseHTTPResponse):
             if len(self._decoded_buffer) >= amt:
                 return self._decoded_buffer.get(amt)
 
-        data = self._raw_read(amt)
+        # The decoder may still hold data from an earlier read, which is
+        # decoded before any more of the body is read.
+        pending = bool(decode_content) and self._has_pending_output()
+        data = b"" if pending and amt is not None else self._raw_read(amt)
 
-        flush_decoder = amt is None or (amt != 0 and not data)
+        flush_decoder = amt is None or (amt != 0 and not data and not pending)
 
-        if not data and len(self._decoded_buffer) == 0:
+        if not data and not pending and len(self._decoded_buffer) == 0:
             return data
 
         if amt is None:
@@ -998,20 +1127,79 @@ class HTTPResponse(BaseHTTPResponse):
                     )
                 return data
 
-            decoded_data = self._decode(data, decode_content, flush_decoder)
+            # Decode no more than asked for, so a small, highly compressed
+            # body cannot fill memory
+            decoded_data = self._decode(
+                data, decode_content, flush_decoder, amt - len(self._decoded_buffer)
+            )
             self._decoded_buffer.put(decoded_data)
 
-            while len(self._decoded_buffer) < amt and data:
+            eof = not data and not pending
+            while len(self._decoded_buffer) < amt and not eof:
                 # TODO make sure to initially read enough data to get past the headers
                 # For example, the GZ file header takes 10 bytes, we don't want to read
                 # it one byte at a time
-                data = self._raw_read(amt)
-                decoded_data = self._decode(data, decode_content, flush_decoder)
+                if self._has_pending_output():
+                    data = b""
+                else:
+                    data = self._raw_read(amt)
+                    eof = not data
+                decoded_data = self._decode(
+                    data, decode_content, flush_decoder, amt - len(self._decoded_buffer)
+                )
                 self._decoded_buffer.put(decoded_data)
             data = self._decoded_buffer.get(amt)
 
         return data
 
+    def readinto(self, b: bytearray) -> int:
+        """
+        Read up to ``len(b)`` bytes into ``b`` and return how many were read.
+
+        Unless the body is being decoded, this reads from the connection
+        straight into ``b``, so no intermediate ``bytes`` object is built and
+        copied.
+        """
+        self._init_decoder()
+        view = memoryview(b).cast("B")
+        if (
+            self._fp is None
+            or not hasattr(self._fp, "readinto")
+            or self._has_decoded_content
+            or (self._decoder is not None and self.decode_content)
+            # See _fp_read().
+            or (
+                len(view) > 2**31 - 1
+                and (util.IS_PYOPENSSL or sys.version_info < (3, 10))
+            )
+        ):
+            return super().readinto(b)
+
+        # Data read by read1() may still be waiting in the buffer.
+        fetched = self._decoded_buffer.get_into(view)
+        if fetched == len(view):
+            return fetched
+
+        fp_closed = getattr(self._fp, "closed", False)
+
+        with self._error_catcher():
+            read = self._fp.readinto(view[fetched:]) if not fp_closed else 0
+            if not read:
+                # See _raw_read().
+                self._fp.close()
+                if (
+                    self.enforce_content_length
+                    and self.length_remaining is not None
+                    and self.length_remaining != 0
+                ):
+                    raise IncompleteRead(self._fp_bytes_read, self.length_remaining)
+
+        if read:
+            self._fp_bytes_read += read
+            if self.length_remaining is not None:
+                self.length_remaining -= read
+        return fetched + read
+
     def read1(
         self,
         amt: int | None = None,
@@ -1049,18 +1237,23 @@ class HTTPResponse(BaseHTTPResponse):
             return b""
 
         # FIXME, this method's type doesn't say returning None is possible
-        data = self._raw_read(amt, read1=True)
+        pending = bool(decode_content) and self._has_pending_output()
+        data = b"" if pending else self._raw_read(amt, read1=True)
         if not decode_content or data is None:
             return data
 
         self._init_decoder()
+        max_length = -1 if amt is None else amt
         while True:
-            flush_decoder = not data
-            decoded_data = self._decode(data, decode_content, flush_decoder)
+            flush_decoder = not data and not pending
+            decoded_data = self._decode(
+                data, decode_content, flush_decoder, max_length
+            )
             self._decoded_buffer.put(decoded_data)
             if decoded_data or flush_decoder:
                 break
-            data = self._raw_read(8192, read1=True)
+            pending = self._has_pending_output()
+            data = b"" if pending else self._raw_read(8192, read1=True)
 
         if amt is None:
             return self._decoded_buffer.get_all()
@@ -1087,7 +1280,11 @@ class HTTPResponse(BaseHTTPResponse):
         if self.chunked and self.supports_chunked_reads():
             yield from self.read_chunked(amt, decode_content=decode_content)
         else:
-            while not is_fp_closed(self._fp) or len(self._decoded_buffer) > 0:
+            while (
+                not is_fp_closed(self._fp)
+                or len(self._decoded_buffer) > 0
+                or self._has_pending_output()
+            ):
                 data = self.read(amt=amt, decode_content=decode_content)
 
                 if data:
@@ -1249,11 +1446,21 @@ class HTTPResponse(BaseHTTPResponse):
                 if self.chunk_left == 0:
                     break
                 chunk = self._handle_chunk(amt)
+                max_length = -1 if amt is None else amt
                 decoded = self._decode(
-                    chunk, decode_content=decode_content, flush_decoder=False
+                    chunk,
+                    decode_content=decode_content,
+                    flush_decoder=False,
+                    max_length=max_length,
                 )
                 if decoded:
                     yield decoded
+                while decode_content and self._has_pending_output():
+                    decoded = self._decode(
+                        b"", decode_content, flush_decoder=False, max_length=max_length
+                    )
+                    if decoded:
+                        yield decoded
 
             if decode_content:
                 # On CPython and PyPy, we should never need to flush the
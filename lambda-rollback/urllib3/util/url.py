@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import re
 import typing
 
@@ -76,6 +77,19 @@ _USERINFO_CHARS = _UNRESERVED_CHARS | _SUB_DELIM_CHARS | {":"}
 _PATH_CHARS = _USERINFO_CHARS | {"@", "/"}
 _QUERY_CHARS = _FRAGMENT_CHARS = _PATH_CHARS | {"?"}
 
+# Components made only of the characters above and upper-case
+# percent-encodings are left as they are by _encode_invalid_chars(), and
+# paths without '.' or '..' segments by _remove_path_dot_segments(), so
+# URLs that are already normalized skip both.
+_NORMALIZED_PATH_RE = re.compile(r"[A-Za-z0-9._~!$&'()*+,;=:@/%-]*")
+_NORMALIZED_QUERY_RE = re.compile(r"[A-Za-z0-9._~!$&'()*+,;=:@/?%-]*")
+_UNNORMALIZED_PERCENT_RE = re.compile(r"%(?![0-9A-F]{2})")
+_DOT_SEGMENT_RE = re.compile(r"(?:^|/)\.\.?(?:/|$)")
+
+# How many parsed authorities parse_url() keeps. Clients talk to a few
+# hosts, so this is plenty, and it bounds what odd URLs can add.
+_AUTHORITY_CACHE_SIZE = 256
+
 
 class Url(
     typing.NamedTuple(
@@ -364,6 +378,40 @@ def _encode_target(target: str) -> str:
     return encoded_target
 
 
+def _is_normalized(component: str, chars_re: re.Pattern[str]) -> bool:
+    return chars_re.fullmatch(component) is not None and (
+        "%" not in component or not _UNNORMALIZED_PERCENT_RE.search(component)
+    )
+
+
+def _has_dot_segments(path: str) -> bool:
+    return ("/." in path or path.startswith(".")) and bool(
+        _DOT_SEGMENT_RE.search(path)
+    )
+
+
+@functools.lru_cache(maxsize=_AUTHORITY_CACHE_SIZE)
+def _parse_authority(
+    authority: str, scheme: str | None, normalize_uri: bool
+) -> tuple[str | None, str | None, int | None]:
+    """
+    Splits an authority into its user info, normalized host and port.
+
+    Ports out of range are returned as they are for parse_url() to reject,
+    without normalizing the host.
+    """
+    auth: str | None
+    auth, _, host_port = authority.rpartition("@")
+    auth = auth or None
+    host, port = _HOST_PORT_RE.match(host_port).groups()  # type: ignore[union-attr]
+    if auth and normalize_uri:
+        auth = _encode_invalid_chars(auth, _USERINFO_CHARS)
+    port_int = int(port) if port else None
+    if port_int is None or 0 <= port_int <= 65535:
+        host = _normalize_host(host, scheme)
+    return auth, host, port_int
+
+
 def parse_url(url: str) -> Url:
     """
     Given a url, return a parsed :class:`.Url` namedtuple. Best-effort is
@@ -404,7 +452,6 @@ def parse_url(url: str) -> Url:
     authority: str | None
     auth: str | None
     host: str | None
-    port: str | None
     port_int: int | None
     path: str | None
     query: str | None
@@ -418,31 +465,24 @@ def parse_url(url: str) -> Url:
             scheme = scheme.lower()
 
         if authority:
-            auth, _, host_port = authority.rpartition("@")
-            auth = auth or None
-            host, port = _HOST_PORT_RE.match(host_port).groups()  # type: ignore[union-attr]
-            if auth and normalize_uri:
-                auth = _encode_invalid_chars(auth, _USERINFO_CHARS)
-            if port == "":
-                port = None
-        else:
-            auth, host, port = None, None, None
-
-        if port is not None:
-            port_int = int(port)
-            if not (0 <= port_int <= 65535):
+            auth, host, port_int = _parse_authority(authority, scheme, normalize_uri)
+            if port_int is not None and not (0 <= port_int <= 65535):
                 raise LocationParseError(url)
         else:
-            port_int = None
-
-        host = _normalize_host(host, scheme)
+            auth, host, port_int = None, None, None
 
         if normalize_uri and path:
-            path = _remove_path_dot_segments(path)
-            path = _encode_invalid_chars(path, _PATH_CHARS)
-        if normalize_uri and query:
+            if _has_dot_segments(path):
+                path = _remove_path_dot_segments(path)
+            if not _is_normalized(path, _NORMALIZED_PATH_RE):
+                path = _encode_invalid_chars(path, _PATH_CHARS)
+        if normalize_uri and query and not _is_normalized(query, _NORMALIZED_QUERY_RE):
             query = _encode_invalid_chars(query, _QUERY_CHARS)
-        if normalize_uri and fragment:
+        if (
+            normalize_uri
+            and fragment
+            and not _is_normalized(fragment, _NORMALIZED_QUERY_RE)
+        ):
             fragment = _encode_invalid_chars(fragment, _FRAGMENT_CHARS)
 
     except (ValueError, AttributeError) as e:
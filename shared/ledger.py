@@ -0,0 +1,369 @@
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger()
+
+# Health verdicts for a deployed image
+PENDING = 'PENDING'
+HEALTHY = 'HEALTHY'
+UNHEALTHY = 'UNHEALTHY'
+# A canary that failed its gate and never replaced the stable image
+ABORTED = 'ABORTED'
+# Verdicts that count against the commit author
+FAILED = (UNHEALTHY, ABORTED)
+
+DEFAULT_SERVICE = 'simple-bank-api'
+DEFAULT_KEY = 'ledger/deployments.sqlite3'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deployments (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    service      TEXT NOT NULL,
+    image        TEXT NOT NULL,
+    tag          TEXT,
+    digest       TEXT NOT NULL,
+    commit_id    TEXT,
+    author       TEXT,
+    execution_id TEXT,
+    status       TEXT NOT NULL,
+    deployed_at  REAL NOT NULL,
+    updated_at   REAL NOT NULL,
+    rolled_back_from TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_deployments_service_status
+    ON deployments (service, status, deployed_at);
+CREATE INDEX IF NOT EXISTS idx_deployments_service_time
+    ON deployments (service, deployed_at);
+CREATE INDEX IF NOT EXISTS idx_deployments_service_digest
+    ON deployments (service, digest, deployed_at);
+CREATE TABLE IF NOT EXISTS author_stats (
+    service      TEXT NOT NULL,
+    author       TEXT NOT NULL,
+    deployments  INTEGER NOT NULL DEFAULT 0,
+    failures     INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (service, author)
+);
+"""
+
+
+class LedgerStore:
+    """Storage backend for DeploymentLedger.
+
+    Rows are only ever appended; a row's status (and updated_at) is the one
+    thing that changes after it is written.
+    """
+
+    def append(self, record):
+        """Persist a new record and return it with its `id` filled in"""
+        raise NotImplementedError
+
+    def set_status(self, record_id, status, updated_at, expected_status=None):
+        """Set a record's status; if `expected_status` is given, only while it still has that
+        status. Returns whether the record was changed."""
+        raise NotImplementedError
+
+    def refresh(self):
+        """Pick up records other writers added since the store was opened"""
+
+    def latest(self, service, exclude_status=None):
+        raise NotImplementedError
+
+    def latest_for_digest(self, service, digest):
+        raise NotImplementedError
+
+    def latest_with_status(self, service, status, exclude_digest=None):
+        raise NotImplementedError
+
+    def since(self, service, timestamp):
+        """Records deployed at or after `timestamp`, oldest first"""
+        raise NotImplementedError
+
+    def author_stats(self, service, author=None):
+        """{author: (deployments, failures)}, for one author or all of them"""
+        raise NotImplementedError
+
+
+class SQLiteLedgerStore(LedgerStore):
+    """LedgerStore backed by a local SQLite file (or ':memory:').
+
+    Every lookup the ledger makes is a range scan on one of the indexes, and
+    per-author failure counts are maintained on write, so queries stay
+    O(log n) as history grows.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        # Ledgers written before rollbacks were told apart from deployments
+        columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(deployments)")}
+        if 'rolled_back_from' not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE deployments ADD COLUMN rolled_back_from TEXT")
+
+    def _one(self, sql, params):
+        row = self.conn.execute(sql, params).fetchone()
+        return dict(row) if row else None
+
+    def _bump_author(self, service, author, deployments=0, failures=0):
+        if author is None:
+            return
+        # No UPSERT: the python3.9 Lambda runtime ships an SQLite older than 3.24
+        self.conn.execute(
+            "INSERT OR IGNORE INTO author_stats (service, author) VALUES (?, ?)", (service, author)
+        )
+        self.conn.execute(
+            "UPDATE author_stats SET deployments = deployments + ?, failures = failures + ? "
+            "WHERE service = ? AND author = ?",
+            (deployments, failures, service, author)
+        )
+
+    def append(self, record):
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO deployments (service, image, tag, digest, commit_id, author, execution_id, "
+                "status, deployed_at, updated_at, rolled_back_from) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (record['service'], record['image'], record['tag'], record['digest'], record['commit_id'],
+                 record['author'], record['execution_id'], record['status'], record['deployed_at'],
+                 record['updated_at'], record.get('rolled_back_from'))
+            )
+            self._bump_author(record['service'], record['author'], deployments=1,
+                              failures=int(record['status'] in FAILED))
+        return dict(record, id=cursor.lastrowid)
+
+    def set_status(self, record_id, status, updated_at, expected_status=None):
+        with self.conn:
+            row = self._one("SELECT service, author, status FROM deployments WHERE id = ?", (record_id,))
+            if row is None or expected_status not in (None, row['status']):
+                return False
+            self.conn.execute(
+                "UPDATE deployments SET status = ?, updated_at = ? WHERE id = ?",
+                (status, updated_at, record_id)
+            )
+            failures = int(status in FAILED) - int(row['status'] in FAILED)
+            if failures:
+                self._bump_author(row['service'], row['author'], failures=failures)
+        return True
+
+    def latest(self, service, exclude_status=None):
+        return self._one(
+            "SELECT * FROM deployments WHERE service = ? AND status IS NOT ? "
+            "ORDER BY deployed_at DESC, id DESC LIMIT 1",
+            (service, exclude_status)
+        )
+
+    def latest_for_digest(self, service, digest):
+        return self._one(
+            "SELECT * FROM deployments WHERE service = ? AND digest = ? "
+            "ORDER BY deployed_at DESC, id DESC LIMIT 1",
+            (service, digest)
+        )
+
+    def latest_with_status(self, service, status, exclude_digest=None):
+        return self._one(
+            "SELECT * FROM deployments WHERE service = ? AND status = ? AND digest IS NOT ? "
+            "ORDER BY deployed_at DESC, id DESC LIMIT 1",
+            (service, status, exclude_digest)
+        )
+
+    def since(self, service, timestamp):
+        rows = self.conn.execute(
+            "SELECT * FROM deployments WHERE service = ? AND deployed_at >= ? ORDER BY deployed_at, id",
+            (service, timestamp)
+        )
+        return [dict(row) for row in rows]
+
+    def author_stats(self, service, author=None):
+        if author is None:
+            rows = self.conn.execute(
+                "SELECT author, deployments, failures FROM author_stats WHERE service = ?", (service,)
+            )
+        else:
+            rows = self.conn.execute(
+                "SELECT author, deployments, failures FROM author_stats WHERE service = ? AND author = ?",
+                (service, author)
+            )
+        return {row['author']: (row['deployments'], row['failures']) for row in rows}
+
+
+def _error_code(error):
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+
+class S3LedgerStore(SQLiteLedgerStore):
+    """SQLiteLedgerStore whose database file lives in S3.
+
+    The file is downloaded to /tmp when the store is opened, so both Lambdas
+    query the same history with the same indexes. Both Lambdas also write to
+    it, so every write is applied to the newest copy of the file and uploaded
+    only if the object's ETag is still the one that copy came from. If
+    another writer got there first, the file is downloaded again and the
+    write applied again, up to `max_attempts` times.
+    """
+
+    # Another conditional write won, or is in progress
+    CONFLICT_CODES = ('PreconditionFailed', 'ConditionalRequestConflict', '412', '409')
+
+    def __init__(self, s3, bucket, key=DEFAULT_KEY, local_path=None, max_attempts=5):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.max_attempts = max_attempts
+        self.path = local_path or os.path.join('/tmp', key.replace('/', '_'))
+        self.conn = None
+        self.etag = None
+        self._download()
+
+    def _download(self, if_changed=False):
+        """Replace the local copy with the object in S3.
+
+        With `if_changed`, a copy that is still current is kept as it is.
+        """
+        kwargs = {'Bucket': self.bucket, 'Key': self.key}
+        if if_changed and self.etag:
+            kwargs['IfNoneMatch'] = self.etag
+        try:
+            response = self.s3.get_object(**kwargs)
+        except Exception as e:
+            code = _error_code(e)
+            if code in ('304', 'NotModified'):
+                return
+            # A missing object just means no deployments have been recorded yet;
+            # anything else must not be papered over with an empty ledger
+            if code not in ('404', 'NoSuchKey'):
+                raise
+            logger.info(f"Starting a new ledger at s3://{self.bucket}/{self.key}")
+            data, self.etag = None, None
+        else:
+            data, self.etag = response['Body'].read(), response['ETag']
+
+        if self.conn is not None:
+            self.conn.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        if data is not None:
+            with open(self.path, 'wb') as f:
+                f.write(data)
+        super().__init__(self.path)
+
+    def _upload(self):
+        # If-None-Match: * only creates the object if nobody else has yet
+        condition = {'IfMatch': self.etag} if self.etag else {'IfNoneMatch': '*'}
+        with open(self.path, 'rb') as f:
+            response = self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=f, **condition)
+        self.etag = response['ETag']
+
+    def _write(self, write):
+        """Apply `write` to the newest ledger and upload it; returns what `write` returns"""
+        self._download(if_changed=True)
+        for attempt in range(1, self.max_attempts + 1):
+            result = write()
+            try:
+                self._upload()
+                return result
+            except Exception as e:
+                # The local copy now holds a write S3 does not have; it must
+                # not be uploaded later as if it were current
+                self.etag = None
+                if _error_code(e) not in self.CONFLICT_CODES or attempt == self.max_attempts:
+                    raise
+                logger.info(f"Ledger at s3://{self.bucket}/{self.key} changed while writing, "
+                            f"retrying ({attempt}/{self.max_attempts})")
+                self._download()
+
+    def refresh(self):
+        self._download(if_changed=True)
+
+    def append(self, record):
+        return self._write(lambda: super(S3LedgerStore, self).append(record))
+
+    def set_status(self, record_id, status, updated_at, expected_status=None):
+        # Retried writes re-check `expected_status` against the ledger as it is now
+        return self._write(
+            lambda: super(S3LedgerStore, self).set_status(record_id, status, updated_at, expected_status)
+        )
+
+
+class DeploymentLedger:
+    """Deployment history for one service and the questions asked of it.
+
+    The deployment Lambda records each rollout and its verdict; the rollback
+    Lambda reads it to find the last image that was known to be healthy.
+    """
+
+    def __init__(self, store, service=DEFAULT_SERVICE, clock=time.time):
+        self.store = store
+        self.service = service
+        self.clock = clock
+
+    def record(self, image, digest, tag=None, commit_id=None, author=None, execution_id=None, status=PENDING,
+               rolled_back_from=None):
+        """Append a deployment of `image` (repository URL) at `digest`.
+
+        A rollback records the image it went back to, with `rolled_back_from`
+        set to the digest it replaced.
+        """
+        now = self.clock()
+        record = self.store.append({
+            'service': self.service,
+            'image': image,
+            'tag': tag,
+            'digest': digest,
+            'commit_id': commit_id,
+            'author': author,
+            'execution_id': execution_id,
+            'status': status,
+            'deployed_at': now,
+            'updated_at': now,
+            'rolled_back_from': rolled_back_from,
+        })
+        logger.info(f"Ledger: recorded {image}@{digest} as {status}")
+        return record
+
+    def mark(self, digest, status, expected_status=None):
+        """Set the verdict of the most recent deployment of `digest`.
+
+        With `expected_status`, the verdict is only set while the record still
+        has that status, so a verdict the other Lambda wrote in the meantime
+        is kept. Returns the updated record, or None if nothing was changed.
+        """
+        # It may have been recorded by the other Lambda after the store was opened
+        self.store.refresh()
+        record = self.store.latest_for_digest(self.service, digest)
+        if record is None:
+            return None
+        if not self.store.set_status(record['id'], status, self.clock(), expected_status):
+            logger.info(f"Ledger: kept {record['image']}@{digest}, no longer {expected_status}")
+            return None
+        logger.info(f"Ledger: marked {record['image']}@{digest} as {status}")
+        return dict(record, status=status)
+
+    def current(self):
+        """Newest deployment that went live; aborted canaries never did"""
+        return self.store.latest(self.service, exclude_status=ABORTED)
+
+    def last_healthy(self, exclude_digest=None):
+        """Newest HEALTHY deployment whose digest differs from `exclude_digest`"""
+        return self.store.latest_with_status(self.service, HEALTHY, exclude_digest)
+
+    def builds_since(self, hours):
+        return self.store.since(self.service, self.clock() - hours * 3600)
+
+    def failure_rate(self, author=None):
+        """{author: fraction of their deployments marked UNHEALTHY}"""
+        return {
+            name: failures / float(deployments)
+            for name, (deployments, failures) in self.store.author_stats(self.service, author).items()
+            if deployments
+        }
+
+
+def image_ref(record):
+    """Digest-pinned image reference for a ledger record"""
+    return f"{record['image']}@{record['digest']}"
@@ -0,0 +1,153 @@
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger()
+
+# SNS rejects subjects of 100 characters or more
+MAX_SUBJECT_LENGTH = 99
+
+
+class Notifier:
+    """Publishes SNS notifications from a background thread.
+
+    Events are buffered per (topic, execution) and each buffer goes out as a
+    single message, so a handler never blocks on `sns.publish`. A message
+    (subject and body) seen again within `dedupe_seconds` is collapsed into a
+    count instead of being sent again; the count goes out with the next copy
+    of it, or on `flush_suppressed`, whichever comes first.
+    """
+
+    def __init__(self, sns, linger_seconds=0.25, dedupe_seconds=60, clock=time.monotonic):
+        self.sns = sns
+        self.linger_seconds = linger_seconds
+        self.dedupe_seconds = dedupe_seconds
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()
+        self._last_sent = {}
+        self._suppressed = {}
+        self._in_flight = 0
+        self._flushing = False
+        self._worker = None
+
+    def notify(self, topic_arn, subject, message, key=None):
+        """Queue a notification; returns False if it was collapsed as a duplicate"""
+        if not topic_arn:
+            logger.warning("SNS topic not set, skipping notification")
+            return False
+
+        now = self.clock()
+        dedupe_key = (topic_arn, subject, message)
+        with self._cond:
+            last = self._last_sent.get(dedupe_key)
+            if last is not None and now - last < self.dedupe_seconds:
+                count, _ = self._suppressed.get(dedupe_key, (0, key))
+                self._suppressed[dedupe_key] = (count + 1, key)
+                logger.info(f"Notification collapsed (duplicate within {self.dedupe_seconds}s): {subject}")
+                return False
+            self._last_sent[dedupe_key] = now
+
+            suppressed, _ = self._suppressed.pop(dedupe_key, (0, key))
+            self._queue(topic_arn, subject, _with_count(message, suppressed), key)
+        return True
+
+    def flush_suppressed(self):
+        """Queue the counts of collapsed duplicates that no later copy has carried yet"""
+        with self._cond:
+            suppressed, self._suppressed = self._suppressed, {}
+            for (topic_arn, subject, message), (count, key) in suppressed.items():
+                self._queue(topic_arn, subject, _with_count(message, count), key)
+
+    def _queue(self, topic_arn, subject, message, key):
+        # Called with self._cond held
+        self._pending.setdefault((topic_arn, key), []).append((subject, message))
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='sns-notifier', daemon=True)
+            self._worker.start()
+        self._cond.notify_all()
+
+    def flush(self, timeout):
+        """Wait up to `timeout` seconds for queued notifications to be published"""
+        deadline = self.clock() + timeout
+        with self._cond:
+            self._flushing = True
+            self._cond.notify_all()
+            try:
+                while self._pending or self._in_flight:
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flushing = False
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # Give the rest of this execution's events a moment to join the batch
+                if not self._flushing:
+                    self._cond.wait(self.linger_seconds)
+                batches = list(self._pending.items())
+                self._pending.clear()
+                self._in_flight += len(batches)
+
+            for (topic_arn, key), events in batches:
+                try:
+                    self._publish(topic_arn, events)
+                finally:
+                    with self._cond:
+                        self._in_flight -= 1
+                        self._cond.notify_all()
+
+    def _publish(self, topic_arn, events):
+        if len(events) == 1:
+            subject, message = events[0]
+        else:
+            subject = f"{events[-1][0]} (+{len(events) - 1} earlier)"
+            message = "\n\n".join(f"{s}\n{m}" for s, m in events)
+        try:
+            self.sns.publish(
+                TopicArn=topic_arn,
+                Subject=subject[:MAX_SUBJECT_LENGTH],
+                Message=message
+            )
+            logger.info(f"Notification sent: {subject}")
+        except Exception as e:
+            logger.error(f"Failed to send notification: {e}")
+
+
+def _with_count(message, suppressed):
+    if not suppressed:
+        return message
+    return f"{message}\n\n({suppressed} identical notification(s) suppressed)"
+
+
+def flush_on_exit(notifier, deadline_seconds=5.0, margin_seconds=0.5):
+    """Decorate a Lambda handler so queued notifications are flushed before it returns.
+
+    Counts of duplicates collapsed during the invocation are published too,
+    since the environment may never be invoked again to carry them.
+
+    The wait is capped at `deadline_seconds` and never runs into the last
+    `margin_seconds` of the invocation's remaining time.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            try:
+                return handler(event, context)
+            finally:
+                deadline = deadline_seconds
+                if hasattr(context, 'get_remaining_time_in_millis'):
+                    deadline = min(deadline, context.get_remaining_time_in_millis() / 1000.0 - margin_seconds)
+                notifier.flush_suppressed()
+                if not notifier.flush(max(0.0, deadline)):
+                    logger.warning("Timed out flushing notifications before handler exit")
+        return wrapper
+    return decorator
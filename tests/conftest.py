@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The rollback Lambda's directory, as the benchmarks import it: the vendored
+# botocore and the shared modules it links to
+sys.path.insert(0, os.path.join(ROOT, 'lambda-rollback'))
+# Reference implementations the benchmarks time against, used as oracles
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
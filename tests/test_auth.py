@@ -0,0 +1,90 @@
+import itertools
+
+import pytest
+from botocore.auth import SigV4Auth, SigV4QueryAuth, _canonical_header_fragment
+from botocore.awsrequest import AWSRequest
+from botocore.credentials import Credentials
+from sigv4_signing import build_request, make_auth, sign
+
+# The AWS aws4_testsuite requests botocore's own suite signs, and the IAM
+# ListUsers walkthrough from the SigV4 documentation
+SUITE_CREDENTIALS = Credentials('AKIDEXAMPLE', 'wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY')
+
+# name, service, method, url, headers, body, expected signature
+TEST_VECTORS = [
+    ('get-vanilla', 'service', 'GET', 'https://example.amazonaws.com/', {}, b'',
+     '5fa00fa31553b73ebf1942676e86291e8372ff2a2260956d9b8aae1d763fbf31'),
+    ('get-vanilla-query-order-key-case', 'service', 'GET',
+     'https://example.amazonaws.com/?Param2=value2&Param1=value1', {}, b'',
+     'b97d918cfa904a5beff61c982a1b6f458b799221646efd99d3219ec94cdf2500'),
+    ('post-vanilla', 'service', 'POST', 'https://example.amazonaws.com/', {}, b'',
+     '5da7c1a2acd57cee7505fc6676e4e544621c30862966e37dddb68e92efbe5d6b'),
+    ('post-x-www-form-urlencoded', 'service', 'POST', 'https://example.amazonaws.com/',
+     {'Content-Type': 'application/x-www-form-urlencoded'}, b'Param1=value1',
+     'ff11897932ad3f4e8b18135d722051e5ac45fc38421b1da7b9d196a0fe09473a'),
+    ('iam-list-users', 'iam', 'GET', 'https://iam.amazonaws.com/?Action=ListUsers&Version=2010-05-08',
+     {'Content-Type': 'application/x-www-form-urlencoded; charset=utf-8'}, b'',
+     '5d672d79c15b13162d9279b0855cfba6789a8edb4c82c400e06b5924a6f2b5d7'),
+]
+
+
+def test_security_token_is_not_kept_in_header_cache():
+    token = 'FwoGZXIvYXdzEXAMPLESESSIONTOKEN'
+    signer = SigV4Auth(Credentials('AKID', 'secret', token), 'codepipeline', 'us-east-1')
+    request = AWSRequest(
+        method='POST', url='https://codepipeline.us-east-1.amazonaws.com/',
+        headers={'Content-Type': 'application/x-amz-json-1.1'}, data=b'{}',
+    )
+    _canonical_header_fragment.cache_clear()
+    signer.add_auth(request)
+
+    assert request.headers['X-Amz-Security-Token'] == token
+    assert _canonical_header_fragment.cache_info().currsize > 0
+    # Looking the token up again must be a miss: it was never cached
+    _canonical_header_fragment('x-amz-security-token', token)
+    assert _canonical_header_fragment.cache_info().hits == 0
+
+
+@pytest.mark.parametrize('caches', [False, True])
+@pytest.mark.parametrize('name, service, method, url, headers, body, expected', TEST_VECTORS)
+def test_signature_matches_test_vector(name, service, method, url, headers, body, expected, caches):
+    auth = make_auth(SigV4Auth, SUITE_CREDENTIALS, service, 'us-east-1', caches)
+    request = sign(auth, build_request(method, url, headers.items(), body))
+
+    assert request.headers['Authorization'].rsplit('Signature=', 1)[1] == expected
+
+
+def generated_requests():
+    """Repeated, padded, blacklisted and non-ASCII headers, query strings
+    and session tokens"""
+    header_sets = [
+        [],
+        [('Content-Type', 'application/x-amz-json-1.1'), ('X-Amz-Target', 'CodePipeline_20150709.GetPipelineState')],
+        [('My-Header1', '  value1  '), ('My-Header2', '"a   b   c"'), ('my-header1', 'value2')],
+        [('User-Agent', 'botocore'), ('Expect', '100-continue'), ('X-Amzn-Trace-Id', 'Root=1-abc')],
+        [('Host', 'override.example.com'), ('Content-MD5', 'abc==')],
+        [('X-Amz-Meta-Name', 'café')],
+        [(' Padded', 'value')],
+        [('X-Amz-Content-SHA256', 'UNSIGNED-PAYLOAD')],
+    ]
+    urls = [
+        'https://monitoring.us-east-1.amazonaws.com/',
+        'https://sns.us-east-1.amazonaws.com/?Action=Publish&Version=2010-03-31',
+        'http://localhost:4566/path%20with/..//dots/?b=2&a=1&a=0',
+        'https://[::1]:8443/ipv6',
+    ]
+    tokens = [None, 'session-token-123']
+    for headers, url, token, body in itertools.product(header_sets, urls, tokens, (b'', b'{"a": 1}')):
+        yield headers, url, token, body
+
+
+@pytest.mark.parametrize('cls, kwargs', [(SigV4Auth, {}), (SigV4QueryAuth, {'expires': 60})])
+def test_signing_caches_do_not_change_signatures(cls, kwargs):
+    for headers, url, token, body in generated_requests():
+        credentials = Credentials('AKIDEXAMPLE', 'secret', token)
+        signed = []
+        for caches in (False, True):
+            auth = make_auth(cls, credentials, 'monitoring', 'us-east-1', caches, **kwargs)
+            request = sign(auth, build_request('POST', url, headers, body))
+            signed.append((request.url, sorted(request.headers.items())))
+        assert signed[0] == signed[1], (url, headers)
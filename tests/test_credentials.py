@@ -0,0 +1,129 @@
+import datetime
+import threading
+import time
+
+import botocore.session
+import pytest
+from botocore.credentials import (
+    AssumeRoleCredentialFetcher,
+    Credentials,
+    RefreshableCredentials,
+    create_credential_resolver,
+)
+from botocore.utils import SharedFileCache
+from dateutil.tz import tzutc
+
+ENV_VAR = 'AWS_CREDENTIAL_BACKGROUND_REFRESH'
+
+
+class FakeCredentialSource:
+    """Hands out numbered credentials that live `lifetime` seconds"""
+
+    def __init__(self, lifetime):
+        self.lifetime = lifetime
+        self.fetches = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.fetches += 1
+            generation = self.fetches
+        expiry = datetime.datetime.now(tzutc()) + datetime.timedelta(seconds=self.lifetime)
+        return {
+            'access_key': f'AKID{generation}', 'secret_key': f'secret{generation}',
+            'token': f'token{generation}', 'expiry_time': expiry.isoformat(),
+        }
+
+
+def credentials_from(source):
+    # Refresh windows scaled down to the source's lifetime
+    window = source.lifetime / 4
+    credentials = RefreshableCredentials.create_from_metadata(
+        source(), refresh_using=source, method='fake',
+        advisory_timeout=window, mandatory_timeout=window / 2,
+    )
+    credentials._background_refresh_lead = window
+    credentials._background_retry_interval = 0.1
+    return credentials
+
+
+@pytest.fixture
+def stop_refreshes():
+    made = []
+    yield made.append
+    for credentials in made:
+        # Drop any pending background refresh
+        credentials._background_entry = None
+
+
+def test_background_refresh_is_off_by_default(monkeypatch, stop_refreshes):
+    monkeypatch.delenv(ENV_VAR, raising=False)
+    credentials = credentials_from(FakeCredentialSource(lifetime=4))
+    stop_refreshes(credentials)
+
+    assert credentials._background_entry is None
+
+
+def test_background_refresh_replaces_credentials_before_callers_need_to(monkeypatch, stop_refreshes):
+    monkeypatch.setenv(ENV_VAR, 'true')
+    source = FakeCredentialSource(lifetime=4)
+    credentials = credentials_from(source)
+    stop_refreshes(credentials)
+    assert credentials._background_entry is not None
+
+    # Due 2s in, when 2s of the 4s lifetime are left; nobody asks in between
+    deadline = time.monotonic() + 5
+    while source.fetches < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert source.fetches == 2
+
+    frozen = credentials.get_frozen_credentials()
+    assert (frozen.access_key, frozen.secret_key, frozen.token) == ('AKID2', 'secret2', 'token2')
+    # The caller used what the background thread fetched
+    assert source.fetches == 2
+    assert not credentials.refresh_needed(credentials._advisory_refresh_timeout)
+
+
+class FakeSTS:
+    def __init__(self):
+        self.calls = 0
+
+    def assume_role(self, **kwargs):
+        self.calls += 1
+        expiration = datetime.datetime.now(tzutc()) + datetime.timedelta(hours=1)
+        return {'Credentials': {
+            'AccessKeyId': f'AKID{self.calls}', 'SecretAccessKey': 'secret',
+            'SessionToken': 'token', 'Expiration': expiration.isoformat(),
+        }}
+
+
+def test_assume_role_providers_use_the_shared_cache_when_enabled(monkeypatch):
+    monkeypatch.setenv('AWS_SHARED_CREDENTIAL_CACHE', 'true')
+    resolver = create_credential_resolver(botocore.session.Session())
+
+    assert isinstance(resolver.get_provider('assume-role').cache, SharedFileCache)
+
+
+def test_assume_role_providers_cache_in_memory_by_default(monkeypatch):
+    monkeypatch.delenv('AWS_SHARED_CREDENTIAL_CACHE', raising=False)
+    resolver = create_credential_resolver(botocore.session.Session())
+
+    assert resolver.get_provider('assume-role').cache == {}
+
+
+def test_shared_cache_serves_assumed_role_credentials_to_other_fetchers(tmp_path):
+    sts = FakeSTS()
+
+    def fetch():
+        # A fetcher per process, as each Lambda container or build step has its own
+        fetcher = AssumeRoleCredentialFetcher(
+            client_creator=lambda *args, **kwargs: sts,
+            source_credentials=Credentials('AKID', 'secret'),
+            role_arn='arn:aws:iam::123456789012:role/deployer',
+            cache=SharedFileCache(str(tmp_path)),
+        )
+        return fetcher.fetch_credentials()
+
+    assert fetch()['access_key'] == 'AKID1'
+    assert fetch()['access_key'] == 'AKID1'
+    assert sts.calls == 1
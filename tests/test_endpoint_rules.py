@@ -0,0 +1,88 @@
+import itertools
+import random
+
+import botocore.loaders
+import pytest
+from botocore.endpoint_provider import RuleSet
+
+REGIONS = [
+    'us-east-1', 'eu-west-1', 'aws-global', 'cn-north-1', 'us-gov-west-1',
+    'us-iso-east-1', 'us-isob-east-1', 'fips-us-east-1', 'not a region!', None,
+]
+ENDPOINTS = [None, 'https://example.com', 'https://example.com:8443/custom/path', 'http://10.0.0.1', 'not a url']
+STRINGS = [
+    None, 'value', 'my-bucket', 'My_Bucket', 'bucket.with.dots', '',
+    'arn:aws:s3:us-west-2:123456789012:accesspoint:myendpoint',
+    'arn:aws:s3-outposts:us-west-2:123456789012:outpost:op-01234567890123456:accesspoint:reports',
+    'arn:aws:dynamodb:us-east-1:123456789012:table/orders', '123456789012', 'preferred',
+]
+BOOLEANS = [None, True, False]
+STRING_ARRAYS = [None, ('a', 'b'), ()]
+# Random parameter sets per rule set, on top of the builtin matrix
+SAMPLES = 20
+
+LOADER = botocore.loaders.create_loader()
+RULESETS = [
+    (service, api_version)
+    for service in LOADER.list_available_services('endpoint-rule-set-1')
+    for api_version in LOADER.list_api_versions(service, 'endpoint-rule-set-1')
+]
+
+
+@pytest.fixture(scope='module')
+def partitions():
+    return LOADER.load_data('partitions')
+
+
+def candidates(spec):
+    if spec.builtin == 'AWS::Region':
+        return REGIONS
+    if spec.builtin == 'SDK::Endpoint':
+        return ENDPOINTS
+    if spec.parameter_type is bool:
+        return BOOLEANS
+    if spec.parameter_type is tuple:
+        return STRING_ARRAYS
+    return STRINGS
+
+
+def parameter_sets(ruleset, rng):
+    """The builtin matrix (regions across partitions, FIPS, dual-stack,
+    custom endpoints) plus seeded random values for everything else"""
+    specs = ruleset.parameters
+    builtins = [name for name in ('Region', 'UseFIPS', 'UseDualStack', 'Endpoint') if name in specs]
+    others = [name for name in specs if name not in builtins]
+    for values in itertools.product(*(candidates(specs[name]) for name in builtins)):
+        params = dict(zip(builtins, values))
+        for name in others:
+            params[name] = rng.choice(candidates(specs[name]))
+        yield params
+    for _ in range(SAMPLES):
+        yield {name: rng.choice(candidates(spec)) for name, spec in specs.items()}
+
+
+def outcome(ruleset, params):
+    params = {name: value for name, value in params.items() if value is not None}
+    try:
+        return ruleset.evaluate(params)
+    except Exception as e:
+        return (type(e), str(e))
+
+
+def make_ruleset(ruleset_data, partitions, compiled):
+    ruleset = RuleSet(**ruleset_data, partitions=partitions)
+    ruleset.COMPILE_RULES = compiled
+    # Compile on the first evaluation rather than after the usual warm-up
+    ruleset.COMPILE_THRESHOLD = 0
+    return ruleset
+
+
+@pytest.mark.parametrize('service, api_version', RULESETS)
+def test_compiled_rule_set_matches_interpreter(service, api_version, partitions):
+    ruleset_data = LOADER.load_service_model(service, 'endpoint-rule-set-1', api_version)
+    interpreted = make_ruleset(ruleset_data, partitions, False)
+    compiled = make_ruleset(ruleset_data, partitions, True)
+    rng = random.Random(service)
+
+    for params in parameter_sets(interpreted, rng):
+        assert outcome(compiled, params) == outcome(interpreted, params), params
@@ -0,0 +1,37 @@
+import pytest
+from botocore.endpoint import _is_incremental_body
+from botocore.httpsession import _is_read_incrementally
+
+THRESHOLD = 1024 * 1024
+
+
+class FakeRaw:
+    def __init__(self, headers, status=200):
+        self.headers = headers
+        self.status = status
+
+    def stream(self):
+        yield b''
+
+
+class FakeResponse:
+    _content = None
+
+    def __init__(self, headers):
+        self.headers = headers
+        self.raw = FakeRaw(headers)
+
+
+class FakeRequest:
+    incremental_threshold = THRESHOLD
+
+
+@pytest.mark.parametrize('headers, incremental', [
+    ({'content-length': str(THRESHOLD)}, True),
+    ({'content-length': str(THRESHOLD - 1)}, False),
+    # Chunked: the length is unknown and the body is usually small
+    ({'transfer-encoding': 'chunked'}, False),
+])
+def test_only_bodies_known_to_be_large_are_parsed_incrementally(headers, incremental):
+    assert _is_read_incrementally(FakeRequest(), FakeRaw(headers)) is incremental
+    assert _is_incremental_body(FakeResponse(headers), THRESHOLD) is incremental
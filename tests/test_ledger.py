@@ -0,0 +1,23 @@
+from ledger import HEALTHY, PENDING, UNHEALTHY, DeploymentLedger, SQLiteLedgerStore
+
+REPOSITORY = '123456789012.dkr.ecr.us-east-1.amazonaws.com/simple-bank-api'
+DIGEST = 'sha256:' + 'a' * 64
+
+
+def test_mark_sets_verdict_while_pending():
+    ledger = DeploymentLedger(SQLiteLedgerStore())
+    ledger.record(REPOSITORY, DIGEST, author='dev')
+
+    assert ledger.mark(DIGEST, HEALTHY, expected_status=PENDING)['status'] == HEALTHY
+    assert ledger.current()['status'] == HEALTHY
+
+
+def test_mark_keeps_verdict_written_meanwhile():
+    ledger = DeploymentLedger(SQLiteLedgerStore())
+    ledger.record(REPOSITORY, DIGEST, author='dev')
+    # The rollback Lambda found it unhealthy while the rollout was still being watched
+    ledger.mark(DIGEST, UNHEALTHY)
+
+    assert ledger.mark(DIGEST, HEALTHY, expected_status=PENDING) is None
+    assert ledger.current()['status'] == UNHEALTHY
+    assert ledger.failure_rate() == {'dev': 1.0}
@@ -0,0 +1,21 @@
+import botocore.session
+
+
+def add_operation(service_data, **kwargs):
+    service_data['operations']['MadeUpOperation'] = {'name': 'MadeUpOperation'}
+    service_data['metadata']['serviceFullName'] = 'Changed by a handler'
+
+
+def test_service_data_handlers_do_not_change_other_sessions():
+    changed = botocore.session.get_session()
+    changed.register('service-data-loaded.sns', add_operation)
+    other = botocore.session.get_session()
+
+    data = changed.get_service_data('sns')
+    assert 'MadeUpOperation' in data['operations']
+    assert 'MadeUpOperation' in changed.get_service_model('sns').operation_names
+
+    data = other.get_service_data('sns')
+    assert 'MadeUpOperation' not in data['operations']
+    assert data['metadata']['serviceFullName'] != 'Changed by a handler'
+    assert 'MadeUpOperation' not in botocore.session.get_session().get_service_model('sns').operation_names
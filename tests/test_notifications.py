@@ -0,0 +1,38 @@
+from notifications import Notifier, flush_on_exit
+
+
+class FakeSNS:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, TopicArn, Subject, Message):
+        self.published.append((Subject, Message))
+
+
+def handler_for(notifier):
+    @flush_on_exit(notifier)
+    def handler(event, context):
+        for subject, message in event:
+            notifier.notify('arn:topic', subject, message, key='alarm')
+    return handler
+
+
+def test_distinct_messages_with_one_subject_are_all_sent():
+    sns = FakeSNS()
+    handler = handler_for(Notifier(sns, linger_seconds=0))
+    handler([('Notification', 'rolled back a')], None)
+    handler([('Notification', 'rolled back b')], None)
+
+    assert [message for _, message in sns.published] == ['rolled back a', 'rolled back b']
+
+
+def test_suppressed_duplicates_are_counted_on_exit():
+    sns = FakeSNS()
+    handler = handler_for(Notifier(sns, linger_seconds=0))
+    handler([('Notification', 'paused')], None)
+    handler([('Notification', 'paused'), ('Notification', 'paused')], None)
+
+    assert sns.published == [
+        ('Notification', 'paused'),
+        ('Notification', 'paused\n\n(2 identical notification(s) suppressed)'),
+    ]
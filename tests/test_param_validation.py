@@ -0,0 +1,42 @@
+import botocore.session
+import pytest
+from botocore.validate import ParamValidator
+from test_serializer_plans import DIFF_SERVICES, sample_value
+
+
+def broken_variants(shape, params):
+    """Valid params plus one variant per kind of mistake a caller can make"""
+    yield params
+    yield dict(params, NotAMember='x')
+    for name in shape.metadata.get('required', []):
+        yield {k: v for k, v in params.items() if k != name}
+    for name, member in shape.members.items():
+        wrong = 12345 if member.type_name in ('string', 'structure', 'list', 'map', 'blob', 'boolean') else 'x'
+        yield dict(params, **{name: wrong})
+        if member.type_name in ('string', 'list') and member.metadata.get('min'):
+            yield dict(params, **{name: member.type_name == 'string' and '' or []})
+
+
+def report(validator, params, shape):
+    errors = validator.validate(params, shape)
+    return errors.generate_report() if errors.has_errors() else None
+
+
+def operations():
+    session = botocore.session.get_session()
+    for service in DIFF_SERVICES:
+        model = session.get_service_model(service)
+        for name in model.operation_names:
+            shape = model.operation_model(name).input_shape
+            if shape is not None:
+                yield pytest.param(shape, id=f'{service}.{name}')
+
+
+@pytest.mark.parametrize('shape', list(operations()))
+def test_compiled_plan_reports_match_reflective_walk(shape):
+    compiled = ParamValidator()
+    reflective = ParamValidator()
+    reflective.COMPILE_PLANS = False
+
+    for params in broken_variants(shape, sample_value(shape)):
+        assert report(compiled, params, shape) == report(reflective, params, shape), params
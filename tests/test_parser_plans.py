@@ -0,0 +1,189 @@
+import base64
+import json
+from xml.sax.saxutils import escape
+
+import botocore.session
+import pytest
+from botocore.parsers import PROTOCOL_PARSERS
+
+DIFF_SERVICES = [
+    'codepipeline', 'sns', 'cloudwatch', 'sts', 'ec2', 'ecr', 'dynamodb',
+    'bedrock', 'bedrock-runtime', 'lambda', 'eks', 's3',
+]
+KNOWN_LOCATIONS = ('header', 'headers', 'statusCode')
+TIMESTAMP = '2024-05-01T12:30:15Z'
+EPOCH = 1714566615.0
+
+
+def json_sample(shape, depth=0):
+    """Deterministic JSON body value for a shape, as json.loads would return it"""
+    type_name = shape.type_name
+    if type_name == 'structure':
+        if shape.is_document_type:
+            return {'doc': [1, 'two']}
+        if shape.is_tagged_union:
+            # Exactly one member must be set; pick the first scalar one
+            name, member = next(
+                ((n, m) for n, m in shape.members.items() if m.type_name not in ('structure', 'list', 'map')),
+                next(iter(shape.members.items()))
+            )
+            return {member.serialization.get('name', name): json_sample(member, depth + 1)}
+        if depth > 3:
+            return {}
+        return {
+            member.serialization.get('name', name): json_sample(member, depth + 1)
+            for name, member in shape.members.items()
+            if member.serialization.get('location') not in KNOWN_LOCATIONS
+        }
+    if type_name == 'list':
+        return [json_sample(shape.member, depth + 1) for _ in range(2)] if depth <= 3 else []
+    if type_name == 'map':
+        return {f'k{i}': json_sample(shape.value, depth + 1) for i in range(2)} if depth <= 3 else {}
+    if type_name == 'timestamp':
+        return EPOCH
+    if type_name == 'blob':
+        return base64.b64encode(b'blob-bytes').decode('ascii')
+    return scalar_sample(shape, json_types=True)
+
+
+def scalar_sample(shape, json_types=False):
+    type_name = shape.type_name
+    if type_name in ('integer', 'long'):
+        return 7 if json_types else '7'
+    if type_name in ('float', 'double'):
+        return 1.5 if json_types else '1.5'
+    if type_name == 'boolean':
+        return True if json_types else 'true'
+    if type_name == 'timestamp':
+        return TIMESTAMP
+    if type_name == 'blob':
+        return base64.b64encode(b'blob-bytes').decode('ascii')
+    return shape.enum[0] if shape.enum else 'value-1'
+
+
+def xml_sample(shape, tag, depth=0):
+    """Deterministic XML for a shape, wrapped in `tag`"""
+    type_name = shape.type_name
+    if type_name == 'structure':
+        inner = '' if depth > 3 else xml_members(shape, depth)
+        return f'<{tag}>{inner}</{tag}>'
+    if type_name == 'list':
+        if shape.serialization.get('flattened'):
+            return ''.join(xml_sample(shape.member, tag, depth + 1) for _ in range(2))
+        name = shape.member.serialization.get('name', 'member')
+        items = '' if depth > 3 else ''.join(xml_sample(shape.member, name, depth + 1) for _ in range(2))
+        return f'<{tag}>{items}</{tag}>'
+    if type_name == 'map':
+        key_name = shape.key.serialization.get('name') or 'key'
+        value_name = shape.value.serialization.get('name') or 'value'
+        entries = [
+            f'<{key_name}>k{i}</{key_name}>' + xml_sample(shape.value, value_name, depth + 1)
+            for i in range(2 if depth <= 3 else 0)
+        ]
+        if shape.serialization.get('flattened'):
+            return ''.join(f'<{tag}>{entry}</{tag}>' for entry in entries)
+        return f'<{tag}>' + ''.join(f'<entry>{entry}</entry>' for entry in entries) + f'</{tag}>'
+    return f'<{tag}>{escape(scalar_sample(shape))}</{tag}>'
+
+
+def xml_members(shape, depth):
+    parts = []
+    for name, member in shape.members.items():
+        serialization = member.serialization
+        if serialization.get('location') in KNOWN_LOCATIONS or serialization.get('xmlAttribute'):
+            continue
+        tag = serialization.get('name', name)
+        if member.type_name == 'list' and serialization.get('flattened'):
+            tag = member.member.serialization.get('name', tag)
+        parts.append(xml_sample(member, tag, depth + 1))
+    return ''.join(parts)
+
+
+def header_sample(shape):
+    headers = {}
+    for name, member in shape.members.items():
+        serialization = member.serialization
+        if serialization.get('location') == 'header':
+            if member.type_name == 'list':
+                value = 'a, b'
+            elif member.type_name == 'string' and serialization.get('jsonvalue'):
+                value = base64.b64encode(b'{"a": 1}').decode('ascii')
+            else:
+                value = scalar_sample(member)
+            headers[serialization.get('name', name)] = value
+        elif serialization.get('location') == 'headers':
+            headers[serialization.get('name', '') + 'meta'] = 'value-1'
+    return headers
+
+
+def sample_response(protocol, operation_model):
+    shape = operation_model.output_shape
+    headers = {'x-amzn-requestid': 'req-1234'}
+    if protocol in ('json', 'rest-json'):
+        body_shape = shape
+        if protocol == 'rest-json':
+            headers.update(header_sample(shape))
+            payload = shape.serialization.get('payload')
+            if payload:
+                body_shape = shape.members[payload]
+                if body_shape.type_name in ('string', 'blob'):
+                    return {'status_code': 200, 'headers': headers, 'body': b'raw-payload'}
+        body = json.dumps(json_sample(body_shape)).encode('utf-8')
+    elif protocol == 'rest-xml':
+        headers.update(header_sample(shape))
+        payload = shape.serialization.get('payload')
+        if payload:
+            body_shape = shape.members[payload]
+            if body_shape.type_name in ('string', 'blob'):
+                return {'status_code': 200, 'headers': headers, 'body': b'raw-payload'}
+            body = xml_sample(body_shape, body_shape.serialization.get('name', payload)).encode('utf-8')
+        else:
+            body = xml_sample(shape, operation_model.name + 'Result').encode('utf-8')
+    else:
+        ns = 'xmlns="https://example.amazonaws.com/doc/2010-03-31/"'
+        result = xml_sample(shape, shape.serialization.get('resultWrapper', 'Result'))
+        metadata = '<ResponseMetadata><RequestId>req-1234</RequestId></ResponseMetadata>'
+        body = (f'<{operation_model.name}Response {ns}>{result}{metadata}'
+                f'<requestId>req-1234</requestId></{operation_model.name}Response>').encode('utf-8')
+    return {'status_code': 200, 'headers': headers, 'body': body, 'context': {}}
+
+
+def parsers(protocol):
+    compiled = PROTOCOL_PARSERS[protocol]()
+    reflective = PROTOCOL_PARSERS[protocol]()
+    reflective.COMPILE_PLANS = False
+    return compiled, reflective
+
+
+def normalized(value):
+    """Parsed output with stray XML elements (repeated scalar tags) made comparable"""
+    if isinstance(value, dict):
+        return {k: normalized(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [normalized(v) for v in value]
+    if hasattr(value, 'tag'):
+        return ('element', value.tag, value.text)
+    return value
+
+
+def operations():
+    session = botocore.session.get_session()
+    for service in DIFF_SERVICES:
+        model = session.get_service_model(service)
+        for name in model.operation_names:
+            operation_model = model.operation_model(name)
+            shape = operation_model.output_shape
+            if shape is None or shape.event_stream_name or operation_model.has_event_stream_output:
+                continue
+            yield pytest.param(operation_model, id=f'{service}.{name}')
+
+
+@pytest.mark.parametrize('operation_model', list(operations()))
+def test_compiled_plan_matches_reflective_parse(operation_model):
+    protocol = operation_model.service_model.resolved_protocol
+    compiled, reflective = parsers(protocol)
+    response = sample_response(protocol, operation_model)
+    shape = operation_model.output_shape
+
+    parsed = normalized(compiled.parse(dict(response), shape))
+    assert parsed == normalized(reflective.parse(dict(response), shape))
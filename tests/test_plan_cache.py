@@ -0,0 +1,51 @@
+import gc
+import json
+import weakref
+
+import botocore.session
+from botocore.parsers import ResponseParserFactory
+from botocore.utils import PlanCache
+
+
+def test_plan_cache_evicts_least_recently_used():
+    cache = PlanCache(2)
+    compiled = []
+
+    def compile_plan(shape):
+        compiled.append(shape)
+        return shape.upper()
+
+    assert cache.get('a', compile_plan) == 'A'
+    cache.get('b', compile_plan)
+    cache.get('a', compile_plan)
+    cache.get('c', compile_plan)
+
+    assert len(cache) == 2
+    cache.get('a', compile_plan)
+    cache.get('b', compile_plan)
+    assert compiled == ['a', 'b', 'c', 'b']
+
+
+def test_shared_parser_does_not_keep_shapes_alive():
+    session = botocore.session.get_session()
+    parser = ResponseParserFactory().create_parser('json')
+    parser.PLAN_CACHE_SIZE = 16
+    response = {
+        'status_code': 200,
+        'headers': {},
+        'body': json.dumps({'pipelineExecutionSummaries': [{'pipelineExecutionId': 'e', 'status': 'Succeeded'}]}).encode(),
+    }
+
+    shapes = []
+    for _ in range(20):
+        # A new client gets a new service model, with new Shape objects
+        model = session.get_service_model('codepipeline')
+        shape = model.operation_model('ListPipelineExecutions').output_shape
+        parsed = parser.parse(response, shape)
+        assert parsed['pipelineExecutionSummaries'][0]['status'] == 'Succeeded'
+        shapes.append(weakref.ref(shape))
+        del model, shape
+
+    gc.collect()
+    assert len(parser._parse_plans) <= 16
+    assert sum(ref() is not None for ref in shapes) < len(shapes)
@@ -0,0 +1,91 @@
+import sqlite3
+
+import pytest
+
+from ledger import HEALTHY, UNHEALTHY, DeploymentLedger, SQLiteLedgerStore
+from rollback import RollbackEngine, RollbackRefused
+
+REPOSITORY = '123456789012.dkr.ecr.us-east-1.amazonaws.com/simple-bank-api'
+
+
+class FakeKube:
+    def __init__(self):
+        self.images = []
+
+    def patch_image(self, image):
+        self.images.append(image)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def digest(n):
+    return f'sha256:{n:064x}'
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def ledger(clock):
+    ledger = DeploymentLedger(SQLiteLedgerStore(), clock=clock)
+    for n in range(3):
+        ledger.record(REPOSITORY, digest(n), commit_id=f'{n:08x}', status=HEALTHY)
+        clock.now += 60
+    ledger.record(REPOSITORY, digest(9), commit_id='badc0de0')
+    return ledger
+
+
+def test_rollback_goes_to_last_healthy(ledger):
+    kube = FakeKube()
+    result = RollbackEngine(ledger, kube).rollback('alarm')
+
+    assert kube.images == [f'{REPOSITORY}@{digest(2)}']
+    assert result['to'] == f'{REPOSITORY}@{digest(2)}'
+    assert ledger.store.latest_for_digest(ledger.service, digest(9))['status'] == UNHEALTHY
+    assert ledger.current()['rolled_back_from'] == digest(9)
+
+
+def test_repeated_alarm_does_not_walk_back(ledger, clock):
+    kube = FakeKube()
+    engine = RollbackEngine(ledger, kube, flap_window_seconds=3600)
+    engine.rollback('alarm')
+
+    clock.now += 600
+    with pytest.raises(RollbackRefused):
+        engine.rollback('alarm again')
+    assert len(kube.images) == 1
+    assert ledger.store.latest_for_digest(ledger.service, digest(2))['status'] == HEALTHY
+
+
+def test_rollback_allowed_again_after_flap_window(ledger, clock):
+    kube = FakeKube()
+    engine = RollbackEngine(ledger, kube, flap_window_seconds=3600)
+    engine.rollback('alarm')
+
+    clock.now += 3601
+    result = engine.rollback('alarm much later')
+    assert result['to'] == f'{REPOSITORY}@{digest(1)}'
+
+
+def test_ledger_without_rollback_column_is_migrated(tmp_path):
+    path = str(tmp_path / 'ledger.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE deployments (id INTEGER PRIMARY KEY AUTOINCREMENT, service TEXT NOT NULL, "
+        "image TEXT NOT NULL, tag TEXT, digest TEXT NOT NULL, commit_id TEXT, author TEXT, "
+        "execution_id TEXT, status TEXT NOT NULL, deployed_at REAL NOT NULL, updated_at REAL NOT NULL)"
+    )
+    conn.commit()
+    conn.close()
+
+    ledger = DeploymentLedger(SQLiteLedgerStore(path))
+    ledger.record(REPOSITORY, digest(1), status=HEALTHY)
+    assert ledger.current()['rolled_back_from'] is None
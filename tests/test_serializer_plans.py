@@ -0,0 +1,65 @@
+import datetime
+
+import botocore.session
+import pytest
+from botocore.serialize import SERIALIZERS
+
+DIFF_SERVICES = ['codepipeline', 'sns', 'bedrock-runtime', 'cloudwatch', 'ec2', 'dynamodb', 'lambda', 'sqs', 'route53', 's3']
+
+
+def sample_value(shape, depth=0):
+    """Deterministic, model-shaped input exercising every member"""
+    type_name = shape.type_name
+    if type_name == 'structure':
+        if shape.is_document_type:
+            return {'doc': [1, 'two']}
+        if depth > 3:
+            return {}
+        return {name: sample_value(member, depth + 1) for name, member in shape.members.items()}
+    if type_name == 'list':
+        return [sample_value(shape.member, depth + 1) for _ in range(2)] if depth <= 3 else []
+    if type_name == 'map':
+        return {f'k{i}': sample_value(shape.value, depth + 1) for i in range(2)} if depth <= 3 else {}
+    if type_name == 'string':
+        return shape.enum[0] if shape.enum else 'value-1'
+    if type_name in ('integer', 'long'):
+        return 7
+    if type_name in ('float', 'double'):
+        return 1.5
+    if type_name == 'boolean':
+        return True
+    if type_name == 'timestamp':
+        return datetime.datetime(2024, 5, 1, 12, 30, 15)
+    if type_name == 'blob':
+        return b'blob-bytes'
+    return 'value-1'
+
+
+def serialize_both(serializer_cls, operation_model, params):
+    compiled = serializer_cls()
+    reflective = serializer_cls()
+    reflective.COMPILE_PLANS = False
+    return (
+        compiled.serialize_to_request(params, operation_model),
+        reflective.serialize_to_request(params, operation_model),
+    )
+
+
+
+def operations():
+    session = botocore.session.get_session()
+    for service in DIFF_SERVICES:
+        model = session.get_service_model(service)
+        for name in model.operation_names:
+            operation_model = model.operation_model(name)
+            if operation_model.input_shape is not None:
+                yield pytest.param(operation_model, id=f'{service}.{name}')
+
+
+@pytest.mark.parametrize('operation_model', list(operations()))
+def test_compiled_plan_matches_reflective_serialize(operation_model):
+    serializer_cls = SERIALIZERS[operation_model.metadata['protocol']]
+    params = sample_value(operation_model.input_shape)
+
+    compiled, reflective = serialize_both(serializer_cls, operation_model, params)
+    assert compiled == reflective
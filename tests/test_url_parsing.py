@@ -0,0 +1,76 @@
+import random
+
+import pytest
+from url_parsing import URLS, previous_parse_url
+from urllib3.exceptions import LocationParseError
+from urllib3.util import url as url_module
+from urllib3.util.url import parse_url
+
+# Fuzz corpus size; every URL is parsed twice, so cached authorities are
+# checked as well
+FUZZ = 20000
+
+# Schemes, user info, hosts (IDNA, IPv4, IPv6 with zones, invalid ones),
+# ports, and paths, queries and fragments mixing dot segments,
+# percent-encodings, reserved and non-ASCII characters.  The current parser
+# must return the same Url, or raise the same error, as the previous one.
+SCHEMES = ('http://', 'https://', 'HTTPS://', '', 'ftp://', 'mailto:', 'HtTp://', 'git+ssh://', '//')
+AUTHS = ('', 'user@', 'user:pass@', 'us er:p@ss@', 'üser@', '%41b@', ':@', '@', 'a%zz@')
+HOSTS = (
+    'example.com', 'EXAMPLE.com', 'codepipeline.us-east-1.amazonaws.com', 'bücher.example', 'xn--bcher-kva.example',
+    '127.0.0.1', '[::1]', '[FE80::1%25eth0]', '[fe80::1%eth0]', '[::1', 'host name', 'host_name', 'a..b', '',
+    '256.1.1.1', '[2001:db8::8a2e:370:7334]', 'ÉXAMPLE.com', 'foo%20bar', '☃.net', '[v1.fe80::a+en1]',
+)
+PORTS = ('', ':', ':0', ':443', ':00080', ':65535', ':65536', ':99999', ':abc', ':-1', ':8080:80')
+PIECES = (
+    'a', 'Z', '9', '/', '//', '.', '..', '/./', '/../', '%', '%2f', '%2F', '%zz', '%e2%98%83', ' ', '~', '-', '_',
+    '!', '$', "'", '(', '*', '+', ',', ';', '=', ':', '@', '?', '#', '[', ']', '{', '|', '\\', '^', '`', '"', '<',
+    'é', '☃', '\x00', '\t', '\n', '\ud800', 'api', 'v1', 'index.html', '%41', '&x=1', '=y',
+)
+
+
+def random_component(rng, prefix):
+    if rng.random() < 0.3:
+        return ''
+    return prefix + ''.join(rng.choice(PIECES) for _ in range(rng.randrange(0, 8)))
+
+
+def fuzz_corpus(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        url = (rng.choice(SCHEMES) + rng.choice(AUTHS) + rng.choice(HOSTS) + rng.choice(PORTS)
+               + random_component(rng, '/') + random_component(rng, '?') + random_component(rng, '#'))
+        if rng.random() < 0.1:
+            # Cut anywhere, including inside the scheme or an escape
+            url = url[:rng.randrange(len(url) + 1)]
+        yield url
+
+
+def outcome(parse, url):
+    try:
+        return parse(url)
+    except LocationParseError as e:
+        return ('LocationParseError', str(e))
+
+
+
+@pytest.fixture(autouse=True)
+def clear_authority_cache():
+    url_module._parse_authority.cache_clear()
+
+
+def assert_parses_like_previous(url):
+    expected = outcome(previous_parse_url, url)
+    for _ in range(2):
+        result = outcome(parse_url, url)
+        assert result == expected and type(result) is type(expected), url
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_service_urls_parse_like_previous_parser(url):
+    assert_parses_like_previous(url)
+
+
+def test_fuzz_corpus_parses_like_previous_parser():
+    for url in fuzz_corpus(FUZZ):
+        assert_parses_like_previous(url)
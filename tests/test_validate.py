@@ -0,0 +1,32 @@
+import botocore.session
+import pytest
+from botocore.validate import ParamValidator
+
+
+@pytest.fixture(scope='module')
+def sns():
+    return botocore.session.get_session().get_service_model('sns')
+
+
+def errors(validator, params, shape):
+    return validator.validate(params, shape).has_errors()
+
+
+def test_trusted_caller_still_checks_value_types(sns):
+    shape = sns.operation_model('Publish').input_shape
+    validator = ParamValidator(trusted_caller=True)
+
+    assert not errors(validator, {'TopicArn': 'arn:topic', 'Message': 'hi'}, shape)
+    assert not errors(validator, {'TopicArn': 'arn:topic', 'Message': 'again'}, shape)
+    assert errors(validator, {'TopicArn': 'arn:topic', 'Message': 12345}, shape)
+
+
+def test_trusted_caller_fully_validates_nested_values(sns):
+    shape = sns.operation_model('Publish').input_shape
+    validator = ParamValidator(trusted_caller=True)
+    good = {'Name': {'DataType': 'String', 'StringValue': 'v'}}
+    bad = {'Name': {'DataType': 'String', 'StringValue': 12345}}
+
+    assert not errors(validator, {'Message': 'hi', 'MessageAttributes': good}, shape)
+    assert errors(validator, {'Message': 'hi', 'MessageAttributes': bad}, shape)
+    assert errors(validator, {'Message': 'hi', 'MessageAttributes': {'Name': {}}}, shape)